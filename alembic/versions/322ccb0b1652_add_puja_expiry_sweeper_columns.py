@@ -0,0 +1,51 @@
+"""add puja expires_at and expiry sweeper indexes
+
+Revision ID: 322ccb0b1652
+Revises: 7e090ec3a674
+Create Date: 2026-10-17 10:12:41.503218
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '322ccb0b1652'
+down_revision = '7e090ec3a674'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('pujas', sa.Column('expires_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_pujas_is_active_date_time', 'pujas', ['is_active', 'date', 'time'], unique=False)
+    op.create_index('ix_pujas_is_active_expires_at', 'pujas', ['is_active', 'expires_at'], unique=False)
+
+    # Backfill expires_at = date + time for existing pujas
+    pujas = sa.table(
+        'pujas',
+        sa.column('id', sa.Integer),
+        sa.column('date', sa.Date),
+        sa.column('time', sa.Time),
+        sa.column('expires_at', sa.DateTime),
+    )
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.select(pujas.c.id, pujas.c.date, pujas.c.time).where(
+            pujas.c.date.isnot(None), pujas.c.time.isnot(None)
+        )
+    ).fetchall()
+    for row in rows:
+        bind.execute(
+            pujas.update()
+            .where(pujas.c.id == row.id)
+            .values(expires_at=datetime.combine(row.date, row.time))
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_pujas_is_active_expires_at', table_name='pujas')
+    op.drop_index('ix_pujas_is_active_date_time', table_name='pujas')
+    op.drop_column('pujas', 'expires_at')
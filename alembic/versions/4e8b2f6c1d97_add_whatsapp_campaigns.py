@@ -0,0 +1,57 @@
+"""add whatsapp campaigns
+
+Revision ID: 4e8b2f6c1d97
+Revises: 9c1e7d3a5b20
+Create Date: 2026-10-17 15:05:12.604917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4e8b2f6c1d97'
+down_revision = '9c1e7d3a5b20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'whatsapp_campaigns',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('template_name', sa.String(length=100), nullable=False),
+        sa.Column('template_params', sa.JSON(), nullable=True),
+        sa.Column('media_url', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('total_recipients', sa.Integer(), nullable=False),
+        sa.Column('created_by', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['created_by'], ['users.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_whatsapp_campaigns_id'), 'whatsapp_campaigns', ['id'], unique=False)
+    op.create_table(
+        'whatsapp_campaign_recipients',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('campaign_id', sa.Integer(), nullable=False),
+        sa.Column('phone', sa.String(length=30), nullable=False),
+        sa.Column('normalized_phone', sa.String(length=30), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('sent_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['campaign_id'], ['whatsapp_campaigns.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_whatsapp_campaign_recipients_id'), 'whatsapp_campaign_recipients', ['id'], unique=False)
+    op.create_index('ix_whatsapp_campaign_recipients_campaign_id_status', 'whatsapp_campaign_recipients',
+                    ['campaign_id', 'status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_whatsapp_campaign_recipients_campaign_id_status', table_name='whatsapp_campaign_recipients')
+    op.drop_index(op.f('ix_whatsapp_campaign_recipients_id'), table_name='whatsapp_campaign_recipients')
+    op.drop_table('whatsapp_campaign_recipients')
+    op.drop_index(op.f('ix_whatsapp_campaigns_id'), table_name='whatsapp_campaigns')
+    op.drop_table('whatsapp_campaigns')
@@ -0,0 +1,40 @@
+"""add outbox
+
+Revision ID: 7b3d9e5f2a61
+Revises: 4e8b2f6c1d97
+Create Date: 2026-10-17 16:40:27.118305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7b3d9e5f2a61'
+down_revision = '4e8b2f6c1d97'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'outbox',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('event_type', sa.String(length=50), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('available_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('dispatched_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_outbox_id'), 'outbox', ['id'], unique=False)
+    op.create_index('ix_outbox_pending', 'outbox', ['available_at', 'id'], unique=False,
+                    postgresql_where=sa.text('dispatched_at IS NULL'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_outbox_pending', table_name='outbox')
+    op.drop_index(op.f('ix_outbox_id'), table_name='outbox')
+    op.drop_table('outbox')
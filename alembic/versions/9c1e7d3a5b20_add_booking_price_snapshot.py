@@ -0,0 +1,33 @@
+"""add booking price snapshot
+
+Revision ID: 9c1e7d3a5b20
+Revises: f22f7982ffcf
+Create Date: 2026-10-17 14:20:41.318502
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c1e7d3a5b20'
+down_revision = 'f22f7982ffcf'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('bookings', sa.Column('amount', sa.Numeric(10, 2), nullable=True))
+    op.add_column('bookings', sa.Column('line_items', sa.JSON(), nullable=True))
+    # Existing bookings: the amount actually charged is the payment's. Their
+    # line items stay NULL and are priced from plan/chadawas on read.
+    op.execute(
+        "UPDATE bookings SET amount = "
+        "(SELECT payments.amount FROM payments WHERE payments.booking_id = bookings.id "
+        "ORDER BY payments.id DESC LIMIT 1)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('bookings', 'line_items')
+    op.drop_column('bookings', 'amount')
@@ -0,0 +1,38 @@
+"""add notification idempotency
+
+Revision ID: 9c4a1e7b3f08
+Revises: 7b3d9e5f2a61
+Create Date: 2026-10-17 18:05:12.402117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c4a1e7b3f08'
+down_revision = '7b3d9e5f2a61'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'notification_idempotency',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('booking_id', sa.Integer(), nullable=False),
+        sa.Column('notification_type', sa.String(length=20), nullable=False),
+        sa.Column('channel', sa.String(length=20), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('claimed_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('sent_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['booking_id'], ['bookings.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('booking_id', 'notification_type', 'channel', name='uq_notification_idempotency_key')
+    )
+    op.create_index(op.f('ix_notification_idempotency_id'), 'notification_idempotency', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_notification_idempotency_id'), table_name='notification_idempotency')
+    op.drop_table('notification_idempotency')
@@ -0,0 +1,43 @@
+"""add notification deliveries
+
+Revision ID: c2f7a9d41e53
+Revises: 9c4a1e7b3f08
+Create Date: 2026-10-17 19:22:48.671930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2f7a9d41e53'
+down_revision = '9c4a1e7b3f08'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'notification_deliveries',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('provider', sa.String(length=20), nullable=False),
+        sa.Column('provider_message_id', sa.String(length=64), nullable=False),
+        sa.Column('channel', sa.String(length=20), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('status_rank', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('recipient', sa.String(length=32), nullable=True),
+        sa.Column('error_code', sa.String(length=20), nullable=True),
+        sa.Column('error_message', sa.String(length=500), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('provider', 'provider_message_id', name='uq_notification_deliveries_message')
+    )
+    op.create_index(op.f('ix_notification_deliveries_id'), 'notification_deliveries', ['id'], unique=False)
+    op.create_index('ix_notification_deliveries_updated_status', 'notification_deliveries',
+                    ['updated_at', 'status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_notification_deliveries_updated_status', table_name='notification_deliveries')
+    op.drop_index(op.f('ix_notification_deliveries_id'), table_name='notification_deliveries')
+    op.drop_table('notification_deliveries')
@@ -0,0 +1,58 @@
+"""add whatsapp audiences
+
+Revision ID: d81b6f3c9a47
+Revises: c2f7a9d41e53
+Create Date: 2026-10-17 21:05:12.318274
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd81b6f3c9a47'
+down_revision = 'c2f7a9d41e53'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'whatsapp_audiences',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=150), nullable=False),
+        sa.Column('source_filename', sa.String(length=255), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('param_count', sa.Integer(), nullable=False),
+        sa.Column('total_rows', sa.Integer(), nullable=False),
+        sa.Column('member_count', sa.Integer(), nullable=False),
+        sa.Column('invalid_count', sa.Integer(), nullable=False),
+        sa.Column('duplicate_count', sa.Integer(), nullable=False),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_by', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['created_by'], ['users.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_whatsapp_audiences_id'), 'whatsapp_audiences', ['id'], unique=False)
+    op.create_table(
+        'whatsapp_audience_members',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('audience_id', sa.Integer(), nullable=False),
+        sa.Column('phone', sa.String(length=30), nullable=False),
+        sa.Column('normalized_phone', sa.String(length=30), nullable=False),
+        sa.Column('template_params', sa.JSON(), nullable=True),
+        sa.ForeignKeyConstraint(['audience_id'], ['whatsapp_audiences.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('audience_id', 'normalized_phone', name='uq_whatsapp_audience_members_phone')
+    )
+    op.create_index(op.f('ix_whatsapp_audience_members_id'), 'whatsapp_audience_members', ['id'], unique=False)
+    op.add_column('whatsapp_campaign_recipients', sa.Column('template_params', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('whatsapp_campaign_recipients', 'template_params')
+    op.drop_index(op.f('ix_whatsapp_audience_members_id'), table_name='whatsapp_audience_members')
+    op.drop_table('whatsapp_audience_members')
+    op.drop_index(op.f('ix_whatsapp_audiences_id'), table_name='whatsapp_audiences')
+    op.drop_table('whatsapp_audiences')
@@ -0,0 +1,25 @@
+"""add campaign recipient keyset index
+
+Revision ID: e5c2a8d17f94
+Revises: d81b6f3c9a47
+Create Date: 2026-10-18 10:42:05.114726
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5c2a8d17f94'
+down_revision = 'd81b6f3c9a47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_whatsapp_campaign_recipients_campaign_id_id', 'whatsapp_campaign_recipients',
+                    ['campaign_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_whatsapp_campaign_recipients_campaign_id_id', table_name='whatsapp_campaign_recipients')
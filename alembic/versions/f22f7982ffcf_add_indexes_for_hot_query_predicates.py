@@ -0,0 +1,58 @@
+"""add indexes for hot query predicates
+
+Revision ID: f22f7982ffcf
+Revises: 322ccb0b1652
+Create Date: 2026-10-17 11:02:15.774120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f22f7982ffcf'
+down_revision = '322ccb0b1652'
+branch_labels = None
+depends_on = None
+
+
+# (index name, table, columns) - keep in sync with __table_args__ in app/models.py
+INDEXES = [
+    # routers/bookings.py and routers/admin.py listings
+    ('ix_bookings_booking_date_id', 'bookings', ['booking_date', 'id']),
+    ('ix_bookings_status_booking_date', 'bookings', ['status', 'booking_date']),
+    ('ix_bookings_puja_id_booking_date', 'bookings', ['puja_id', 'booking_date']),
+    ('ix_bookings_temple_id_booking_date', 'bookings', ['temple_id', 'booking_date']),
+    ('ix_bookings_user_id', 'bookings', ['user_id']),
+    ('ix_bookings_created_at', 'bookings', ['created_at']),
+    ('ix_booking_chadawas_booking_id', 'booking_chadawas', ['booking_id']),
+    # payment lookups (routers/bookings.py, routers/payments.py)
+    ('ix_payments_booking_id', 'payments', ['booking_id']),
+    ('ix_payments_razorpay_order_id', 'payments', ['razorpay_order_id']),
+    # routers/order_payments.py
+    ('ix_order_payments_order_id', 'order_payments', ['order_id']),
+    ('ix_order_payments_razorpay_order_id', 'order_payments', ['razorpay_order_id']),
+    # routers/promo_orders.py
+    ('ix_orders_user_id_created_at', 'orders', ['user_id', 'created_at']),
+    ('ix_orders_created_at_id', 'orders', ['created_at', 'id']),
+    ('ix_promo_codes_created_at_id', 'promo_codes', ['created_at', 'id']),
+    # crud.OTPCRUD.verify_otp
+    ('ix_otp_logins_user_id_expires_at', 'otp_logins', ['user_id', 'expires_at']),
+    # routers/products.py
+    ('ix_products_category_id_is_active', 'products', ['category_id', 'is_active']),
+    # routers/users.py
+    ('ix_users_created_at_id', 'users', ['created_at', 'id']),
+]
+
+
+def upgrade() -> None:
+    # Build concurrently on PostgreSQL so live tables are not write-locked
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
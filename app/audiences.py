@@ -0,0 +1,196 @@
+"""
+Audience import for bulk WhatsApp campaigns.
+
+An audience is uploaded once as CSV or XLSX and stored as a reusable list
+(models.WhatsAppAudience). A campaign is then created from it with one
+INSERT ... SELECT (crud.WhatsAppCampaignCRUD.create_campaign_from_audience).
+
+The upload is never read into memory as a whole. Starlette spools it to a
+temporary file. Rows are read from that file one at a time (csv.reader,
+openpyxl read-only mode), normalized and validated, and written in batches
+of AUDIENCE_IMPORT_BATCH_SIZE. Only a set of the normalized numbers seen
+so far is kept, for deduplication.
+
+File layout: a header row with a phone column (``phone``, ``mobile``,
+``whatsapp``, ``number`` or ``phone_number``) and, for templates with
+variables, ``param1`` .. ``paramN`` columns holding each row's values of
+{{1}} .. {{N}}. A file without a recognised header is read as phone
+numbers in its first column.
+"""
+import codecs
+import csv
+import itertools
+import re
+from typing import IO, Iterable, Iterator, List, Optional, Sequence
+
+from sqlalchemy.orm import Session
+
+from app import crud, models
+from app.config import settings
+from app.log import get_logger
+
+try:
+    import openpyxl
+except ImportError:  # XLSX uploads are unavailable without it; CSV still works
+    openpyxl = None
+
+log = get_logger(__name__)
+
+PHONE_COLUMNS = ("phone", "mobile", "whatsapp", "number", "phone_number", "mobile_number", "whatsapp_number")
+PARAM_COLUMN = re.compile(r"^param(\d+)$")
+_NOT_DIGITS = re.compile(r"\D")
+
+
+class AudienceImportError(Exception):
+    """The uploaded file cannot be imported (unsupported type, corrupt workbook, no phone column, too many rows)."""
+
+
+def normalize_phone(phone) -> Optional[str]:
+    """E.164 form of an Indian or international number, or None if it is not a valid mobile number."""
+    if phone is None:
+        return None
+    raw = str(phone).strip()
+    if raw.endswith(".0"):  # numeric XLSX cells
+        raw = raw[:-2]
+    international = raw.startswith("+") or raw.startswith("00")
+    digits = _NOT_DIGITS.sub("", raw)
+    if raw.startswith("00"):
+        digits = digits[2:]
+    if not international:
+        if len(digits) == 11 and digits.startswith("0"):
+            digits = digits[1:]
+        if len(digits) == 10:
+            digits = "91" + digits
+    if digits.startswith("91") and len(digits) == 12:
+        return "+" + digits if digits[2] in "6789" else None
+    if international and 8 <= len(digits) <= 15:
+        return "+" + digits
+    return None
+
+
+def _text_rows(file: IO[bytes]) -> Iterator[List[str]]:
+    # utf-8-sig drops the BOM Excel writes at the start of CSV exports
+    return csv.reader(codecs.getreader("utf-8-sig")(file, errors="replace"))
+
+
+def _open_workbook(file: IO[bytes]):
+    try:
+        workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    except Exception as e:  # not a zip, or a zip without a workbook in it
+        raise AudienceImportError("The file is not a valid .xlsx workbook") from e
+    if not workbook.worksheets:
+        workbook.close()
+        raise AudienceImportError("The .xlsx workbook has no sheets")
+    return workbook
+
+
+def _xlsx_rows(workbook) -> Iterator[List[str]]:
+    try:
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            yield ["" if value is None else str(value) for value in row]
+    except Exception as e:  # sheet XML that is truncated or malformed
+        raise AudienceImportError("The file is not a valid .xlsx workbook") from e
+    finally:
+        workbook.close()
+
+
+def iter_rows(file: IO[bytes], filename: str) -> Iterator[List[str]]:
+    """Rows of an uploaded CSV or XLSX file, one list of cell strings at a time."""
+    name = (filename or "").lower()
+    if name.endswith(".xlsx"):
+        if openpyxl is None:
+            raise AudienceImportError("XLSX upload is not available on this server, upload a CSV file instead")
+        # Opened here so a corrupt file is rejected before an audience is created
+        return _xlsx_rows(_open_workbook(file))
+    if name.endswith(".csv") or name.endswith(".txt"):
+        return _text_rows(file)
+    raise AudienceImportError("Unsupported file type, upload a .csv or .xlsx file")
+
+
+class RowLayout:
+    """Where the phone number and the template parameters are in each row."""
+
+    def __init__(self, phone_index: int = 0, param_indexes: Sequence[int] = ()):
+        self.phone_index = phone_index
+        self.param_indexes = list(param_indexes)
+
+    @classmethod
+    def from_header(cls, header: List[str]) -> Optional["RowLayout"]:
+        """Layout described by ``header``, or None if it is not a header row."""
+        names = [cell.strip().lower().replace(" ", "_") for cell in header]
+        phone_index = next((i for i, name in enumerate(names) if name in PHONE_COLUMNS), None)
+        if phone_index is None:
+            return None
+        params = sorted((int(m.group(1)), i) for i, name in enumerate(names) if (m := PARAM_COLUMN.match(name)))
+        if [n for n, _ in params] != list(range(1, len(params) + 1)):
+            raise AudienceImportError("Template parameter columns must be param1, param2, ... without gaps")
+        return cls(phone_index, [i for _, i in params])
+
+    def params(self, row: List[str]) -> Optional[List[str]]:
+        if not self.param_indexes:
+            return None
+        return [row[i].strip() if i < len(row) else "" for i in self.param_indexes]
+
+
+def _batches(rows: Iterable, size: int) -> Iterator[list]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def import_audience(db: Session, audience: models.WhatsAppAudience, rows: Iterator[List[str]]) -> models.WhatsAppAudience:
+    """
+    Stream ``rows`` into ``audience``: normalize, validate, dedupe, insert in batches.
+
+    Rows with an invalid number, or with a template parameter left empty,
+    are counted as invalid and skipped. The audience is marked ready at the
+    end, or failed (and emptied) if the import raises.
+    """
+    seen = set()
+    total = invalid = duplicates = 0
+    try:
+        first = next(rows, None)
+        layout = RowLayout.from_header(first) if first is not None else None
+        if layout is None:
+            layout = RowLayout()
+            if first is not None:
+                rows = itertools.chain([first], rows)
+        audience.param_count = len(layout.param_indexes)
+
+        for batch in _batches(rows, settings.AUDIENCE_IMPORT_BATCH_SIZE):
+            members = []
+            for row in batch:
+                if not any(cell.strip() for cell in row):
+                    continue  # blank lines
+                total += 1
+                if total > settings.AUDIENCE_MAX_ROWS:
+                    raise AudienceImportError(f"Audiences are limited to {settings.AUDIENCE_MAX_ROWS} rows")
+                phone = row[layout.phone_index].strip() if layout.phone_index < len(row) else ""
+                normalized = normalize_phone(phone)
+                params = layout.params(row)
+                if normalized is None or (params is not None and not all(params)):
+                    invalid += 1
+                    continue
+                if normalized in seen:
+                    duplicates += 1
+                    continue
+                seen.add(normalized)
+                members.append({"audience_id": audience.id, "phone": phone[:30], "normalized_phone": normalized,
+                                "template_params": params})
+            crud.WhatsAppAudienceCRUD.add_members(db, members)
+    except Exception as e:
+        db.rollback()
+        crud.WhatsAppAudienceCRUD.mark_failed(db, audience, str(e))
+        log.error("audience.import_failed", audience_id=audience.id, rows=total, error=str(e))
+        raise
+
+    crud.WhatsAppAudienceCRUD.mark_ready(db, audience, total_rows=total, member_count=len(seen),
+                                         invalid_count=invalid, duplicate_count=duplicates)
+    log.info("audience.imported", audience_id=audience.id, rows=total, members=len(seen), invalid=invalid,
+             duplicates=duplicates)
+    return audience
@@ -1,17 +1,137 @@
 from datetime import datetime, timedelta
 from typing import Optional
+import time
 from jose import JWTError, jwt
 import bcrypt
+import redis
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
 from app.database import get_db
 from app.models import User, UserRole
 from app.schemas import TokenData
 from app.config import settings
+from app.cache import LocalTTLCache
+from app.log import get_logger
 
 # JWT token security
 security = HTTPBearer()
+log = get_logger(__name__)
+
+class UserCache:
+    """
+    Column values of recently authenticated users, keyed by token subject (mobile).
+
+    Entries are kept in this process and stamped with the user's generation,
+    a Redis counter that invalidate() increments. A lookup reads the current
+    generation (one Redis GET instead of the users SELECT) and only uses an
+    entry stamped with it, so an update or delete made through any process
+    is seen by every other process on its next request. When Redis is
+    unavailable a cached entry cannot be checked, and users are loaded from
+    the database instead.
+    """
+
+    KEY_PREFIX = "auth:user:generation"
+    # After a Redis error, skip the cache for this long instead of paying a
+    # connection timeout on every request.
+    REDIS_RETRY_SECONDS = 30
+
+    def __init__(self, redis_url: str, ttl: int, max_entries: int):
+        self.redis_url = redis_url
+        self.ttl = ttl
+        self.local = LocalTTLCache(max_entries=max_entries, ttl=ttl)
+        self._redis = None
+        self._redis_retry_at = 0.0
+
+    def _key(self, mobile: str) -> str:
+        return f"{self.KEY_PREFIX}:{mobile}"
+
+    def _get_redis(self, force: bool = False):
+        if not force and time.monotonic() < self._redis_retry_at:
+            return None
+        if self._redis is None:
+            self._redis = redis.Redis.from_url(self.redis_url, socket_connect_timeout=0.25, socket_timeout=0.25)
+        return self._redis
+
+    def _redis_failed(self, exc: Exception) -> None:
+        self._redis_retry_at = time.monotonic() + self.REDIS_RETRY_SECONDS
+        log.warning("auth.user_cache_unavailable", retry_in=self.REDIS_RETRY_SECONDS, error=str(exc))
+
+    def generation(self, mobile: str) -> Optional[int]:
+        """The user's current generation, or None if Redis cannot be reached."""
+        client = self._get_redis()
+        if client is None:
+            return None
+        try:
+            return int(client.get(self._key(mobile)) or 0)
+        except redis.RedisError as exc:
+            self._redis_failed(exc)
+            return None
+
+    def get(self, mobile: str, generation: int) -> Optional[dict]:
+        """Cached column values, if they were stamped with ``generation``."""
+        entry = self.local.get(mobile, None)
+        if entry is None or entry[0] != generation:
+            return None
+        return entry[1]
+
+    def set(self, mobile: str, generation: int, values: dict) -> None:
+        self.local.set(mobile, (generation, values))
+
+    def invalidate(self, mobile: str) -> None:
+        """Make every process reload the user on its next request."""
+        self.local.delete(mobile)
+        # Always attempt it, even while lookups are backing off
+        client = self._get_redis(force=True)
+        try:
+            pipe = client.pipeline(transaction=False)
+            pipe.incr(self._key(mobile))
+            # Outlive every entry stamped before the increment
+            pipe.expire(self._key(mobile), max(60, self.ttl * 2))
+            pipe.execute()
+        except redis.RedisError as exc:
+            self._redis_failed(exc)
+
+    def clear(self) -> None:
+        self.local.clear()
+
+
+user_cache = UserCache(
+    redis_url=settings.REDIS_URL,
+    ttl=settings.AUTH_USER_CACHE_TTL_SECONDS,
+    max_entries=settings.AUTH_USER_CACHE_MAX_ENTRIES,
+)
+
+
+def invalidate_cached_user(*mobiles: Optional[str]) -> None:
+    """Drop cached users in every process so the next request reloads them from the database."""
+    for mobile in mobiles:
+        if mobile:
+            user_cache.invalidate(mobile)
+
+
+def _load_user(db: Session, mobile: str) -> Optional[User]:
+    """Load the user for a token subject, from the cache when possible."""
+    if settings.AUTH_USER_CACHE_TTL_SECONDS <= 0:
+        return db.query(User).filter(User.mobile == mobile).first()
+
+    # Read the generation before the SELECT, so an update committed in between
+    # leaves an entry that the next lookup already treats as stale
+    generation = user_cache.generation(mobile)
+    values = user_cache.get(mobile, generation) if generation is not None else None
+    if values is None:
+        user = db.query(User).filter(User.mobile == mobile).first()
+        if user is not None and generation is not None:
+            user_cache.set(mobile, generation, {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs})
+        return user
+
+    # A detached copy, deliberately not added to the request's session: a
+    # db.get(User, id) later in the request still loads the database row.
+    # Routes only read the user's columns; updates go through UserCRUD by id.
+    user = User(**values)
+    make_transient_to_detached(user)
+    return user
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -72,7 +192,7 @@ def get_current_user(
     )
     
     token_data = verify_token(credentials.credentials, credentials_exception)
-    user = db.query(User).filter(User.mobile == token_data.mobile).first()
+    user = _load_user(db, token_data.mobile)
     if user is None:
         raise credentials_exception
     return user
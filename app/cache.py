@@ -0,0 +1,270 @@
+"""
+Two-tier read-through cache for the public catalog endpoints
+(/pujas, /plans, /chadawas, /temples).
+
+Tier 1 is a small in-process LRU with a short TTL, tier 2 is Redis shared by
+every API worker. Values are the already-serialized response payloads
+(plain JSON-compatible lists/dicts), so a hit skips both the database and
+the ORM -> Pydantic conversion.
+
+Writes go through the CRUD layer, which calls ``catalog_cache.invalidate()``
+for the entity it changed. That clears Redis for every process immediately;
+other processes' in-process tier can serve the old payload for at most
+CATALOG_CACHE_LOCAL_TTL_SECONDS.
+"""
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+import redis
+
+from app.config import settings
+from app.log import get_logger
+
+log = get_logger(__name__)
+
+# Cached namespaces that embed data from each entity. A write to the entity
+# invalidates all of them (e.g. PujaResponse carries plan ids and chadawas,
+# TempleResponse carries recommended pujas and chadawas).
+CATALOG_DEPENDENCIES: Dict[str, Tuple[str, ...]] = {
+    "pujas": ("pujas", "temples"),
+    "plans": ("plans", "pujas"),
+    "chadawas": ("chadawas", "pujas", "temples"),
+    "temples": ("temples",),
+}
+
+_MISSING = object()
+
+
+class LocalTTLCache:
+    """Thread-safe LRU cache whose entries also expire after ``ttl`` seconds."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str], default: Any = _MISSING) -> Any:
+        """Return the cached value or ``default`` (``_MISSING`` unless given)."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Tuple[str, str], value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Tuple[str, str]) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_namespace(self, namespace: str) -> None:
+        with self._lock:
+            for key in [k for k in self._data if k[0] == namespace]:
+                del self._data[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class CatalogCache:
+    """Read-through cache: in-process LRU in front of Redis in front of the loader."""
+
+    KEY_PREFIX = "catalog"
+    # After a Redis error, skip the shared tier for this long instead of
+    # paying a connection timeout on every request.
+    REDIS_RETRY_SECONDS = 30
+
+    def __init__(self, redis_url: str, local_ttl: float, redis_ttl: int, max_entries: int, enabled: bool = True):
+        self.enabled = enabled
+        self.redis_url = redis_url
+        self.redis_ttl = redis_ttl
+        self.local = LocalTTLCache(max_entries=max_entries, ttl=local_ttl)
+        self._redis = None
+        self._redis_retry_at = 0.0
+        self._stats_lock = threading.Lock()
+        self._stats = {"local_hits": 0, "redis_hits": 0, "misses": 0, "invalidations": 0, "redis_errors": 0}
+
+    # ---- stats -----------------------------------------------------------
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters since process start plus current tier state."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats["local_hits"] + stats["redis_hits"] + stats["misses"]
+        stats["hit_ratio"] = round((stats["local_hits"] + stats["redis_hits"]) / lookups, 4) if lookups else 0.0
+        stats["local_entries"] = len(self.local)
+        stats["redis_available"] = time.monotonic() >= self._redis_retry_at
+        stats["enabled"] = self.enabled
+        return stats
+
+    def reset_stats(self) -> None:
+        with self._stats_lock:
+            for name in self._stats:
+                self._stats[name] = 0
+
+    # ---- redis tier ------------------------------------------------------
+    def _redis_key(self, namespace: str, key: str) -> str:
+        return f"{self.KEY_PREFIX}:{namespace}:{key}"
+
+    def _redis_index_key(self, namespace: str) -> str:
+        # Set of live keys per namespace so invalidation needs no SCAN
+        return f"{self.KEY_PREFIX}:keys:{namespace}"
+
+    def _get_redis(self, force: bool = False):
+        if not force and time.monotonic() < self._redis_retry_at:
+            return None
+        if self._redis is None:
+            self._redis = redis.Redis.from_url(
+                self.redis_url,
+                socket_connect_timeout=0.25,
+                socket_timeout=0.25,
+            )
+        return self._redis
+
+    def _redis_failed(self, exc: Exception) -> None:
+        self._count("redis_errors")
+        self._redis_retry_at = time.monotonic() + self.REDIS_RETRY_SECONDS
+        log.warning("catalog_cache.redis_unavailable", fallback="in-process tier",
+                    retry_in=self.REDIS_RETRY_SECONDS, error=str(exc))
+
+    def _redis_get(self, namespace: str, key: str) -> Any:
+        client = self._get_redis()
+        if client is None:
+            return _MISSING
+        try:
+            raw = client.get(self._redis_key(namespace, key))
+        except redis.RedisError as exc:
+            self._redis_failed(exc)
+            return _MISSING
+        return _MISSING if raw is None else json.loads(raw)
+
+    def _redis_set(self, namespace: str, key: str, value: Any) -> None:
+        client = self._get_redis()
+        if client is None:
+            return
+        redis_key = self._redis_key(namespace, key)
+        try:
+            pipe = client.pipeline(transaction=False)
+            pipe.set(redis_key, json.dumps(value, separators=(",", ":")), ex=self.redis_ttl)
+            pipe.sadd(self._redis_index_key(namespace), redis_key)
+            pipe.expire(self._redis_index_key(namespace), self.redis_ttl)
+            pipe.execute()
+        except redis.RedisError as exc:
+            self._redis_failed(exc)
+
+    def _redis_delete_namespace(self, namespace: str) -> None:
+        # Always attempt invalidation, even while reads are backing off:
+        # other workers may still be serving from Redis.
+        client = self._get_redis(force=True)
+        if client is None:
+            return
+        index_key = self._redis_index_key(namespace)
+        try:
+            keys = client.smembers(index_key)
+            client.delete(index_key, *keys)
+        except redis.RedisError as exc:
+            self._redis_failed(exc)
+
+    # ---- public API ------------------------------------------------------
+    def get_or_load(self, namespace: str, key: str, loader: Callable[[], Any]) -> Any:
+        """Return the cached payload for (namespace, key), calling ``loader`` on a miss.
+
+        ``loader`` must return a JSON-serializable value. ``None`` (e.g. "not
+        found") is returned as-is and never cached.
+        """
+        if not self.enabled:
+            return loader()
+
+        local_key = (namespace, key)
+        value = self.local.get(local_key)
+        if value is not _MISSING:
+            self._count("local_hits")
+            return value
+
+        value = self._redis_get(namespace, key)
+        if value is not _MISSING:
+            self._count("redis_hits")
+            self.local.set(local_key, value)
+            return value
+
+        self._count("misses")
+        value = loader()
+        if value is not None:
+            self.local.set(local_key, value)
+            self._redis_set(namespace, key, value)
+        return value
+
+    async def aget_or_load(self, namespace: str, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """get_or_load() for ``async def`` routes; ``loader`` is a coroutine function.
+
+        Redis round trips run in a worker thread so a slow Redis never blocks
+        the event loop.
+        """
+        if not self.enabled:
+            return await loader()
+
+        local_key = (namespace, key)
+        value = self.local.get(local_key)
+        if value is not _MISSING:
+            self._count("local_hits")
+            return value
+
+        value = await asyncio.to_thread(self._redis_get, namespace, key)
+        if value is not _MISSING:
+            self._count("redis_hits")
+            self.local.set(local_key, value)
+            return value
+
+        self._count("misses")
+        value = await loader()
+        if value is not None:
+            self.local.set(local_key, value)
+            await asyncio.to_thread(self._redis_set, namespace, key, value)
+        return value
+
+    def invalidate(self, entity: str) -> None:
+        """Drop every cached payload that embeds ``entity`` (see CATALOG_DEPENDENCIES)."""
+        if not self.enabled:
+            return
+        self._count("invalidations")
+        for namespace in CATALOG_DEPENDENCIES.get(entity, (entity,)):
+            self.local.delete_namespace(namespace)
+            self._redis_delete_namespace(namespace)
+
+    def clear(self) -> None:
+        """Drop every cached payload in both tiers."""
+        self.local.clear()
+        for namespace in CATALOG_DEPENDENCIES:
+            self._redis_delete_namespace(namespace)
+
+
+# Process-wide catalog cache
+catalog_cache = CatalogCache(
+    redis_url=settings.REDIS_URL,
+    local_ttl=settings.CATALOG_CACHE_LOCAL_TTL_SECONDS,
+    redis_ttl=settings.CATALOG_CACHE_REDIS_TTL_SECONDS,
+    max_entries=settings.CATALOG_CACHE_MAX_ENTRIES,
+    enabled=settings.CATALOG_CACHE_ENABLED,
+)
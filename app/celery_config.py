@@ -3,6 +3,9 @@ Celery Configuration for Async Task Processing
 """
 from celery import Celery
 from app.config import settings
+from app.log import configure_logging
+
+configure_logging()
 
 # Create Celery instance
 celery_app = Celery(
@@ -31,4 +34,20 @@ celery_app.conf.update(
 # Optional: Configure task routes
 celery_app.conf.task_routes = {
     'app.tasks.send_booking_notification': {'queue': 'notifications'},
+    # Own queue and worker, so login OTPs never wait behind notifications or campaigns
+    'app.tasks.send_otp': {'queue': 'otp'},
+    # Bulk WhatsApp chunks; the campaigns worker's concurrency bounds how many send at once
+    'app.tasks.send_whatsapp_campaign_chunk': {'queue': 'campaigns'},
+}
+
+# Periodic tasks (run with: celery -A app.celery_config.celery_app beat)
+celery_app.conf.beat_schedule = {
+    'expire-past-pujas': {
+        'task': 'app.tasks.expire_pujas',
+        'schedule': settings.PUJA_EXPIRY_SWEEP_SECONDS,
+    },
+    'purge-dispatched-outbox-events': {
+        'task': 'app.tasks.purge_outbox',
+        'schedule': 3600,
+    },
 }
@@ -4,11 +4,23 @@ from typing import List
 class Settings:
     # Database
     DATABASE_URL: str = config("DATABASE_URL", default="sqlite:///./33kotidham.db")
+    # Connection pool, per engine and per process. Size it per PROCESS_TYPE:
+    # API workers serve many concurrent requests, Celery children run one task at a time.
+    PROCESS_TYPE: str = config("PROCESS_TYPE", default="api")  # api, worker
+    DATABASE_POOL_SIZE: int = config("DATABASE_POOL_SIZE", default=5, cast=int)
+    DATABASE_MAX_OVERFLOW: int = config("DATABASE_MAX_OVERFLOW", default=10, cast=int)
+    DATABASE_POOL_TIMEOUT: int = config("DATABASE_POOL_TIMEOUT", default=30, cast=int)  # seconds
+    DATABASE_STATEMENT_TIMEOUT_MS: int = config("DATABASE_STATEMENT_TIMEOUT_MS", default=30000, cast=int)  # 0 disables (PostgreSQL only)
+    DATABASE_POOL_METRICS_PUBLISH_SECONDS: int = config("DATABASE_POOL_METRICS_PUBLISH_SECONDS", default=30, cast=int)
     
     # JWT
     SECRET_KEY: str = config("SECRET_KEY", default="your-secret-key-change-this-in-production")
     ALGORITHM: str = config("ALGORITHM", default="HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = config("ACCESS_TOKEN_EXPIRE_MINUTES", default=30, cast=int)
+    # Authenticated-user cache (app.auth.UserCache: per process, checked against a
+    # per-user generation in Redis on every hit). Entry lifetime in seconds; 0 disables.
+    AUTH_USER_CACHE_TTL_SECONDS: int = config("AUTH_USER_CACHE_TTL_SECONDS", default=10, cast=int)
+    AUTH_USER_CACHE_MAX_ENTRIES: int = config("AUTH_USER_CACHE_MAX_ENTRIES", default=4096, cast=int)
     
     # Razorpay
     RAZORPAY_KEY_ID: str = config("RAZORPAY_KEY_ID", default="")
@@ -19,6 +31,10 @@ class Settings:
     TWILIO_AUTH_TOKEN: str = config("TWILIO_AUTH_TOKEN", default="")
     TWILIO_PHONE_NUMBER: str = config("TWILIO_PHONE_NUMBER", default="")
     TWILIO_WHATSAPP_NUMBER: str = config("TWILIO_WHATSAPP_NUMBER", default="whatsapp:+19804808487")
+    # Shared HTTP client (app.twilio_client): keep-alive connections per process and timeouts
+    TWILIO_HTTP_POOL_SIZE: int = config("TWILIO_HTTP_POOL_SIZE", default=10, cast=int)
+    TWILIO_CONNECT_TIMEOUT_SECONDS: float = config("TWILIO_CONNECT_TIMEOUT_SECONDS", default=5, cast=float)
+    TWILIO_READ_TIMEOUT_SECONDS: float = config("TWILIO_READ_TIMEOUT_SECONDS", default=15, cast=float)
     
     # WhatsApp Template SIDs (Content Templates)
     WHATSAPP_TEMPLATE_BOOKING_PENDING: str = config("WHATSAPP_TEMPLATE_BOOKING_PENDING", default="")
@@ -29,6 +45,46 @@ class Settings:
     WHATSAPP_TEMPLATE_33KOTI_PROMO: str = config("WHATSAPP_TEMPLATE_33KOTI_PROMO", default="")
     WHATSAPP_TEMPLATE_PUJA_PROMO: str = config("WHATSAPP_TEMPLATE_PUJA_PROMO", default="")
     
+    # Bulk WhatsApp campaigns (app.tasks.enqueue_whatsapp_campaign): recipients per
+    # Celery task, and how many tasks send at the same time (the concurrency of the
+    # worker on the campaigns queue, see docker-compose.prod.yml)
+    BULK_WHATSAPP_CHUNK_SIZE: int = config("BULK_WHATSAPP_CHUNK_SIZE", default=25, cast=int)
+    BULK_WHATSAPP_CONCURRENCY: int = config("BULK_WHATSAPP_CONCURRENCY", default=4, cast=int)
+    # Audience uploads (app.audiences): rows written per batch and the largest file accepted
+    AUDIENCE_IMPORT_BATCH_SIZE: int = config("AUDIENCE_IMPORT_BATCH_SIZE", default=1000, cast=int)
+    AUDIENCE_MAX_ROWS: int = config("AUDIENCE_MAX_ROWS", default=200000, cast=int)
+    
+    # Transactional outbox (app.outbox): events published to Celery per dispatcher
+    # poll, idle poll interval, publish retry backoff cap and how long sent rows are kept
+    OUTBOX_BATCH_SIZE: int = config("OUTBOX_BATCH_SIZE", default=100, cast=int)
+    OUTBOX_POLL_SECONDS: float = config("OUTBOX_POLL_SECONDS", default=1, cast=float)
+    OUTBOX_MAX_BACKOFF_SECONDS: int = config("OUTBOX_MAX_BACKOFF_SECONDS", default=300, cast=int)
+    OUTBOX_RETENTION_HOURS: int = config("OUTBOX_RETENTION_HOURS", default=72, cast=int)
+    # Notification idempotency (app.idempotency): after this long a claim whose
+    # worker never finished the send is considered abandoned and can be retaken
+    NOTIFICATION_CLAIM_TTL_SECONDS: int = config("NOTIFICATION_CLAIM_TTL_SECONDS", default=300, cast=int)
+    # Delivery receipts (app.delivery_receipts): public URL Twilio posts status callbacks
+    # to (also used to verify their signature), the shared token MSG91 reports must carry,
+    # rows per upsert and how long a callback waits for others to share its upsert
+    TWILIO_STATUS_CALLBACK_URL: str = config("TWILIO_STATUS_CALLBACK_URL", default="")
+    MSG91_WEBHOOK_TOKEN: str = config("MSG91_WEBHOOK_TOKEN", default="")
+    DELIVERY_RECEIPT_BATCH_SIZE: int = config("DELIVERY_RECEIPT_BATCH_SIZE", default=200, cast=int)
+    DELIVERY_RECEIPT_FLUSH_SECONDS: float = config("DELIVERY_RECEIPT_FLUSH_SECONDS", default=0.05, cast=float)
+    
+    # Provider send rates (app.rate_limit): tokens per second and burst, per sender
+    RATE_LIMIT_ENABLED: bool = config("RATE_LIMIT_ENABLED", default=True, cast=bool)
+    RATE_LIMIT_MAX_WAIT_SECONDS: float = config("RATE_LIMIT_MAX_WAIT_SECONDS", default=10, cast=float)
+    TWILIO_WHATSAPP_RATE_PER_SECOND: float = config("TWILIO_WHATSAPP_RATE_PER_SECOND", default=20, cast=float)
+    TWILIO_WHATSAPP_BURST: int = config("TWILIO_WHATSAPP_BURST", default=20, cast=int)
+    TWILIO_SMS_RATE_PER_SECOND: float = config("TWILIO_SMS_RATE_PER_SECOND", default=1, cast=float)
+    TWILIO_SMS_BURST: int = config("TWILIO_SMS_BURST", default=5, cast=int)
+    MSG91_RATE_PER_SECOND: float = config("MSG91_RATE_PER_SECOND", default=10, cast=float)
+    MSG91_BURST: int = config("MSG91_BURST", default=20, cast=int)
+    # Async notification executor (app.notification_executor): messages in flight
+    # per process and concurrent Twilio requests
+    NOTIFY_EXECUTOR_MAX_IN_FLIGHT: int = config("NOTIFY_EXECUTOR_MAX_IN_FLIGHT", default=200, cast=int)
+    NOTIFY_TWILIO_CONCURRENCY: int = config("NOTIFY_TWILIO_CONCURRENCY", default=100, cast=int)
+    
     # SMS Provider Selection
     SMS_PROVIDER: str = config("SMS_PROVIDER", default="auto")  # auto, twilio, msg91
     
@@ -36,16 +92,38 @@ class Settings:
     MSG91_API_KEY: str = config("MSG91_API_KEY", default="")
     MSG91_TEMPLATE_ID: str = config("MSG91_TEMPLATE_ID", default="")
     MSG91_SENDER_ID: str = config("MSG91_SENDER_ID", default="33KOTI")
+    MSG91_CONNECT_TIMEOUT_SECONDS: float = config("MSG91_CONNECT_TIMEOUT_SECONDS", default=3, cast=float)
+    MSG91_READ_TIMEOUT_SECONDS: float = config("MSG91_READ_TIMEOUT_SECONDS", default=5, cast=float)
+    # OTP delivery (app.tasks.send_otp, "otp" queue): an OTP SMS not sent within this many
+    # seconds of the request is dropped (the user will ask again), and failed sends are retried
+    OTP_TASK_EXPIRES_SECONDS: int = config("OTP_TASK_EXPIRES_SECONDS", default=60, cast=int)
+    OTP_SEND_MAX_RETRIES: int = config("OTP_SEND_MAX_RETRIES", default=2, cast=int)
+    OTP_RETRY_DELAY_SECONDS: float = config("OTP_RETRY_DELAY_SECONDS", default=2, cast=float)
     
     # Redis
     REDIS_URL: str = config("REDIS_URL", default="redis://localhost:6379")
     
+    # Catalog cache (in-process LRU in front of Redis)
+    CATALOG_CACHE_ENABLED: bool = config("CATALOG_CACHE_ENABLED", default=True, cast=bool)
+    CATALOG_CACHE_LOCAL_TTL_SECONDS: int = config("CATALOG_CACHE_LOCAL_TTL_SECONDS", default=10, cast=int)
+    CATALOG_CACHE_REDIS_TTL_SECONDS: int = config("CATALOG_CACHE_REDIS_TTL_SECONDS", default=300, cast=int)
+    CATALOG_CACHE_MAX_ENTRIES: int = config("CATALOG_CACHE_MAX_ENTRIES", default=1024, cast=int)
+    
+    # Background jobs
+    PUJA_EXPIRY_SWEEP_SECONDS: int = config("PUJA_EXPIRY_SWEEP_SECONDS", default=60, cast=int)
+    
     # Email
     SMTP_HOST: str = config("SMTP_HOST", default="smtp.gmail.com")
     SMTP_PORT: int = config("SMTP_PORT", default=587, cast=int)
     SMTP_USERNAME: str = config("SMTP_USERNAME", default="")
     SMTP_PASSWORD: str = config("SMTP_PASSWORD", default="")
     SMTP_FROM_EMAIL: str = config("SMTP_FROM_EMAIL", default="")
+    SMTP_USE_TLS: bool = config("SMTP_USE_TLS", default=True, cast=bool)  # STARTTLS
+    # Pooled sessions (app.mailer), per process
+    SMTP_POOL_SIZE: int = config("SMTP_POOL_SIZE", default=4, cast=int)
+    SMTP_TIMEOUT_SECONDS: float = config("SMTP_TIMEOUT_SECONDS", default=10, cast=float)
+    SMTP_POOL_MAX_IDLE_SECONDS: float = config("SMTP_POOL_MAX_IDLE_SECONDS", default=60, cast=float)
+    SMTP_MAX_MESSAGES_PER_CONNECTION: int = config("SMTP_MAX_MESSAGES_PER_CONNECTION", default=100, cast=int)
     
     # WhatsApp
     WHATSAPP_ENABLED: bool = config("WHATSAPP_ENABLED", default=False, cast=bool)
@@ -61,6 +139,11 @@ class Settings:
     # Application
     DEBUG: bool = config("DEBUG", default=False, cast=bool)
     ENVIRONMENT: str = config("ENVIRONMENT", default="production")
+    # Logging (app.log): level for the app loggers (DEBUG brings back full message
+    # traces), text or json lines, and per-event sample rates "event=0.1,..."
+    LOG_LEVEL: str = config("LOG_LEVEL", default="INFO")
+    LOG_FORMAT: str = config("LOG_FORMAT", default="text")
+    LOG_SAMPLE_RATES: str = config("LOG_SAMPLE_RATES", default="")
     
     # Security
     ALLOWED_HOSTS: List[str] = config("ALLOWED_HOSTS", default="*", cast=lambda v: [s.strip() for s in v.split(',')])
@@ -1,13 +1,17 @@
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_
-from typing import List, Optional
+from sqlalchemy.orm import Load, Session, joinedload, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, func, insert, literal, or_, select
+from typing import Iterator, List, Optional
 from datetime import datetime, timedelta
 import random
 import string
 import pytz
 from app import models, schemas
 from app.utils import FileManager
-from app.auth import get_password_hash
+from app.auth import get_password_hash, invalidate_cached_user
+from app.cache import catalog_cache
+from app.database import dialect_insert
+from app.pricing import ResolvedBooking, apply_snapshot, resolve_booking_items
 
 # IST Timezone
 IST = pytz.timezone('Asia/Kolkata')
@@ -59,11 +63,13 @@ class UserCRUD:
         if not db_user:
             return None
         
+        old_mobile = db_user.mobile
         update_data = user_update.dict(exclude_unset=True)
         for field, value in update_data.items():
             setattr(db_user, field, value)
         
         db.commit()
+        invalidate_cached_user(old_mobile, update_data.get("mobile"))
         db.refresh(db_user)
         return db_user
     
@@ -73,8 +79,10 @@ class UserCRUD:
         if not db_user:
             return False
         
+        mobile = db_user.mobile
         db.delete(db_user)
         db.commit()
+        invalidate_cached_user(mobile)
         return True
 
 
@@ -118,67 +126,79 @@ class OTPCRUD:
         return None
 
 
+def _puja_expires_at(puja_date, puja_time) -> Optional[datetime]:
+    """Moment a puja stops being bookable, or None when it has no date/time."""
+    if puja_date and puja_time:
+        return datetime.combine(puja_date, puja_time)
+    return None
+
+
 # Puja CRUD operations
 class PujaCRUD:
     @staticmethod
     def get_puja(db: Session, puja_id: int) -> Optional[models.Puja]:
-        puja = db.query(models.Puja).options(
+        return db.query(models.Puja).options(
             joinedload(models.Puja.puja_chadawas).joinedload(models.PujaChadawa.chadawa),
             joinedload(models.Puja.plan_ids)
         ).filter(models.Puja.id == puja_id).first()
-
-        # If the puja has a date and time and is past, auto-disable it
-        try:
-            if puja and getattr(puja, 'is_active', False):
-                puja_date = getattr(puja, 'date', None)
-                puja_time = getattr(puja, 'time', None)
-                if puja_date and puja_time:
-                    combined = datetime.combine(puja_date, puja_time)
-                    # Use UTC now for comparison (consistent with other uses of datetime.utcnow())
-                    if datetime.utcnow() > combined:
-                        # mark inactive
-                        db.query(models.Puja).filter(models.Puja.id == puja.id).update({"is_active": False}, synchronize_session=False)
-                        db.commit()
-                        db.refresh(puja)
-        except Exception:
-            # If anything goes wrong during auto-disable, fail silently and return the puja as-is
-            pass
-
-        return puja
     
     @staticmethod
     def get_pujas(db: Session, skip: int = 0, limit: int = 100, is_active: Optional[bool] = False) -> List[models.Puja]:
         """Get pujas with optional is_active filter. Default is_active=False per API requirement.
 
-        Auto-disable any puja whose date+time is in the past by setting is_active=False.
+        Past pujas are deactivated by the periodic expiry sweeper (see expire_due_pujas).
         """
         query = db.query(models.Puja)
-        # Fetch candidates first (we'll adjust is_active for expired ones)
-        candidates = query.offset(skip).limit(limit).all()
-
-        expired_ids = []
-        for p in candidates:
-            try:
-                if getattr(p, 'is_active', False):
-                    puja_date = getattr(p, 'date', None)
-                    puja_time = getattr(p, 'time', None)
-                    if puja_date and puja_time:
-                        combined = datetime.combine(puja_date, puja_time)
-                        if datetime.utcnow() > combined:
-                            expired_ids.append(p.id)
-            except Exception:
-                continue
-
-        # Bulk-update expired pujas to is_active=False
-        if expired_ids:
-            db.query(models.Puja).filter(models.Puja.id.in_(expired_ids)).update({"is_active": False}, synchronize_session=False)
-            db.commit()
-
-        # Now apply requested is_active filter (note: if is_active is None we return all)
-        query = db.query(models.Puja)
+        # Note: if is_active is None we return all
         if is_active is not None:
             query = query.filter(models.Puja.is_active == is_active)
         return query.offset(skip).limit(limit).all()
+
+    @staticmethod
+    async def get_puja_async(db: AsyncSession, puja_id: int) -> Optional[models.Puja]:
+        stmt = select(models.Puja).options(
+            *_puja_response_options(Load(models.Puja)),
+            selectinload(models.Puja.puja_chadawas).selectinload(models.PujaChadawa.chadawa),
+        ).where(models.Puja.id == puja_id)
+        return (await db.scalars(stmt)).first()
+
+    @staticmethod
+    async def get_pujas_async(db: AsyncSession, skip: int = 0, limit: int = 100,
+                              is_active: Optional[bool] = False) -> List[models.Puja]:
+        """Async get_pujas() with everything PujaResponse serializes eager-loaded."""
+        stmt = select(models.Puja).options(*_puja_response_options(Load(models.Puja)))
+        if is_active is not None:
+            stmt = stmt.where(models.Puja.is_active == is_active)
+        return (await db.scalars(stmt.offset(skip).limit(limit))).all()
+
+    @staticmethod
+    def expire_due_pujas(db: Session, now: Optional[datetime] = None) -> int:
+        """Deactivate every active puja whose date+time is in the past.
+
+        Rows with expires_at set are matched on it directly; older rows without it
+        fall back to the (is_active, date, time) index. Returns the number of pujas deactivated.
+        """
+        # Use UTC now for comparison (consistent with other uses of datetime.utcnow())
+        now = now or datetime.utcnow()
+        today = now.date()
+        due = or_(
+            models.Puja.expires_at < now,
+            and_(
+                models.Puja.expires_at.is_(None),
+                models.Puja.time.isnot(None),
+                or_(
+                    models.Puja.date < today,
+                    and_(models.Puja.date == today, models.Puja.time < now.time()),
+                ),
+            ),
+        )
+        expired = db.query(models.Puja).filter(
+            models.Puja.is_active.is_(True), due
+        ).update({"is_active": False}, synchronize_session=False)
+        db.commit()
+        if expired:
+            catalog_cache.invalidate("pujas")
+        return expired
     
     @staticmethod
     def create_puja(db: Session, puja: schemas.PujaCreate) -> models.Puja:
@@ -188,6 +208,7 @@ class PujaCRUD:
         # Coerce is_active to a proper bool and provide default False if missing
         puja_data['is_active'] = bool(puja_data.get('is_active', False))
         db_puja = models.Puja(**puja_data)
+        db_puja.expires_at = _puja_expires_at(db_puja.date, db_puja.time)
         db.add(db_puja)
         db.commit()
         db.refresh(db_puja)
@@ -219,6 +240,7 @@ class PujaCRUD:
                     db_puja.puja_chadawas.append(db_pc)
 
         db.commit()
+        catalog_cache.invalidate("pujas")
         db.refresh(db_puja)
         return db_puja
     
@@ -285,8 +307,11 @@ class PujaCRUD:
         # Set remaining simple fields
         for field, value in update_data.items():
             setattr(db_puja, field, value)
+        if 'date' in update_data or 'time' in update_data:
+            db_puja.expires_at = _puja_expires_at(db_puja.date, db_puja.time)
 
         db.commit()
+        catalog_cache.invalidate("pujas")
         db.refresh(db_puja)
         return db_puja
     
@@ -304,6 +329,7 @@ class PujaCRUD:
         # Finally delete the Puja itself
         db.query(models.Puja).filter(models.Puja.id == puja_id).delete(synchronize_session=False)
         db.commit()
+        catalog_cache.invalidate("pujas")
         return True
 
 
@@ -322,6 +348,7 @@ class PlanCRUD:
         db_plan = models.Plan(**plan.dict())
         db.add(db_plan)
         db.commit()
+        catalog_cache.invalidate("plans")
         db.refresh(db_plan)
         return db_plan
     
@@ -336,6 +363,7 @@ class PlanCRUD:
             setattr(db_plan, field, value)
         
         db.commit()
+        catalog_cache.invalidate("plans")
         db.refresh(db_plan)
         return db_plan
     
@@ -347,6 +375,7 @@ class PlanCRUD:
         
         db.delete(db_plan)
         db.commit()
+        catalog_cache.invalidate("plans")
         return True
 
 
@@ -365,6 +394,7 @@ class ChadawaCRUD:
         db_chadawa = models.Chadawa(**chadawa.dict())
         db.add(db_chadawa)
         db.commit()
+        catalog_cache.invalidate("chadawas")
         db.refresh(db_chadawa)
         return db_chadawa
     
@@ -379,6 +409,7 @@ class ChadawaCRUD:
             setattr(db_chadawa, field, value)
         
         db.commit()
+        catalog_cache.invalidate("chadawas")
         db.refresh(db_chadawa)
         return db_chadawa
     
@@ -390,6 +421,7 @@ class ChadawaCRUD:
         
         db.delete(db_chadawa)
         db.commit()
+        catalog_cache.invalidate("chadawas")
         return True
 
 
@@ -403,6 +435,16 @@ class TempleCRUD:
     def get_temples(db: Session, skip: int = 0, limit: int = 100) -> List[models.temple]:
         return db.query(models.temple).offset(skip).limit(limit).all()
 
+    @staticmethod
+    async def get_temple_async(db: AsyncSession, temple_id: int) -> Optional[models.temple]:
+        stmt = select(models.temple).options(*_temple_response_options(Load(models.temple)))
+        return (await db.scalars(stmt.where(models.temple.id == temple_id))).first()
+
+    @staticmethod
+    async def get_temples_async(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[models.temple]:
+        stmt = select(models.temple).options(*_temple_response_options(Load(models.temple)))
+        return (await db.scalars(stmt.offset(skip).limit(limit))).all()
+
     @staticmethod
     def create_temple(db: Session, temple: 'schemas.TempleCreate') -> models.temple:
         # create base temple
@@ -428,6 +470,7 @@ class TempleCRUD:
                 db_temple.chadawas.append(c)
 
         db.commit()
+        catalog_cache.invalidate("temples")
         db.refresh(db_temple)
         return db_temple
 
@@ -458,6 +501,7 @@ class TempleCRUD:
             setattr(db_temple, field, value)
 
         db.commit()
+        catalog_cache.invalidate("temples")
         db.refresh(db_temple)
         return db_temple
 
@@ -468,6 +512,7 @@ class TempleCRUD:
             return False
         db.delete(db_temple)
         db.commit()
+        catalog_cache.invalidate("temples")
         return True
 
     @staticmethod
@@ -480,25 +525,109 @@ class TempleCRUD:
             pujas = db.query(models.Puja).filter(models.Puja.id.in_(puja_ids)).all()
             db_temple.recommended_pujas = pujas
         db.commit()
+        catalog_cache.invalidate("temples")
         db.refresh(db_temple)
         return db_temple
 
 
+# Eager-loading option sets for the nested Puja/Temple payloads
+def _puja_response_options(path):
+    """Loader options for everything PujaResponse serializes below ``path``."""
+    return [
+        path.selectinload(models.Puja.images),
+        path.selectinload(models.Puja.benefits),
+        path.selectinload(models.Puja.plan_ids),
+    ]
+
+
+def _temple_response_options(path):
+    """Loader options for everything TempleResponse serializes below ``path``."""
+    recommended = path.selectinload(models.temple.recommended_pujas)
+    return [
+        recommended,
+        *_puja_response_options(recommended),
+        path.selectinload(models.temple.chadawas),
+    ]
+
+
+# Named load profiles for booking queries. Each profile lists the relationships
+# its consumers read so they are fetched with a fixed number of SELECT ... IN
+# queries per page instead of one lazy load per row.
+BOOKING_LOAD_PROFILES = {
+    # Everything BookingResponse serializes (listing and detail endpoints)
+    "response": [
+        selectinload(models.Booking.user),
+        selectinload(models.Booking.puja),
+        *_puja_response_options(selectinload(models.Booking.puja)),
+        selectinload(models.Booking.temple),
+        *_temple_response_options(selectinload(models.Booking.temple)),
+        selectinload(models.Booking.plan),
+        selectinload(models.Booking.booking_chadawas).selectinload(models.BookingChadawa.chadawa),
+    ],
+}
+
+
 # Booking CRUD operations
 class BookingCRUD:
     @staticmethod
-    def get_booking(db: Session, booking_id: int) -> Optional[models.Booking]:
-        return db.query(models.Booking).filter(models.Booking.id == booking_id).first()
+    def load_options(profile: str) -> list:
+        """Return the loader options for a named booking load profile."""
+        try:
+            return BOOKING_LOAD_PROFILES[profile]
+        except KeyError:
+            raise ValueError(f"Unknown booking load profile: {profile}")
+
+    @staticmethod
+    def query(db: Session, profile: Optional[str] = "response"):
+        """Base booking query with the given load profile applied."""
+        query = db.query(models.Booking)
+        if profile:
+            query = query.options(*BookingCRUD.load_options(profile))
+        return query
+
+    @staticmethod
+    def select(profile: Optional[str] = "response"):
+        """``select()`` counterpart of query() for AsyncSession callers."""
+        stmt = select(models.Booking)
+        if profile:
+            stmt = stmt.options(*BookingCRUD.load_options(profile))
+        return stmt
+
+    @staticmethod
+    def get_booking(db: Session, booking_id: int, profile: Optional[str] = None) -> Optional[models.Booking]:
+        return BookingCRUD.query(db, profile).filter(models.Booking.id == booking_id).first()
     
     @staticmethod
     def get_bookings(db: Session, skip: int = 0, limit: int = 100, user_id: Optional[int] = None) -> List[models.Booking]:
-        query = db.query(models.Booking)
+        query = BookingCRUD.query(db)
         if user_id:
             query = query.filter(models.Booking.user_id == user_id)
         return query.offset(skip).limit(limit).all()
+
+    @staticmethod
+    async def get_booking_async(db: AsyncSession, booking_id: int, profile: Optional[str] = "response") -> Optional[models.Booking]:
+        return (await db.scalars(BookingCRUD.select(profile).where(models.Booking.id == booking_id))).first()
+
+    @staticmethod
+    async def get_bookings_async(db: AsyncSession, skip: int = 0, limit: int = 100,
+                                 user_id: Optional[int] = None) -> List[models.Booking]:
+        stmt = BookingCRUD.select()
+        if user_id:
+            stmt = stmt.where(models.Booking.user_id == user_id)
+        return (await db.scalars(stmt.offset(skip).limit(limit))).all()
     
     @staticmethod
-    def create_booking(db: Session, booking: schemas.BookingCreate, user_id: int) -> models.Booking:
+    def create_booking(db: Session, booking: schemas.BookingCreate, user_id: int,
+                       resolved: Optional[ResolvedBooking] = None) -> models.Booking:
+        """Persist a booking with its price snapshot.
+
+        ``resolved`` is the result of app.pricing.resolve_booking_items() the
+        caller validated the booking with; without it the items are resolved
+        leniently here.
+        """
+        if resolved is None:
+            resolved = resolve_booking_items(db, booking, strict=False)
+
         # Defensive normalization: treat falsy or non-positive IDs as None to avoid FK errors
         puja_id = booking.puja_id if getattr(booking, 'puja_id', None) and int(getattr(booking, 'puja_id', 0)) > 0 else None
         temple_id = booking.temple_id if getattr(booking, 'temple_id', None) and int(getattr(booking, 'temple_id', 0)) > 0 else None
@@ -514,6 +643,7 @@ class BookingCRUD:
             whatsapp_number=getattr(booking, 'whatsapp_number', None),
             gotra=getattr(booking, 'gotra', None),
         )
+        apply_snapshot(db_booking, resolved)
         db.add(db_booking)
         db.flush()  # Get the booking ID
         
@@ -603,12 +733,18 @@ class PujaBenefitCRUD:
     @staticmethod
     def get_puja_benefits(db: Session, puja_id: int) -> List[models.PujaBenefit]:
         return db.query(models.PujaBenefit).filter(models.PujaBenefit.puja_id == puja_id).all()
+
+    @staticmethod
+    async def get_puja_benefits_async(db: AsyncSession, puja_id: int) -> List[models.PujaBenefit]:
+        stmt = select(models.PujaBenefit).where(models.PujaBenefit.puja_id == puja_id)
+        return (await db.scalars(stmt)).all()
     
     @staticmethod
     def create_puja_benefit(db: Session, benefit: schemas.PujaBenefitCreate) -> models.PujaBenefit:
         db_benefit = models.PujaBenefit(**benefit.dict())
         db.add(db_benefit)
         db.commit()
+        catalog_cache.invalidate("pujas")
         db.refresh(db_benefit)
         return db_benefit
     
@@ -620,6 +756,7 @@ class PujaBenefitCRUD:
         
         db.delete(db_benefit)
         db.commit()
+        catalog_cache.invalidate("pujas")
         return True
 
 
@@ -635,6 +772,14 @@ class CategoryCRUD:
         if active_only:
             query = query.filter(models.Category.is_active == True)
         return query.offset(skip).limit(limit).all()
+
+    @staticmethod
+    async def get_categories_async(db: AsyncSession, skip: int = 0, limit: int = 100,
+                                   active_only: bool = True) -> List[models.Category]:
+        stmt = select(models.Category)
+        if active_only:
+            stmt = stmt.where(models.Category.is_active == True)
+        return (await db.scalars(stmt.offset(skip).limit(limit))).all()
     
     @staticmethod
     def create_category(db: Session, category: schemas.CategoryCreate) -> models.Category:
@@ -705,7 +850,7 @@ class BlogCRUD:
             query = query.filter(models.Blog.is_featured == True)
         
         if category_id:
-            query = query.filter(models.Blog.category_id == category_id)
+            query = query.filter(models.Blog.categories.any(models.Category.id == category_id))
         
         return query.order_by(models.Blog.created_at.desc()).offset(skip).limit(limit).all()
     
@@ -798,6 +943,64 @@ class BlogCRUD:
             )
         ).order_by(models.Blog.created_at.desc()).offset(skip).limit(limit).all()
 
+    # Async reads for the public blog routes. BlogResponse serializes the
+    # categories and author, so both are eager-loaded.
+    @staticmethod
+    def _blog_select():
+        return select(models.Blog).options(
+            selectinload(models.Blog.categories),
+            selectinload(models.Blog.author),
+        )
+
+    @staticmethod
+    def _published():
+        return or_(models.Blog.publish_time.is_(None), models.Blog.publish_time <= datetime.now())
+
+    @staticmethod
+    async def get_blog_async(db: AsyncSession, blog_id: int) -> Optional[models.Blog]:
+        stmt = BlogCRUD._blog_select().where(models.Blog.id == blog_id, models.Blog.is_active == True)
+        return (await db.scalars(stmt)).first()
+
+    @staticmethod
+    async def get_blog_by_slug_async(db: AsyncSession, slug: str) -> Optional[models.Blog]:
+        stmt = BlogCRUD._blog_select().where(models.Blog.slug == slug, models.Blog.is_active == True)
+        return (await db.scalars(stmt)).first()
+
+    @staticmethod
+    async def get_blogs_async(db: AsyncSession, skip: int = 0, limit: int = 100, featured_only: bool = False,
+                              category_id: Optional[int] = None, published_only: bool = True) -> List[models.Blog]:
+        stmt = BlogCRUD._blog_select().where(models.Blog.is_active == True)
+        if published_only:
+            stmt = stmt.where(BlogCRUD._published())
+        if featured_only:
+            stmt = stmt.where(models.Blog.is_featured == True)
+        if category_id:
+            stmt = stmt.where(models.Blog.categories.any(models.Category.id == category_id))
+        stmt = stmt.order_by(models.Blog.created_at.desc()).offset(skip).limit(limit)
+        return (await db.scalars(stmt)).all()
+
+    @staticmethod
+    async def get_admin_blogs_async(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[models.Blog]:
+        """Get all blogs for admin (including inactive and scheduled)"""
+        stmt = BlogCRUD._blog_select().order_by(models.Blog.created_at.desc()).offset(skip).limit(limit)
+        return (await db.scalars(stmt)).all()
+
+    @staticmethod
+    async def search_blogs_async(db: AsyncSession, search_term: str, skip: int = 0, limit: int = 100) -> List[models.Blog]:
+        """Search blogs by title, subtitle, or content"""
+        pattern = f"%{search_term}%"
+        stmt = BlogCRUD._blog_select().where(
+            models.Blog.is_active == True,
+            BlogCRUD._published(),
+            or_(
+                models.Blog.title.ilike(pattern),
+                models.Blog.subtitle.ilike(pattern),
+                models.Blog.content.ilike(pattern),
+                models.Blog.tags.ilike(pattern)
+            )
+        ).order_by(models.Blog.created_at.desc()).offset(skip).limit(limit)
+        return (await db.scalars(stmt)).all()
+
 
 # PujaPlan CRUD operations
 class PujaPlanCRUD:
@@ -806,6 +1009,7 @@ class PujaPlanCRUD:
         db_puja_plan = models.PujaPlan(**puja_plan.dict())
         db.add(db_puja_plan)
         db.commit()
+        catalog_cache.invalidate("pujas")
         db.refresh(db_puja_plan)
         return db_puja_plan
 
@@ -820,8 +1024,216 @@ class PujaPlanCRUD:
             db_puja_plan = models.PujaPlan(puja_id=puja_id, plan_id=plan_id)
             db.add(db_puja_plan)
         db.commit()
+        catalog_cache.invalidate("pujas")
 
     @staticmethod
     def delete_puja_plans(db: Session, puja_id: int):
         db.query(models.PujaPlan).filter(models.PujaPlan.puja_id == puja_id).delete()
         db.commit()
+        catalog_cache.invalidate("pujas")
+
+
+# WhatsApp campaign CRUD operations
+class WhatsAppCampaignCRUD:
+    @staticmethod
+    def create_campaign(db: Session, template_name: str, template_params: Optional[List[str]],
+                        media_url: Optional[str], recipients: List[tuple],
+                        created_by: Optional[int] = None) -> models.WhatsAppCampaign:
+        """Create a queued campaign with one pending row per ``(phone, normalized_phone)``."""
+        db_campaign = models.WhatsAppCampaign(
+            template_name=template_name,
+            template_params=template_params,
+            media_url=media_url,
+            total_recipients=len(recipients),
+            created_by=created_by,
+        )
+        db.add(db_campaign)
+        db.flush()
+        db.execute(insert(models.WhatsAppCampaignRecipient), [
+            {"campaign_id": db_campaign.id, "phone": phone, "normalized_phone": normalized,
+             "status": models.CampaignRecipientStatus.PENDING.value}
+            for phone, normalized in recipients
+        ])
+        db.commit()
+        db.refresh(db_campaign)
+        return db_campaign
+
+    @staticmethod
+    def create_campaign_from_audience(db: Session, audience: models.WhatsAppAudience, template_name: str,
+                                      template_params: Optional[List[str]], media_url: Optional[str],
+                                      created_by: Optional[int] = None) -> models.WhatsAppCampaign:
+        """Create a queued campaign with one pending row per audience member, copied by INSERT ... SELECT."""
+        db_campaign = models.WhatsAppCampaign(
+            template_name=template_name,
+            template_params=template_params,
+            media_url=media_url,
+            total_recipients=audience.member_count,
+            created_by=created_by,
+        )
+        db.add(db_campaign)
+        db.flush()
+        member = models.WhatsAppAudienceMember
+        db.execute(insert(models.WhatsAppCampaignRecipient).from_select(
+            ["campaign_id", "phone", "normalized_phone", "template_params", "status"],
+            select(
+                literal(db_campaign.id), member.phone, member.normalized_phone, member.template_params,
+                literal(models.CampaignRecipientStatus.PENDING.value),
+            ).where(member.audience_id == audience.id).order_by(member.id)
+        ))
+        db.commit()
+        db.refresh(db_campaign)
+        return db_campaign
+
+    @staticmethod
+    def get_campaign(db: Session, campaign_id: int) -> Optional[models.WhatsAppCampaign]:
+        return db.get(models.WhatsAppCampaign, campaign_id)
+
+    @staticmethod
+    def delete_campaign(db: Session, campaign_id: int) -> None:
+        """Delete a campaign and its recipients with two bulk DELETEs (no rows are loaded) and commit."""
+        # Explicit rather than relying on ON DELETE CASCADE, which SQLite only enforces with foreign_keys on
+        db.query(models.WhatsAppCampaignRecipient).filter(
+            models.WhatsAppCampaignRecipient.campaign_id == campaign_id
+        ).delete(synchronize_session=False)
+        db.query(models.WhatsAppCampaign).filter(
+            models.WhatsAppCampaign.id == campaign_id
+        ).delete(synchronize_session=False)
+        db.commit()
+
+    @staticmethod
+    def iter_chunk_bounds(db: Session, campaign_id: int, size: int) -> Iterator[tuple]:
+        """
+        ``(after_id, last_id)`` of each run of ``size`` recipients in id order, streamed.
+        
+        Only the id closing each chunk comes back from the database (a window
+        query), so the recipient list itself is never loaded.
+        """
+        recipient = models.WhatsAppCampaignRecipient
+        numbered = select(
+            recipient.id,
+            func.row_number().over(order_by=recipient.id).label("position"),
+            func.count().over().label("total"),
+        ).where(recipient.campaign_id == campaign_id).subquery()
+        ends = select(numbered.c.id).where(
+            or_(numbered.c.position % size == 0, numbered.c.position == numbered.c.total)
+        ).order_by(numbered.c.id)
+        after_id = 0
+        for last_id in db.execute(ends.execution_options(yield_per=1000)).scalars():
+            yield after_id, last_id
+            after_id = last_id
+
+    @staticmethod
+    def _chunk_filter(campaign_id: int, after_id: int, last_id: int):
+        recipient = models.WhatsAppCampaignRecipient
+        return (
+            recipient.campaign_id == campaign_id,
+            recipient.id > after_id,
+            recipient.id <= last_id,
+            recipient.status == models.CampaignRecipientStatus.PENDING.value,
+        )
+
+    @staticmethod
+    def get_pending_recipients(db: Session, campaign_id: int, after_id: int,
+                               last_id: int) -> List[models.WhatsAppCampaignRecipient]:
+        """Pending recipients of the chunk ``after_id < id <= last_id``, by keyset."""
+        return db.query(models.WhatsAppCampaignRecipient).filter(
+            *WhatsAppCampaignCRUD._chunk_filter(campaign_id, after_id, last_id)
+        ).order_by(models.WhatsAppCampaignRecipient.id).all()
+
+    @staticmethod
+    def fail_pending_recipients(db: Session, campaign_id: int, after_id: int, last_id: int, error: str) -> int:
+        """Mark the still-pending recipients of a chunk errored. Returns how many were."""
+        updated = db.query(models.WhatsAppCampaignRecipient).filter(
+            *WhatsAppCampaignCRUD._chunk_filter(campaign_id, after_id, last_id)
+        ).update({"status": models.CampaignRecipientStatus.ERROR.value, "error": error,
+                  "sent_at": get_ist_now()}, synchronize_session=False)
+        db.commit()
+        return updated
+
+    @staticmethod
+    def get_status_counts(db: Session, campaign_id: int) -> dict:
+        """Recipients per status, e.g. ``{"pending": 10, "success": 85, "failed": 5}``."""
+        rows = db.query(
+            models.WhatsAppCampaignRecipient.status, func.count(models.WhatsAppCampaignRecipient.id)
+        ).filter(
+            models.WhatsAppCampaignRecipient.campaign_id == campaign_id
+        ).group_by(models.WhatsAppCampaignRecipient.status).all()
+        return {status: count for status, count in rows}
+
+    @staticmethod
+    def complete_if_done(db: Session, campaign_id: int) -> bool:
+        """Mark the campaign completed once no recipient is pending. Safe to call from every chunk."""
+        pending = db.query(models.WhatsAppCampaignRecipient.id).filter(
+            models.WhatsAppCampaignRecipient.campaign_id == campaign_id,
+            models.WhatsAppCampaignRecipient.status == models.CampaignRecipientStatus.PENDING.value
+        ).first()
+        if pending is not None:
+            return False
+        updated = db.query(models.WhatsAppCampaign).filter(
+            models.WhatsAppCampaign.id == campaign_id,
+            models.WhatsAppCampaign.status != models.CampaignStatus.COMPLETED.value
+        ).update({"status": models.CampaignStatus.COMPLETED.value, "completed_at": get_ist_now()},
+                 synchronize_session=False)
+        db.commit()
+        return updated > 0
+
+
+class WhatsAppAudienceCRUD:
+    @staticmethod
+    def create_audience(db: Session, name: str, source_filename: Optional[str] = None,
+                        created_by: Optional[int] = None) -> models.WhatsAppAudience:
+        db_audience = models.WhatsAppAudience(name=name, source_filename=source_filename, created_by=created_by)
+        db.add(db_audience)
+        db.commit()
+        db.refresh(db_audience)
+        return db_audience
+
+    @staticmethod
+    def get_audience(db: Session, audience_id: int) -> Optional[models.WhatsAppAudience]:
+        return db.get(models.WhatsAppAudience, audience_id)
+
+    @staticmethod
+    def get_audiences(db: Session, skip: int = 0, limit: int = 100) -> List[models.WhatsAppAudience]:
+        return db.query(models.WhatsAppAudience).order_by(models.WhatsAppAudience.id.desc()).offset(skip).limit(limit).all()
+
+    @staticmethod
+    def add_members(db: Session, members: List[dict]) -> None:
+        """Insert one batch of member rows (audience_id, phone, normalized_phone, template_params) and commit."""
+        if members:
+            db.execute(insert(models.WhatsAppAudienceMember), members)
+            db.commit()
+
+    @staticmethod
+    def add_unique_members(db: Session, members: List[dict]) -> None:
+        """Insert one batch of member rows, skipping numbers already in the audience. Does not commit."""
+        if not members:
+            return
+        stmt = dialect_insert(db, models.WhatsAppAudienceMember)
+        db.execute(stmt.on_conflict_do_nothing(index_elements=["audience_id", "normalized_phone"]), members)
+
+    @staticmethod
+    def count_members(db: Session, audience_id: int) -> int:
+        return db.scalar(
+            select(func.count(models.WhatsAppAudienceMember.id))
+            .where(models.WhatsAppAudienceMember.audience_id == audience_id)
+        )
+
+    @staticmethod
+    def mark_ready(db: Session, audience: models.WhatsAppAudience, total_rows: int, member_count: int,
+                   invalid_count: int, duplicate_count: int) -> None:
+        audience.status = models.AudienceStatus.READY.value
+        audience.total_rows = total_rows
+        audience.member_count = member_count
+        audience.invalid_count = invalid_count
+        audience.duplicate_count = duplicate_count
+        db.commit()
+
+    @staticmethod
+    def mark_failed(db: Session, audience: models.WhatsAppAudience, error: str) -> None:
+        """Drop the members imported so far; a failed audience cannot be sent to."""
+        db.query(models.WhatsAppAudienceMember).filter(
+            models.WhatsAppAudienceMember.audience_id == audience.id
+        ).delete(synchronize_session=False)
+        audience.status = models.AudienceStatus.FAILED.value
+        audience.error = error[:1000]
+        db.commit()
@@ -1,14 +1,46 @@
 from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from app.config import settings
+from app.db_metrics import InstrumentedAsyncQueuePool, InstrumentedQueuePool
+
+
+def _pool_kwargs(url, poolclass) -> dict:
+    """Pool sizing and checkout instrumentation from settings (see app.db_metrics)."""
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        # In-memory SQLite must keep its single-connection default pool
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.DATABASE_POOL_SIZE,
+        "max_overflow": settings.DATABASE_MAX_OVERFLOW,
+        "pool_timeout": settings.DATABASE_POOL_TIMEOUT,
+    }
+
+
+# INSERT constructs with ON CONFLICT (upserts, insert-if-absent) per supported backend
+DIALECT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+_sync_url = make_url(settings.DATABASE_URL)
+if _sync_url.get_backend_name() not in DIALECT_INSERTS:
+    # Fail at startup, not on the first upsert
+    raise ValueError(f"Unsupported database backend: {_sync_url.get_backend_name()} (use PostgreSQL or SQLite)")
+_connect_args = {}
+if _sync_url.get_backend_name() == "postgresql" and settings.DATABASE_STATEMENT_TIMEOUT_MS:
+    _connect_args["options"] = f"-c statement_timeout={settings.DATABASE_STATEMENT_TIMEOUT_MS}"
 
 # Enable pool_pre_ping to ensure connections are alive before use and set a pool_recycle
 # to avoid long-lived connections being closed by the server.
 engine = create_engine(
-    settings.DATABASE_URL,
+    _sync_url,
     pool_pre_ping=True,
-    pool_recycle=1800  # recycle connections every 30 minutes
+    pool_recycle=1800,  # recycle connections every 30 minutes
+    connect_args=_connect_args,
+    **_pool_kwargs(_sync_url, InstrumentedQueuePool)
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -20,3 +52,51 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def dialect_insert(db, model):
+    """INSERT into ``model`` for the session's backend, with on_conflict_do_nothing() / on_conflict_do_update()."""
+    return DIALECT_INSERTS[db.get_bind().dialect.name](model)
+
+
+# Async drivers used for the same DATABASE_URL by the async engine
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+def async_database_url(url: str):
+    """Rewrite a sync DATABASE_URL (postgresql://, sqlite://) for its async driver."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database backend: {backend}")
+    url = url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+    if "sslmode" in url.query:
+        # asyncpg takes ``ssl`` instead of libpq's ``sslmode``
+        url = url.difference_update_query(["sslmode"]).update_query_dict({"ssl": url.query["sslmode"]})
+    return url
+
+
+_async_url = async_database_url(settings.DATABASE_URL)
+if _async_url.get_backend_name() == "sqlite":
+    # aiosqlite connections are cheap and each owns a thread; don't pool them
+    async_engine = create_async_engine(_async_url, poolclass=NullPool)
+else:
+    _async_connect_args = {}
+    if settings.DATABASE_STATEMENT_TIMEOUT_MS:
+        _async_connect_args["server_settings"] = {"statement_timeout": str(settings.DATABASE_STATEMENT_TIMEOUT_MS)}
+    async_engine = create_async_engine(
+        _async_url,
+        pool_pre_ping=True,
+        pool_recycle=1800,
+        connect_args=_async_connect_args,
+        **_pool_kwargs(_async_url, InstrumentedAsyncQueuePool)
+    )
+
+# expire_on_commit=False: attributes can't be lazily refreshed on an async session
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+
+async def get_async_db():
+    """Async session for ``async def`` routes. Relationships must be eager-loaded."""
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,190 @@
+"""
+Database connection pool metrics.
+
+Both engines use instrumented pools. They time every checkout, i.e. how
+long a request or task waited for a connection, and they count checkout
+timeouts. pool_stats() adds the live gauges: connections checked out,
+overflow connections in use, and idle connections.
+
+Every process publishes a snapshot to Redis, tagged with PROCESS_TYPE
+(``api`` or ``worker``). /admin/diagnostics/db-pool therefore shows the
+pools of every API and Celery process side by side, which is what
+DATABASE_POOL_SIZE / DATABASE_MAX_OVERFLOW are tuned against per process
+type.
+"""
+import json
+import os
+import socket
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List
+
+import redis
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.config import settings
+from app.log import get_logger
+
+log = get_logger(__name__)
+
+SNAPSHOT_KEY_PREFIX = "db_pool"
+
+
+class CheckoutTimer:
+    """Checkout wait times for one pool: running totals plus a window of recent samples."""
+
+    WINDOW = 1000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=self.WINDOW)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.timeouts = 0
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._recent.append(seconds)
+            self.count += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+
+    def timed_out(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            recent = sorted(self._recent)
+            count, total, longest, timeouts = self.count, self.total, self.max, self.timeouts
+
+        def percentile(p: float) -> float:
+            if not recent:
+                return 0.0
+            return round(recent[min(len(recent) - 1, int(p * len(recent)))] * 1000, 3)
+
+        return {
+            "checkouts": count,
+            "timeouts": timeouts,
+            "avg_ms": round(total / count * 1000, 3) if count else 0.0,
+            "max_ms": round(longest * 1000, 3),
+            # Percentiles over the last WINDOW checkouts
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+        }
+
+
+class _CheckoutTimingMixin:
+    """Times ``_do_get``, the point where a pool hands out or waits for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkout_timer = CheckoutTimer()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.checkout_timer.timed_out()
+            raise
+        self.checkout_timer.observe(time.perf_counter() - started)
+        return connection
+
+
+class InstrumentedQueuePool(_CheckoutTimingMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_stats(pool) -> Dict[str, Any]:
+    """Live gauges and checkout latency for one engine's pool."""
+    stats: Dict[str, Any] = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            # QueuePool reports unused base capacity as negative overflow
+            "overflow": max(0, pool.overflow()),
+            "max_overflow": settings.DATABASE_MAX_OVERFLOW,
+            "timeout_seconds": pool.timeout(),
+        })
+    timer = getattr(pool, "checkout_timer", None)
+    if timer is not None:
+        stats["checkout"] = timer.stats()
+    return stats
+
+
+def snapshot() -> Dict[str, Any]:
+    """Pool metrics of both engines in this process."""
+    from app.database import async_engine, engine
+
+    return {
+        "process_type": settings.PROCESS_TYPE,
+        "host": socket.gethostname(),
+        "pid": os.getpid(),
+        "timestamp": time.time(),
+        "engines": {
+            "sync": pool_stats(engine.pool),
+            "async": pool_stats(async_engine.sync_engine.pool),
+        },
+    }
+
+
+_redis_client = None
+_last_published = 0.0
+_publish_lock = threading.Lock()
+
+
+def _get_redis():
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(settings.REDIS_URL, socket_connect_timeout=0.5, socket_timeout=0.5)
+    return _redis_client
+
+
+def publish() -> None:
+    """Store this process's snapshot in Redis for the diagnostics endpoint."""
+    global _last_published
+    data = snapshot()
+    key = f"{SNAPSHOT_KEY_PREFIX}:{data['process_type']}:{data['host']}:{data['pid']}"
+    # Expire snapshots of processes that stopped publishing
+    ttl = settings.DATABASE_POOL_METRICS_PUBLISH_SECONDS * 3
+    try:
+        _get_redis().set(key, json.dumps(data), ex=ttl)
+    except redis.RedisError as e:
+        log.warning("db_pool.metrics_publish_failed", error=str(e))
+    _last_published = time.monotonic()
+
+
+def maybe_publish() -> None:
+    """publish() at most once per DATABASE_POOL_METRICS_PUBLISH_SECONDS (for per-task hooks)."""
+    if time.monotonic() - _last_published < settings.DATABASE_POOL_METRICS_PUBLISH_SECONDS:
+        return
+    if not _publish_lock.acquire(blocking=False):
+        return
+    try:
+        publish()
+    finally:
+        _publish_lock.release()
+
+
+def published_snapshots() -> List[Dict[str, Any]]:
+    """Latest snapshot of every process that published recently, grouped by process type."""
+    try:
+        client = _get_redis()
+        keys = list(client.scan_iter(match=f"{SNAPSHOT_KEY_PREFIX}:*", count=100))
+        values = client.mget(keys) if keys else []
+    except redis.RedisError as e:
+        log.warning("db_pool.metrics_read_failed", error=str(e))
+        return []
+    snapshots = [json.loads(value) for value in values if value]
+    return sorted(snapshots, key=lambda s: (s["process_type"], s["host"], s["pid"]))
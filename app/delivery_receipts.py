@@ -0,0 +1,235 @@
+"""
+Delivery receipts from messaging providers.
+
+Twilio posts a status callback for every status change of a message
+(queued → sent → delivered / read, or failed / undelivered) to the
+StatusCallback URL set on each send (TWILIO_STATUS_CALLBACK_URL). MSG91
+posts delivery reports to the webhook configured in its panel. The
+endpoints in app.routers.notification_webhooks turn both into receipt rows
+and hand them to ``receipt_writer``. Callbacks arriving together are
+written to the ``notification_deliveries`` table as one batch, so a burst
+costs one upsert per batch and not one transaction per request, and each
+callback is acknowledged only after its batch is committed.
+
+One row per (provider, provider_message_id) holds the latest status. The
+receipts of one message can arrive out of order, so a status only replaces
+one of equal or lower rank (STATUS_RANK). A late "sent" never overwrites
+"delivered".
+
+failure_rates() is what the admin API reports. Nobody has to poll Twilio
+per message SID any more.
+"""
+import asyncio
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from app import models
+from app.config import settings
+from app.database import SessionLocal, dialect_insert
+from app.log import get_logger
+
+log = get_logger(__name__)
+
+# Normalized statuses, by how far a message got
+STATUS_RANK = {
+    "accepted": 0, "queued": 0, "scheduled": 0, "sending": 1, "sent": 2,
+    "delivered": 3, "read": 4,
+    "failed": 4, "undelivered": 4, "canceled": 4,
+}
+FAILED_STATUSES = ("failed", "undelivered")
+FINAL_STATUSES = ("delivered", "read") + FAILED_STATUSES
+
+# MSG91 delivery report status codes
+MSG91_STATUSES = {
+    "1": "delivered", "2": "failed", "8": "sent", "9": "failed",  # 9: NDNC
+    "16": "failed", "17": "failed", "25": "failed", "26": "failed",  # rejected / blocked
+}
+
+Delivery = models.NotificationDelivery
+
+
+def receipt(provider: str, provider_message_id: str, status: str, channel: str,
+            recipient: Optional[str] = None, error_code: Optional[str] = None,
+            error_message: Optional[str] = None) -> Dict:
+    """One receipt row as stored in notification_deliveries."""
+    status = status.lower()
+    return {
+        "provider": provider,
+        "provider_message_id": provider_message_id,
+        "channel": channel,
+        "status": status,
+        "status_rank": STATUS_RANK.get(status, 0),
+        "recipient": recipient,
+        "error_code": error_code or None,
+        "error_message": (error_message or None) and error_message[:500],
+        "updated_at": datetime.now(timezone.utc),
+    }
+
+
+def twilio_receipt(params: Dict[str, str]) -> Optional[Dict]:
+    """Receipt from the form fields of a Twilio status callback, or None if it has no SID/status."""
+    sid = params.get("MessageSid") or params.get("SmsSid")
+    status = params.get("MessageStatus") or params.get("SmsStatus")
+    if not sid or not status:
+        return None
+    to = params.get("To") or ""
+    channel = "whatsapp" if to.startswith("whatsapp:") else "sms"
+    return receipt("twilio", sid, status, channel, recipient=to.replace("whatsapp:", "") or None,
+                   error_code=params.get("ErrorCode"), error_message=params.get("ErrorMessage"))
+
+
+def msg91_receipts(reports: List[Dict]) -> List[Dict]:
+    """Receipts from an MSG91 delivery report: ``[{"requestId": ..., "report": [{"number", "status", "desc"}]}]``."""
+    rows = []
+    for item in reports:
+        request_id = item.get("requestId") or item.get("request_id")
+        if not request_id:
+            continue
+        for entry in item.get("report") or []:
+            code = str(entry.get("status", ""))
+            status = MSG91_STATUSES.get(code, "sent")
+            rows.append(receipt(
+                "msg91", request_id, status, "sms", recipient=entry.get("number"),
+                error_code=code if status in FAILED_STATUSES else None,
+                error_message=entry.get("desc") if status in FAILED_STATUSES else None,
+            ))
+    return rows
+
+
+def write_receipts(db: Session, rows: List[Dict]) -> int:
+    """Upsert ``rows`` in one statement, keeping the highest-ranked status per message. Returns the rows written."""
+    # Collapse receipts of the same message first; one statement cannot update a row twice
+    latest: Dict[tuple, Dict] = {}
+    for row in rows:
+        key = (row["provider"], row["provider_message_id"])
+        if key not in latest or row["status_rank"] >= latest[key]["status_rank"]:
+            latest[key] = row
+    if not latest:
+        return 0
+    stmt = dialect_insert(db, Delivery).values(list(latest.values()))
+    excluded = stmt.excluded
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["provider", "provider_message_id"],
+        set_={
+            "status": excluded.status,
+            "status_rank": excluded.status_rank,
+            "error_code": func.coalesce(excluded.error_code, Delivery.error_code),
+            "error_message": func.coalesce(excluded.error_message, Delivery.error_message),
+            "recipient": func.coalesce(excluded.recipient, Delivery.recipient),
+            "updated_at": excluded.updated_at,
+        },
+        where=excluded.status_rank >= Delivery.status_rank,
+    )
+    db.execute(stmt)
+    db.commit()
+    return len(latest)
+
+
+class ReceiptWriter:
+    """
+    Group commit of webhook receipts: callbacks that arrive close together share one upsert.
+    
+    write() returns only once the caller's rows are committed, so a webhook
+    never acknowledges a receipt that is not in the database. If the upsert
+    fails, every caller in the batch gets the error (the webhook answers 503
+    and the provider retries). A batch is written when
+    DELIVERY_RECEIPT_BATCH_SIZE rows are waiting, or
+    DELIVERY_RECEIPT_FLUSH_SECONDS after its first row.
+    """
+
+    def __init__(self):
+        self._rows: List[Dict] = []
+        self._waiters: List[asyncio.Future] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._writes = set()
+
+    async def write(self, rows: List[Dict]) -> None:
+        """Add ``rows`` to the next batch and wait until it is committed."""
+        if not rows:
+            return
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        self._rows.extend(rows)
+        self._waiters.append(waiter)
+        if len(self._rows) >= settings.DELIVERY_RECEIPT_BATCH_SIZE:
+            self._start_write()
+        elif self._timer is None:
+            self._timer = loop.call_later(settings.DELIVERY_RECEIPT_FLUSH_SECONDS, self._start_write)
+        await waiter
+
+    def _start_write(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        rows, waiters = self._rows, self._waiters
+        self._rows, self._waiters = [], []
+        if rows:
+            task = asyncio.ensure_future(self._write(rows, waiters))
+            self._writes.add(task)  # keep a reference until it is done
+            task.add_done_callback(self._writes.discard)
+
+    @staticmethod
+    async def _write(rows: List[Dict], waiters: List[asyncio.Future]) -> None:
+        try:
+            await asyncio.to_thread(_write_batch, rows)
+        except Exception as e:
+            log.error("receipts.write_failed", rows=len(rows), error=str(e))
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_exception(e)
+            return
+        log.debug("receipts.written", rows=len(rows), requests=len(waiters))
+        for waiter in waiters:
+            if not waiter.done():  # cancelled if the client went away
+                waiter.set_result(None)
+
+
+def _write_batch(rows: List[Dict]) -> None:
+    db = SessionLocal()
+    try:
+        for start in range(0, len(rows), settings.DELIVERY_RECEIPT_BATCH_SIZE):
+            write_receipts(db, rows[start:start + settings.DELIVERY_RECEIPT_BATCH_SIZE])
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+receipt_writer = ReceiptWriter()
+
+
+def failure_rates(db: Session, since: datetime) -> List[Dict]:
+    """Per provider and channel: messages with a final status since ``since``, failures and the failure rate."""
+    failed = func.sum(case((Delivery.status.in_(FAILED_STATUSES), 1), else_=0))
+    rows = (
+        db.query(Delivery.provider, Delivery.channel, func.count(Delivery.id), failed)
+        .filter(Delivery.updated_at >= since, Delivery.status.in_(FINAL_STATUSES))
+        .group_by(Delivery.provider, Delivery.channel)
+        .order_by(Delivery.provider, Delivery.channel)
+        .all()
+    )
+    errors = (
+        db.query(Delivery.provider, Delivery.channel, Delivery.error_code, func.count(Delivery.id))
+        .filter(Delivery.updated_at >= since, Delivery.status.in_(FAILED_STATUSES))
+        .group_by(Delivery.provider, Delivery.channel, Delivery.error_code)
+        .order_by(func.count(Delivery.id).desc())
+        .all()
+    )
+    top_errors: Dict[tuple, List[Dict]] = {}
+    for provider, channel, code, count in errors:
+        top_errors.setdefault((provider, channel), []).append({"error_code": code, "count": count})
+    return [
+        {
+            "provider": provider,
+            "channel": channel,
+            "total": total,
+            "failed": int(failed_count or 0),
+            "failure_rate": round((failed_count or 0) / total, 4) if total else 0.0,
+            "top_errors": top_errors.get((provider, channel), [])[:5],
+        }
+        for provider, channel, total, failed_count in rows
+    ]
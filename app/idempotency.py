@@ -0,0 +1,114 @@
+"""
+Idempotency records for booking notifications.
+
+send_booking_notification retries on any exception, acks late, and can be
+enqueued more than once for the same booking (confirm, verify-payment, and
+outbox redelivery). Without a record, every one of those resends the
+message and Twilio bills for it again.
+
+Each (booking_id, notification_type, channel) gets one row in
+``notification_idempotency``. A sender claims the key before the provider
+call and marks it sent afterwards:
+
+    outcome = idempotency.claim(booking.id, "confirmed", idempotency.WHATSAPP)
+    if outcome == idempotency.CLAIMED:
+        try:
+            sent = deliver(...)
+        except Exception:
+            idempotency.release(booking.id, "confirmed", idempotency.WHATSAPP)
+            raise
+        idempotency.finish(booking.id, "confirmed", idempotency.WHATSAPP, sent)
+
+The unique constraint makes the claim atomic across workers. A claim whose
+worker died mid-send is taken over after NOTIFICATION_CLAIM_TTL_SECONDS. A
+failed send releases the claim, so the task's retry can try again.
+
+Each call commits in its own short session, so a record never depends on
+the caller's transaction.
+"""
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.exc import IntegrityError
+
+from app import models
+from app.config import settings
+from app.database import SessionLocal
+from app.log import get_logger
+
+log = get_logger(__name__)
+
+# Channels
+WHATSAPP = "whatsapp"
+EMAIL = "email"
+
+# claim() outcomes
+CLAIMED = "claimed"          # the caller must send, then finish() or release()
+ALREADY_SENT = "sent"        # an earlier attempt succeeded; skip the channel
+IN_PROGRESS = "in_progress"  # another worker holds a live claim; skip the channel
+
+Key = models.NotificationIdempotencyKey
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _key_filter(booking_id: int, notification_type: str, channel: str):
+    return (Key.booking_id == booking_id, Key.notification_type == notification_type, Key.channel == channel)
+
+
+def claim(booking_id: int, notification_type: str, channel: str) -> str:
+    """Claim the right to send this notification on ``channel``. Returns CLAIMED, ALREADY_SENT or IN_PROGRESS."""
+    now = _utcnow()
+    db = SessionLocal()
+    try:
+        db.add(Key(booking_id=booking_id, notification_type=notification_type, channel=channel,
+                   status=CLAIMED, claimed_at=now))
+        try:
+            db.commit()
+            return CLAIMED
+        except IntegrityError:
+            db.rollback()
+
+        # The key exists: take it over only if its claim has expired
+        stale = now - timedelta(seconds=settings.NOTIFICATION_CLAIM_TTL_SECONDS)
+        taken = (
+            db.query(Key)
+            .filter(*_key_filter(booking_id, notification_type, channel), Key.status == CLAIMED, Key.claimed_at < stale)
+            .update({Key.claimed_at: now}, synchronize_session=False)
+        )
+        db.commit()
+        if taken:
+            log.warning("notification.claim_expired", booking_id=booking_id, kind=notification_type, channel=channel)
+            return CLAIMED
+        status = db.query(Key.status).filter(*_key_filter(booking_id, notification_type, channel)).scalar()
+        return ALREADY_SENT if status == ALREADY_SENT else IN_PROGRESS
+    finally:
+        db.close()
+
+
+def finish(booking_id: int, notification_type: str, channel: str, sent: bool) -> None:
+    """Record the outcome of a claimed send: mark it sent, or release the claim so a retry can send."""
+    if not sent:
+        release(booking_id, notification_type, channel)
+        return
+    db = SessionLocal()
+    try:
+        (db.query(Key)
+         .filter(*_key_filter(booking_id, notification_type, channel))
+         .update({Key.status: ALREADY_SENT, Key.sent_at: _utcnow()}, synchronize_session=False))
+        db.commit()
+    finally:
+        db.close()
+
+
+def release(booking_id: int, notification_type: str, channel: str) -> None:
+    """Drop an unfinished claim so the notification can be sent again."""
+    db = SessionLocal()
+    try:
+        (db.query(Key)
+         .filter(*_key_filter(booking_id, notification_type, channel), Key.status == CLAIMED)
+         .delete(synchronize_session=False))
+        db.commit()
+    finally:
+        db.close()
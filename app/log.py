@@ -0,0 +1,145 @@
+"""
+Structured, leveled logging.
+
+    from app.log import get_logger
+    log = get_logger(__name__)
+
+    log.info("whatsapp.sent", to=phone, sid=msg.sid)
+    log.debug("whatsapp.request", params=msg_params)
+
+Every call is an event name plus key/value fields. The fields ride on the log
+record untouched and are only turned into text by the handler, so a call
+below the configured level costs one level check: no f-string, no json.dumps.
+
+LOG_LEVEL (default INFO) applies to the ``app`` logger tree; LOG_LEVEL=DEBUG
+brings back the full request/message traces. LOG_FORMAT is ``text``
+(key=value) or ``json`` (one object per line, for log shippers).
+
+High-volume events can be sampled with LOG_SAMPLE_RATES, e.g.
+"whatsapp.sent=0.1,campaign.chunk_done=0.5" keeps roughly that fraction of
+those INFO/DEBUG lines. Warnings and errors are never sampled.
+"""
+import json
+import logging
+import random
+import sys
+from typing import Any, Dict
+
+from app.config import settings
+
+# Logger trees that get the structured handler
+LOGGER_ROOTS = ("app", "whatsapp_template_sender")
+
+
+def _parse_sample_rates(spec: str) -> Dict[str, float]:
+    rates = {}
+    for item in spec.split(","):
+        event, sep, rate = item.partition("=")
+        if not sep:
+            continue
+        try:
+            rates[event.strip()] = min(1.0, max(0.0, float(rate)))
+        except ValueError:
+            continue
+    return rates
+
+
+_sample_rates = _parse_sample_rates(settings.LOG_SAMPLE_RATES)
+
+
+class EventLogger:
+    """Thin wrapper over a stdlib logger that logs ``event key=value ...`` records."""
+
+    __slots__ = ("_logger",)
+
+    def __init__(self, name: str):
+        self._logger = logging.getLogger(name)
+
+    def is_enabled_for(self, level: int) -> bool:
+        return self._logger.isEnabledFor(level)
+
+    def _log(self, level: int, event: str, fields: Dict[str, Any], exc_info=False) -> None:
+        if not self._logger.isEnabledFor(level):
+            return
+        if level < logging.WARNING:
+            rate = _sample_rates.get(event)
+            if rate is not None and random.random() >= rate:
+                return
+        self._logger.log(level, event, exc_info=exc_info, stacklevel=3,
+                         extra={"event": event, "fields": fields})
+
+    def debug(self, event: str, **fields) -> None:
+        self._log(logging.DEBUG, event, fields)
+
+    def info(self, event: str, **fields) -> None:
+        self._log(logging.INFO, event, fields)
+
+    def warning(self, event: str, **fields) -> None:
+        self._log(logging.WARNING, event, fields)
+
+    def error(self, event: str, exc_info=False, **fields) -> None:
+        self._log(logging.ERROR, event, fields, exc_info=exc_info)
+
+    def exception(self, event: str, **fields) -> None:
+        self._log(logging.ERROR, event, fields, exc_info=True)
+
+
+def get_logger(name: str) -> EventLogger:
+    return EventLogger(name)
+
+
+def _text_value(value: Any) -> str:
+    if isinstance(value, str):
+        if value and not any(c in value for c in ' "=\n\t'):
+            return value
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, (dict, list, tuple)):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    return str(value)
+
+
+class StructuredFormatter(logging.Formatter):
+    """Formats event records as ``time LEVEL logger event k=v ...`` or one JSON object.
+
+    Plain stdlib records (``logger.info("...")``) are formatted the same way,
+    with their message in place of the event name.
+    """
+
+    def __init__(self, fmt: str = "text"):
+        super().__init__()
+        self.as_json = fmt.lower() == "json"
+
+    def format(self, record: logging.LogRecord) -> str:
+        event = getattr(record, "event", None) or record.getMessage()
+        fields = getattr(record, "fields", None) or {}
+        if self.as_json:
+            data = {"ts": self.formatTime(record), "level": record.levelname, "logger": record.name, "event": event}
+            data.update(fields)
+            if record.exc_info:
+                data["exc"] = self.formatException(record.exc_info)
+            return json.dumps(data, ensure_ascii=False, default=str)
+        line = f"{self.formatTime(record)} {record.levelname} {record.name} {event}"
+        if fields:
+            line += " " + " ".join(f"{key}={_text_value(value)}" for key, value in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+_configured = False
+
+
+def configure_logging() -> None:
+    """Attach the structured handler to the app loggers at LOG_LEVEL. Safe to call more than once."""
+    global _configured
+    if _configured:
+        return
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(StructuredFormatter(settings.LOG_FORMAT))
+    level = settings.LOG_LEVEL.upper()
+    for name in LOGGER_ROOTS:
+        logger = logging.getLogger(name)
+        logger.addHandler(handler)
+        logger.setLevel(level)
+        logger.propagate = False
+    _configured = True
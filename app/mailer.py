@@ -0,0 +1,203 @@
+"""
+Pooled SMTP sending.
+
+Opening an SMTP session costs a TCP connect, the greeting, EHLO, STARTTLS
+(a TLS handshake) and AUTH, i.e. several round trips before the first byte
+of a message. Providers also throttle clients that churn connections. The
+pool keeps authenticated sessions open and hands them out per message:
+
+    smtp_pool.send(msg)                 # one message on a pooled session
+    smtp_pool.send_many(messages)       # a batch over one session
+
+At most SMTP_POOL_SIZE sessions are open per process. Sessions idle for
+longer than SMTP_POOL_MAX_IDLE_SECONDS (servers drop idle clients), or that
+have sent SMTP_MAX_MESSAGES_PER_CONNECTION messages, are replaced. A send on
+a session the server has since closed reconnects and is retried once.
+"""
+import os
+import smtplib
+import threading
+import time
+from email.message import Message
+from typing import List, Optional
+
+from app.config import settings
+from app.log import get_logger
+
+log = get_logger(__name__)
+
+
+def _is_connection_error(exc: Exception) -> bool:
+    """True if the session is unusable, as opposed to this one message being refused."""
+    if isinstance(exc, smtplib.SMTPServerDisconnected):
+        return True
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return exc.smtp_code == 421  # service not available, closing channel
+    # Socket-level failures; SMTPException is itself an OSError subclass
+    return isinstance(exc, OSError) and not isinstance(exc, smtplib.SMTPException)
+
+
+class _Session:
+    def __init__(self, server: smtplib.SMTP):
+        self.server = server
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPPool:
+    """Thread-safe pool of authenticated SMTP sessions to one server."""
+
+    def __init__(self, host: str, port: int, username: str = "", password: str = "", use_tls: bool = True,
+                 size: int = 4, timeout: float = 10, max_idle_seconds: float = 60, max_messages: int = 100):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.size = size
+        self.timeout = timeout
+        self.max_idle_seconds = max_idle_seconds
+        self.max_messages = max_messages
+        self._idle: List[_Session] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+        self._pid = os.getpid()
+        self._stats = {"connects": 0, "reconnects": 0, "messages": 0}
+
+    # ---- sessions --------------------------------------------------------
+    def _open(self) -> _Session:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                server.starttls()
+            if self.username:
+                server.login(self.username, self.password)
+        except Exception:
+            self._close(server)
+            raise
+        with self._lock:
+            self._stats["connects"] += 1
+        return _Session(server)
+
+    @staticmethod
+    def _close(server: smtplib.SMTP) -> None:
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def _usable(self, session: _Session) -> bool:
+        return (session.sent < self.max_messages
+                and time.monotonic() - session.last_used < self.max_idle_seconds)
+
+    def _checkout(self) -> _Session:
+        self._slots.acquire()
+        stale = []
+        session = None
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked child: the idle sockets belong to the parent, forget them
+                self._idle, self._pid = [], os.getpid()
+            while self._idle and session is None:
+                candidate = self._idle.pop()
+                if self._usable(candidate):
+                    session = candidate
+                else:
+                    stale.append(candidate)
+        for old in stale:
+            self._close(old.server)
+        if session is None:
+            try:
+                session = self._open()
+            except Exception:
+                self._slots.release()
+                raise
+        return session
+
+    def _checkin(self, session: Optional[_Session], healthy: bool) -> None:
+        if session is not None:
+            if healthy and session.sent < self.max_messages:
+                with self._lock:
+                    self._idle.append(session)
+            else:
+                self._close(session.server)
+        self._slots.release()
+
+    def _deliver(self, session: _Session, msg: Message, from_addr: Optional[str]) -> _Session:
+        """Send ``msg``; reconnect and retry once if the session was dropped. Returns the session used."""
+        if session.sent >= self.max_messages:
+            # Rotate mid-batch; idle sessions were already replaced at checkout
+            self._close(session.server)
+            session = self._open()
+        try:
+            session.server.send_message(msg, from_addr=from_addr)
+        except Exception as exc:
+            if not _is_connection_error(exc):
+                raise
+            log.info("mail.smtp_reconnect", host=self.host, error=str(exc))
+            self._close(session.server)
+            session = self._open()
+            with self._lock:
+                self._stats["reconnects"] += 1
+            session.server.send_message(msg, from_addr=from_addr)
+        session.sent += 1
+        session.last_used = time.monotonic()
+        with self._lock:
+            self._stats["messages"] += 1
+        return session
+
+    # ---- public API ------------------------------------------------------
+    def send(self, msg: Message, from_addr: Optional[str] = None) -> None:
+        """Send one message on a pooled session. Raises on failure."""
+        session = self._checkout()
+        try:
+            session = self._deliver(session, msg, from_addr)
+        except Exception as exc:
+            self._checkin(session, healthy=not _is_connection_error(exc))
+            raise
+        self._checkin(session, healthy=True)
+
+    def send_many(self, messages: List[Message], from_addr: Optional[str] = None) -> List[bool]:
+        """Send a batch over one session. Returns per-message success; refusals don't stop the batch."""
+        results = []
+        session = self._checkout()
+        try:
+            for msg in messages:
+                try:
+                    session = self._deliver(session, msg, from_addr)
+                    results.append(True)
+                except smtplib.SMTPException as exc:
+                    if _is_connection_error(exc):
+                        raise
+                    log.error("mail.smtp_refused", to=msg.get('To'), error=str(exc))
+                    session.server.rset()
+                    results.append(False)
+        except Exception:
+            self._checkin(session, healthy=False)
+            raise
+        self._checkin(session, healthy=True)
+        return results
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, idle=len(self._idle), size=self.size)
+
+    def close(self) -> None:
+        """Quit every idle session (e.g. on shutdown)."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for session in idle:
+            self._close(session.server)
+
+
+smtp_pool = SMTPPool(
+    host=settings.SMTP_HOST,
+    port=settings.SMTP_PORT,
+    username=settings.SMTP_USERNAME,
+    password=settings.SMTP_PASSWORD,
+    use_tls=settings.SMTP_USE_TLS,
+    size=settings.SMTP_POOL_SIZE,
+    timeout=settings.SMTP_TIMEOUT_SECONDS,
+    max_idle_seconds=settings.SMTP_POOL_MAX_IDLE_SECONDS,
+    max_messages=settings.SMTP_MAX_MESSAGES_PER_CONNECTION,
+)
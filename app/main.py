@@ -2,12 +2,25 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
+import asyncio
 import os
 from app.database import engine
 from app.models import Base
 from app.config import settings
+from app import db_metrics
+from app.log import configure_logging
+from app.pagination import NEXT_CURSOR_HEADER
 from app.routers import auth, users, pujas, plans, chadawas, bookings, payments, admin, uploads, blogs
-from app.routers import temples, products, promo_orders, order_payments, bulk_whatsapp
+from app.routers import temples, products, promo_orders, order_payments, bulk_whatsapp, notification_webhooks
+
+configure_logging()
+
+
+async def publish_pool_metrics():
+    """Report this worker's DB pool metrics for /admin/diagnostics/db-pool."""
+    while True:
+        await asyncio.to_thread(db_metrics.publish)
+        await asyncio.sleep(settings.DATABASE_POOL_METRICS_PUBLISH_SECONDS)
 
 
 @asynccontextmanager
@@ -19,10 +32,12 @@ async def lifespan(app: FastAPI):
     # Create database tables
     Base.metadata.create_all(bind=engine)
     
+    pool_metrics_task = asyncio.create_task(publish_pool_metrics())
+    
     yield
     
     # Shutdown
-    pass
+    pool_metrics_task.cancel()
 
 
 app = FastAPI(
@@ -39,6 +54,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Cross-origin clients can only read response headers listed here
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Mount static files (only if directory exists)
@@ -61,6 +78,7 @@ app.include_router(products.router, prefix="/api/v1")
 app.include_router(promo_orders.router, prefix="/api/v1")
 app.include_router(order_payments.router, prefix="/api/v1")
 app.include_router(bulk_whatsapp.router, prefix="/api/v1")
+app.include_router(notification_webhooks.router, prefix="/api/v1")
 
 
 @app.get("/")
@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, Integer, String, Float, ForeignKey, DateTime, Date, Time, Enum, Table, Text, Numeric
+from sqlalchemy import Boolean, Column, Integer, String, Float, ForeignKey, DateTime, Date, Time, Enum, Table, Text, Numeric, Index, JSON, UniqueConstraint, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -21,6 +21,19 @@ class PaymentStatus(str, enum.Enum):
     REFUNDED = "refunded"
 
 
+class CampaignStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+
+
+class CampaignRecipientStatus(str, enum.Enum):
+    PENDING = "pending"
+    SUCCESS = "success"
+    FAILED = "failed"
+    ERROR = "error"
+
+
 class UserRole(str, enum.Enum):
     SUPER_ADMIN = "super_admin"
     ADMIN = "admin"
@@ -44,6 +57,11 @@ class User(Base):
     # Relationships
     bookings = relationship("Booking", back_populates="user")
     otp_logins = relationship("OTPLogin", back_populates="user")
+
+    __table_args__ = (
+        # Keyset pagination on /users
+        Index("ix_users_created_at_id", "created_at", "id"),
+    )
     
     def __init__(self, **kwargs):
         # Set is_active to True by default for admin roles
@@ -65,6 +83,11 @@ class OTPLogin(Base):
     # Relationships
     user = relationship("User", back_populates="otp_logins")
 
+    __table_args__ = (
+        # OTPCRUD.verify_otp: user_id = ? AND expires_at > now()
+        Index("ix_otp_logins_user_id_expires_at", "user_id", "expires_at"),
+    )
+
 
 class Puja(Base):
     __tablename__ = "pujas"
@@ -75,6 +98,9 @@ class Puja(Base):
     description = Column(Text, nullable=True)
     date = Column(Date, nullable=True)
     time = Column(Time, nullable=True)
+    # date + time combined (UTC, naive); set on create/update so the expiry
+    # sweeper can use a single indexed comparison
+    expires_at = Column(DateTime, nullable=True)
 
     # Temple details
     temple_image_url = Column(String(500), nullable=True)
@@ -144,6 +170,12 @@ class Puja(Base):
         overlaps="puja_chadawas,puja_plans",
     )
 
+    __table_args__ = (
+        # Used by the expiry sweeper (app.tasks.expire_pujas)
+        Index("ix_pujas_is_active_date_time", "is_active", "date", "time"),
+        Index("ix_pujas_is_active_expires_at", "is_active", "expires_at"),
+    )
+
 
 class PujaImage(Base):
     __tablename__ = "puja_images"
@@ -220,6 +252,9 @@ class Booking(Base):
     gotra = Column(String(100), nullable=True)
     status = Column(String(20), default=BookingStatus.PENDING.value, nullable=False)
     puja_link = Column(Text, nullable=True)
+    # Price snapshot taken at booking time (app.pricing.apply_snapshot)
+    amount = Column(Numeric(10, 2), nullable=True)
+    line_items = Column(JSON, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
@@ -230,6 +265,17 @@ class Booking(Base):
     booking_chadawas = relationship("BookingChadawa", back_populates="booking")
     payment = relationship("Payment", back_populates="booking", uselist=False)
 
+    __table_args__ = (
+        # Listings in routers/bookings.py and routers/admin.py; each ends with the
+        # ORDER BY column so filtered pages come straight off the index
+        Index("ix_bookings_booking_date_id", "booking_date", "id"),
+        Index("ix_bookings_status_booking_date", "status", "booking_date"),
+        Index("ix_bookings_puja_id_booking_date", "puja_id", "booking_date"),
+        Index("ix_bookings_temple_id_booking_date", "temple_id", "booking_date"),
+        Index("ix_bookings_user_id", "user_id"),
+        Index("ix_bookings_created_at", "created_at"),
+    )
+
 
 class BookingChadawa(Base):
     __tablename__ = "booking_chadawas"
@@ -243,6 +289,10 @@ class BookingChadawa(Base):
     booking = relationship("Booking", back_populates="booking_chadawas")
     chadawa = relationship("Chadawa", back_populates="booking_chadawas")
 
+    __table_args__ = (
+        Index("ix_booking_chadawas_booking_id", "booking_id"),
+    )
+
 
 class Payment(Base):
     __tablename__ = "payments"
@@ -265,6 +315,11 @@ class Payment(Base):
     # Relationships
     booking = relationship("Booking", back_populates="payment")
 
+    __table_args__ = (
+        Index("ix_payments_booking_id", "booking_id"),
+        Index("ix_payments_razorpay_order_id", "razorpay_order_id"),
+    )
+
 
 # Association table models
 class PujaPlan(Base):
@@ -489,6 +544,11 @@ class Product(Base):
     )
     order_items = relationship("OrderItem", back_populates="product")
 
+    __table_args__ = (
+        # Product listing filters in routers/products.py
+        Index("ix_products_category_id_is_active", "category_id", "is_active"),
+    )
+
 
 class ProductImage(Base):
     __tablename__ = "product_images"
@@ -539,6 +599,11 @@ class PromoCode(Base):
     # Relationships
     orders = relationship("Order", back_populates="promo_code")
 
+    __table_args__ = (
+        # Keyset pagination on /promo-codes
+        Index("ix_promo_codes_created_at_id", "created_at", "id"),
+    )
+
 
 class Order(Base):
     __tablename__ = "orders"
@@ -586,6 +651,12 @@ class Order(Base):
     order_items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
     order_payment = relationship("OrderPayment", back_populates="order", uselist=False)
 
+    __table_args__ = (
+        # /orders (user_id = ? ORDER BY created_at) and /orders/all keyset pagination
+        Index("ix_orders_user_id_created_at", "user_id", "created_at"),
+        Index("ix_orders_created_at_id", "created_at", "id"),
+    )
+
 
 class OrderItem(Base):
     __tablename__ = "order_items"
@@ -629,4 +700,156 @@ class OrderPayment(Base):
     # Relationships
     order = relationship("Order", back_populates="order_payment")
 
+    __table_args__ = (
+        Index("ix_order_payments_order_id", "order_id"),
+        Index("ix_order_payments_razorpay_order_id", "razorpay_order_id"),
+    )
+
+
+class WhatsAppCampaign(Base):
+    """A bulk WhatsApp template send, delivered in the background by app.tasks."""
+    __tablename__ = "whatsapp_campaigns"
+
+    id = Column(Integer, primary_key=True, index=True)
+    template_name = Column(String(100), nullable=False)
+    template_params = Column(JSON, nullable=True)
+    media_url = Column(Text, nullable=True)
+    status = Column(String(20), default=CampaignStatus.QUEUED.value, nullable=False)
+    total_recipients = Column(Integer, nullable=False, default=0)
+    created_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Relationships
+    # Recipients can number tens of thousands: deleting a campaign never loads them
+    recipients = relationship(
+        "WhatsAppCampaignRecipient",
+        back_populates="campaign",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+
+
+class WhatsAppCampaignRecipient(Base):
+    __tablename__ = "whatsapp_campaign_recipients"
+
+    id = Column(Integer, primary_key=True, index=True)
+    campaign_id = Column(Integer, ForeignKey("whatsapp_campaigns.id", ondelete="CASCADE"), nullable=False)
+    phone = Column(String(30), nullable=False)  # as submitted
+    normalized_phone = Column(String(30), nullable=False)
+    template_params = Column(JSON, nullable=True)  # per-recipient values, overriding the campaign's
+    status = Column(String(20), default=CampaignRecipientStatus.PENDING.value, nullable=False)
+    error = Column(Text, nullable=True)
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Relationships
+    campaign = relationship("WhatsAppCampaign", back_populates="recipients")
+
+    __table_args__ = (
+        # Progress counts per campaign (GROUP BY status)
+        Index("ix_whatsapp_campaign_recipients_campaign_id_status", "campaign_id", "status"),
+        # Chunk ranges (app.tasks.enqueue_whatsapp_campaign) and each chunk's keyset scan
+        Index("ix_whatsapp_campaign_recipients_campaign_id_id", "campaign_id", "id"),
+    )
+
+
+class AudienceStatus(str, enum.Enum):
+    IMPORTING = "importing"
+    READY = "ready"
+    FAILED = "failed"
+
+
+class WhatsAppAudience(Base):
+    """A reusable, normalized and deduplicated list of WhatsApp recipients (app.audiences)."""
+    __tablename__ = "whatsapp_audiences"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(150), nullable=False)
+    source_filename = Column(String(255), nullable=True)
+    status = Column(String(20), default=AudienceStatus.IMPORTING.value, nullable=False)
+    param_count = Column(Integer, nullable=False, default=0)  # per-row template parameters
+    total_rows = Column(Integer, nullable=False, default=0)
+    member_count = Column(Integer, nullable=False, default=0)
+    invalid_count = Column(Integer, nullable=False, default=0)
+    duplicate_count = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    created_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationships
+    members = relationship("WhatsAppAudienceMember", back_populates="audience", cascade="all, delete-orphan")
+
+
+class WhatsAppAudienceMember(Base):
+    __tablename__ = "whatsapp_audience_members"
+
+    id = Column(Integer, primary_key=True, index=True)
+    audience_id = Column(Integer, ForeignKey("whatsapp_audiences.id", ondelete="CASCADE"), nullable=False)
+    phone = Column(String(30), nullable=False)  # as uploaded
+    normalized_phone = Column(String(30), nullable=False)
+    template_params = Column(JSON, nullable=True)
 
+    # Relationships
+    audience = relationship("WhatsAppAudience", back_populates="members")
+
+    __table_args__ = (
+        UniqueConstraint("audience_id", "normalized_phone", name="uq_whatsapp_audience_members_phone"),
+    )
+
+
+class OutboxEvent(Base):
+    """A Celery task to publish, written in the same transaction as the change that caused it (app.outbox)."""
+    __tablename__ = "outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    event_type = Column(String(50), nullable=False)
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    available_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)  # pushed back on publish failure
+    dispatched_at = Column(DateTime(timezone=True), nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+
+    __table_args__ = (
+        # The dispatcher's scan: pending events that are due, oldest first
+        Index("ix_outbox_pending", "available_at", "id", postgresql_where=text("dispatched_at IS NULL")),
+    )
+
+
+class NotificationIdempotencyKey(Base):
+    """Idempotency record of one booking notification on one channel (app.idempotency)."""
+    __tablename__ = "notification_idempotency"
+
+    id = Column(Integer, primary_key=True, index=True)
+    booking_id = Column(Integer, ForeignKey("bookings.id"), nullable=False)
+    notification_type = Column(String(20), nullable=False)
+    channel = Column(String(20), nullable=False)
+    status = Column(String(20), nullable=False)  # "claimed" while a worker is sending, then "sent"
+    claimed_at = Column(DateTime(timezone=True), nullable=False)
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint("booking_id", "notification_type", "channel", name="uq_notification_idempotency_key"),
+    )
+
+
+class NotificationDelivery(Base):
+    """Latest delivery status of one provider message, from its status callbacks (app.delivery_receipts)."""
+    __tablename__ = "notification_deliveries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    provider = Column(String(20), nullable=False)  # twilio, msg91
+    provider_message_id = Column(String(64), nullable=False)  # Twilio message SID, MSG91 request id
+    channel = Column(String(20), nullable=False)  # whatsapp, sms
+    status = Column(String(20), nullable=False)
+    status_rank = Column(Integer, nullable=False, default=0)  # receipts may arrive out of order
+    recipient = Column(String(32), nullable=True)
+    error_code = Column(String(20), nullable=True)
+    error_message = Column(String(500), nullable=True)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("provider", "provider_message_id", name="uq_notification_deliveries_message"),
+        # Failure-rate reports: recent receipts by status
+        Index("ix_notification_deliveries_updated_status", "updated_at", "status"),
+    )
@@ -0,0 +1,152 @@
+"""
+Notification context loader.
+
+A booking notification needs the booking, its user, puja (with images),
+plan, temple and chadawas. Lazy loads fetch each of these with its own
+query, and temple's joined recommended pujas and chadawas come along too,
+so one message used to cost 8-15 queries. The session also stayed open
+while Twilio was called.
+
+load_booking_notification() fetches everything in one SELECT with joins
+(NOTIFICATION_LOAD_OPTIONS) and flattens it into a BookingNotification
+right away. That object holds plain values only, so the session is closed
+before any provider I/O starts:
+
+    db = SessionLocal()
+    try:
+        notification = load_booking_notification(db, booking_id)
+    finally:
+        db.close()
+    NotificationService.send_booking_notification(notification, "confirmed")
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
+
+from app import models
+from app.pricing import booking_price
+
+IMAGE_BASE_URL = "https://api.33kotidham.in"
+
+# Everything booking_context() reads, joined into a single SELECT. The temple's
+# own joined collections are not needed and stay lazy.
+NOTIFICATION_LOAD_OPTIONS = [
+    joinedload(models.Booking.user),
+    joinedload(models.Booking.puja).joinedload(models.Puja.images),
+    joinedload(models.Booking.temple).lazyload("*"),
+    joinedload(models.Booking.plan),
+    joinedload(models.Booking.booking_chadawas).joinedload(models.BookingChadawa.chadawa),
+]
+
+
+def normalize_image_url(url: str) -> str:
+    """Normalize image URL by adding base URL if needed."""
+    if not url:
+        return ""
+    if url.startswith("/uploda") or url.startswith("/uploads"):
+        return f"{IMAGE_BASE_URL}{url}"
+    if url.startswith("http"):
+        return url
+    return f"{IMAGE_BASE_URL}/{url}"
+
+
+def format_puja_time(puja_time) -> str:
+    """Puja time (time or "HH:MM:SS") as 12-hour IST, e.g. "06:30 PM IST"."""
+    if not puja_time or puja_time == "N/A":
+        return "N/A"
+    try:
+        if isinstance(puja_time, str):
+            time_obj = datetime.strptime(puja_time, "%H:%M:%S").time()
+        else:
+            time_obj = puja_time
+        return datetime.combine(datetime.today(), time_obj).strftime("%I:%M %p") + " IST"
+    except (TypeError, ValueError):
+        return f"{puja_time} IST"
+
+
+def booking_context(booking: models.Booking) -> dict:
+    """Flat, render-ready values of a booking for app.notification_templates.
+
+    Relationships are read once here; the templates only see strings and
+    lists of plain dicts.
+    """
+    def or_na(value):
+        return "N/A" if value is None or value == "" else value
+
+    puja, plan, temple = booking.puja, booking.plan, booking.temple
+    price = booking_price(booking)
+    gallery = [img.image_url for img in puja.images[:4] if img.image_url] if puja else []
+    return {
+        "booking_id": booking.id,
+        "status": booking.status.upper(),
+        "booking_created": booking.booking_date.strftime('%d-%m-%Y %H:%M') if booking.booking_date else "N/A",
+        "booking_kind": "temple" if temple and not puja else "puja" if puja else "other",
+        "puja_name": or_na(puja.name) if puja else "N/A",
+        "plan_name": or_na(plan.name) if plan else "N/A",
+        "temple_name": or_na(temple.name) if temple else "N/A",
+        "temple_location": or_na(temple.location) if temple else "N/A",
+        "temple_address": or_na(puja.temple_address) if puja else "N/A",
+        "puja_date": str(or_na(puja.date)) if puja else "N/A",
+        "puja_time": format_puja_time(puja.time) if puja else "N/A",
+        "puja_image": normalize_image_url(puja.temple_image_url) if puja else "",
+        "gallery_images": [normalize_image_url(url) for url in gallery],
+        "plan_price": price.plan_price,
+        "total": price.amount,
+        "chadawas": [{"name": item["name"], "price": item["price"]} for item in price.chadawa_items],
+        "gotra": booking.gotra or "N/A",
+        "mobile": booking.mobile_number or "N/A",
+        "whatsapp": booking.whatsapp_number or "N/A",
+    }
+
+
+def booking_contacts(booking: models.Booking) -> tuple:
+    """(email, phone) to notify about a booking; either may be empty."""
+    user = booking.user
+    user_email = (user.email if user else None) or ""
+    user_phone = booking.whatsapp_number or booking.mobile_number or getattr(user, 'mobile', None) or ""
+    return user_email, user_phone
+
+
+class BookingNotification:
+    """Everything a booking notification needs, as plain values (no ORM objects, no session)."""
+
+    __slots__ = ("booking_id", "status", "user_email", "user_phone", "mobile_number", "context")
+
+    def __init__(self, booking_id: int, status: str, user_email: str, user_phone: str,
+                 mobile_number: Optional[str], context: dict):
+        self.booking_id = booking_id
+        self.status = status
+        self.user_email = user_email
+        self.user_phone = user_phone
+        self.mobile_number = mobile_number
+        self.context = context  # booking_context(): what the templates render
+
+    @classmethod
+    def from_booking(cls, booking: models.Booking) -> "BookingNotification":
+        """Flatten a loaded booking. Reads relationships, so the booking's session must still be usable."""
+        user_email, user_phone = booking_contacts(booking)
+        return cls(booking.id, booking.status, user_email, user_phone, booking.mobile_number,
+                   booking_context(booking))
+
+
+def load_booking_notification(db: Session, booking_id: int) -> Optional[BookingNotification]:
+    """Load a booking for notification in one query. Returns None if it does not exist."""
+    booking = (
+        db.query(models.Booking)
+        .options(*NOTIFICATION_LOAD_OPTIONS)
+        .filter(models.Booking.id == booking_id)
+        .first()
+    )
+    return BookingNotification.from_booking(booking) if booking else None
+
+
+async def load_booking_notification_async(db: AsyncSession, booking_id: int) -> Optional[BookingNotification]:
+    """load_booking_notification() for AsyncSession callers."""
+    result = await db.scalars(
+        select(models.Booking).options(*NOTIFICATION_LOAD_OPTIONS).where(models.Booking.id == booking_id)
+    )
+    booking = result.unique().first()
+    return BookingNotification.from_booking(booking) if booking else None
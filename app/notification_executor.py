@@ -0,0 +1,332 @@
+"""
+Asyncio notification executor.
+
+A prefork Celery child handles one notification at a time
+(worker_prefetch_multiplier=1) and is blocked while Twilio answers,
+so notification throughput only grows with the number of processes. This
+executor runs notifications as coroutines on one event loop instead. The
+booking is loaded with the async engine and provider calls share one
+httpx.AsyncClient, so one process keeps hundreds of requests in flight.
+Twilio calls are capped at NOTIFY_TWILIO_CONCURRENCY, and the app.rate_limit
+token buckets still apply. OTP SMS do not come through here; they have their
+own Celery queue (app.tasks.send_otp).
+
+It consumes the ``notifications`` queue in place of a Celery worker:
+
+    python -m app.notification_executor
+
+NotificationConsumer reads the Celery messages of send_booking_notification
+from that queue and acknowledges each one once it has been handled, as
+task_acks_late does. Failures are republished with the task's retry policy.
+What to send is planned by NotificationService.booking_whatsapp_messages,
+exactly as on the Celery path.
+"""
+import asyncio
+import queue
+import signal
+import socket
+import threading
+import time
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import httpx
+from celery.utils.time import get_exponential_backoff_interval
+from kombu import Connection, Exchange, Queue
+from kombu.common import QoS
+
+from app import idempotency
+from app.celery_config import celery_app
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.log import configure_logging, get_logger
+from app.notification_context import load_booking_notification_async
+from app.rate_limit import RateLimitExceeded, rate_limiter
+from app.services import NotificationService
+from app.tasks import send_booking_notification
+from app.twilio_client import MESSAGES_URL, WhatsAppMessage
+
+log = get_logger(__name__)
+
+NOTIFICATIONS_QUEUE = "notifications"
+
+
+def _error_details(response: httpx.Response) -> dict:
+    try:
+        data = response.json()
+    except ValueError:
+        return {"error": response.text}
+    return {"code": data.get("code"), "error": data.get("message") or response.text}
+
+
+def _eta_delay(headers: dict) -> float:
+    """Seconds until a message's ETA (countdown/retry), or 0 if it has none or it is due."""
+    eta = headers.get("eta")
+    if not eta:
+        return 0.0
+    due = datetime.fromisoformat(eta)
+    if due.tzinfo is None:
+        due = due.replace(tzinfo=timezone.utc)
+    return max(0.0, (due - datetime.now(timezone.utc)).total_seconds())
+
+
+class AsyncNotificationExecutor:
+    """Sends notifications over one shared httpx.AsyncClient with a cap on concurrent Twilio calls."""
+
+    def __init__(self, client: Optional[httpx.AsyncClient] = None, twilio_concurrency: Optional[int] = None):
+        twilio_concurrency = twilio_concurrency or settings.NOTIFY_TWILIO_CONCURRENCY
+        self.client = client or httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.TWILIO_READ_TIMEOUT_SECONDS, connect=settings.TWILIO_CONNECT_TIMEOUT_SECONDS),
+            limits=httpx.Limits(max_connections=twilio_concurrency),
+        )
+        self._twilio_slots = asyncio.Semaphore(twilio_concurrency)
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+    @staticmethod
+    async def _take_token(provider: str, sender: str) -> None:
+        # The bucket lives in Redis; keep that round trip off the event loop
+        wait = await asyncio.to_thread(rate_limiter.reserve, provider, sender)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def send_whatsapp(self, message: WhatsAppMessage) -> bool:
+        """Send one message through the Twilio Messages API. Provider errors return False."""
+        await self._take_token("twilio_whatsapp", settings.TWILIO_WHATSAPP_NUMBER)
+        log.debug("whatsapp.request", variant=message.label, params=message.form_data())
+        try:
+            async with self._twilio_slots:
+                response = await self.client.post(
+                    MESSAGES_URL.format(account_sid=settings.TWILIO_ACCOUNT_SID),
+                    data=message.form_data(),
+                    auth=(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN),
+                )
+        except httpx.HTTPError as e:
+            log.error("whatsapp.failed", to=message.to, variant=message.label, error=str(e),
+                      error_type=type(e).__name__)
+            return False
+        if response.is_error:
+            log.error("whatsapp.failed", to=message.to, variant=message.label, status=response.status_code,
+                      **_error_details(response))
+            return False
+        data = response.json()
+        log.info("whatsapp.sent", to=message.to, variant=message.label, sid=data.get("sid"), status=data.get("status"))
+        return True
+
+    async def deliver_whatsapp(self, messages: List[WhatsAppMessage]) -> bool:
+        """Send ``messages`` in order until one is accepted."""
+        for i, message in enumerate(messages):
+            if i:
+                log.info("whatsapp.fallback", to=message.to, variant=message.label)
+            if await self.send_whatsapp(message):
+                return True
+        return False
+
+    async def deliver_whatsapp_once(self, booking_id: int, notification_type: str,
+                                    messages: List[WhatsAppMessage]) -> bool:
+        """deliver_whatsapp() guarded by the idempotency record, as NotificationService.deliver_whatsapp_once."""
+        key = (booking_id, notification_type, idempotency.WHATSAPP)
+        outcome = await asyncio.to_thread(idempotency.claim, *key)
+        if outcome != idempotency.CLAIMED:
+            log.info("whatsapp.skipped", booking_id=booking_id, kind=notification_type, reason=outcome)
+            return outcome == idempotency.ALREADY_SENT
+        try:
+            sent = await self.deliver_whatsapp(messages)
+        except BaseException:
+            await asyncio.to_thread(idempotency.release, *key)
+            raise
+        await asyncio.to_thread(idempotency.finish, *key, sent)
+        return sent
+
+    async def deliver_booking_notification(self, booking_id: int, notification_type: str) -> dict:
+        """Async counterpart of app.tasks.send_booking_notification, with the same result shape."""
+        async with AsyncSessionLocal() as db:
+            notification = await load_booking_notification_async(db, booking_id)
+        if not notification:
+            log.error("notification.booking_not_found", booking_id=booking_id, kind=notification_type)
+            return {"status": "error", "message": "Booking not found"}
+        if notification_type not in ("pending", "confirmed"):
+            log.error("notification.unknown_type", booking_id=booking_id, kind=notification_type)
+            return {"status": "error", "message": f"Unknown notification type: {notification_type}"}
+
+        if not notification.user_email and not notification.user_phone:
+            log.warning("notification.skipped", booking_id=booking_id, kind=notification_type, reason="no_contact_info")
+            return {"status": "skipped", "message": "No contact information available"}
+
+        whatsapp_sent = False
+        if settings.SEND_BOOKING_NOTIFICATIONS:
+            # Email notifications are temporarily disabled (WhatsApp-only mode), as on the Celery path
+            messages = NotificationService.booking_whatsapp_messages(notification, notification_type)
+            if messages:
+                whatsapp_sent = await self.deliver_whatsapp_once(booking_id, notification_type, messages)
+        else:
+            log.info("notification.skipped", booking_id=booking_id, kind=notification_type, reason="disabled")
+
+        log.info("notification.done", booking_id=booking_id, kind=notification_type, whatsapp_sent=whatsapp_sent,
+                 email_sent=False)
+        return {
+            "status": "success",
+            "booking_id": booking_id,
+            "notification_type": notification_type,
+            "result": {"email_sent": False, "whatsapp_sent": whatsapp_sent, "booking_id": booking_id},
+        }
+
+
+class NotificationConsumer:
+    """Runs Celery task messages from the notifications queue on an AsyncNotificationExecutor.
+
+    A kombu consumer on a background thread owns the broker connection. It
+    hands each message to the event loop and acks it there once the
+    coroutine has finished, so up to ``max_in_flight`` messages are
+    processed at the same time. A message with a future ETA (a retry or
+    rate-limit requeue) raises the prefetch count by one while it waits, as
+    the Celery worker does, so waiting messages never take those slots.
+    """
+
+    POLL_SECONDS = 0.2
+
+    def __init__(self, executor: AsyncNotificationExecutor, broker_url: Optional[str] = None,
+                 max_in_flight: Optional[int] = None, queue_name: str = NOTIFICATIONS_QUEUE):
+        self.executor = executor
+        self.broker_url = broker_url or settings.REDIS_URL
+        self.max_in_flight = max_in_flight or settings.NOTIFY_EXECUTOR_MAX_IN_FLIGHT
+        self.queue = Queue(queue_name, Exchange(queue_name), routing_key=queue_name)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopping = threading.Event()
+        self._done: "queue.Queue" = queue.Queue()  # (message, future) handed back to the connection thread
+        # Futures not settled yet. Kept across reconnects: coroutines started on a
+        # lost connection still finish, and their messages are redelivered anyway.
+        self._in_flight: set = set()
+        self._qos: Optional[QoS] = None  # prefetch count of the current connection
+
+    # ---- event loop side ---------------------------------------------------
+    async def handle(self, task_name: str, args: list, kwargs: dict, headers: dict,
+                     qos: Optional[QoS] = None) -> str:
+        """
+        Run one task message. Returns "ack", or "requeue" if it could not be handled or retried.
+
+        ``qos`` is given for an ETA message whose wait raised the prefetch
+        count; it is lowered again once the message is due.
+        """
+        try:
+            delay = _eta_delay(headers)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        finally:
+            if qos is not None:
+                qos.decrement_eventually()
+
+        if task_name != send_booking_notification.name:
+            log.error("executor.unknown_task", task=task_name, queue=self.queue.name)
+            return "ack"
+        try:
+            await self.executor.deliver_booking_notification(*args, **kwargs)
+            return "ack"
+        except Exception as e:
+            return await self._retry(task_name, args, kwargs, headers, e)
+
+    async def _retry(self, task_name: str, args: list, kwargs: dict, headers: dict, error: Exception) -> str:
+        """Republish a failed message with send_booking_notification's retry policy."""
+        task = send_booking_notification
+        retries = headers.get("retries") or 0
+        if isinstance(error, RateLimitExceeded):
+            # Waiting for the provider budget does not use up a retry
+            countdown, next_retries = error.retry_after, retries
+        elif retries >= task.max_retries:
+            log.error("notification.retries_exhausted", task=task_name, args=args, error=str(error))
+            return "ack"
+        else:
+            # Same defaults as Celery's autoretry_for handling
+            countdown = get_exponential_backoff_interval(
+                factor=int(max(1.0, float(getattr(task, "retry_backoff", 1)))), retries=retries,
+                maximum=int(getattr(task, "retry_backoff_max", 600)), full_jitter=getattr(task, "retry_jitter", True),
+            )
+            next_retries = retries + 1
+        log.warning("notification.retry_scheduled", task=task_name, args=args, countdown=countdown,
+                    retries=next_retries, error=str(error))
+        try:
+            await asyncio.to_thread(celery_app.send_task, task_name, args=args, kwargs=kwargs,
+                                    countdown=countdown, retries=next_retries)
+        except Exception as e:
+            log.error("notification.retry_publish_failed", task=task_name, args=args, error=str(e))
+            return "requeue"
+        return "ack"
+
+    # ---- connection thread side --------------------------------------------
+    def _on_message(self, body, message) -> None:
+        headers = message.headers or {}
+        try:
+            args, kwargs, _embed = body
+        except (TypeError, ValueError):
+            log.error("executor.bad_message", task=headers.get("task"), queue=self.queue.name)
+            message.reject()
+            return
+        qos = None
+        if _eta_delay(headers) > 0 and self._qos is not None:
+            qos = self._qos
+            qos.increment_eventually()
+        future = asyncio.run_coroutine_threadsafe(
+            self.handle(headers.get("task"), args, kwargs, headers, qos=qos), self._loop
+        )
+        self._in_flight.add(future)
+        future.add_done_callback(lambda f, m=message: self._done.put((m, f)))
+
+    def _settle(self, timeout: float = 0) -> None:
+        """Ack or requeue the messages whose coroutines have finished."""
+        while True:
+            try:
+                message, future = self._done.get(timeout=timeout)
+            except queue.Empty:
+                return
+            timeout = 0
+            self._in_flight.discard(future)
+            action = "requeue" if future.cancelled() or future.exception() else future.result()
+            try:
+                message.ack() if action == "ack" else message.requeue()
+            except Exception as e:
+                # Connection lost: the broker redelivers unacked messages
+                log.warning("executor.settle_failed", action=action, error=str(e))
+
+    def _consume(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                with Connection(self.broker_url) as conn:
+                    with conn.Consumer(self.queue, callbacks=[self._on_message], accept=["json"],
+                                       prefetch_count=self.max_in_flight) as consumer:
+                        self._qos = QoS(consumer.qos, self.max_in_flight)
+                        self._qos.update()
+                        log.info("executor.consuming", queue=self.queue.name, max_in_flight=self.max_in_flight)
+                        while not self._stopping.is_set():
+                            try:
+                                conn.drain_events(timeout=self.POLL_SECONDS)
+                            except socket.timeout:
+                                pass
+                            self._settle()
+                            if self._qos.prev != self._qos.value:
+                                self._qos.update()
+                    # No new deliveries; finish and ack what is in flight before closing
+                    while self._in_flight:
+                        self._settle(timeout=self.POLL_SECONDS)
+            except Exception as e:
+                log.error("executor.connection_failed", error=str(e), in_flight=len(self._in_flight))
+                time.sleep(1)
+
+    async def run(self) -> None:
+        """Consume until SIGTERM/SIGINT, then drain the messages in flight."""
+        self._loop = asyncio.get_running_loop()
+        stop = asyncio.Event()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            self._loop.add_signal_handler(sig, stop.set)
+        thread = threading.Thread(target=self._consume, name="notification-consumer", daemon=True)
+        thread.start()
+        await stop.wait()
+        log.info("executor.stopping", in_flight=len(self._in_flight))
+        self._stopping.set()
+        await asyncio.to_thread(thread.join)
+        await self.executor.close()
+
+
+if __name__ == "__main__":
+    configure_logging()
+    asyncio.run(NotificationConsumer(AsyncNotificationExecutor()).run())
@@ -0,0 +1,230 @@
+"""
+Precompiled notification templates.
+
+Every notification body is a ``str.format``-style template that is parsed
+once, at import, into literal and field segments. Rendering is a pure
+function of a flat context dict (see NotificationService.booking_context):
+it only joins strings. It never touches the ORM, so it can't trigger
+lazy loads, and it can't fail halfway through a relationship chain.
+
+HTML templates escape every value unless it is SafeHTML, which is what
+rendered HTML fragments (chadawa rows, image blocks) are.
+"""
+from html import escape
+from string import Formatter
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+
+class SafeHTML(str):
+    """Markup that HTML templates insert without escaping."""
+
+
+class CompiledTemplate:
+    """A template parsed once into ``(literal, field, format_spec)`` segments."""
+
+    def __init__(self, name: str, source: str, html: bool = False):
+        self.name = name
+        self.html = html
+        self.segments: List[Tuple[str, Optional[str], str]] = []
+        for literal, field, spec, conversion in Formatter().parse(source):
+            if field is not None and (not field.isidentifier() or conversion):
+                raise ValueError(f"Template {name}: fields must be plain names, got {{{field}}}")
+            self.segments.append((literal, field, spec or ""))
+        self.fields = frozenset(field for _, field, _ in self.segments if field)
+
+    def render(self, context: Mapping[str, Any]) -> str:
+        parts = []
+        for literal, field, spec in self.segments:
+            parts.append(literal)
+            if field is None:
+                continue
+            value = format(context[field], spec)
+            if self.html and not isinstance(context[field], SafeHTML):
+                value = escape(value)
+            parts.append(value)
+        rendered = "".join(parts)
+        return SafeHTML(rendered) if self.html else rendered
+
+
+class TemplateRegistry:
+    def __init__(self):
+        self._templates: Dict[str, CompiledTemplate] = {}
+
+    def register(self, name: str, source: str, html: bool = False) -> CompiledTemplate:
+        if name in self._templates:
+            raise ValueError(f"Template {name} is already registered")
+        template = self._templates[name] = CompiledTemplate(name, source, html=html)
+        return template
+
+    def get(self, name: str) -> CompiledTemplate:
+        return self._templates[name]
+
+    def render(self, name: str, context: Mapping[str, Any]) -> str:
+        return self._templates[name].render(context)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._templates
+
+
+templates = TemplateRegistry()
+
+
+# ---- booking: WhatsApp ---------------------------------------------------
+templates.register("booking.whatsapp", """🙏 Booking Received 🙏
+
+📋 *Booking Reference:* #{booking_id}
+✅ *Status:* {status}
+📅 *Booking Created:* {booking_created}{details_section}
+{pricing_section}
+
+👤 *Your Details:*
+   *Gotra:* {gotra}
+   *Mobile:* {mobile}
+
+🙏 Thank you for choosing 33 Koti Dham! 🙏
+""")
+templates.register("booking.whatsapp.temple_details", """
+🛕 *Temple Details:*
+   *Temple:* {temple_name}
+   📍 *Location:* {temple_location}
+""")
+templates.register("booking.whatsapp.puja_details", """
+🙏 *Puja Details:*
+   *Name:* {puja_name}
+   *Plan:* {plan_name}
+   📍 *Location:* {temple_address}
+   📅 *Puja Date:* {puja_date}
+   ⏰ *Puja Time:* {puja_time}
+""")
+templates.register("booking.whatsapp.temple_pricing", "{chadawa_section}   *Total:* ₹{total}")
+templates.register("booking.whatsapp.puja_pricing", """💰 *Pricing:*
+   *Plan Price:* ₹{plan_price}{chadawa_section}   *Total:* ₹{total}""")
+templates.register("booking.whatsapp.chadawas", "\n🎁 *Selected Offerings(chadawas):*\n{rows}")
+templates.register("booking.whatsapp.chadawa_row", "   • {name}: ₹{price}\n")
+
+
+# ---- booking: email ------------------------------------------------------
+templates.register("booking.email", """
+<div style="font-family: Arial, sans-serif; color: #333; background-color: #fafafa; padding: 20px;">
+    <div style="max-width: 600px; margin: 0 auto; background-color: white; border-radius: 8px; overflow: hidden; box-shadow: 0 2px 8px rgba(0,0,0,0.1);">
+        
+        <div style="background: linear-gradient(135deg, #8B4513 0%, #D2691E 100%); padding: 20px; text-align: center; color: white;">
+            <h2 style="margin: 0; font-size: 24px;">� Booking Received</h2>
+            <p style="margin: 10px 0 0 0; font-size: 14px; opacity: 0.9;">Reference: #{booking_id}</p>
+        </div>
+        
+        <div style="padding: 25px;">
+            <p style="font-size: 16px; margin: 0 0 20px 0;">Dear Valued Customer,</p>
+            
+            <p>Thank you for your booking with <strong>33 Koti Dham</strong>! Your puja booking has been received and is pending confirmation.</p>
+            
+            {image_section}
+            
+            <div style="background-color: #fff8f0; padding: 15px; border-radius: 5px; margin: 15px 0; border-left: 4px solid #8B4513;">
+                <h4 style="color: #8B4513; margin-top: 0;">🙏 Puja Details</h4>
+                <p style="margin: 8px 0;"><strong>Puja Name:</strong> {puja_name}</p>
+                <p style="margin: 8px 0;"><strong>Plan:</strong> {plan_name}</p>
+                <p style="margin: 8px 0;"><strong>Location:</strong> {temple_address}</p>
+                <p style="margin: 8px 0;"><strong>Puja Date:</strong> {puja_date}</p>
+                <p style="margin: 8px 0;"><strong>Puja Time:</strong> {puja_time}</p>
+            </div>
+            
+            <div style="background-color: #f0f8ff; padding: 15px; border-radius: 5px; margin: 15px 0; border-left: 4px solid #4169E1;">
+                <h4 style="color: #4169E1; margin-top: 0;">💰 Pricing Details</h4>
+                <div style="display: flex; justify-content: space-between; padding: 8px 0; border-bottom: 1px solid #e0e0e0;">
+                    <span><strong>Plan:</strong></span>
+                    <span>₹{plan_price}</span>
+                </div>
+                {chadawa_section}
+                <div style="display: flex; justify-content: space-between; padding: 8px 0; color: #4CAF50; font-size: 18px; font-weight: bold;">
+                    <span><strong>Total Amount:</strong></span>
+                    <span>₹{total}</span>
+                </div>
+            </div>
+            
+            <div style="background-color: #fffacd; padding: 15px; border-radius: 5px; margin: 15px 0; border-left: 4px solid #FFD700;">
+                <h4 style="color: #8B4513; margin-top: 0;">👤 Your Details</h4>
+                <p style="margin: 8px 0;"><strong>Gotra:</strong> {gotra}</p>
+                <p style="margin: 8px 0;"><strong>Mobile:</strong> {mobile}</p>
+                <p style="margin: 8px 0;"><strong>WhatsApp:</strong> {whatsapp}</p>
+                <p style="margin: 8px 0;"><strong>Booking Status:</strong> <span style="color: #FF6347; font-weight: bold;">PENDING</span></p>
+            </div>
+            
+            {gallery_section}
+            
+            <div style="background-color: #e8f4f8; padding: 15px; border-radius: 5px; margin: 15px 0; border-left: 4px solid #2196F3;">
+                <ul style="margin: 10px 0; padding-left: 20px;">
+                    <li>Further puja details will be shared with you</li>
+                </ul>
+            </div>
+            
+            <p style="color: #666; font-size: 14px; margin-top: 25px; text-align: center;">
+                <strong>33 Koti Dham Team</strong><br>
+                Bringing Divine Blessings to Your Home 🙏
+            </p>
+        </div>
+    </div>
+</div>
+""", html=True)
+
+templates.register("booking.email.image", """
+            <div style="margin: 20px 0; text-align: center;">
+                <img src="{puja_image}" alt="{puja_name}" style="max-width: 100%; height: auto; border-radius: 8px; box-shadow: 0 2px 8px rgba(0,0,0,0.1);">
+            </div>
+            """, html=True)
+templates.register("booking.email.gallery",
+                   "<div style='margin: 15px 0;'><h4 style='color: #8B4513; margin-bottom: 10px;'>📸 Puja Gallery:</h4>"
+                   "<div style='display: flex; gap: 10px; flex-wrap: wrap;'>{images}</div></div>", html=True)
+templates.register("booking.email.gallery_image",
+                   "<img src='{url}' alt='Puja' style='max-width: 150px; height: 120px; object-fit: cover; border-radius: 5px; box-shadow: 0 1px 3px rgba(0,0,0,0.1);'>",
+                   html=True)
+templates.register("booking.email.chadawas",
+                   '<div style="margin: 10px 0;"><strong>   🎁 Selected Offerings:</strong><br>{rows}</div>', html=True)
+templates.register("booking.email.chadawa_row",
+                   "<div style='display: flex; justify-content: space-between; padding: 6px 0; border-bottom: 1px solid #e8e8e8; font-size: 14px;'>"
+                   "<span style='padding-left: 15px;'>• {name}</span>"
+                   "<span>₹{price}</span>"
+                   "</div>", html=True)
+
+
+def _rows(name: str, items: List[Mapping[str, Any]]) -> str:
+    template = templates.get(name)
+    rendered = "".join(template.render(item) for item in items)
+    return SafeHTML(rendered) if template.html else rendered
+
+
+def render_booking_whatsapp(context: Mapping[str, Any]) -> str:
+    """WhatsApp booking summary (free-form fallback when no Content Template is configured)."""
+    chadawa_section = ""
+    if context["chadawas"]:
+        chadawa_section = templates.render("booking.whatsapp.chadawas", {
+            "rows": _rows("booking.whatsapp.chadawa_row", context["chadawas"])})
+
+    details_section = pricing_section = ""
+    values = dict(context, chadawa_section=chadawa_section)
+    if context["booking_kind"] == "temple":
+        details_section = templates.render("booking.whatsapp.temple_details", values)
+        pricing_section = templates.render("booking.whatsapp.temple_pricing", values)
+    elif context["booking_kind"] == "puja":
+        puja_fields = (context["puja_name"], context["temple_address"], context["puja_date"], context["puja_time"])
+        if any(value != "N/A" for value in puja_fields):
+            details_section = templates.render("booking.whatsapp.puja_details", values)
+        pricing_section = templates.render("booking.whatsapp.puja_pricing", values)
+
+    values.update(details_section=details_section, pricing_section=pricing_section)
+    return templates.render("booking.whatsapp", values).strip()
+
+
+def render_booking_email(context: Mapping[str, Any]) -> str:
+    """HTML booking summary embedded in the booking emails."""
+    image_section = gallery_section = chadawa_section = SafeHTML("")
+    if context["puja_image"]:
+        image_section = templates.render("booking.email.image", context)
+    if context["gallery_images"]:
+        gallery_section = templates.render("booking.email.gallery", {
+            "images": _rows("booking.email.gallery_image", [{"url": url} for url in context["gallery_images"]])})
+    if context["chadawas"]:
+        chadawa_section = templates.render("booking.email.chadawas", {
+            "rows": _rows("booking.email.chadawa_row", context["chadawas"])})
+    return templates.render("booking.email", dict(
+        context, image_section=image_section, gallery_section=gallery_section, chadawa_section=chadawa_section))
@@ -0,0 +1,135 @@
+"""
+Transactional outbox.
+
+Work that must follow a state change (booking notifications) is not
+published to Celery from the request. It is written to the ``outbox`` table
+in the same transaction as the change:
+
+    outbox.add_booking_notification(db, booking_id, "confirmed")
+    crud.BookingCRUD.update_booking(db, booking_id, update)   # commits both
+
+so a request never waits on the broker, and an event exists if and only if
+its change was committed. The dispatcher process (``python -m app.outbox``)
+drains pending events in batches and publishes them as Celery tasks.
+
+Delivery is at least once: a dispatcher that dies after publishing a batch
+but before marking it republishes those events. An event that fails to
+publish is retried with exponential backoff, up to OUTBOX_MAX_BACKOFF_SECONDS.
+"""
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app import models
+from app.celery_config import celery_app
+from app.config import settings
+from app.database import SessionLocal
+from app.log import configure_logging, get_logger
+
+log = get_logger(__name__)
+
+BOOKING_NOTIFICATION = "booking.notification"
+
+# Event type -> Celery task published with the event payload as kwargs
+EVENT_TASKS = {
+    BOOKING_NOTIFICATION: "app.tasks.send_booking_notification",
+}
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def add_event(db: Session, event_type: str, payload: Dict[str, Any]) -> models.OutboxEvent:
+    """Stage an event in the caller's transaction. Does not commit."""
+    if event_type not in EVENT_TASKS:
+        raise ValueError(f"Unknown outbox event type: {event_type}")
+    event = models.OutboxEvent(event_type=event_type, payload=payload, attempts=0)
+    db.add(event)
+    return event
+
+
+def add_booking_notification(db: Session, booking_id: int, notification_type: str) -> models.OutboxEvent:
+    """Stage app.tasks.send_booking_notification(booking_id, notification_type)."""
+    return add_event(db, BOOKING_NOTIFICATION, {"booking_id": booking_id, "notification_type": notification_type})
+
+
+def dispatch_batch(db: Session, batch_size: Optional[int] = None) -> int:
+    """
+    Publish up to ``batch_size`` due events and mark them dispatched.
+
+    Rows are locked with SKIP LOCKED, so several dispatchers can run side by
+    side. A publish failure usually means the broker is down: that event is
+    backed off and the rest of the batch is left for the next poll. Returns
+    the number of events published.
+    """
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    now = _utcnow()
+    events = (
+        db.query(models.OutboxEvent)
+        .filter(models.OutboxEvent.dispatched_at.is_(None), models.OutboxEvent.available_at <= now)
+        .order_by(models.OutboxEvent.available_at, models.OutboxEvent.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    published = 0
+    for event in events:
+        try:
+            celery_app.send_task(EVENT_TASKS[event.event_type], kwargs=event.payload)
+        except Exception as e:
+            event.attempts += 1
+            event.last_error = str(e)[:1000]
+            delay = min(settings.OUTBOX_MAX_BACKOFF_SECONDS, 2 ** event.attempts)
+            event.available_at = now + timedelta(seconds=delay)
+            log.warning("outbox.publish_failed", event_id=event.id, event_type=event.event_type,
+                        attempts=event.attempts, retry_in=delay, error=str(e))
+            break
+        event.dispatched_at = now
+        published += 1
+    db.commit()
+    return published
+
+
+def purge_dispatched(db: Session, older_than_hours: Optional[int] = None) -> int:
+    """Delete events dispatched more than ``older_than_hours`` ago. Returns the number deleted."""
+    hours = settings.OUTBOX_RETENTION_HOURS if older_than_hours is None else older_than_hours
+    cutoff = _utcnow() - timedelta(hours=hours)
+    deleted = (
+        db.query(models.OutboxEvent)
+        .filter(models.OutboxEvent.dispatched_at.isnot(None), models.OutboxEvent.dispatched_at < cutoff)
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return deleted
+
+
+def run(batch_size: Optional[int] = None, poll_seconds: Optional[float] = None) -> None:
+    """Dispatcher loop: drain full batches back to back, sleep when caught up."""
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    poll_seconds = settings.OUTBOX_POLL_SECONDS if poll_seconds is None else poll_seconds
+    log.info("outbox.dispatcher_started", batch_size=batch_size, poll_seconds=poll_seconds)
+    while True:
+        db = SessionLocal()
+        try:
+            published = dispatch_batch(db, batch_size)
+        except Exception as e:
+            log.error("outbox.dispatch_failed", error=str(e))
+            db.rollback()
+            published = 0
+        finally:
+            db.close()
+        if published:
+            log.info("outbox.published", count=published)
+        if published < batch_size:
+            time.sleep(poll_seconds)
+
+
+if __name__ == "__main__":
+    configure_logging()
+    try:
+        run()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,78 @@
+"""
+Opaque keyset (cursor) pagination for the high-volume admin lists.
+
+Pages are ordered newest first on ``(sort_column, id)``. When a page is full,
+the endpoint returns the cursor for the next page in the ``X-Next-Cursor``
+response header. Pass it back as ``?cursor=`` to continue. The cursor turns
+into ``WHERE (sort_column, id) < (:value, :id)``, so every page is an index
+range scan no matter how deep it is. Plain ``skip`` still works when no
+cursor is given.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+CURSOR_DESCRIPTION = "Opaque cursor from the X-Next-Cursor header of the previous page (takes precedence over skip)"
+
+
+def encode_cursor(sort_value: Optional[datetime], row_id: int) -> str:
+    """Encode the last row's sort key into an opaque, URL-safe cursor."""
+    payload = [sort_value.isoformat() if sort_value is not None else None, row_id]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    """Decode a cursor produced by encode_cursor, raising 400 if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_value, row_id = json.loads(raw)
+        return (datetime.fromisoformat(sort_value) if sort_value is not None else None), int(row_id)
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor")
+
+
+def apply_keyset(query, sort_column, id_column, skip: int, limit: int, cursor: Optional[str] = None):
+    """Order ``query`` newest first and restrict it to one page.
+
+    Works with both ``Session.query()`` and ``select()`` statements. One extra
+    row is fetched so finish_page() can tell whether another page exists.
+    """
+    query = query.order_by(sort_column.desc(), id_column.desc())
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        query = query.filter(tuple_(sort_column, id_column) < (sort_value, row_id))
+    else:
+        query = query.offset(skip)
+    return query.limit(limit + 1)
+
+
+def finish_page(rows: List, limit: int, sort_column, response: Response) -> List:
+    """Trim the look-ahead row and set the X-Next-Cursor header when there are more rows."""
+    if len(rows) <= limit:
+        return rows
+    rows = rows[:limit]
+    last = rows[-1]
+    response.headers[NEXT_CURSOR_HEADER] = encode_cursor(getattr(last, sort_column.key), last.id)
+    return rows
+
+
+def paginate(query, sort_column, id_column, response: Response, skip: int = 0, limit: int = 100,
+             cursor: Optional[str] = None) -> List:
+    """Run one keyset/offset page of a ``Session.query()`` and return its rows."""
+    rows = apply_keyset(query, sort_column, id_column, skip, limit, cursor).all()
+    return finish_page(rows, limit, sort_column, response)
+
+
+async def paginate_async(db, stmt, sort_column, id_column, response: Response, skip: int = 0, limit: int = 100,
+                         cursor: Optional[str] = None) -> List:
+    """Run one keyset/offset page of a ``select()`` on an AsyncSession and return its rows."""
+    rows = (await db.scalars(apply_keyset(stmt, sort_column, id_column, skip, limit, cursor))).all()
+    return finish_page(rows, limit, sort_column, response)
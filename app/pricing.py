@@ -0,0 +1,162 @@
+"""
+Booking item resolution and pricing.
+
+resolve_booking_items() loads the booking's plan by primary key and all of
+its chadawas with a single ``IN`` query. It validates them and computes the
+authoritative Decimal total. Booking creation validates and prices the
+booking from the result, so a booking costs the same two queries whatever
+the number of offerings.
+
+The result is also stored on the booking (apply_snapshot(): ``amount`` and
+``line_items``), so later catalog price changes never alter what a booking
+costs. Payments, notifications and admin listings read it back through
+booking_price() instead of re-querying and re-summing.
+"""
+from decimal import Decimal
+from typing import List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app import models
+
+
+class BookingValidationError(Exception):
+    """A booking references a missing plan/chadawa or lacks a required note."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class ResolvedBooking:
+    """Plan and chadawas of one booking, loaded once, with its total."""
+
+    def __init__(self, plan: Optional[models.Plan], chadawas: List[Tuple[models.Chadawa, Optional[str]]],
+                 include_plan: bool):
+        self.plan = plan
+        # (chadawa, note) in request order; a chadawa selected twice appears twice
+        self.chadawas = chadawas
+        self.include_plan = include_plan
+
+    @property
+    def plan_price(self) -> Decimal:
+        if not self.include_plan or self.plan is None:
+            return Decimal('0')
+        return plan_price(self.plan)
+
+    @property
+    def total(self) -> Decimal:
+        return self.plan_price + sum((Decimal(str(c.price)) for c, _ in self.chadawas), Decimal('0'))
+
+    def line_items(self) -> List[dict]:
+        """JSON-serializable snapshot of what the booking is charged for (prices as strings)."""
+        items = []
+        if self.include_plan and self.plan is not None:
+            items.append({"type": "plan", "id": self.plan.id, "name": self.plan.name, "price": str(self.plan_price)})
+        for chadawa, note in self.chadawas:
+            items.append({"type": "chadawa", "id": chadawa.id, "name": chadawa.name,
+                          "price": str(Decimal(str(chadawa.price))), "note": note})
+        return items
+
+
+class BookingPrice:
+    """Amount and line items of a persisted booking, as stored at booking time."""
+
+    def __init__(self, amount: Decimal, line_items: List[dict]):
+        self.amount = amount
+        self.line_items = line_items
+
+    @property
+    def plan_items(self) -> List[dict]:
+        return [item for item in self.line_items if item["type"] == "plan"]
+
+    @property
+    def chadawa_items(self) -> List[dict]:
+        return [item for item in self.line_items if item["type"] == "chadawa"]
+
+    @property
+    def plan_price(self) -> Decimal:
+        return sum((Decimal(item["price"]) for item in self.plan_items), Decimal('0'))
+
+
+def plan_price(plan: models.Plan) -> Decimal:
+    """Price charged for a plan: discounted_price when set, otherwise actual_price."""
+    price = plan.discounted_price if plan.discounted_price is not None else plan.actual_price
+    return Decimal(str(price)) if price is not None else Decimal('0')
+
+
+def _requested_chadawas(booking) -> Tuple[List[Tuple[int, Optional[str]]], bool]:
+    """(chadawa_id, note) pairs from a BookingCreate or a persisted Booking.
+
+    Also returns whether the client sent detailed objects. Notes are only
+    enforced for detailed objects; the chadawa_ids shorthand carries no notes.
+    """
+    if getattr(booking, 'chadawa_ids', None):
+        return [(cid, None) for cid in booking.chadawa_ids if cid], False
+
+    items = getattr(booking, 'booking_chadawas', None)
+    if items is None:
+        items = getattr(booking, 'chadawas', None) or []
+    return [(item.chadawa_id, item.note) for item in items if item.chadawa_id], True
+
+
+def resolve_booking_items(db: Session, booking, strict: bool = True) -> ResolvedBooking:
+    """Load the plan and chadawas of ``booking`` (incoming or persisted).
+
+    With ``strict`` (new bookings) a missing plan or chadawa, or a missing
+    note on a chadawa that requires one, raises BookingValidationError.
+    Otherwise (persisted bookings whose catalog rows may since have been
+    deleted) missing rows are left out of the total.
+    """
+    plan = None
+    plan_id = getattr(booking, 'plan_id', None)
+    if plan_id:
+        plan = db.get(models.Plan, plan_id)
+        if plan is None and strict:
+            raise BookingValidationError(404, "Plan not found")
+
+    requested, detailed = _requested_chadawas(booking)
+    found = {}
+    if requested:
+        ids = {cid for cid, _ in requested}
+        found = {c.id: c for c in db.query(models.Chadawa).filter(models.Chadawa.id.in_(ids)).all()}
+
+    chadawas = []
+    for cid, note in requested:
+        chadawa = found.get(cid)
+        if chadawa is None:
+            if strict:
+                raise BookingValidationError(404, f"Chadawa with ID {cid} not found")
+            continue
+        if strict and detailed and chadawa.requires_note and not note:
+            raise BookingValidationError(400, f"Note is required for chadawa: {chadawa.name}")
+        chadawas.append((chadawa, note))
+
+    # Temple chadawa bookings are charged for chadawas only, never the plan
+    is_temple_booking = bool(getattr(booking, 'temple_id', None)) and not getattr(booking, 'puja_id', None)
+    return ResolvedBooking(plan, chadawas, include_plan=not is_temple_booking)
+
+
+def apply_snapshot(db_booking: models.Booking, resolved: ResolvedBooking) -> None:
+    """Store the amount and line items of ``resolved`` on the booking row."""
+    db_booking.amount = resolved.total
+    db_booking.line_items = resolved.line_items()
+
+
+def booking_price(booking: models.Booking) -> BookingPrice:
+    """Snapshot of a persisted booking.
+
+    Bookings created before snapshots were stored fall back to their loaded
+    plan and chadawas, priced by the same rules as resolve_booking_items().
+    Their ``amount`` was backfilled from the payment where one exists, and
+    that stays authoritative.
+    """
+    if booking.amount is not None and booking.line_items is not None:
+        return BookingPrice(Decimal(str(booking.amount)), booking.line_items)
+
+    chadawas = [(bc.chadawa, bc.note) for bc in booking.booking_chadawas or [] if bc.chadawa is not None]
+    is_temple_booking = bool(booking.temple_id) and not booking.puja_id
+    resolved = ResolvedBooking(booking.plan, chadawas, include_plan=not is_temple_booking)
+    amount = Decimal(str(booking.amount)) if booking.amount is not None else resolved.total
+    return BookingPrice(amount, resolved.line_items())
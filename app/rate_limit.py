@@ -0,0 +1,172 @@
+"""
+Cluster-wide token-bucket rate limiting for messaging providers.
+
+Twilio and MSG91 enforce per-account and per-sender send rates. Every API
+process and Celery worker takes a token from the same Redis bucket before a
+send, so OTPs, booking notifications and bulk campaigns share one budget:
+
+    rate_limiter.acquire("twilio_whatsapp", settings.TWILIO_WHATSAPP_NUMBER)
+
+A bucket holds up to ``burst`` tokens and refills at ``rate`` tokens per
+second. When it is empty acquire() reserves the next token and sleeps until
+it is due. Only a wait longer than ``max_wait`` raises RateLimitExceeded,
+with the delay after which a retry will get a token. Celery tasks requeue
+themselves with that delay instead of failing.
+
+The bucket math runs as one Lua script on Redis time, so concurrent callers
+on different hosts never over-spend. If Redis is unreachable each process
+falls back to an in-process bucket with the same limits.
+"""
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import redis
+
+from app.config import settings
+from app.log import get_logger
+
+log = get_logger(__name__)
+
+
+class RateLimitExceeded(Exception):
+    """No token within the allowed wait; retry after ``retry_after`` seconds."""
+
+    def __init__(self, bucket: str, retry_after: float):
+        super().__init__(f"Rate limit for {bucket} exceeded, retry in {retry_after:.2f}s")
+        self.bucket = bucket
+        self.retry_after = retry_after
+
+
+def provider_limits() -> Dict[str, Tuple[float, int]]:
+    """(tokens per second, burst) per provider. Each sender number/ID gets its own bucket."""
+    return {
+        "twilio_whatsapp": (settings.TWILIO_WHATSAPP_RATE_PER_SECOND, settings.TWILIO_WHATSAPP_BURST),
+        "twilio_sms": (settings.TWILIO_SMS_RATE_PER_SECOND, settings.TWILIO_SMS_BURST),
+        "msg91": (settings.MSG91_RATE_PER_SECOND, settings.MSG91_BURST),
+    }
+
+
+# Returns the seconds the caller must wait for its token (0 = send now), as a
+# string because Lua numbers are truncated to integers on return. A token is
+# only reserved (tokens may go negative) when that wait is within max_wait.
+_TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local max_wait = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens < 1 then
+    wait = (1 - tokens) / rate
+end
+if wait <= max_wait then
+    tokens = tokens - 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil((burst + math.max(0, -tokens)) / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
+
+class _LocalBucket:
+    """In-process equivalent of _TAKE_SCRIPT, used while Redis is unreachable."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.ts = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self, max_wait: float) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + max(0.0, now - self.ts) * self.rate)
+            self.ts = now
+            wait = (1 - self.tokens) / self.rate if self.tokens < 1 else 0.0
+            if wait <= max_wait:
+                self.tokens -= 1
+            return wait
+
+
+class RateLimiter:
+    KEY_PREFIX = "ratelimit"
+    # After a Redis error, use the in-process buckets for this long
+    REDIS_RETRY_SECONDS = 30
+
+    def __init__(self, redis_url: str, enabled: bool = True):
+        self.enabled = enabled
+        self.redis_url = redis_url
+        self._redis = None
+        self._script = None
+        self._redis_retry_at = 0.0
+        self._local: Dict[str, _LocalBucket] = {}
+        self._local_lock = threading.Lock()
+
+    def _get_script(self):
+        if time.monotonic() < self._redis_retry_at:
+            return None
+        if self._script is None:
+            self._redis = redis.Redis.from_url(self.redis_url, socket_connect_timeout=0.25, socket_timeout=0.25)
+            self._script = self._redis.register_script(_TAKE_SCRIPT)
+        return self._script
+
+    def _local_bucket(self, key: str, rate: float, burst: int) -> _LocalBucket:
+        with self._local_lock:
+            bucket = self._local.get(key)
+            if bucket is None or (bucket.rate, bucket.burst) != (rate, burst):
+                bucket = self._local[key] = _LocalBucket(rate, burst)
+            return bucket
+
+    def _take(self, key: str, rate: float, burst: int, max_wait: float) -> float:
+        script = self._get_script()
+        if script is not None:
+            try:
+                return float(script(keys=[key], args=[rate, burst, max_wait]))
+            except redis.RedisError as exc:
+                self._redis_retry_at = time.monotonic() + self.REDIS_RETRY_SECONDS
+                log.warning("ratelimit.redis_unavailable", fallback="per process",
+                            retry_in=self.REDIS_RETRY_SECONDS, error=str(exc))
+        return self._local_bucket(key, rate, burst).take(max_wait)
+
+    def reserve(self, provider: str, sender: str, max_wait: Optional[float] = None) -> float:
+        """Reserve a send token for ``sender`` of ``provider`` without waiting for it.
+
+        Returns the seconds until the token is due; the caller must wait that
+        long before sending (async callers use asyncio.sleep). Raises
+        RateLimitExceeded if it is more than ``max_wait`` (default
+        RATE_LIMIT_MAX_WAIT_SECONDS) away.
+        """
+        rate, burst = provider_limits()[provider]
+        if not self.enabled or rate <= 0:
+            return 0.0
+        if max_wait is None:
+            max_wait = settings.RATE_LIMIT_MAX_WAIT_SECONDS
+        key = f"{self.KEY_PREFIX}:{provider}:{sender or 'default'}"
+        wait = self._take(key, rate, max(1, burst), max_wait)
+        if wait > max_wait:
+            raise RateLimitExceeded(key, wait)
+        return wait
+
+    def acquire(self, provider: str, sender: str, max_wait: Optional[float] = None) -> float:
+        """Take a send token for ``sender`` of ``provider``, sleeping until it is due.
+
+        Returns the seconds waited. Raises RateLimitExceeded if the token is
+        more than ``max_wait`` (default RATE_LIMIT_MAX_WAIT_SECONDS) away.
+        """
+        wait = self.reserve(provider, sender, max_wait)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def reset_local(self) -> None:
+        with self._local_lock:
+            self._local.clear()
+
+
+rate_limiter = RateLimiter(redis_url=settings.REDIS_URL, enabled=settings.RATE_LIMIT_ENABLED)
@@ -3,9 +3,12 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import List
 from app.database import get_db
-from app import schemas, models
+from app import schemas, models, crud
 from app.auth import get_admin_user
 from app.models import User
+from app.cache import catalog_cache
+from app import db_metrics, delivery_receipts
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 
 router = APIRouter(prefix="/admin", tags=["admin"])
@@ -58,7 +61,7 @@ def get_pending_bookings(
     current_user: User = Depends(get_admin_user)
 ):
     """Get all pending bookings (Admin only)."""
-    return db.query(models.Booking).filter(
+    return crud.BookingCRUD.query(db).filter(
         models.Booking.status == models.BookingStatus.PENDING.value
     ).offset(skip).limit(limit).all()
 
@@ -70,7 +73,7 @@ def get_recent_bookings(
     current_user: User = Depends(get_admin_user)
 ):
     """Get recent bookings (Admin only)."""
-    return db.query(models.Booking).order_by(
+    return crud.BookingCRUD.query(db).order_by(
         models.Booking.created_at.desc()
     ).limit(limit).all()
 
@@ -136,3 +139,34 @@ def get_booking_status_distribution(
         {"status": status, "count": count}
         for status, count in status_distribution
     ]
+
+
+@router.get("/diagnostics/cache")
+def get_cache_stats(current_user: User = Depends(get_admin_user)):
+    """Get catalog cache hit/miss counters for this process (Admin only)."""
+    return catalog_cache.stats()
+
+
+@router.get("/diagnostics/db-pool")
+def get_db_pool_stats(current_user: User = Depends(get_admin_user)):
+    """Get connection pool gauges and checkout latency for this process and every API/worker process that reported recently (Admin only)."""
+    db_metrics.publish()
+    return {
+        "current": db_metrics.snapshot(),
+        "processes": db_metrics.published_snapshots(),
+    }
+
+
+@router.get("/notifications/failure-rates")
+def get_notification_failure_rates(
+    hours: int = Query(24, ge=1, le=24 * 30),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_admin_user)
+):
+    """Get delivery failure rates per provider and channel from the delivery receipts of the last ``hours`` hours (Admin only)."""
+    since = datetime.now(timezone.utc) - timedelta(hours=hours)
+    return {
+        "since": since,
+        "hours": hours,
+        "providers": delivery_receipts.failure_rates(db, since),
+    }
@@ -1,14 +1,44 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
+import time
 from datetime import timedelta
 from app.database import get_db
 from app import schemas, crud
 from app.auth import verify_password, create_access_token, get_current_active_user, get_super_admin_user
 from app.config import settings
+from app.log import get_logger
 from app.models import User, UserRole
+from app.rate_limit import RateLimitExceeded
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
+log = get_logger(__name__)
+
+
+def send_otp_sms(otp, mobile: str) -> bool:
+    """
+    Hand an OTP to the ``otp`` queue and return without waiting for the SMS provider.
+    
+    Returns False when no SMS provider is configured (the endpoints then
+    show the code in DEBUG). If the broker is down the SMS is sent inline,
+    bounded by the provider timeouts; with no send token available it is
+    not sent and False is returned.
+    """
+    from app.services import notification_service
+    from app.tasks import enqueue_otp
+    if not notification_service.sms_service.sms_provider:
+        return notification_service.send_otp(mobile, otp.otp_code)
+    started = time.perf_counter()
+    queued = enqueue_otp(otp.id)
+    log.info("otp.requested", otp_id=otp.id, queued=queued,
+             duration_ms=round((time.perf_counter() - started) * 1000, 1))
+    if queued:
+        return True
+    try:
+        return notification_service.send_otp(mobile, otp.otp_code)
+    except RateLimitExceeded as e:
+        log.warning("otp.not_sent", otp_id=otp.id, to=mobile, reason="rate_limited", error=str(e))
+        return False
 
 
 @router.post("/register", response_model=schemas.UserResponse)
@@ -53,8 +83,7 @@ def register_with_otp(user: schemas.UserCreate, db: Session = Depends(get_db)):
     otp = crud.OTPCRUD.create_otp(db, new_user.id)
     
     # Send OTP via SMS
-    from app.services import notification_service
-    sms_sent = notification_service.send_otp(new_user.mobile, otp.otp_code)
+    sms_sent = send_otp_sms(otp, new_user.mobile)
     
     if sms_sent:
         return {"message": "User registered successfully. OTP sent to your mobile number"}
@@ -230,8 +259,7 @@ def request_otp(otp_request: schemas.OTPRequest, db: Session = Depends(get_db)):
     otp = crud.OTPCRUD.create_otp(db, user.id)
     
     # Send OTP via SMS
-    from app.services import notification_service
-    sms_sent = notification_service.send_otp(user.mobile, otp.otp_code)
+    sms_sent = send_otp_sms(otp, user.mobile)
     
     if sms_sent:
         return {"message": "OTP sent successfully to your mobile number"}
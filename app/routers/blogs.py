@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app import schemas, crud
 from app.auth import get_admin_user, get_current_active_user
 from app.models import User, Category
@@ -11,15 +12,15 @@ router = APIRouter(prefix="/blogs", tags=["blogs"])
 
 # Public endpoints for viewing blogs
 @router.get("/", response_model=List[schemas.BlogListResponse])
-def get_blogs(
+async def get_blogs(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),  # Changed default to 10 for better performance
     featured_only: bool = Query(False),
     category_id: Optional[int] = Query(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all published blogs (Public endpoint)."""
-    blogs = crud.BlogCRUD.get_blogs(
+    blogs = await crud.BlogCRUD.get_blogs_async(
         db, 
         skip=skip, 
         limit=limit,
@@ -31,31 +32,31 @@ def get_blogs(
 
 
 @router.get("/search", response_model=List[schemas.BlogListResponse])
-def search_blogs(
+async def search_blogs(
     q: str = Query(..., min_length=2),
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),  # Changed default to 10 for better performance
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Search blogs by title, subtitle, content, or tags (Public endpoint)."""
-    blogs = crud.BlogCRUD.search_blogs(db, q, skip=skip, limit=limit)
+    blogs = await crud.BlogCRUD.search_blogs_async(db, q, skip=skip, limit=limit)
     return blogs
 
 
 @router.get("/featured", response_model=List[schemas.BlogListResponse])
-def get_featured_blogs(
+async def get_featured_blogs(
     limit: int = Query(10, ge=1, le=50),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get featured blogs (Public endpoint)."""
-    blogs = crud.BlogCRUD.get_blogs(db, skip=0, limit=limit, featured_only=True)
+    blogs = await crud.BlogCRUD.get_blogs_async(db, skip=0, limit=limit, featured_only=True)
     return blogs
 
 
 @router.get("/{blog_id}", response_model=schemas.BlogResponse)
-def get_blog(blog_id: int, db: Session = Depends(get_db)):
+async def get_blog(blog_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get blog by ID (Public endpoint)."""
-    blog = crud.BlogCRUD.get_blog(db, blog_id)
+    blog = await crud.BlogCRUD.get_blog_async(db, blog_id)
     if not blog:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -65,9 +66,9 @@ def get_blog(blog_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/slug/{slug}", response_model=schemas.BlogResponse)
-def get_blog_by_slug(slug: str, db: Session = Depends(get_db)):
+async def get_blog_by_slug(slug: str, db: AsyncSession = Depends(get_async_db)):
     """Get blog by slug (Public endpoint)."""
-    blog = crud.BlogCRUD.get_blog_by_slug(db, slug)
+    blog = await crud.BlogCRUD.get_blog_by_slug_async(db, slug)
     if not blog:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -78,14 +79,14 @@ def get_blog_by_slug(slug: str, db: Session = Depends(get_db)):
 
 # Admin endpoints for managing blogs
 @router.get("/admin/all", response_model=List[schemas.BlogResponse])
-def get_all_blogs_admin(
+async def get_all_blogs_admin(
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),  # Changed default to 50 for better performance
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_admin_user)
 ):
     """Get all blogs including inactive and scheduled (Admin only)."""
-    blogs = crud.BlogCRUD.get_admin_blogs(db, skip=skip, limit=limit)
+    blogs = await crud.BlogCRUD.get_admin_blogs_async(db, skip=skip, limit=limit)
     return blogs
 
 
@@ -165,14 +166,14 @@ def delete_blog(
 
 # Category endpoints
 @router.get("/categories/", response_model=List[schemas.CategoryResponse])
-def get_categories(
+async def get_categories(
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),  # Changed default to 50 for better performance
     active_only: bool = Query(True),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all categories (Public endpoint)."""
-    return crud.CategoryCRUD.get_categories(db, skip=skip, limit=limit, active_only=active_only)
+    return await crud.CategoryCRUD.get_categories_async(db, skip=skip, limit=limit, active_only=active_only)
 
 
 @router.post("/categories/", response_model=schemas.CategoryResponse)
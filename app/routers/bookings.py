@@ -1,22 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional, Any, Dict
 import logging
 from datetime import datetime, date
 import pytz
-from app.database import get_db
-from app import schemas, crud, models
+from app.database import get_db, get_async_db
+from app import schemas, crud, models, outbox
 from app.auth import get_current_active_user, get_admin_user
+from app.pagination import paginate_async, CURSOR_DESCRIPTION
+from app.pricing import BookingValidationError, resolve_booking_items
 from app.models import User, BookingStatus
-from app.services import create_razorpay_order, calculate_booking_amount, verify_razorpay_signature, NotificationService
-
-# Import Celery task for queued message delivery
-try:
-    from app.tasks import send_booking_notification
-    CELERY_AVAILABLE = True
-except ImportError:
-    CELERY_AVAILABLE = False
-    logging.warning("Celery not available - notifications will be skipped")
+from app.services import create_razorpay_order, verify_razorpay_signature, NotificationService
 
 router = APIRouter(prefix="/bookings", tags=["bookings"])
 logger = logging.getLogger(__name__)
@@ -30,20 +25,22 @@ def get_ist_now():
 
 
 @router.get("/puja", response_model=List[schemas.BookingResponse])
-def get_puja_bookings(
+async def get_puja_bookings(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
     start_date: Optional[date] = Query(None, description="Filter bookings from this date (YYYY-MM-DD)"),
     end_date: Optional[date] = Query(None, description="Filter bookings until this date (YYYY-MM-DD)"),
     status: Optional[str] = Query(None, description="Filter by booking status"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get puja bookings (puja_id not null) with optional date and status filters. Admins only."""
     if current_user.role not in ["admin", "super_admin"]:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    query = db.query(models.Booking).filter(models.Booking.puja_id != None)
+    query = crud.BookingCRUD.select().filter(models.Booking.puja_id != None)
     
     # Apply date filters
     if start_date:
@@ -58,19 +55,20 @@ def get_puja_bookings(
     if status:
         query = query.filter(models.Booking.status == status)
     
-    bookings = query.order_by(models.Booking.booking_date.desc()).offset(skip).limit(limit).all()
+    bookings = await paginate_async(db, query, models.Booking.booking_date, models.Booking.id, response,
+                                    skip=skip, limit=limit, cursor=cursor)
     return [schemas.BookingResponse.from_orm(b) for b in bookings]
 
 
 @router.get("/puja/{puja_id}/bookings", response_model=List[schemas.BookingResponse])
-def get_bookings_by_puja(
+async def get_bookings_by_puja(
     puja_id: int,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     start_date: Optional[date] = Query(None, description="Filter bookings from this date (YYYY-MM-DD)"),
     end_date: Optional[date] = Query(None, description="Filter bookings until this date (YYYY-MM-DD)"),
     status: Optional[str] = Query(None, description="Filter by booking status"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get all bookings for a specific puja with optional date and status filters. Admins only."""
@@ -78,11 +76,11 @@ def get_bookings_by_puja(
         raise HTTPException(status_code=403, detail="Not authorized")
     
     # Verify puja exists
-    puja = crud.PujaCRUD.get_puja(db, puja_id)
+    puja = await db.get(models.Puja, puja_id)
     if not puja:
         raise HTTPException(status_code=404, detail="Puja not found")
     
-    query = db.query(models.Booking).filter(models.Booking.puja_id == puja_id)
+    query = crud.BookingCRUD.select().filter(models.Booking.puja_id == puja_id)
     
     # Apply date filters
     if start_date:
@@ -97,25 +95,27 @@ def get_bookings_by_puja(
     if status:
         query = query.filter(models.Booking.status == status)
     
-    bookings = query.order_by(models.Booking.booking_date.desc()).offset(skip).limit(limit).all()
+    bookings = (await db.scalars(query.order_by(models.Booking.booking_date.desc()).offset(skip).limit(limit))).all()
     return [schemas.BookingResponse.from_orm(b) for b in bookings]
 
 
 @router.get("/temple-chadawa", response_model=List[schemas.BookingResponse])
-def get_temple_chadawa_bookings(
+async def get_temple_chadawa_bookings(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
     start_date: Optional[date] = Query(None, description="Filter bookings from this date (YYYY-MM-DD)"),
     end_date: Optional[date] = Query(None, description="Filter bookings until this date (YYYY-MM-DD)"),
     status: Optional[str] = Query(None, description="Filter by booking status"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get temple chadawa bookings (temple_id not null) with optional date and status filters. Admins only."""
     if current_user.role not in ["admin", "super_admin"]:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    query = db.query(models.Booking).filter(models.Booking.temple_id != None)
+    query = crud.BookingCRUD.select().filter(models.Booking.temple_id != None)
     
     # Apply date filters
     if start_date:
@@ -130,42 +130,43 @@ def get_temple_chadawa_bookings(
     if status:
         query = query.filter(models.Booking.status == status)
     
-    bookings = query.order_by(models.Booking.booking_date.desc()).offset(skip).limit(limit).all()
+    bookings = await paginate_async(db, query, models.Booking.booking_date, models.Booking.id, response,
+                                    skip=skip, limit=limit, cursor=cursor)
     return [schemas.BookingResponse.from_orm(b) for b in bookings]
 
 
 @router.get("/", response_model=List[schemas.BookingResponse])
-def get_bookings(
+async def get_bookings(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get user's bookings."""
     # Regular users can only see their own bookings
     user_id = None if current_user.role in ["admin", "super_admin"] else current_user.id
-    return crud.BookingCRUD.get_bookings(db, skip=skip, limit=limit, user_id=user_id)
+    return await crud.BookingCRUD.get_bookings_async(db, skip=skip, limit=limit, user_id=user_id)
 
 
 @router.get("/my", response_model=List[schemas.BookingResponse])
-def get_my_bookings(
+async def get_my_bookings(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get current user's bookings."""
-    return crud.BookingCRUD.get_bookings(db, skip=skip, limit=limit, user_id=current_user.id)
+    return await crud.BookingCRUD.get_bookings_async(db, skip=skip, limit=limit, user_id=current_user.id)
 
 
 @router.get("/{booking_id}", response_model=schemas.BookingResponse)
-def get_booking(
+async def get_booking(
     booking_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get booking by ID."""
-    booking = crud.BookingCRUD.get_booking(db, booking_id)
+    booking = await crud.BookingCRUD.get_booking_async(db, booking_id)
     if not booking:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -198,7 +199,6 @@ def create_booking(
                 detail="Puja not found"
             )
     
-    # Validate plan exists
     # Validate temple exists (if provided)
     if getattr(booking, 'temple_id', None):
         temple = crud.TempleCRUD.get_temple(db, booking.temple_id)
@@ -207,35 +207,13 @@ def create_booking(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Temple not found"
             )
-    if booking.plan_id:
-        plan = crud.PlanCRUD.get_plan(db, booking.plan_id)
-        if not plan:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Plan not found"
-            )
+    # Validate plan and chadawas exist (one batched lookup; supports chadawa_ids shorthand)
+    try:
+        resolved = resolve_booking_items(db, booking)
+    except BookingValidationError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     
-    # Validate chadawas exist (support chadawa_ids shorthand)
-    chadawa_ids = booking.chadawa_ids if getattr(booking, 'chadawa_ids', None) else [c.chadawa_id for c in booking.chadawas]
-    for ch_id in chadawa_ids:
-        chadawa = crud.ChadawaCRUD.get_chadawa(db, ch_id)
-        if not chadawa:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Chadawa with ID {ch_id} not found"
-            )
-        # If the chadawa requires a note and the client passed objects, validate note
-        if chadawa.requires_note and getattr(booking, 'chadawa_ids', None) is None:
-            # client used detailed objects
-            # find the object
-            obj = next((c for c in booking.chadawas if c.chadawa_id == ch_id), None)
-            if obj is None or not obj.note:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Note is required for chadawa: {chadawa.name}"
-                )
-    
-    created_booking = crud.BookingCRUD.create_booking(db, booking, current_user.id)
+    created_booking = crud.BookingCRUD.create_booking(db, booking, current_user.id, resolved=resolved)
     
     return created_booking
 
@@ -320,15 +298,11 @@ def confirm_booking(
             detail="Only pending bookings can be confirmed"
         )
     
+    # The confirmation notification is committed together with the status
+    # change and published to Celery by the outbox dispatcher
+    outbox.add_booking_notification(db, booking_id, "confirmed")
     booking_update = schemas.BookingUpdate(status=BookingStatus.CONFIRMED)
-    updated_booking = crud.BookingCRUD.update_booking(db, booking_id, booking_update)
-    
-    # Queue confirmation notification for delivery (non-blocking, reliable)
-    if CELERY_AVAILABLE:
-        send_booking_notification.delay(booking_id, "confirmed")
-        logger.info(f"📬 Queued confirmation notification for booking {booking_id}")
-    else:
-        logger.warning(f"⚠️ Celery not available - notification not queued for booking {booking_id}")
+    crud.BookingCRUD.update_booking(db, booking_id, booking_update)
     
     return {"message": "Booking confirmed successfully"}
 
@@ -354,19 +328,14 @@ def complete_booking(
             detail="Only confirmed bookings can be completed"
         )
     
+    # Completion notification goes out via the outbox, in the same commit
+    outbox.add_booking_notification(db, booking_id, "completed")
     booking_update = schemas.BookingUpdate(
         status=BookingStatus.COMPLETED,
         puja_link=puja_link
     )
     crud.BookingCRUD.update_booking(db, booking_id, booking_update)
     
-    # Queue completion notification for delivery (non-blocking, reliable)
-    if CELERY_AVAILABLE:
-        send_booking_notification.delay(booking_id, "completed")
-        logger.info(f"📬 Queued completion notification for booking {booking_id}")
-    else:
-        logger.warning(f"⚠️ Celery not available - notification not queued for booking {booking_id}")
-    
     return {"message": "Booking completed successfully"}
 
 
@@ -404,61 +373,26 @@ def create_booking_with_razorpay(
                 detail="Temple not found"
             )
 
-    # Validate plan exists (if provided)
-    if getattr(booking, 'plan_id', None):
-        plan = crud.PlanCRUD.get_plan(db, booking.plan_id)
-        if not plan:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Plan not found"
-            )
-
-    # Validate chadawas exist. Support both detailed objects (booking.chadawas)
-    # and shorthand id list (booking.chadawa_ids).
-    chadawa_ids = None
-    if getattr(booking, 'chadawa_ids', None):
-        chadawa_ids = booking.chadawa_ids
-    else:
-        chadawa_ids = [getattr(c, 'chadawa_id', None) for c in getattr(booking, 'chadawas', [])]
-
-    for ch_id in chadawa_ids:
-        # skip None
-        if ch_id is None:
-            continue
-        chadawa = crud.ChadawaCRUD.get_chadawa(db, ch_id)
-        if not chadawa:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Chadawa with ID {ch_id} not found"
-            )
-        # If the chadawa requires a note and client passed detailed objects, validate note
-        if chadawa.requires_note and getattr(booking, 'chadawa_ids', None) is None:
-            obj = next((c for c in getattr(booking, 'chadawas', []) if getattr(c, 'chadawa_id', None) == ch_id), None)
-            if obj is None or not getattr(obj, 'note', None):
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Note is required for chadawa: {chadawa.name}"
-                )
+    # Validate plan and chadawas exist with one batched lookup. Supports both
+    # detailed objects (booking.chadawas) and shorthand id list (booking.chadawa_ids).
+    try:
+        resolved = resolve_booking_items(db, booking)
+    except BookingValidationError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     
-    # Persist booking first (status PENDING), then calculate authoritative amount server-side
-    db_booking = crud.BookingCRUD.create_booking(db, booking, current_user.id)
-    
-    # Calculate authoritative amount server-side using the persisted booking (safer)
-    amount = calculate_booking_amount(db, db_booking)
+    # Persist booking (status PENDING) with its price snapshot; the snapshot
+    # amount is what the customer is charged
+    db_booking = crud.BookingCRUD.create_booking(db, booking, current_user.id, resolved=resolved)
+    amount = db_booking.amount
     
     # Create Razorpay order
     razorpay_order = create_razorpay_order(float(amount), db_booking.id)
     payment = schemas.PaymentCreate(booking_id=db_booking.id, amount=amount)
+    # PENDING notification (WhatsApp/Email) is committed with the payment
+    # record and published by the outbox dispatcher
+    outbox.add_booking_notification(db, db_booking.id, "pending")
     db_payment = crud.PaymentCRUD.create_payment(db, payment, razorpay_order["id"])
     
-    # Queue PENDING notification for delivery (non-blocking, reliable)
-    # This sends WhatsApp/Email notification immediately after booking creation
-    if CELERY_AVAILABLE:
-        send_booking_notification.delay(db_booking.id, "pending")
-        logger.info(f"📬 Queued PENDING notification for booking {db_booking.id}")
-    else:
-        logger.warning(f"⚠️ Celery not available - notification not queued for booking {db_booking.id}")
-    
     # Return booking and Razorpay order info IMMEDIATELY without waiting for notifications
     response = schemas.RazorpayBookingResponse(
         booking=schemas.BookingResponse.from_orm(db_booking),
@@ -496,19 +430,11 @@ def verify_payment(
     payment.razorpay_payment_id = razorpay_payment_id
     payment.razorpay_signature = razorpay_signature
     payment.status = 'success'
-    db.commit()
-    db.refresh(payment)
 
-    # Update booking status if needed
+    # Payment, booking status and the confirmation notification are
+    # committed together by update_booking
+    outbox.add_booking_notification(db, booking_id, "confirmed")
     booking_update = schemas.BookingUpdate(status=BookingStatus.CONFIRMED)
     crud.BookingCRUD.update_booking(db, booking_id, booking_update)
 
-    # Queue confirmation notification for delivery (non-blocking, reliable)
-    # This ensures message is delivered even after response is sent
-    if CELERY_AVAILABLE:
-        send_booking_notification.delay(booking_id, "confirmed")
-        logger.info(f"📬 Queued confirmation notification for booking {booking_id} after payment verification")
-    else:
-        logger.warning(f"⚠️ Celery not available - notification not queued for booking {booking_id}")
-
     return {"message": "Payment verified and booking confirmed", "payment_id": payment.id}
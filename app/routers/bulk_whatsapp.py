@@ -1,14 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, UploadFile, status
+from pydantic import BaseModel, Field
+from sqlalchemy.orm import Session
 from typing import List, Optional
+from datetime import datetime
+from app import audiences, crud, segments
 from app.auth import get_admin_user
-from app.models import User
-from app.services import NotificationService
+from app.database import get_db
+from app.log import get_logger
+from app.models import AudienceStatus, CampaignRecipientStatus, User
+from app.tasks import enqueue_whatsapp_campaign
 import re
-import logging
 
 router = APIRouter(prefix="/bulk-whatsapp", tags=["bulk_whatsapp"])
-logger = logging.getLogger(__name__)
+log = get_logger(__name__)
 
 
 class BulkWhatsAppRequest(BaseModel):
@@ -18,11 +22,63 @@ class BulkWhatsAppRequest(BaseModel):
     media_url: Optional[str] = None
 
 
-class BulkWhatsAppResponse(BaseModel):
+class BulkWhatsAppJobResponse(BaseModel):
+    job_id: int
+    status: str
     total_numbers: int
+
+
+class BulkWhatsAppJobStatus(BaseModel):
+    job_id: int
+    template_name: str
+    status: str
+    total_numbers: int
+    pending: int
     successful: int
     failed: int
-    results: List[dict]
+    progress: float  # percent of recipients processed
+    created_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+
+
+class AudienceResponse(BaseModel):
+    id: int
+    name: str
+    source_filename: Optional[str] = None
+    status: str
+    param_count: int
+    total_rows: int
+    member_count: int
+    invalid_count: int
+    duplicate_count: int
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class AudienceCampaignRequest(BaseModel):
+    template_name: str
+    template_params: Optional[List[str]] = None  # for recipients without their own parameters
+    media_url: Optional[str] = None
+
+
+class SegmentResponse(BaseModel):
+    name: str
+    description: str
+    required: List[str]
+    optional: List[str]
+
+
+class SegmentCampaignRequest(BaseModel):
+    template_name: str
+    template_params: Optional[List[str]] = None
+    media_url: Optional[str] = None
+    # Segment parameters; see GET /bulk-whatsapp/segments for which each segment takes
+    puja_id: Optional[int] = None
+    temple_id: Optional[int] = None
+    days: Optional[int] = Field(None, ge=1)
 
 
 def normalize_phone_number(phone: str) -> str:
@@ -56,14 +112,61 @@ def normalize_phone_number(phone: str) -> str:
     return cleaned if cleaned.startswith('+') else '+91' + cleaned
 
 
-@router.post("/send", response_model=BulkWhatsAppResponse)
+VALID_TEMPLATES = ["33koti_promo", "puja_promp"]
+# Template variables each template needs, from template_params or per recipient
+TEMPLATE_PARAM_COUNTS = {"puja_promp": 3}
+
+
+def validate_template(template_name: str, template_params: Optional[List[str]], per_recipient_params: int = 0):
+    """Raise 400 unless ``template_name`` is known and gets the variables it needs."""
+    if not template_name or len(template_name.strip()) == 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Template name cannot be empty"
+        )
+    
+    if template_name not in VALID_TEMPLATES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid template name. Must be one of: {', '.join(VALID_TEMPLATES)}"
+        )
+    
+    # Validate template params for puja_promp
+    required = TEMPLATE_PARAM_COUNTS.get(template_name)
+    if required and per_recipient_params != required and (not template_params or len(template_params) != required):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="puja_promp template requires 3 parameters: [message, benefit, url]"
+        )
+
+
+def enqueue_campaign(db: Session, campaign) -> int:
+    """Queue a created campaign's chunks; on failure the campaign is deleted and 503 raised."""
+    campaign_id = campaign.id
+    try:
+        return enqueue_whatsapp_campaign(db, campaign_id)
+    except Exception as e:
+        log.error("campaign.enqueue_failed", campaign_id=campaign_id, error=str(e))
+        db.rollback()
+        crud.WhatsAppCampaignCRUD.delete_campaign(db, campaign_id)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Could not queue the campaign, please try again"
+        )
+
+
+@router.post("/send", response_model=BulkWhatsAppJobResponse, status_code=status.HTTP_202_ACCEPTED)
 def send_bulk_whatsapp(
     request: BulkWhatsAppRequest,
+    db: Session = Depends(get_db),
     current_user: User = Depends(get_admin_user),
     skip_failed: bool = False
 ):
     """
-    Send WhatsApp template message to multiple numbers (Admin only).
+    Queue a WhatsApp template campaign to multiple numbers (Admin only).
+    
+    Returns a job ID immediately; messages are sent by Celery workers.
+    Poll GET /bulk-whatsapp/jobs/{job_id} for progress and results.
     
     Set skip_failed=true to automatically skip numbers that previously failed with error 63049.
     
@@ -101,96 +204,64 @@ def send_bulk_whatsapp(
             detail="Phone numbers list cannot be empty"
         )
     
-    if not request.template_name or len(request.template_name.strip()) == 0:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Template name cannot be empty"
-        )
+    validate_template(request.template_name, request.template_params)
+    
+    log.debug("campaign.request", requested_by=current_user.mobile, template=request.template_name,
+              numbers=len(request.phone_numbers), params=request.template_params, media_url=request.media_url)
+    
+    recipients = [(phone, normalize_phone_number(phone)) for phone in request.phone_numbers]
+    campaign = crud.WhatsAppCampaignCRUD.create_campaign(
+        db,
+        template_name=request.template_name,
+        template_params=request.template_params,
+        media_url=request.media_url,
+        recipients=recipients,
+        created_by=current_user.id
+    )
+    
+    chunks = enqueue_campaign(db, campaign)
+    
+    log.info("campaign.queued", campaign_id=campaign.id, template=request.template_name,
+             numbers=len(recipients), chunks=chunks, requested_by=current_user.mobile)
     
-    # Validate template name
-    valid_templates = ["33koti_promo", "puja_promp"]
-    if request.template_name not in valid_templates:
+    return BulkWhatsAppJobResponse(
+        job_id=campaign.id,
+        status=campaign.status,
+        total_numbers=campaign.total_recipients
+    )
+
+
+@router.get("/jobs/{job_id}", response_model=BulkWhatsAppJobStatus)
+def get_bulk_whatsapp_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_admin_user)
+):
+    """Progress and success/failure counts of a bulk WhatsApp campaign (Admin only)."""
+    campaign = crud.WhatsAppCampaignCRUD.get_campaign(db, job_id)
+    if not campaign:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid template name. Must be one of: {', '.join(valid_templates)}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
         )
     
-    # Validate template params for puja_promp
-    if request.template_name == "puja_promp":
-        if not request.template_params or len(request.template_params) != 3:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="puja_promp template requires 3 parameters: [message, benefit, url]"
-            )
-    
-    logger.info(f"🔵 Bulk WhatsApp Send Request by {current_user.mobile}")
-    logger.info(f"   Template: {request.template_name}")
-    logger.info(f"   Total numbers: {len(request.phone_numbers)}")
-    logger.info(f"   Template params: {request.template_params or 'None'}")
-    logger.info(f"   Media URL: {request.media_url or 'None'}")
+    counts = crud.WhatsAppCampaignCRUD.get_status_counts(db, job_id)
+    pending = counts.get(CampaignRecipientStatus.PENDING.value, 0)
+    successful = counts.get(CampaignRecipientStatus.SUCCESS.value, 0)
+    failed = counts.get(CampaignRecipientStatus.FAILED.value, 0) + counts.get(CampaignRecipientStatus.ERROR.value, 0)
+    total = campaign.total_recipients
     
-    results = []
-    successful = 0
-    failed = 0
-    
-    for phone in request.phone_numbers:
-        try:
-            # Normalize phone number
-            normalized_phone = normalize_phone_number(phone)
-            print(f"\n{'='*70}")
-            print(f"📱 Processing: {phone} → {normalized_phone}")
-            print(f"   Template: {request.template_name}")
-            print(f"{'='*70}")
-            logger.info(f"📱 Sending to {phone} (normalized: {normalized_phone})")
-            
-            # Send WhatsApp template message
-            sent = NotificationService.send_whatsapp_template(
-                phone_number=normalized_phone,
-                template_name=request.template_name,
-                template_params=request.template_params or [],
-                media_url=request.media_url
-            )
-            
-            print(f"📊 Send result: {sent}")
-            print(f"{'='*70}\n")
-            
-            if sent:
-                successful += 1
-                results.append({
-                    "phone": phone,
-                    "normalized": normalized_phone,
-                    "status": "success",
-                    "error": None
-                })
-                logger.info(f"✅ Sent to {normalized_phone}")
-            else:
-                failed += 1
-                results.append({
-                    "phone": phone,
-                    "normalized": normalized_phone,
-                    "status": "failed",
-                    "error": "WhatsApp send failed - check server logs for details"
-                })
-                logger.warning(f"❌ Failed to send to {normalized_phone}")
-                
-        except Exception as e:
-            failed += 1
-            error_msg = str(e)
-            results.append({
-                "phone": phone,
-                "normalized": normalized_phone if 'normalized_phone' in locals() else phone,
-                "status": "error",
-                "error": error_msg
-            })
-            logger.error(f"❌ Error sending to {phone}: {error_msg}")
-    
-    logger.info(f"📊 Bulk send complete: {successful} successful, {failed} failed")
-    
-    return BulkWhatsAppResponse(
-        total_numbers=len(request.phone_numbers),
+    return BulkWhatsAppJobStatus(
+        job_id=campaign.id,
+        template_name=campaign.template_name,
+        status=campaign.status,
+        total_numbers=total,
+        pending=pending,
         successful=successful,
         failed=failed,
-        results=results
+        progress=round((total - pending) * 100 / total, 1) if total else 100.0,
+        created_at=campaign.created_at,
+        completed_at=campaign.completed_at
     )
 
 
@@ -226,3 +297,166 @@ def test_normalize_numbers(
         "total": len(phone_numbers),
         "results": results
     }
+
+
+@router.post("/audiences", response_model=AudienceResponse, status_code=status.HTTP_201_CREATED)
+def upload_audience(
+    file: UploadFile = File(...),
+    name: Optional[str] = Form(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_admin_user)
+):
+    """
+    Import a CSV or XLSX audience for bulk WhatsApp campaigns (Admin only).
+    
+    The first row is a header with a ``phone`` (or ``mobile``/``whatsapp``/``number``)
+    column and optional ``param1``..``paramN`` columns with each recipient's
+    template variables. Numbers are normalized to +91..., invalid ones are
+    skipped and duplicates are dropped. Send to it with
+    POST /bulk-whatsapp/audiences/{audience_id}/send.
+    """
+    try:
+        rows = audiences.iter_rows(file.file, file.filename)
+    except audiences.AudienceImportError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    audience = crud.WhatsAppAudienceCRUD.create_audience(
+        db, name=name or file.filename or "Audience", source_filename=file.filename, created_by=current_user.id
+    )
+    try:
+        audiences.import_audience(db, audience, rows)
+    except audiences.AudienceImportError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return audience
+
+
+@router.get("/audiences", response_model=List[AudienceResponse])
+def list_audiences(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_admin_user)
+):
+    """Imported audiences, newest first (Admin only)."""
+    return crud.WhatsAppAudienceCRUD.get_audiences(db, skip=skip, limit=limit)
+
+
+@router.get("/audiences/{audience_id}", response_model=AudienceResponse)
+def get_audience(
+    audience_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_admin_user)
+):
+    """Import summary of an audience (Admin only)."""
+    audience = crud.WhatsAppAudienceCRUD.get_audience(db, audience_id)
+    if not audience:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Audience not found")
+    return audience
+
+
+@router.post("/audiences/{audience_id}/send", response_model=BulkWhatsAppJobResponse,
+             status_code=status.HTTP_202_ACCEPTED)
+def send_to_audience(
+    audience_id: int,
+    request: AudienceCampaignRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_admin_user)
+):
+    """
+    Queue a WhatsApp template campaign to every member of an audience (Admin only).
+    
+    Recipients with per-row parameters from the upload use those; the others
+    use ``template_params``. Poll GET /bulk-whatsapp/jobs/{job_id} for progress.
+    """
+    audience = crud.WhatsAppAudienceCRUD.get_audience(db, audience_id)
+    if not audience:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Audience not found")
+    if audience.status != AudienceStatus.READY.value or not audience.member_count:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Audience has no recipients to send to")
+    validate_template(request.template_name, request.template_params, per_recipient_params=audience.param_count)
+    
+    campaign = crud.WhatsAppCampaignCRUD.create_campaign_from_audience(
+        db,
+        audience,
+        template_name=request.template_name,
+        template_params=request.template_params,
+        media_url=request.media_url,
+        created_by=current_user.id
+    )
+    chunks = enqueue_campaign(db, campaign)
+    
+    log.info("campaign.queued", campaign_id=campaign.id, template=request.template_name, audience_id=audience.id,
+             numbers=campaign.total_recipients, chunks=chunks, requested_by=current_user.mobile)
+    
+    return BulkWhatsAppJobResponse(
+        job_id=campaign.id,
+        status=campaign.status,
+        total_numbers=campaign.total_recipients
+    )
+
+
+@router.get("/segments", response_model=List[SegmentResponse])
+def list_segments(current_user: User = Depends(get_admin_user)):
+    """Audience segments that campaigns can be sent to (Admin only)."""
+    return [
+        SegmentResponse(name=segment.name, description=segment.description,
+                        required=segment.required, optional=segment.optional)
+        for segment in segments.SEGMENTS.values()
+    ]
+
+
+@router.post("/segments/{segment_name}/send", response_model=BulkWhatsAppJobResponse,
+             status_code=status.HTTP_202_ACCEPTED)
+def send_to_segment(
+    segment_name: str,
+    request: SegmentCampaignRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_admin_user)
+):
+    """
+    Queue a WhatsApp template campaign to everyone in a segment (Admin only).
+    
+    The segment is resolved now into a new audience (a snapshot, listed under
+    GET /bulk-whatsapp/audiences), and the campaign is sent to that audience.
+    
+    Example - chadawa bookers of temple 12 in the last 90 days:
+    ```json
+    {
+        "template_name": "33koti_promo",
+        "temple_id": 12,
+        "days": 90
+    }
+    ```
+    """
+    segment = segments.SEGMENTS.get(segment_name)
+    if not segment:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Segment not found")
+    validate_template(request.template_name, request.template_params)
+    
+    params = request.model_dump(include={"puja_id", "temple_id", "days"})
+    try:
+        audience = segments.resolve_segment(db, segment, params, created_by=current_user.id)
+    except segments.SegmentError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if not audience.member_count:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Segment has no recipients to send to")
+    
+    campaign = crud.WhatsAppCampaignCRUD.create_campaign_from_audience(
+        db,
+        audience,
+        template_name=request.template_name,
+        template_params=request.template_params,
+        media_url=request.media_url,
+        created_by=current_user.id
+    )
+    chunks = enqueue_campaign(db, campaign)
+    
+    log.info("campaign.queued", campaign_id=campaign.id, template=request.template_name, segment=segment.name,
+             audience_id=audience.id, numbers=campaign.total_recipients, chunks=chunks,
+             requested_by=current_user.mobile)
+    
+    return BulkWhatsAppJobResponse(
+        job_id=campaign.id,
+        status=campaign.status,
+        total_numbers=campaign.total_recipients
+    )
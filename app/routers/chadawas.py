@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from typing import List
 from app.database import get_db
 from app import schemas, crud
+from app.cache import catalog_cache
 from app.auth import get_admin_user
 from app.models import User
 
@@ -16,7 +17,13 @@ def get_chadawas(
     db: Session = Depends(get_db)
 ):
     """Get all chadawas (Public endpoint)."""
-    return crud.ChadawaCRUD.get_chadawas(db, skip=skip, limit=limit)
+    def load():
+        return [
+            schemas.ChadawaResponse.from_orm(obj).model_dump(mode="json")
+            for obj in crud.ChadawaCRUD.get_chadawas(db, skip=skip, limit=limit)
+        ]
+
+    return catalog_cache.get_or_load("chadawas", f"list:{skip}:{limit}", load)
 
 
 @router.get("/{chadawa_id}", response_model=schemas.ChadawaResponse)
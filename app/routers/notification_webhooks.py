@@ -0,0 +1,70 @@
+import hmac
+import json
+
+from fastapi import APIRouter, HTTPException, Request, Response, status
+from twilio.request_validator import RequestValidator
+
+from app.config import settings
+from app.delivery_receipts import msg91_receipts, receipt_writer, twilio_receipt
+from app.log import get_logger
+
+router = APIRouter(prefix="/notifications/webhooks", tags=["notification_webhooks"])
+log = get_logger(__name__)
+
+
+async def store_receipts(rows) -> None:
+    """Write receipt rows (batched with concurrent callbacks); 503 if they could not be stored, so the provider retries."""
+    try:
+        await receipt_writer.write(rows)
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Receipt could not be stored")
+
+
+@router.post("/twilio/status", status_code=status.HTTP_204_NO_CONTENT)
+async def twilio_status_callback(request: Request):
+    """Twilio message status callback (StatusCallback of WhatsApp/SMS sends), signed with X-Twilio-Signature."""
+    if not settings.TWILIO_AUTH_TOKEN:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Twilio is not configured")
+    params = dict(await request.form())
+    # Twilio signs the URL it was given, which behind a proxy is not request.url
+    url = settings.TWILIO_STATUS_CALLBACK_URL or str(request.url)
+    signature = request.headers.get("X-Twilio-Signature", "")
+    if not RequestValidator(settings.TWILIO_AUTH_TOKEN).validate(url, params, signature):
+        log.warning("receipts.bad_signature", provider="twilio", sid=params.get("MessageSid"))
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid signature")
+
+    row = twilio_receipt(params)
+    if row is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="MessageSid and MessageStatus are required")
+    await store_receipts([row])
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.post("/msg91/status")
+async def msg91_delivery_report(request: Request, token: str = ""):
+    """
+    MSG91 delivery report webhook.
+
+    MSG91 does not sign its reports, so the webhook URL configured in the
+    MSG91 panel carries a shared secret: ``...?token=<MSG91_WEBHOOK_TOKEN>``.
+    The report is accepted as a JSON body or as the ``data`` form field.
+    """
+    if not settings.MSG91_WEBHOOK_TOKEN:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="MSG91 webhook is not configured")
+    if not hmac.compare_digest(token.encode(), settings.MSG91_WEBHOOK_TOKEN.encode()):
+        log.warning("receipts.bad_signature", provider="msg91")
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid token")
+
+    try:
+        if request.headers.get("content-type", "").startswith("application/json"):
+            reports = await request.json()
+        else:
+            reports = json.loads((await request.form()).get("data") or "[]")
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid delivery report")
+    if isinstance(reports, dict):
+        reports = [reports]
+
+    rows = msg91_receipts(reports)
+    await store_receipts(rows)
+    return {"status": "ok", "receipts": len(rows)}
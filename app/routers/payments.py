@@ -44,7 +44,11 @@ def create_payment_order(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Payment already exists for this booking"
         )
-    
+
+    # Charge the amount snapshotted at booking time, not a client-supplied one
+    if booking.amount is not None:
+        payment.amount = booking.amount
+
     try:
         # Create Razorpay order
         razorpay_order = razorpay_client.order.create({
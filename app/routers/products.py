@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from typing import List, Optional
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app import schemas, models
 from app.auth import get_admin_user, get_current_active_user
 from decimal import Decimal
@@ -10,31 +12,37 @@ from datetime import datetime
 router = APIRouter(prefix="/products", tags=["products"])
 
 
+def _product_select():
+    """Product query with the category and images the response schemas serialize."""
+    return select(models.Product).options(
+        selectinload(models.Product.category),
+        selectinload(models.Product.images),
+    )
+
+
 # ==================== PRODUCT CATEGORIES ====================
 
 @router.get("/categories", response_model=List[schemas.ProductCategoryResponse])
-def get_product_categories(
+async def get_product_categories(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     is_active: Optional[bool] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all product categories (Public endpoint)."""
-    query = db.query(models.ProductCategory)
+    query = select(models.ProductCategory)
     
     if is_active is not None:
-        query = query.filter(models.ProductCategory.is_active == is_active)
+        query = query.where(models.ProductCategory.is_active == is_active)
     
-    categories = query.offset(skip).limit(limit).all()
+    categories = (await db.scalars(query.offset(skip).limit(limit))).all()
     return categories
 
 
 @router.get("/categories/{category_id}", response_model=schemas.ProductCategoryResponse)
-def get_product_category(category_id: int, db: Session = Depends(get_db)):
+async def get_product_category(category_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get product category by ID (Public endpoint)."""
-    category = db.query(models.ProductCategory).filter(
-        models.ProductCategory.id == category_id
-    ).first()
+    category = await db.get(models.ProductCategory, category_id)
     
     if not category:
         raise HTTPException(status_code=404, detail="Product category not found")
@@ -123,45 +131,45 @@ def delete_product_category(
 # ==================== PRODUCTS ====================
 
 @router.get("/", response_model=List[schemas.ProductListResponse])
-def get_products(
+async def get_products(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     category_id: Optional[int] = None,
     is_active: Optional[bool] = None,
     is_featured: Optional[bool] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all products with filters (Public endpoint)."""
-    query = db.query(models.Product)
+    query = _product_select()
     
     if category_id:
-        query = query.filter(models.Product.category_id == category_id)
+        query = query.where(models.Product.category_id == category_id)
     
     if is_active is not None:
-        query = query.filter(models.Product.is_active == is_active)
+        query = query.where(models.Product.is_active == is_active)
     
     if is_featured is not None:
-        query = query.filter(models.Product.is_featured == is_featured)
+        query = query.where(models.Product.is_featured == is_featured)
     
     if search:
         search_pattern = f"%{search}%"
-        query = query.filter(
+        query = query.where(
             (models.Product.name.ilike(search_pattern)) |
             (models.Product.short_description.ilike(search_pattern)) |
             (models.Product.tags.ilike(search_pattern))
         )
     
-    products = query.offset(skip).limit(limit).all()
+    products = (await db.scalars(query.offset(skip).limit(limit))).all()
     return products
 
 
 @router.get("/{product_id}", response_model=schemas.ProductResponse)
-def get_product(product_id: int, db: Session = Depends(get_db)):
+async def get_product(product_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get product by ID (Public endpoint)."""
-    product = db.query(models.Product).filter(
-        models.Product.id == product_id
-    ).first()
+    product = (await db.scalars(
+        _product_select().where(models.Product.id == product_id)
+    )).first()
     
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
@@ -170,11 +178,11 @@ def get_product(product_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/slug/{slug}", response_model=schemas.ProductResponse)
-def get_product_by_slug(slug: str, db: Session = Depends(get_db)):
+async def get_product_by_slug(slug: str, db: AsyncSession = Depends(get_async_db)):
     """Get product by slug (Public endpoint)."""
-    product = db.query(models.Product).filter(
-        models.Product.slug == slug
-    ).first()
+    product = (await db.scalars(
+        _product_select().where(models.Product.slug == slug)
+    )).first()
     
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Dict, List, Optional
 from app.database import get_db
 from app import schemas, models
 from app.auth import get_admin_user, get_current_active_user
+from app.pagination import paginate, CURSOR_DESCRIPTION
 from app.config import settings
 from decimal import Decimal
 from datetime import datetime
@@ -17,8 +18,10 @@ router = APIRouter(tags=["promo_codes_and_orders"])
 
 @router.get("/promo-codes", response_model=List[schemas.PromoCodeResponse])
 def get_promo_codes(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
     is_active: Optional[bool] = None,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_admin_user)
@@ -29,7 +32,8 @@ def get_promo_codes(
     if is_active is not None:
         query = query.filter(models.PromoCode.is_active == is_active)
     
-    promo_codes = query.offset(skip).limit(limit).all()
+    promo_codes = paginate(query, models.PromoCode.created_at, models.PromoCode.id, response,
+                           skip=skip, limit=limit, cursor=cursor)
     return promo_codes
 
 
@@ -246,6 +250,27 @@ def generate_order_number():
     return f"ORD{timestamp}{random_suffix}"
 
 
+def lock_products(db: Session, product_ids: List[int]) -> Dict[int, models.Product]:
+    """
+    Load the active products of an order in one query, locked until the transaction ends.
+    
+    SELECT ... FOR UPDATE makes a concurrent order for the same products wait
+    until this one commits, so the stock it checks cannot be sold twice.
+    Rows are locked in id order so two carts cannot deadlock. SQLite has no
+    row locks and SQLAlchemy leaves FOR UPDATE out there; SQLite already
+    allows one writer at a time and refuses to upgrade a transaction that
+    read rows changed since it started.
+    """
+    products = (
+        db.query(models.Product)
+        .filter(models.Product.id.in_(set(product_ids)), models.Product.is_active == True)
+        .order_by(models.Product.id)
+        .with_for_update()
+        .all()
+    )
+    return {product.id: product for product in products}
+
+
 @router.post("/orders", response_model=schemas.OrderResponse)
 def create_order(
     order: schemas.OrderCreate,
@@ -256,16 +281,16 @@ def create_order(
     if not order.items:
         raise HTTPException(status_code=400, detail="Order must contain at least one item")
     
+    products = lock_products(db, [item.product_id for item in order.items])
+    
     # Calculate subtotal and validate products
     subtotal = Decimal(0)
     order_items_data = []
     all_products_support_cod = True
+    requested = {}
     
     for item in order.items:
-        product = db.query(models.Product).filter(
-            models.Product.id == item.product_id,
-            models.Product.is_active == True
-        ).first()
+        product = products.get(item.product_id)
         
         if not product:
             raise HTTPException(
@@ -273,7 +298,9 @@ def create_order(
                 detail=f"Product {item.product_id} not found or inactive"
             )
         
-        if product.stock_quantity < item.quantity:
+        # A product may appear on several lines; check stock against the total
+        requested[product.id] = requested.get(product.id, 0) + item.quantity
+        if product.stock_quantity < requested[product.id]:
             raise HTTPException(
                 status_code=400,
                 detail=f"Insufficient stock for {product.name}. Available: {product.stock_quantity}"
@@ -336,18 +363,15 @@ def create_order(
     # Calculate shipping charges dynamically per product
     shipping_charges = Decimal(0)
     for item in order.items:
-        product = db.query(models.Product).filter(
-            models.Product.id == item.product_id
-        ).first()
+        product = products[item.product_id]
         
-        if product:
-            # Check if product has free shipping threshold
-            if product.free_shipping_above and subtotal >= product.free_shipping_above:
-                # Free shipping if order total exceeds product's threshold
-                continue
-            else:
-                # Add product's shipping charge from database (multiplied by quantity)
-                shipping_charges += Decimal(product.shipping_charge) * item.quantity
+        # Check if product has free shipping threshold
+        if product.free_shipping_above and subtotal >= product.free_shipping_above:
+            # Free shipping if order total exceeds product's threshold
+            continue
+        else:
+            # Add product's shipping charge from database (multiplied by quantity)
+            shipping_charges += Decimal(product.shipping_charge) * item.quantity
     
     tax_amount = Decimal(0)  # Add tax calculation if needed
     
@@ -389,19 +413,16 @@ def create_order(
         )
         db.add(db_order_item)
         
-        # Update product stock and sales
-        product = db.query(models.Product).filter(
-            models.Product.id == item_data["product_id"]
-        ).first()
+        # Update product stock and sales (rows are still locked)
+        product = products[item_data["product_id"]]
         product.stock_quantity -= item_data["quantity"]
         product.total_sales += item_data["quantity"]
     
-    # Update promo code usage
+    # Update promo code usage in SQL, so concurrent orders with the same code don't overwrite each other's count
     if promo_code_id:
-        promo_code = db.query(models.PromoCode).filter(
-            models.PromoCode.id == promo_code_id
-        ).first()
-        promo_code.current_uses += 1
+        db.query(models.PromoCode).filter(models.PromoCode.id == promo_code_id).update(
+            {models.PromoCode.current_uses: models.PromoCode.current_uses + 1}, synchronize_session=False
+        )
     
     db.commit()
     db.refresh(db_order)
@@ -428,8 +449,10 @@ def get_orders(
 
 @router.get("/orders/all", response_model=List[schemas.OrderListResponse])
 def get_all_orders(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
     status: Optional[str] = None,
     payment_status: Optional[str] = None,
     db: Session = Depends(get_db),
@@ -444,7 +467,8 @@ def get_all_orders(
     if payment_status:
         query = query.filter(models.Order.payment_status == payment_status)
     
-    orders = query.order_by(models.Order.created_at.desc()).offset(skip).limit(limit).all()
+    orders = paginate(query, models.Order.created_at, models.Order.id, response,
+                      skip=skip, limit=limit, cursor=cursor)
     return orders
 
 
@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app import schemas, crud
+from app.cache import catalog_cache
 from app.auth import get_admin_user, get_current_active_user
 from app.models import User  # Import only User
 from app import models  # Import the entire models module
@@ -11,30 +13,38 @@ router = APIRouter(prefix="/pujas", tags=["pujas"])
 
 
 @router.get("/", response_model=List[schemas.PujaResponse])
-def get_pujas(
+async def get_pujas(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     is_active: Optional[bool] = Query(None, description="Filter by is_active. If omitted (null) returns all pujas")
 ):
     """Get all pujas (Public endpoint). If `is_active` is omitted, returns all pujas."""
-    return crud.PujaCRUD.get_pujas(db, skip=skip, limit=limit, is_active=is_active)
+    async def load():
+        pujas = await crud.PujaCRUD.get_pujas_async(db, skip=skip, limit=limit, is_active=is_active)
+        return [schemas.PujaResponse.from_orm(p).model_dump(mode="json") for p in pujas]
+
+    return await catalog_cache.aget_or_load("pujas", f"list:{skip}:{limit}:{is_active}", load)
 
 
 @router.get("/{puja_id}", response_model=schemas.PujaResponse)
-def get_puja(puja_id: int, db: Session = Depends(get_db)):
+async def get_puja(puja_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get puja by ID (Public endpoint)."""
-    # Use CRUD getter so auto-disable logic runs (date+time expiration)
-    puja = crud.PujaCRUD.get_puja(db, puja_id)
-    if not puja:
+    async def load():
+        puja = await crud.PujaCRUD.get_puja_async(db, puja_id)
+        if not puja:
+            return None
+
+        # Build response model so nested chadawas list is populated correctly
+        puja_response = schemas.PujaResponse.from_orm(puja)
+        puja_response.plan_ids = [plan.id for plan in puja.plan_ids]
+        puja_response.chadawas = [schemas.ChadawaResponse.from_orm(pc.chadawa) for pc in puja.puja_chadawas]
+        return puja_response.model_dump(mode="json")
+
+    puja = await catalog_cache.aget_or_load("pujas", f"detail:{puja_id}", load)
+    if puja is None:
         raise HTTPException(status_code=404, detail="Puja not found")
-
-    # Build response model so nested chadawas list is populated correctly
-    puja_response = schemas.PujaResponse.from_orm(puja)
-    puja_response.plan_ids = [plan.id for plan in puja.plan_ids]
-    puja_response.chadawas = [schemas.ChadawaResponse.from_orm(pc.chadawa) for pc in puja.puja_chadawas]
-
-    return puja_response
+    return puja
 
 
 @router.post("/", response_model=schemas.PujaResponse)
@@ -128,16 +138,16 @@ def delete_puja(
 
 # Puja Benefits endpoints
 @router.get("/{puja_id}/benefits", response_model=List[schemas.PujaBenefitResponse])
-def get_puja_benefits(puja_id: int, db: Session = Depends(get_db)):
+async def get_puja_benefits(puja_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get benefits for a specific puja (Public endpoint)."""
     # Verify puja exists
-    puja = crud.PujaCRUD.get_puja(db, puja_id)
+    puja = await db.get(models.Puja, puja_id)
     if not puja:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Puja not found"
         )
-    return crud.PujaBenefitCRUD.get_puja_benefits(db, puja_id)
+    return await crud.PujaBenefitCRUD.get_puja_benefits_async(db, puja_id)
 
 
 @router.post("/{puja_id}/benefits", response_model=schemas.PujaBenefitResponse)
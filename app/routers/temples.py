@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app import schemas, crud
+from app.cache import catalog_cache
 from app.auth import get_admin_user, get_current_active_user
 from app.models import User
 
@@ -10,17 +12,23 @@ router = APIRouter(prefix="/temples", tags=["temples"])
 
 
 @router.get("/", response_model=List[schemas.TempleResponse])
-def get_temples(
+async def get_temples(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    return crud.TempleCRUD.get_temples(db, skip=skip, limit=limit)
+    async def load():
+        return [
+            schemas.TempleResponse.from_orm(obj).model_dump(mode="json")
+            for obj in await crud.TempleCRUD.get_temples_async(db, skip=skip, limit=limit)
+        ]
+
+    return await catalog_cache.aget_or_load("temples", f"list:{skip}:{limit}", load)
 
 
 @router.get("/{temple_id}", response_model=schemas.TempleResponse)
-def get_temple(temple_id: int, db: Session = Depends(get_db)):
-    temple = crud.TempleCRUD.get_temple(db, temple_id)
+async def get_temple(temple_id: int, db: AsyncSession = Depends(get_async_db)):
+    temple = await crud.TempleCRUD.get_temple_async(db, temple_id)
     if not temple:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Temple not found")
     return temple
@@ -5,6 +5,7 @@ from app import schemas, crud
 from app.auth import get_admin_user
 from app.models import User
 from app.utils import FileManager
+from app.cache import catalog_cache
 
 router = APIRouter(prefix="/uploads", tags=["uploads"])
 
@@ -54,6 +55,7 @@ async def upload_puja_image(
         db.add(puja_image)
         db.commit()
         db.refresh(puja_image)
+        catalog_cache.invalidate("pujas")
         
         return {
             "message": "Image uploaded successfully",
@@ -85,6 +87,7 @@ def delete_puja_image(
     # Delete database record
     db.delete(puja_image)
     db.commit()
+    catalog_cache.invalidate("pujas")
 
     return {"message": "Image deleted successfully"}
 
@@ -1,23 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.database import get_db
 from app import schemas, crud
 from app.auth import get_admin_user, get_super_admin_user
 from app.models import User
+from app.pagination import paginate, CURSOR_DESCRIPTION
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 
 @router.get("/", response_model=List[schemas.UserResponse])
 def get_users(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_admin_user)
 ):
-    """Get all users (Admin only)."""
-    return crud.UserCRUD.get_users(db, skip=skip, limit=limit)
+    """Get all users, newest first (Admin only)."""
+    return paginate(db.query(User), User.created_at, User.id, response,
+                    skip=skip, limit=limit, cursor=cursor)
 
 
 @router.get("/{user_id}", response_model=schemas.UserResponse)
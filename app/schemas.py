@@ -278,6 +278,9 @@ class BookingResponse(BookingBase, BaseResponse):
     user_id: int
     status: str
     puja_link: Optional[str] = None
+    # Price snapshot taken at booking time
+    amount: Optional[Decimal] = None
+    line_items: Optional[List[Dict[str, Any]]] = None
     created_at: datetime
     user: Optional[UserResponse] = None
     puja: Optional[PujaResponse] = None
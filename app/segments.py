@@ -0,0 +1,162 @@
+"""
+Audience segments for bulk WhatsApp campaigns.
+
+A segment is a saved query over bookings, users and orders, such as "users
+who booked puja X". Admins do not have to build phone lists by hand any more.
+Sending to a segment first resolves it into a WhatsAppAudience (a snapshot
+of who matched at that moment). The campaign is then created from that
+audience like an uploaded one (app.audiences), with one INSERT ... SELECT.
+
+Resolution streams. The segment's SELECT DISTINCT of phone numbers runs
+with yield_per, so rows arrive AUDIENCE_IMPORT_BATCH_SIZE at a time. Each
+batch is normalized and inserted with ON CONFLICT DO NOTHING on
+(audience_id, normalized_phone). The database does the deduplication, and
+no list or set of numbers is built in Python.
+
+A booking is reached on its WhatsApp number, then its mobile number, then
+the account's mobile. An order is reached on its shipping mobile, then the
+account's mobile.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import Select, exists, func, select
+from sqlalchemy.orm import Session
+
+from app import crud, models
+from app.audiences import normalize_phone
+from app.config import settings
+from app.log import get_logger
+
+log = get_logger(__name__)
+
+Booking = models.Booking
+Order = models.Order
+User = models.User
+
+
+class SegmentError(Exception):
+    """A segment is missing a parameter it needs."""
+
+
+def _booking_phone():
+    return func.coalesce(func.nullif(Booking.whatsapp_number, ""), func.nullif(Booking.mobile_number, ""), User.mobile)
+
+
+def _since(days: Optional[int]) -> Optional[datetime]:
+    return datetime.now(timezone.utc) - timedelta(days=days) if days else None
+
+
+def puja_bookers(puja_id: int, days: Optional[int] = None) -> Select:
+    """Everyone with a booking (not cancelled) for the puja, optionally only in the last ``days``."""
+    stmt = (
+        select(_booking_phone())
+        .select_from(Booking)
+        .join(User, Booking.user_id == User.id)
+        .where(Booking.puja_id == puja_id, Booking.status != models.BookingStatus.CANCELLED.value)
+    )
+    if days:
+        stmt = stmt.where(Booking.booking_date >= _since(days))
+    return stmt.distinct()
+
+
+def temple_chadawa_bookers(temple_id: int, days: Optional[int] = 90) -> Select:
+    """Everyone who booked the temple with at least one chadawa in the last ``days`` (default 90)."""
+    has_chadawa = exists().where(models.BookingChadawa.booking_id == Booking.id)
+    stmt = (
+        select(_booking_phone())
+        .select_from(Booking)
+        .join(User, Booking.user_id == User.id)
+        .where(Booking.temple_id == temple_id, Booking.status != models.BookingStatus.CANCELLED.value, has_chadawa)
+    )
+    if days:
+        stmt = stmt.where(Booking.booking_date >= _since(days))
+    return stmt.distinct()
+
+
+def delivered_order_customers(days: Optional[int] = None) -> Select:
+    """Everyone with a delivered store order, optionally created in the last ``days``."""
+    stmt = (
+        select(func.coalesce(func.nullif(Order.shipping_mobile, ""), User.mobile))
+        .select_from(Order)
+        .join(User, Order.user_id == User.id)
+        .where(Order.status == "delivered")
+    )
+    if days:
+        stmt = stmt.where(Order.created_at >= _since(days))
+    return stmt.distinct()
+
+
+class Segment:
+    """A named segment: its query builder and the parameters that builder takes."""
+
+    def __init__(self, name: str, description: str, query, required: List[str], optional: List[str]):
+        self.name = name
+        self.description = description
+        self.query = query
+        self.required = required
+        self.optional = optional
+
+    def select(self, params: Dict) -> Select:
+        missing = [name for name in self.required if params.get(name) is None]
+        if missing:
+            raise SegmentError(f"Segment {self.name} requires: {', '.join(missing)}")
+        return self.query(**{name: params[name] for name in self.required + self.optional
+                             if params.get(name) is not None})
+
+
+SEGMENTS: Dict[str, Segment] = {
+    segment.name: segment for segment in [
+        Segment("puja_bookers", "Users who booked a puja", puja_bookers, ["puja_id"], ["days"]),
+        Segment("temple_chadawa_bookers", "Chadawa bookers of a temple in the last N days (default 90)",
+                temple_chadawa_bookers, ["temple_id"], ["days"]),
+        Segment("delivered_order_customers", "Customers with a delivered order", delivered_order_customers,
+                [], ["days"]),
+    ]
+}
+
+
+def _phones(db: Session, stmt: Select) -> Iterator[List[str]]:
+    # yield_per streams the result (a server-side cursor on PostgreSQL) in partitions
+    result = db.execute(stmt.execution_options(yield_per=settings.AUDIENCE_IMPORT_BATCH_SIZE))
+    for partition in result.scalars().partitions():
+        yield partition
+
+
+def resolve_segment(db: Session, segment: Segment, params: Dict,
+                    created_by: Optional[int] = None) -> models.WhatsAppAudience:
+    """
+    Snapshot ``segment`` into a new audience, streaming and deduplicating in the database.
+
+    The audience is marked ready when done, or failed (and emptied) if
+    resolution raises.
+    """
+    stmt = segment.select(params)
+    label = ", ".join(f"{key}={value}" for key, value in sorted(params.items()) if value is not None)
+    audience = crud.WhatsAppAudienceCRUD.create_audience(
+        db, name=f"{segment.name} ({label})" if label else segment.name, created_by=created_by
+    )
+    total = invalid = 0
+    try:
+        for phones in _phones(db, stmt):
+            members = []
+            for phone in phones:
+                total += 1
+                normalized = normalize_phone(phone)
+                if normalized is None:
+                    invalid += 1
+                    continue
+                members.append({"audience_id": audience.id, "phone": phone[:30], "normalized_phone": normalized})
+            crud.WhatsAppAudienceCRUD.add_unique_members(db, members)
+        members = crud.WhatsAppAudienceCRUD.count_members(db, audience.id)
+    except Exception as e:
+        db.rollback()
+        crud.WhatsAppAudienceCRUD.mark_failed(db, audience, str(e))
+        log.error("segment.resolve_failed", segment=segment.name, audience_id=audience.id, error=str(e))
+        raise
+
+    crud.WhatsAppAudienceCRUD.mark_ready(db, audience, total_rows=total, member_count=members,
+                                         invalid_count=invalid, duplicate_count=total - invalid - members)
+    log.info("segment.resolved", segment=segment.name, audience_id=audience.id, rows=total, members=members,
+             invalid=invalid)
+    return audience
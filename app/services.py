@@ -1,20 +1,28 @@
 from typing import Optional
-from twilio.rest import Client
 import json
+import time
+import traceback
 from twilio.base.exceptions import TwilioRestException
 import requests
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import razorpay
 from app.config import settings
-from decimal import Decimal
+from app.log import get_logger
 from typing import List
 from pydantic import BaseModel
 from razorpay.errors import SignatureVerificationError
-from app import models
+from app import idempotency, models, notification_context
+from app.notification_context import BookingNotification
+from app.mailer import smtp_pool
+from app.notification_templates import render_booking_email, render_booking_whatsapp
+from app.rate_limit import rate_limiter
+from app.twilio_client import WhatsAppMessage, get_twilio_client
 from datetime import datetime
 
+log = get_logger(__name__)
+
+
 class SMSService:
     """SMS service supporting both Twilio and MSG91."""
     
@@ -25,8 +33,6 @@ class SMSService:
         # Determine SMS provider based on configuration
         provider_choice = settings.SMS_PROVIDER.lower()
         
-        print(f"🔧 SMS Provider Setting: {provider_choice}")
-        
         if provider_choice == "msg91":
             self._init_msg91_only()
         elif provider_choice == "twilio":
@@ -34,16 +40,16 @@ class SMSService:
         elif provider_choice == "auto":
             self._init_auto_selection()
         else:
-            print(f"❌ Invalid SMS_PROVIDER: {provider_choice}. Use 'auto', 'twilio', or 'msg91'")
+            log.error("sms.invalid_provider", provider=provider_choice, allowed="auto, twilio, msg91")
             self.sms_provider = None
     
     def _init_msg91_only(self):
         """Initialize MSG91 only."""
         if settings.MSG91_API_KEY:
             self.sms_provider = "msg91"
-            print("✅ MSG91 SMS service initialized (forced)")
+            log.info("sms.provider_selected", provider="msg91", mode="forced")
         else:
-            print("❌ MSG91 credentials not found")
+            log.error("sms.credentials_missing", provider="msg91")
             self.sms_provider = None
     
     def _init_twilio_only(self):
@@ -51,14 +57,13 @@ class SMSService:
         if settings.TWILIO_ACCOUNT_SID and settings.TWILIO_AUTH_TOKEN and settings.TWILIO_PHONE_NUMBER:
             self.sms_provider = "twilio"
             try:
-                print(f"Initializing Twilio with Account SID: {settings.TWILIO_ACCOUNT_SID[:10]}...")
-                self.client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
-                print("✅ Twilio client initialized (forced)")
+                self.client = get_twilio_client()
+                log.info("sms.provider_selected", provider="twilio", mode="forced")
             except Exception as e:
-                print(f"❌ Failed to initialize Twilio: {e}")
+                log.error("sms.init_failed", provider="twilio", error=str(e))
                 self.sms_provider = None
         else:
-            print("❌ Twilio credentials not found")
+            log.error("sms.credentials_missing", provider="twilio")
             self.sms_provider = None
     
     def _init_auto_selection(self):
@@ -66,104 +71,116 @@ class SMSService:
         # Priority: MSG91 > Twilio (MSG91 is better for Indian numbers)
         if settings.MSG91_API_KEY:
             self.sms_provider = "msg91"
-            print("✅ MSG91 SMS service initialized (auto-selected)")
+            log.info("sms.provider_selected", provider="msg91", mode="auto")
         elif settings.TWILIO_ACCOUNT_SID and settings.TWILIO_AUTH_TOKEN and settings.TWILIO_PHONE_NUMBER:
             self.sms_provider = "twilio"
             try:
-                print(f"Initializing Twilio with Account SID: {settings.TWILIO_ACCOUNT_SID[:10]}...")
-                self.client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
-                print("✅ Twilio client initialized (auto-selected)")
+                self.client = get_twilio_client()
+                log.info("sms.provider_selected", provider="twilio", mode="auto")
             except Exception as e:
-                print(f"❌ Failed to initialize Twilio: {e}")
+                log.error("sms.init_failed", provider="twilio", error=str(e))
                 self.sms_provider = None
         else:
-            print("❌ No SMS service configured (MSG91 or Twilio)")
+            log.error("sms.not_configured")
             self.sms_provider = None
     
     def send_otp(self, mobile: str, otp: str) -> bool:
-        """Send OTP via SMS using MSG91 or Twilio."""
+        """Send OTP via SMS using MSG91 or Twilio. Raises RateLimitExceeded when the provider budget is used up."""
         if not self.sms_provider:
-            print(f"❌ SMS Service not configured. OTP for {mobile}: {otp}")
+            log.warning("otp.not_sent", to=mobile, reason="sms_not_configured")
+            log.debug("otp.unsent_code", to=mobile, otp=otp)
             return False
         
-        if self.sms_provider == "msg91":
-            return self._send_msg91_otp(mobile, otp)
-        elif self.sms_provider == "twilio":
-            return self._send_twilio_otp(mobile, otp)
-        else:
-            return False
+        started = time.perf_counter()
+        sent = False
+        try:
+            if self.sms_provider == "msg91":
+                sent = self._send_msg91_otp(mobile, otp)
+            elif self.sms_provider == "twilio":
+                sent = self._send_twilio_otp(mobile, otp)
+        finally:
+            # Provider latency per send; the OTP endpoints no longer wait for it (app.tasks.send_otp)
+            log.info("otp.provider_call", provider=self.sms_provider, sent=sent,
+                     duration_ms=round((time.perf_counter() - started) * 1000, 1))
+        return sent
+    
+    MSG91_OTP_URL = "https://control.msg91.com/api/v5/otp"
+    
+    @staticmethod
+    def msg91_otp_payload(mobile: str, otp: str) -> dict:
+        """JSON body of the MSG91 OTP API call for ``mobile`` (with or without +91)."""
+        # Clean mobile number for MSG91
+        if mobile.startswith('+91'):
+            mobile = mobile[3:]
+        elif mobile.startswith('91'):
+            mobile = mobile[2:]
+        return {
+            "template_id": settings.MSG91_TEMPLATE_ID,
+            "mobile": f"91{mobile}",
+            "authkey": settings.MSG91_API_KEY,
+            "otp": otp,
+            "otp_expiry": 10
+        }
     
     def _send_msg91_otp(self, mobile: str, otp: str) -> bool:
         """Send OTP via MSG91."""
+        rate_limiter.acquire("msg91", settings.MSG91_SENDER_ID)
         try:
-            # Clean mobile number for MSG91
-            original_mobile = mobile
-            if mobile.startswith('+91'):
-                mobile = mobile[3:]
-            elif mobile.startswith('91'):
-                mobile = mobile[2:]
-            
-            print(f"📱 Sending MSG91 SMS to {mobile} (original: {original_mobile})")
-            print(f"🔐 OTP: {otp}")
-            
-            url = "https://control.msg91.com/api/v5/otp"
-            
-            payload = {
-                "template_id": settings.MSG91_TEMPLATE_ID,
-                "mobile": f"91{mobile}",
-                "authkey": settings.MSG91_API_KEY,
-                "otp": otp,
-                "otp_expiry": 10
-            }
+            payload = self.msg91_otp_payload(mobile, otp)
+            mobile = payload["mobile"]
+            log.debug("otp.sending", provider="msg91", to=mobile, otp=otp)
             
             headers = {"Content-Type": "application/json"}
             
-            response = requests.post(url, json=payload, headers=headers)
+            response = requests.post(
+                self.MSG91_OTP_URL, json=payload, headers=headers,
+                timeout=(settings.MSG91_CONNECT_TIMEOUT_SECONDS, settings.MSG91_READ_TIMEOUT_SECONDS)
+            )
             
             if response.status_code == 200:
                 result = response.json()
-                print(f"✅ MSG91 SMS sent successfully to {mobile}")
-                print(f"📧 Request ID: {result.get('request_id', 'N/A')}")
+                log.info("otp.sent", provider="msg91", to=mobile, request_id=result.get('request_id'))
                 return True
             else:
-                print(f"❌ MSG91 SMS failed: {response.text}")
+                log.error("otp.failed", provider="msg91", to=mobile, status=response.status_code,
+                          response=response.text)
                 return False
                 
         except Exception as e:
-            print(f"❌ MSG91 SMS error for {mobile}: {e}")
+            log.error("otp.failed", provider="msg91", to=mobile, error=str(e))
             return False
     
     def _send_twilio_otp(self, mobile: str, otp: str) -> bool:
         """Send OTP via Twilio."""
+        rate_limiter.acquire("twilio_sms", settings.TWILIO_PHONE_NUMBER)
         try:
             # Format mobile number for international format
             original_mobile = mobile
             if not mobile.startswith('+'):
                 mobile = f"+91{mobile}"
             
-            print(f"📱 Sending Twilio SMS to {mobile} (original: {original_mobile})")
-            print(f"📞 From: {settings.TWILIO_PHONE_NUMBER}")
-            print(f"🔐 OTP: {otp}")
+            log.debug("otp.sending", provider="twilio", to=mobile, original=original_mobile,
+                      from_=settings.TWILIO_PHONE_NUMBER, otp=otp)
             
             message = self.client.messages.create(
                 body=f"Your 33 Koti Dham OTP is: {otp}. Valid for 10 minutes. Do not share this OTP.",
                 from_=settings.TWILIO_PHONE_NUMBER,
                 to=mobile
             )
-            print(f"✅ Twilio SMS sent successfully to {mobile}")
-            print(f"📧 Message SID: {message.sid}")
+            log.info("otp.sent", provider="twilio", to=mobile, sid=message.sid)
             return True
         except Exception as e:
-            print(f"❌ Twilio SMS failed for {mobile}: {e}")
+            log.error("otp.failed", provider="twilio", to=mobile, error=str(e))
             return False
     
     def send_booking_confirmation(self, mobile: str, booking_id: int) -> bool:
         """Send booking confirmation SMS."""
         if not self.client:
-            print(f"Booking confirmation SMS for {mobile}: Booking #{booking_id} confirmed")
+            log.info("sms.skipped", to=mobile, booking_id=booking_id, reason="sms_not_configured")
             return True
         
         try:
+            rate_limiter.acquire("twilio_sms", settings.TWILIO_PHONE_NUMBER)
             message = self.client.messages.create(
                 body=f"Your puja booking #{booking_id} has been confirmed.",
                 from_=settings.TWILIO_PHONE_NUMBER,
@@ -171,7 +188,7 @@ class SMSService:
             )
             return True
         except Exception as e:
-            print(f"SMS sending failed: {e}")
+            log.error("sms.failed", to=mobile, booking_id=booking_id, error=str(e))
             return False
 
 def create_razorpay_order(amount, receipt_id):
@@ -185,74 +202,6 @@ def create_razorpay_order(amount, receipt_id):
     return order
 
 
-def calculate_booking_amount(db, booking) -> Decimal:
-    """Calculate total amount for a Booking (persisted or incoming) using authoritative DB prices.
-
-    For PUJA bookings:
-    - plan.actual_price (if plan_id provided)
-    - sum of selected chadawa prices
-
-    For TEMPLE bookings:
-    - ONLY sum of selected chadawa prices (NO plan price)
-
-    Returns Decimal total amount (INR)
-    """
-    total = Decimal('0')
-
-    # Check if this is a temple booking (temple_id set, puja_id not set)
-    temple_id = getattr(booking, 'temple_id', None)
-    puja_id = getattr(booking, 'puja_id', None)
-    is_temple_booking = temple_id and not puja_id
-
-    # Plan price: only include for PUJA bookings, NOT for temple bookings
-    if not is_temple_booking:
-        plan_id = getattr(booking, 'plan_id', None)
-        if plan_id:
-            plan = db.query(models.Plan).filter(models.Plan.id == plan_id).first()
-            if plan:
-                price = None
-                if getattr(plan, 'discounted_price', None) is not None and str(getattr(plan, 'discounted_price')).strip() != "":
-                    price = getattr(plan, 'discounted_price')
-                elif getattr(plan, 'actual_price', None) is not None:
-                    price = getattr(plan, 'actual_price')
-
-                if price is not None:
-                    try:
-                        total += Decimal(str(price))
-                    except Exception:
-                        pass
-
-    # Collect chadawa ids from multiple possible shapes (persisted booking or request shapes)
-    chadawa_ids = []
-    if hasattr(booking, 'booking_chadawas') and booking.booking_chadawas is not None:
-        for bc in booking.booking_chadawas:
-            cid = getattr(bc, 'chadawa_id', None) or (bc.get('chadawa_id') if isinstance(bc, dict) else None)
-            if cid:
-                chadawa_ids.append(cid)
-
-    if not chadawa_ids and getattr(booking, 'chadawa_ids', None):
-        chadawa_ids = list(getattr(booking, 'chadawa_ids') or [])
-
-    if not chadawa_ids and getattr(booking, 'chadawas', None):
-        for c in getattr(booking, 'chadawas') or []:
-            cid = getattr(c, 'chadawa_id', None) or (c.get('chadawa_id') if isinstance(c, dict) else None)
-            if cid:
-                chadawa_ids.append(cid)
-
-    for cid in chadawa_ids:
-        try:
-            ch_obj = db.query(models.Chadawa).filter(models.Chadawa.id == cid).first()
-        except Exception:
-            ch_obj = None
-        if ch_obj and getattr(ch_obj, 'price', None) is not None:
-            try:
-                total += Decimal(str(ch_obj.price))
-            except Exception:
-                pass
-
-    return total
-
-
 def verify_razorpay_signature(order_id: str, payment_id: str, signature: str) -> bool:
     """Verify a Razorpay payment signature using the Razorpay SDK. Returns True if valid."""
     client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
@@ -281,7 +230,7 @@ class EmailService:
     def send_email(self, to_email: str, subject: str, body: str, is_html: bool = False) -> bool:
         """Send email."""
         if not all([self.smtp_host, self.username, self.password]):
-            print(f"Email service not configured. Email to {to_email}: {subject}")
+            log.info("email.skipped", to=to_email, subject=subject, reason="smtp_not_configured")
             return True  # Return True for development
         
         try:
@@ -292,16 +241,11 @@ class EmailService:
             
             msg.attach(MIMEText(body, 'html' if is_html else 'plain'))
             
-            server = smtplib.SMTP(self.smtp_host, self.smtp_port)
-            server.starttls()
-            server.login(self.username, self.password)
-            text = msg.as_string()
-            server.sendmail(self.username, to_email, text)
-            server.quit()
+            smtp_pool.send(msg, from_addr=self.username)
             
             return True
         except Exception as e:
-            print(f"Email sending failed: {e}")
+            log.error("email.failed", to=to_email, error=str(e))
             return False
     
     def send_booking_confirmation_email(self, to_email: str, user_name: str, booking_id: int) -> bool:
@@ -399,315 +343,19 @@ Thank you for booking with us!
 """
         return details.strip()
     
-    @staticmethod
-    def format_booking_details_whatsapp(booking) -> str:
-        """Format booking details for WhatsApp message with emojis, pricing and images."""
-        from datetime import datetime
-        
-        try:
-            puja_name = booking.puja.name if booking.puja else "N/A"
-        except:
-            puja_name = "N/A"
-            
-        try:
-            plan_name = booking.plan.name if booking.plan else "N/A"
-        except:
-            plan_name = "N/A"
-        
-        # Extract temple name (for temple bookings)
-        try:
-            temple_name = booking.temple.name if booking.temple else "N/A"
-        except:
-            temple_name = "N/A"
-            
-        try:
-            temple_address = booking.puja.temple_address if booking.puja else "N/A"
-        except:
-            temple_address = "N/A"
-            
-        try:
-            puja_date = booking.puja.date if booking.puja else "N/A"
-        except:
-            puja_date = "N/A"
-            
-        try:
-            puja_time = booking.puja.time if booking.puja else "N/A"
-        except:
-            puja_time = "N/A"
-        
-        # Format time to 12-hour IST format
-        if puja_time and puja_time != "N/A":
-            try:
-                if isinstance(puja_time, str):
-                    time_obj = datetime.strptime(puja_time, "%H:%M:%S").time()
-                else:
-                    time_obj = puja_time
-                puja_time = datetime.combine(datetime.today(), time_obj).strftime("%I:%M %p") + " IST"
-            except:
-                puja_time = f"{puja_time} IST"
-        else:
-            puja_time = "N/A"
-        
-        # Get plan pricing
-        plan_price = "0"
-        try:
-            if booking.plan:
-                plan_price = booking.plan.discounted_price if booking.plan.discounted_price else booking.plan.actual_price
-        except:
-            plan_price = "0"
-        
-        # Calculate chadawa prices and details
-        chadawa_details = ""
-        chadawa_total = 0
-        try:
-            if booking.booking_chadawas and len(booking.booking_chadawas) > 0:
-                chadawa_details = "\n🎁 *Selected Offerings(chadawas):*\n"
-                for bc in booking.booking_chadawas:
-                    try:
-                        chadawa = bc.chadawa if hasattr(bc, 'chadawa') else bc.get('chadawa') if isinstance(bc, dict) else None
-                        if chadawa:
-                            chadawa_name = chadawa.name if hasattr(chadawa, 'name') else chadawa.get('name')
-                            chadawa_price = float(chadawa.price if hasattr(chadawa, 'price') else chadawa.get('price', 0))
-                            chadawa_details += f"   • {chadawa_name}: ₹{chadawa_price}\n"
-                            chadawa_total += chadawa_price
-                    except Exception as e:
-                        print(f"⚠️ Error parsing chadawa: {e}")
-                        continue
-        except Exception as e:
-            print(f"⚠️ Error processing chadawas: {e}")
-        # Calculate total price
-        try:
-            plan_price_float = float(plan_price)
-        except:
-            plan_price_float = 0
-        
-        # For temple bookings: only chadawa total (no plan)
-        # For puja bookings: plan + chadawas
-        is_temple_booking = booking.temple and not booking.puja
-        if is_temple_booking:
-            total_price = chadawa_total
-        else:
-            total_price = plan_price_float + chadawa_total
-        
-        # Get first puja image URL
-        puja_image = ""
-        try:
-            if booking.puja and booking.puja.images:
-                img_url = booking.puja.images[0].image_url if booking.puja.images else ""
-                if img_url:
-                    puja_image = NotificationService._normalize_image_url(img_url)
-        except:
-            pass
-        
-        # Build puja/temple section and pricing section
-        puja_details_section = ""
-        pricing_section = ""
-        
-        # For temple bookings (has temple but no puja)
-        if booking.temple and not booking.puja:
-            puja_details_section = f"""
-🛕 *Temple Details:*
-   *Temple:* {temple_name}
-   📍 *Location:* {booking.temple.location if booking.temple and booking.temple.location else 'N/A'}
-"""
-            # Temple booking: show chadawas with total on new line
-            pricing_section = f"""{chadawa_details}   *Total:* ₹{total_price}"""
-        # For puja bookings (has puja)
-        elif booking.puja:
-            # Check if puja details are all N/A
-            if not (puja_name == "N/A" and temple_address == "N/A" and puja_date == "N/A" and puja_time == "N/A"):
-                puja_details_section = f"""
-🙏 *Puja Details:*
-   *Name:* {puja_name}
-   *Plan:* {plan_name}
-   📍 *Location:* {temple_address}
-   📅 *Puja Date:* {puja_date}
-   ⏰ *Puja Time:* {puja_time}
-"""
-            # Puja booking: show plan + chadawas pricing
-            pricing_section = f"""💰 *Pricing:*
-   *Plan Price:* ₹{plan_price}{chadawa_details}   *Total:* ₹{total_price}"""
-        
-        details = f"""🙏 Booking Received 🙏
-
-📋 *Booking Reference:* #{booking.id}
-✅ *Status:* {booking.status.upper()}
-📅 *Booking Created:* {booking.booking_date.strftime('%d-%m-%Y %H:%M') if booking.booking_date else 'N/A'}{puja_details_section}
-{pricing_section}
-
-👤 *Your Details:*
-   *Gotra:* {booking.gotra or 'N/A'}
-   *Mobile:* {booking.mobile_number or 'N/A'}
-
-🙏 Thank you for choosing 33 Koti Dham! 🙏
-"""
-        
-        return details.strip()
-    
-    @staticmethod
-    def _normalize_image_url(url: str) -> str:
-        """Normalize image URL by adding base URL if needed."""
-        if not url:
-            return ""
-        if url.startswith("/uploda") or url.startswith("/uploads"):
-            return f"https://api.33kotidham.in{url}"
-        if url.startswith("http"):
-            return url
-        return f"https://api.33kotidham.in/{url}"
+    # Defined in app.notification_context
+    booking_context = staticmethod(notification_context.booking_context)
+    booking_contacts = staticmethod(notification_context.booking_contacts)
     
     @staticmethod
-    def _calculate_booking_total(booking) -> float:
-        """Calculate total booking amount including plan and all chadawas."""
-        try:
-            plan_price = float(booking.plan.discounted_price if booking.plan and booking.plan.discounted_price else booking.plan.actual_price if booking.plan else 0)
-        except:
-            plan_price = 0
-        
-        chadawa_total = 0
-        try:
-            if booking.booking_chadawas and len(booking.booking_chadawas) > 0:
-                for bc in booking.booking_chadawas:
-                    try:
-                        chadawa = bc.chadawa if hasattr(bc, 'chadawa') else bc.get('chadawa') if isinstance(bc, dict) else None
-                        if chadawa:
-                            price = float(chadawa.price if hasattr(chadawa, 'price') else chadawa.get('price', 0))
-                            chadawa_total += price
-                    except Exception as e:
-                        print(f"⚠️ Error parsing chadawa price: {e}")
-                        continue
-        except Exception as e:
-            print(f"⚠️ Error calculating chadawa total: {e}")
-        
-        return plan_price + chadawa_total
-    
-    @staticmethod
-    def _format_chadawa_html_for_email(booking) -> str:
-        """Format chadawas as HTML rows for email."""
-        if not booking.booking_chadawas or len(booking.booking_chadawas) == 0:
-            return ""
-        
-        html = '<div style="margin: 10px 0;"><strong>   🎁 Selected Offerings:</strong><br>'
-        try:
-            for bc in booking.booking_chadawas:
-                try:
-                    chadawa = bc.chadawa if hasattr(bc, 'chadawa') else bc.get('chadawa') if isinstance(bc, dict) else None
-                    if chadawa:
-                        chadawa_name = chadawa.name if hasattr(chadawa, 'name') else chadawa.get('name')
-                        chadawa_price = float(chadawa.price if hasattr(chadawa, 'price') else chadawa.get('price', 0))
-                        html += f"<div style='display: flex; justify-content: space-between; padding: 6px 0; border-bottom: 1px solid #e8e8e8; font-size: 14px;'>"
-                        html += f"<span style='padding-left: 15px;'>• {chadawa_name}</span>"
-                        html += f"<span>₹{chadawa_price}</span>"
-                        html += f"</div>"
-                except Exception as e:
-                    print(f"⚠️ Error formatting chadawa row: {e}")
-                    continue
-        except Exception as e:
-            print(f"⚠️ Error processing chadawas for HTML: {e}")
-        
-        html += "</div>"
-        return html
+    def format_booking_details_whatsapp(booking) -> str:
+        """Format booking details for WhatsApp message with emojis and pricing."""
+        return render_booking_whatsapp(NotificationService.booking_context(booking))
     
     @staticmethod
     def format_booking_details_email(booking) -> str:
         """Format booking details for email with HTML styling, pricing and images."""
-        puja_name = booking.puja.name if booking.puja else "N/A"
-        plan_name = booking.plan.name if booking.plan else "N/A"
-        temple_address = booking.puja.temple_address if booking.puja else "N/A"
-        puja_date = booking.puja.date if booking.puja else "N/A"
-        puja_time = booking.puja.time if booking.puja else "N/A"
-        
-        # Get pricing
-        plan_actual = booking.plan.actual_price if booking.plan else "0"
-        plan_discount = booking.plan.discounted_price if booking.plan and booking.plan.discounted_price else plan_actual
-        
-        # Get puja image
-        puja_image = ""
-        if booking.puja and booking.puja.temple_image_url:
-            puja_image = NotificationService._normalize_image_url(booking.puja.temple_image_url)
-        
-        # Build image HTML
-        image_html = ""
-        if puja_image:
-            image_html = f"""
-            <div style="margin: 20px 0; text-align: center;">
-                <img src="{puja_image}" alt="{puja_name}" style="max-width: 100%; height: auto; border-radius: 8px; box-shadow: 0 2px 8px rgba(0,0,0,0.1);">
-            </div>
-            """
-        
-        # Get all puja images if available
-        puja_images_html = ""
-        if booking.puja and booking.puja.images and len(booking.puja.images) > 0:
-            puja_images_html = "<div style='margin: 15px 0;'><h4 style='color: #8B4513; margin-bottom: 10px;'>📸 Puja Gallery:</h4>"
-            puja_images_html += "<div style='display: flex; gap: 10px; flex-wrap: wrap;'>"
-            for img in booking.puja.images[:4]:  # Show first 4 images
-                if img.image_url:
-                    normalized_url = NotificationService._normalize_image_url(img.image_url)
-                    puja_images_html += f"<img src='{normalized_url}' alt='Puja' style='max-width: 150px; height: 120px; object-fit: cover; border-radius: 5px; box-shadow: 0 1px 3px rgba(0,0,0,0.1);'>"
-            puja_images_html += "</div></div>"
-        
-        html = f"""
-<div style="font-family: Arial, sans-serif; color: #333; background-color: #fafafa; padding: 20px;">
-    <div style="max-width: 600px; margin: 0 auto; background-color: white; border-radius: 8px; overflow: hidden; box-shadow: 0 2px 8px rgba(0,0,0,0.1);">
-        
-        <div style="background: linear-gradient(135deg, #8B4513 0%, #D2691E 100%); padding: 20px; text-align: center; color: white;">
-            <h2 style="margin: 0; font-size: 24px;">� Booking Received</h2>
-            <p style="margin: 10px 0 0 0; font-size: 14px; opacity: 0.9;">Reference: #{booking.id}</p>
-        </div>
-        
-        <div style="padding: 25px;">
-            <p style="font-size: 16px; margin: 0 0 20px 0;">Dear Valued Customer,</p>
-            
-            <p>Thank you for your booking with <strong>33 Koti Dham</strong>! Your puja booking has been received and is pending confirmation.</p>
-            
-            {image_html}
-            
-            <div style="background-color: #fff8f0; padding: 15px; border-radius: 5px; margin: 15px 0; border-left: 4px solid #8B4513;">
-                <h4 style="color: #8B4513; margin-top: 0;">🙏 Puja Details</h4>
-                <p style="margin: 8px 0;"><strong>Puja Name:</strong> {puja_name}</p>
-                <p style="margin: 8px 0;"><strong>Plan:</strong> {plan_name}</p>
-                <p style="margin: 8px 0;"><strong>Location:</strong> {temple_address}</p>
-                <p style="margin: 8px 0;"><strong>Puja Date:</strong> {puja_date}</p>
-                <p style="margin: 8px 0;"><strong>Puja Time:</strong> {puja_time}</p>
-            </div>
-            
-            <div style="background-color: #f0f8ff; padding: 15px; border-radius: 5px; margin: 15px 0; border-left: 4px solid #4169E1;">
-                <h4 style="color: #4169E1; margin-top: 0;">💰 Pricing Details</h4>
-                <div style="display: flex; justify-content: space-between; padding: 8px 0; border-bottom: 1px solid #e0e0e0;">
-                    <span><strong>Plan:</strong></span>
-                    <span>₹{plan_discount}</span>
-                </div>
-                {NotificationService._format_chadawa_html_for_email(booking)}
-                <div style="display: flex; justify-content: space-between; padding: 8px 0; color: #4CAF50; font-size: 18px; font-weight: bold;">
-                    <span><strong>Total Amount:</strong></span>
-                    <span>₹{NotificationService._calculate_booking_total(booking)}</span>
-                </div>
-            </div>
-            
-            <div style="background-color: #fffacd; padding: 15px; border-radius: 5px; margin: 15px 0; border-left: 4px solid #FFD700;">
-                <h4 style="color: #8B4513; margin-top: 0;">👤 Your Details</h4>
-                <p style="margin: 8px 0;"><strong>Gotra:</strong> {booking.gotra or 'N/A'}</p>
-                <p style="margin: 8px 0;"><strong>Mobile:</strong> {booking.mobile_number or 'N/A'}</p>
-                <p style="margin: 8px 0;"><strong>WhatsApp:</strong> {booking.whatsapp_number or 'N/A'}</p>
-                <p style="margin: 8px 0;"><strong>Booking Status:</strong> <span style="color: #FF6347; font-weight: bold;">PENDING</span></p>
-            </div>
-            
-            {puja_images_html}
-            
-            <div style="background-color: #e8f4f8; padding: 15px; border-radius: 5px; margin: 15px 0; border-left: 4px solid #2196F3;">
-                <ul style="margin: 10px 0; padding-left: 20px;">
-                    <li>Further puja details will be shared with you</li>
-                </ul>
-            </div>
-            
-            <p style="color: #666; font-size: 14px; margin-top: 25px; text-align: center;">
-                <strong>33 Koti Dham Team</strong><br>
-                Bringing Divine Blessings to Your Home 🙏
-            </p>
-        </div>
-    </div>
-</div>
-"""
-        return html
+        return render_booking_email(NotificationService.booking_context(booking))
 
     @staticmethod
     def send_email_notification(
@@ -718,8 +366,7 @@ Thank you for booking with us!
     ) -> bool:
         """Send email notification."""
         if not settings.SEND_EMAIL_ON_BOOKING or not settings.SMTP_USERNAME:
-            import logging
-            logging.warning(f"Email notifications disabled or not configured. Skipping email to {to_email}")
+            log.warning("email.skipped", to=to_email, reason="disabled_or_not_configured")
             return False
 
         try:
@@ -735,18 +382,54 @@ Thank you for booking with us!
             if html_body:
                 msg.attach(MIMEText(html_body, "html"))
 
-            # Connect and send
-            with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
-                server.starttls()
-                server.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD)
-                server.send_message(msg)
+            # Send on a pooled, already authenticated SMTP session
+            smtp_pool.send(msg)
+
+            log.info("email.sent", to=to_email, subject=subject)
+            return True
+        except Exception as e:
+            log.error("email.failed", to=to_email, error=str(e))
+            return False
+
+    @staticmethod
+    def _log_twilio_error(event: str, err: Exception, **fields) -> None:
+        if isinstance(err, TwilioRestException):
+            fields.update(status=err.status, code=err.code)
+        log.error(event, error=str(err), error_type=type(err).__name__, **fields)
+
+    @staticmethod
+    def free_form_whatsapp(phone_number: str, message: str, media_url: Optional[str] = None) -> WhatsAppMessage:
+        """A free-form WhatsApp message from the configured sender number."""
+        # Normalize phone number
+        phone = phone_number.replace("+", "").replace("-", "").replace(" ", "")
+        if not phone.startswith("91") and len(phone) == 10:  # Indian number without country code
+            phone = "91" + phone
+        
+        # Ensure it starts with +
+        if not phone.startswith("+"):
+            phone = "+" + phone
+        return WhatsAppMessage(
+            to=f"whatsapp:{phone}",
+            from_=f"whatsapp:{settings.TWILIO_WHATSAPP_NUMBER}",
+            body=message,
+            media_url=media_url,
+            label="free_form_media" if media_url else "free_form",
+        )
+
+    @staticmethod
+    def send_whatsapp_message(message: WhatsAppMessage) -> bool:
+        """Send one prepared message on the shared Twilio client. Twilio errors return False."""
+        # Waits for a send token; raises RateLimitExceeded past the allowed wait
+        rate_limiter.acquire("twilio_whatsapp", settings.TWILIO_WHATSAPP_NUMBER)
 
-            import logging
-            logging.info(f"Email sent successfully to {to_email}")
+        try:
+            log.debug("whatsapp.request", variant=message.label, params=message.create_kwargs())
+            msg = get_twilio_client().messages.create(**message.create_kwargs())
+            log.info("whatsapp.sent", to=message.to, variant=message.label, sid=msg.sid, status=msg.status)
             return True
         except Exception as e:
-            import logging
-            logging.error(f"Failed to send email to {to_email}: {str(e)}")
+            NotificationService._log_twilio_error("whatsapp.failed", e, to=message.to, variant=message.label)
+            log.debug("whatsapp.failed_trace", to=message.to, trace=traceback.format_exc())
             return False
 
     @staticmethod
@@ -756,109 +439,17 @@ Thank you for booking with us!
         media_url: Optional[str] = None
     ) -> bool:
         """Send WhatsApp message notification using Twilio WhatsApp API."""
-        print(f"\n🔵 SEND_WHATSAPP_NOTIFICATION CALLED")
-        print(f"   Phone: {phone_number}")
-        print(f"   Message length: {len(message)}")
-        print(f"   Media URL: {media_url}")
-        
         if not settings.SEND_WHATSAPP_ON_BOOKING:
-            print(f"🔴 SEND_WHATSAPP_ON_BOOKING = False, returning False")
+            log.debug("whatsapp.skipped", to=phone_number, reason="SEND_WHATSAPP_ON_BOOKING disabled")
             return False
 
         if not settings.TWILIO_ACCOUNT_SID or not settings.TWILIO_AUTH_TOKEN:
-            print(f"🔴 Twilio credentials not configured")
+            log.warning("whatsapp.skipped", to=phone_number, reason="twilio_not_configured")
             return False
 
-        try:
-            print(f"🟢 Initializing Twilio client...")
-            # Initialize Twilio client
-            client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
-
-            # Normalize phone number
-            phone = phone_number.replace("+", "").replace("-", "").replace(" ", "")
-            if not phone.startswith("91") and len(phone) == 10:  # Indian number without country code
-                phone = "91" + phone
-            
-            # Ensure it starts with +
-            if not phone.startswith("+"):
-                phone = "+" + phone
-
-            print(f"📤 Twilio WhatsApp Send Details:")
-            print(f"   From: whatsapp:{settings.TWILIO_WHATSAPP_NUMBER}")
-            print(f"   To: whatsapp:{phone}")
-            print(f"   Has Media: {bool(media_url)}")
-            print(f"   Message Length: {len(message)}")
-
-            # Send via Twilio WhatsApp using sandbox number
-            try:
-                try:
-                    # Debug: show params we will send
-                    try:
-                        debug_params = {
-                            "body": message,
-                            "from_": f"whatsapp:{settings.TWILIO_WHATSAPP_NUMBER}",
-                            "to": f"whatsapp:{phone}",
-                        }
-                        if media_url:
-                            debug_params["media_url"] = [media_url]
-                        print(f"DEBUG: Notification msg_params: {json.dumps(debug_params, ensure_ascii=False)}")
-                    except Exception:
-                        print(f"DEBUG: Notification msg_params (repr): {repr({'body': message, 'from_': f'whatsapp:{settings.TWILIO_WHATSAPP_NUMBER}', 'to': f'whatsapp:{phone}', 'media_url': media_url})}")
-
-                    if media_url:
-                        print(f"📸 Sending WhatsApp WITH media attachment...")
-                        # Send message with media attachment
-                        msg = client.messages.create(
-                            body=message,
-                            from_=f"whatsapp:{settings.TWILIO_WHATSAPP_NUMBER}",
-                            to=f"whatsapp:{phone}",
-                            media_url=[media_url]
-                        )
-                    else:
-                        print(f"📝 Sending WhatsApp TEXT ONLY (no media)...")
-                        # Send text-only message
-                        msg = client.messages.create(
-                            body=message,
-                            from_=f"whatsapp:{settings.TWILIO_WHATSAPP_NUMBER}",
-                            to=f"whatsapp:{phone}"
-                        )
-
-                    print(f"✅ Twilio API Response:")
-                    print(f"   Message SID: {msg.sid}")
-                    print(f"   Status: {msg.status}")
-                    print(f"🟢 RETURNING TRUE\n")
-                    return True
-
-                except Exception as twilio_err:
-                    print(f"🔴 Twilio API Error: {str(twilio_err)}")
-                    print(f"   Error Type: {type(twilio_err).__name__}")
-                    if isinstance(twilio_err, TwilioRestException):
-                        try:
-                            print(f"   TwilioRestException status={twilio_err.status}, code={twilio_err.code}, msg={twilio_err.msg}")
-                        except Exception:
-                            pass
-                    # Fail gracefully for Twilio errors
-                    return False
-                    
-            except Exception as e:
-                print(f"🔴 FAILED to send WhatsApp message (inner)")
-                print(f"   Phone: {phone_number}")
-                print(f"   Exception: {str(e)}")
-                print(f"   Exception Type: {type(e).__name__}")
-                import traceback
-                print(f"   Traceback: {traceback.format_exc()}")
-                print(f"🔴 RETURNING FALSE\n")
-                return False
-                
-        except Exception as e:
-            print(f"🔴 FAILED to send WhatsApp message")
-            print(f"   Phone: {phone_number}")
-            print(f"   Exception: {str(e)}")
-            print(f"   Exception Type: {type(e).__name__}")
-            import traceback
-            print(f"   Traceback: {traceback.format_exc()}")
-            print(f"🔴 RETURNING FALSE\n")
-            return False
+        return NotificationService.send_whatsapp_message(
+            NotificationService.free_form_whatsapp(phone_number, message, media_url)
+        )
 
     @staticmethod
     def send_whatsapp_template(
@@ -874,23 +465,20 @@ Thank you for booking with us!
         - 33koti_promo (no params needed) - SID: HX46c755406e89d0f2622699f33e0f805e
         - puja_promp (requires 3 params: message, benefit, url) - SID: HX82c8860899ba41aa502df50540831e27
         """
-        print(f"\n🔵 SEND_WHATSAPP_TEMPLATE CALLED")
-        print(f"   Phone: {phone_number}")
-        print(f"   Template: {template_name}")
-        print(f"   Params: {template_params}")
-        print(f"   Media URL: {media_url}")
-        
         if not settings.SEND_WHATSAPP_ON_BOOKING:
-            print(f"🔴 SEND_WHATSAPP_ON_BOOKING = False, returning False")
+            log.debug("whatsapp.skipped", to=phone_number, template=template_name,
+                      reason="SEND_WHATSAPP_ON_BOOKING disabled")
             return False
 
         if not settings.TWILIO_ACCOUNT_SID or not settings.TWILIO_AUTH_TOKEN:
-            print(f"🔴 Twilio credentials not configured")
+            log.warning("whatsapp.skipped", to=phone_number, template=template_name, reason="twilio_not_configured")
             return False
 
+        # Waits for a send token; raises RateLimitExceeded past the allowed wait
+        rate_limiter.acquire("twilio_whatsapp", settings.TWILIO_WHATSAPP_NUMBER)
+
         try:
-            print(f"🟢 Initializing Twilio client...")
-            client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
+            client = get_twilio_client()
 
             # Normalize phone number
             phone = phone_number.replace("+", "").replace("-", "").replace(" ", "")
@@ -906,14 +494,13 @@ Thank you for booking with us!
             if template_name == "33koti_promo":
                 content_sid = settings.WHATSAPP_TEMPLATE_33KOTI_PROMO
                 # No variables needed for this template
-                print(f"📋 Using template: 33koti_promo")
-                print(f"   Content SID: {content_sid}")
                 
             elif template_name == "puja_promp":
                 content_sid = settings.WHATSAPP_TEMPLATE_PUJA_PROMO
                 
                 if not template_params or len(template_params) != 3:
-                    print(f"🔴 puja_promp requires 3 parameters: [message, benefit, url]")
+                    log.error("whatsapp.template_invalid_params", template=template_name,
+                              expected="[message, benefit, url]")
                     return False
                 
                 # Map to template variables {{1}}, {{2}}, {{3}}
@@ -922,117 +509,184 @@ Thank you for booking with us!
                     "2": template_params[1],  # Benefit
                     "3": template_params[2]   # URL
                 }
-                
-                print(f"📋 Using template: puja_promp")
-                print(f"   Content SID: {content_sid}")
-                print(f"   Variable {{{{1}}}}: {template_params[0][:50]}...")
-                print(f"   Variable {{{{2}}}}: {template_params[1][:50]}...")
-                print(f"   Variable {{{{3}}}}: {template_params[2]}")
             else:
-                print(f"🔴 Unknown template: {template_name}")
+                log.error("whatsapp.template_unknown", template=template_name)
                 return False
 
             if not content_sid:
-                print(f"🔴 Content SID not configured for template: {template_name}")
-                print(f"   Please set WHATSAPP_TEMPLATE_{template_name.upper()} in .env")
+                log.error("whatsapp.template_not_configured", template=template_name,
+                          setting=f"WHATSAPP_TEMPLATE_{template_name.upper()}")
                 return False
 
-            print(f"📤 Twilio WhatsApp Send (Content API):")
-            print(f"   From: {settings.TWILIO_WHATSAPP_NUMBER}")
-            print(f"   To: whatsapp:{phone}")
-            print(f"   Content SID: {content_sid}")
-
             # Send via Twilio WhatsApp using Content API (approved templates)
-            try:
-                msg_params = {
-                    "from_": f"whatsapp:{settings.TWILIO_WHATSAPP_NUMBER}",
-                    "to": f"whatsapp:{phone}",
-                    "content_sid": content_sid
-                }
-                
-                # Add content variables if present
-                if content_variables:
-                    msg_params["content_variables"] = json.dumps(content_variables)
-                    print(f"📝 Content variables: {content_variables}")
-                
-                # Add media if provided (for templates that support media)
-                if media_url:
-                    print(f"📸 Media URL provided: {media_url}")
-                    print(f"   Note: Media is embedded in template, not sent separately")
-                
-                print(f"📤 Sending WhatsApp template message...")
-                
-                msg = client.messages.create(**msg_params)
-
-                print(f"✅ Twilio Response:")
-                print(f"   Message SID: {msg.sid}")
-                print(f"   Status: {msg.status}")
-
-                # Consider queued/accepted/sent as success
-                success_states = {"queued", "accepted", "sending", "sent", "delivered"}
-                if getattr(msg, "status", "") in success_states:
-                    print(f"🟢 RETURNING TRUE\n")
-                    return True
-                else:
-                    print(f"🔴 Twilio returned non-success status: {getattr(msg, 'status', None)}")
-                    return False
+            msg_params = {
+                "from_": f"whatsapp:{settings.TWILIO_WHATSAPP_NUMBER}",
+                "to": f"whatsapp:{phone}",
+                "content_sid": content_sid
+            }
+            
+            # Add content variables if present
+            if content_variables:
+                msg_params["content_variables"] = json.dumps(content_variables)
+            
+            # Media is embedded in the approved template, not sent separately
+            log.debug("whatsapp.template_request", template=template_name, params=msg_params, media_url=media_url)
+            
+            msg = client.messages.create(**msg_params)
 
-            except Exception as twilio_err:
-                print(f"🔴 Twilio API Error: {str(twilio_err)}")
-                print(f"   Error Type: {type(twilio_err).__name__}")
-                if isinstance(twilio_err, TwilioRestException):
-                    try:
-                        print(f"   TwilioRestException status={twilio_err.status}, code={twilio_err.code}, msg={twilio_err.msg}")
-                    except Exception:
-                        pass
+            # Consider queued/accepted/sent as success
+            success_states = {"queued", "accepted", "sending", "sent", "delivered"}
+            if getattr(msg, "status", "") in success_states:
+                log.info("whatsapp.template_sent", to=phone, template=template_name, sid=msg.sid, status=msg.status)
+                return True
+            else:
+                log.error("whatsapp.template_failed", to=phone, template=template_name, sid=msg.sid,
+                          status=getattr(msg, 'status', None))
                 return False
-                
+
         except Exception as e:
-            print(f"🔴 FAILED to send WhatsApp template")
-            print(f"   Phone: {phone_number}")
-            print(f"   Template: {template_name}")
-            print(f"   Exception: {str(e)}")
-            print(f"   Exception Type: {type(e).__name__}")
-            import traceback
-            print(f"   Traceback: {traceback.format_exc()}")
-            print(f"🔴 RETURNING FALSE\n")
+            NotificationService._log_twilio_error("whatsapp.template_failed", e, to=phone_number,
+                                                  template=template_name)
+            log.debug("whatsapp.failed_trace", to=phone_number, trace=traceback.format_exc())
             return False
 
     @staticmethod
-    def send_booking_pending_notification(booking, user_email: str, user_phone: str) -> dict:
-        """Send notification when booking is created (PENDING status)."""
-        print(f"\n{'='*70}")
-        print(f"🔔 NOTIFICATION SERVICE - PENDING NOTIFICATION")
-        print(f"{'='*70}")
-        print(f"📋 Booking ID: {booking.id}")
-        print(f"👤 Email: {user_email}")
-        print(f"📱 Phone (Raw): '{user_phone}'")
-        print(f"📱 Phone (Type): {type(user_phone)}")
-        print(f"📱 Phone (Bool): {bool(user_phone)}")
-        print(f"📱 Phone (Len): {len(str(user_phone)) if user_phone else 0}")
+    def booking_whatsapp_messages(notification: BookingNotification, notification_type: str) -> List[WhatsAppMessage]:
+        """WhatsApp messages for a booking notification, in fallback order.
         
-        if not settings.SEND_BOOKING_NOTIFICATIONS:
-            print(f"⚠️ Booking notifications DISABLED in settings")
-            return {"email_sent": False, "whatsapp_sent": False}
+        The approved template comes first (if its Content SID is configured),
+        then the free-form message with its image, then without it. Delivery
+        stops at the first message that is accepted. Free-form messages also
+        need SEND_WHATSAPP_ON_BOOKING; templates only need Twilio credentials.
+        """
+        if notification_type not in ("pending", "confirmed"):
+            raise ValueError(f"Unknown notification type: {notification_type}")
+        user_phone = notification.user_phone
+        if not user_phone or not user_phone.strip():
+            return []
+        if not settings.TWILIO_ACCOUNT_SID or not settings.TWILIO_AUTH_TOKEN:
+            return []
+        
+        from whatsapp_template_sender import WhatsAppTemplateSender
+        
+        context = notification.context
+        booking_id = notification.booking_id
+        mobile = notification.mobile_number or user_phone
+        if context["booking_kind"] == "temple":
+            template = WhatsAppTemplateSender.temple_booking_message(
+                phone=user_phone,
+                booking_id=booking_id,
+                status=notification_type.upper(),
+                booking_date=context["booking_created"],
+                temple_name=context["temple_name"],
+                location=context["temple_location"],
+                total_amount=str(context["total"]),
+                gotra=context["gotra"],
+                mobile=mobile
+            )
+        elif notification_type == "pending":
+            template = WhatsAppTemplateSender.booking_pending_message(
+                phone=user_phone,
+                booking_id=booking_id,
+                booking_date=context["booking_created"],
+                puja_name=context["puja_name"],
+                plan_name=context["plan_name"],
+                location=context["temple_address"],
+                puja_date=context["puja_date"],
+                puja_time=context["puja_time"],
+                plan_price=str(context["plan_price"]),
+                total_amount=str(context["total"]),
+                gotra=context["gotra"],
+                mobile=mobile
+            )
+        else:
+            # Puja success template for CONFIRMED bookings
+            template = WhatsAppTemplateSender.booking_confirmed_message(
+                phone=user_phone,
+                booking_id=booking_id,
+                puja_name=context["puja_name"],
+                plan_name=context["plan_name"],
+                location=context["temple_address"],
+                puja_date=context["puja_date"],
+                puja_time=context["puja_time"],
+                total_amount=str(context["total"])
+            )
+        messages = [template] if template else []
+        
+        # Free-form fallback (sandbox, or template not configured/failed)
+        if settings.SEND_WHATSAPP_ON_BOOKING:
+            details = render_booking_whatsapp(context)
+            if notification_type == "pending":
+                body = details
+                # ALWAYS use this specific PNG image for WhatsApp
+                media_url = "https://api.33kotidham.in/uploads/images/b4bd9c33-d6e3-4069-b436-ef8e4c5cfaa0.png"
+            else:
+                body = f"""✅ *Booking Confirmed!* ✅
+
+{details}
+
+Your booking is now confirmed! 🎉
+
+Further instructions will be sent to you shortly.
+
+Thank you for choosing 33 Koti Dham! 🙏
+"""
+                # Puja image as the media attachment
+                media_url = context["gallery_images"][0] if context["gallery_images"] else None
+            if media_url:
+                messages.append(NotificationService.free_form_whatsapp(user_phone, body, media_url=media_url))
+            # Retried without media if the media send fails
+            messages.append(NotificationService.free_form_whatsapp(user_phone, body))
+        return messages
 
-        print(f"✅ Booking notifications ENABLED")
-        print(f"✅ SEND_WHATSAPP_ON_BOOKING: {settings.SEND_WHATSAPP_ON_BOOKING}")
-        print(f"✅ TWILIO_ACCOUNT_SID: {'SET' if settings.TWILIO_ACCOUNT_SID else 'NOT SET'}")
-        print(f"🛕 Temple: {booking.temple if hasattr(booking, 'temple') else None}")
-        print(f"🛕 Puja: {booking.puja}")
-        print(f"📋 Plan: {booking.plan}")
+    @staticmethod
+    def deliver_whatsapp(messages: List[WhatsAppMessage]) -> bool:
+        """Send ``messages`` in order until one is accepted. RateLimitExceeded propagates (callers retry later)."""
+        for i, message in enumerate(messages):
+            if i:
+                log.info("whatsapp.fallback", to=message.to, variant=message.label)
+            if NotificationService.send_whatsapp_message(message):
+                return True
+        return False
+
+    @staticmethod
+    def deliver_whatsapp_once(booking_id: int, notification_type: str, messages: List[WhatsAppMessage]) -> bool:
+        """deliver_whatsapp() guarded by the (booking, type, whatsapp) idempotency record.
+        
+        A notification that was already sent is not sent again (returns True);
+        one another worker is sending right now is skipped (returns False).
+        """
+        outcome = idempotency.claim(booking_id, notification_type, idempotency.WHATSAPP)
+        if outcome != idempotency.CLAIMED:
+            log.info("whatsapp.skipped", booking_id=booking_id, kind=notification_type, reason=outcome)
+            return outcome == idempotency.ALREADY_SENT
+        try:
+            sent = NotificationService.deliver_whatsapp(messages)
+        except Exception:
+            idempotency.release(booking_id, notification_type, idempotency.WHATSAPP)
+            raise
+        idempotency.finish(booking_id, notification_type, idempotency.WHATSAPP, sent)
+        return sent
 
-        # Email notification with enhanced details
-        email_subject = f"🙏 Booking Received - Ref: {booking.id} | 33 Koti Dham"
-        puja_name = booking.puja.name if booking.puja else "Puja"
+    @staticmethod
+    def booking_email(notification: BookingNotification, notification_type: str) -> tuple:
+        """(subject, text, html) of a booking notification email.
         
-        email_body = f"""Dear Customer,
+        Email notifications are temporarily disabled per request (WhatsApp-only
+        mode), so nothing sends these at the moment.
+        """
+        context = notification.context
+        puja_name = context["puja_name"] if context["booking_kind"] == "puja" else "Puja"
+        details_html = render_booking_email(context)
+        if notification_type == "pending":
+            subject = f"🙏 Booking Received - Ref: {notification.booking_id} | 33 Koti Dham"
+            text = f"""Dear Customer,
 
 Thank you for your booking with 33 Koti Dham!
 
 Your booking for {puja_name} has been received and is pending confirmation.
 
-Booking Reference: #{booking.id}
+Booking Reference: #{notification.booking_id}
 Status: PENDING
 
 We will confirm your booking shortly and send you further details.
@@ -1040,8 +694,7 @@ We will confirm your booking shortly and send you further details.
 Best regards,
 33 Koti Dham Team
 """
-        
-        email_html = f"""<html>
+            html = f"""<html>
 <body style="font-family: Arial, sans-serif; color: #333;">
     <div style="max-width: 600px; margin: 0 auto;">
         <h2 style="color: #8B4513; text-align: center;">🙏 Booking Received</h2>
@@ -1052,7 +705,7 @@ Best regards,
         
         <p>Your booking for <strong>{puja_name}</strong> has been received and is pending confirmation.</p>
         
-        {NotificationService.format_booking_details_email(booking)}
+        {details_html}
         
         <div style="background-color: #e8f4f8; padding: 15px; border-left: 4px solid #2196F3; margin: 20px 0;">
             <p style="margin: 0;"><strong>Next Steps:</strong></p>
@@ -1067,160 +720,13 @@ Best regards,
     </div>
 </body>
 </html>"""
-        
-        # Email notifications are temporarily disabled per request - only WhatsApp will be sent
-        email_sent = False
-        print(f"✉️ Email sending skipped for booking {booking.id} (WhatsApp-only mode)")
-        email_sent = False
-
-        # WhatsApp notification with enhanced details
-        whatsapp_sent = False
-        try:
-            print(f"💬 Building WhatsApp message...")
-            print(f"💬 User phone for WhatsApp: '{user_phone}'")
-            
-            if not user_phone or user_phone.strip() == "":
-                print(f"⚠️ SKIPPING WHATSAPP: No valid phone number provided")
-                print(f"   user_phone value: '{user_phone}'")
-                whatsapp_sent = False
-            else:
-                print(f"✅ Phone number valid, proceeding with WhatsApp")
-                
-                # Check if this is a temple booking (temple_id set, puja_id not set)
-                is_temple_booking = hasattr(booking, 'temple') and booking.temple and not booking.puja
-                
-                # Try using WhatsApp templates first (production)
-                template_sent = False
-                try:
-                    from whatsapp_template_sender import WhatsAppTemplateSender
-                    sender = WhatsAppTemplateSender()
-                    
-                    if is_temple_booking:
-                        # Use temple booking template
-                        print(f"📋 Using TEMPLE booking template")
-                        template_sent = sender.send_temple_booking(
-                            phone=user_phone,
-                            booking_id=booking.id,
-                            status="PENDING",
-                            booking_date=booking.booking_date.strftime('%d-%m-%Y %H:%M') if booking.booking_date else "N/A",
-                            temple_name=booking.temple.name if booking.temple else "N/A",
-                            location=booking.temple.location if booking.temple and booking.temple.location else "N/A",
-                            total_amount=str(NotificationService._calculate_booking_total(booking)),
-                            gotra=booking.gotra or "N/A",
-                            mobile=booking.mobile_number or user_phone
-                        )
-                    else:
-                        # Use puja booking template
-                        print(f"📋 Using PUJA booking template")
-                        puja_date = booking.puja.date if booking.puja and booking.puja.date else "N/A"
-                        puja_time_obj = booking.puja.time if booking.puja and booking.puja.time else None
-                        
-                        # Format time to 12-hour IST format
-                        if puja_time_obj and puja_time_obj != "N/A":
-                            try:
-                                if isinstance(puja_time_obj, str):
-                                    time_obj = datetime.strptime(puja_time_obj, "%H:%M:%S").time()
-                                else:
-                                    time_obj = puja_time_obj
-                                puja_time = datetime.combine(datetime.today(), time_obj).strftime("%I:%M %p") + " IST"
-                            except:
-                                puja_time = f"{puja_time_obj} IST"
-                        else:
-                            puja_time = "N/A"
-                        
-                        plan_price = "0"
-                        try:
-                            if booking.plan:
-                                plan_price = str(booking.plan.discounted_price if booking.plan.discounted_price else booking.plan.actual_price)
-                        except:
-                            plan_price = "0"
-                        
-                        template_sent = sender.send_booking_pending(
-                            phone=user_phone,
-                            booking_id=booking.id,
-                            booking_date=booking.booking_date.strftime('%d-%m-%Y %H:%M') if booking.booking_date else "N/A",
-                            puja_name=booking.puja.name if booking.puja else "N/A",
-                            plan_name=booking.plan.name if booking.plan else "N/A",
-                            location=booking.puja.temple_address if booking.puja else "N/A",
-                            puja_date=str(puja_date),
-                            puja_time=puja_time,
-                            plan_price=plan_price,
-                            total_amount=str(NotificationService._calculate_booking_total(booking)),
-                            gotra=booking.gotra or "N/A",
-                            mobile=booking.mobile_number or user_phone
-                        )
-                    
-                    if template_sent:
-                        print(f"✅ WhatsApp TEMPLATE sent successfully")
-                        whatsapp_sent = True
-                    else:
-                        print(f"⚠️ Template not configured or failed, falling back to free-form message")
-                        
-                except Exception as template_err:
-                    print(f"⚠️ Template sending failed: {template_err}")
-                    print(f"   Falling back to free-form WhatsApp message")
-                
-                # Fallback to free-form message if template failed or not configured
-                if not template_sent:
-                    print(f"📝 Using free-form WhatsApp message (sandbox/fallback)")
-                    whatsapp_body = NotificationService.format_booking_details_whatsapp(booking)
-                    
-                    # ALWAYS use this specific PNG image for WhatsApp
-                    media_url = "https://api.33kotidham.in/uploads/images/b4bd9c33-d6e3-4069-b436-ef8e4c5cfaa0.png"
-                    print(f"📸 Using verified WhatsApp-compatible image: {media_url}")
-                    
-                    print(f"📤 Calling send_whatsapp_notification...")
-                    print(f"   Phone: {user_phone}")
-                    print(f"   Media URL: {media_url}")
-                    print(f"   Message length: {len(whatsapp_body)}")
-                    
-                    # Try sending with media first
-                    whatsapp_sent = NotificationService.send_whatsapp_notification(user_phone, whatsapp_body, media_url=media_url)
-                    
-                    # If failed and media was included, retry without media
-                    if not whatsapp_sent and media_url:
-                        print(f"⚠️ WhatsApp with media failed, retrying WITHOUT media...")
-                        whatsapp_sent = NotificationService.send_whatsapp_notification(user_phone, whatsapp_body, media_url=None)
-                        if whatsapp_sent:
-                            print(f"✅ WhatsApp sent successfully WITHOUT media")
-                
-                print(f"💬 WhatsApp final result: {'✅ SENT' if whatsapp_sent else '❌ FAILED'}")
-                
-        except Exception as e:
-            print(f"❌ WhatsApp notification error: {str(e)}")
-            import traceback
-            print(traceback.format_exc())
-            whatsapp_sent = False
-
-        print(f"{'='*70}\n")
-        
-        return {
-            "email_sent": email_sent,
-            "whatsapp_sent": whatsapp_sent,
-            "booking_id": booking.id
-        }
-
-    @staticmethod
-    def send_booking_confirmed_notification(booking, user_email: str, user_phone: str) -> dict:
-        """Send notification when booking is confirmed by admin."""
-        import logging
-        logger = logging.getLogger(__name__)
-        
-        if not settings.SEND_BOOKING_NOTIFICATIONS:
-            logger.info(f"Booking notifications disabled. Skipping notifications for booking {booking.id}")
-            return {"email_sent": False, "whatsapp_sent": False}
-
-        logger.info(f"🔔 Starting confirmation notification for booking #{booking.id}")
-
-        # Email notification with enhanced details
-        email_subject = f"✅ Booking Confirmed! - Ref: {booking.id} | 33 Koti Dham"
-        puja_name = booking.puja.name if booking.puja else "Puja"
-        
-        email_body = f"""Dear Customer,
+        else:
+            subject = f"✅ Booking Confirmed! - Ref: {notification.booking_id} | 33 Koti Dham"
+            text = f"""Dear Customer,
 
 Great news! Your booking has been confirmed!
 
-Booking Reference: #{booking.id}
+Booking Reference: #{notification.booking_id}
 Puja: {puja_name}
 Status: CONFIRMED
 
@@ -1229,8 +735,7 @@ Thank you for your trust in 33 Koti Dham!
 Best regards,
 33 Koti Dham Team
 """
-        
-        email_html = f"""<html>
+            html = f"""<html>
 <body style="font-family: Arial, sans-serif; color: #333;">
     <div style="max-width: 600px; margin: 0 auto;">
         <h2 style="color: #4CAF50; text-align: center;">✅ Booking Confirmed!</h2>
@@ -1239,7 +744,7 @@ Best regards,
         
         <p style="color: #4CAF50; font-size: 18px;"><strong>Great news! Your booking has been confirmed.</strong></p>
         
-        {NotificationService.format_booking_details_email(booking)}
+        {details_html}
         
         <div style="background-color: #c8e6c9; padding: 15px; border-left: 4px solid #4CAF50; margin: 20px 0;">
             <p style="margin: 0; color: #2e7d32;"><strong>✅ Your booking is confirmed!</strong></p>
@@ -1254,128 +759,62 @@ Best regards,
     </div>
 </body>
 </html>"""
-        
-        # Email notifications are temporarily disabled per request - only WhatsApp will be sent
-        email_sent = False
-        logger.info(f"✉️ Email confirmation skipped for booking {booking.id} (WhatsApp-only mode)")
+        return subject, text, html
 
-        # WhatsApp notification with enhanced details
-        whatsapp_sent = False
-        try:
-            logger.info(f"💬 Building WhatsApp confirmation message...")
-            logger.info(f"💬 User phone for WhatsApp: '{user_phone}'")
-            
-            if not user_phone or user_phone.strip() == "":
-                logger.warning(f"⚠️ SKIPPING WHATSAPP: No valid phone number provided")
-                whatsapp_sent = False
-            else:
-                logger.info(f"✅ Phone number valid, proceeding with WhatsApp confirmation")
-                
-                # Check if this is a temple booking (temple_id set, puja_id not set)
-                is_temple_booking = hasattr(booking, 'temple') and booking.temple and not booking.puja
-                
-                # Try using WhatsApp templates first (production)
-                template_sent = False
-                try:
-                    from whatsapp_template_sender import WhatsAppTemplateSender
-                    sender = WhatsAppTemplateSender()
-                    
-                    if is_temple_booking:
-                        # Use temple booking template for confirmation
-                        logger.info(f"📋 Using TEMPLE booking template for CONFIRMED status")
-                        template_sent = sender.send_temple_booking(
-                            phone=user_phone,
-                            booking_id=booking.id,
-                            status="CONFIRMED",
-                            booking_date=booking.booking_date.strftime('%d-%m-%Y %H:%M') if booking.booking_date else "N/A",
-                            temple_name=booking.temple.name if booking.temple else "N/A",
-                            location=booking.temple.location if booking.temple and booking.temple.location else "N/A",
-                            total_amount=str(NotificationService._calculate_booking_total(booking)),
-                            gotra=booking.gotra or "N/A",
-                            mobile=booking.mobile_number or user_phone
-                        )
-                    else:
-                        # Use puja success template for CONFIRMED bookings
-                        logger.info(f"📋 Using PUJA SUCCESS template for CONFIRMED status")
-                        puja_date = booking.puja.date if booking.puja and booking.puja.date else "N/A"
-                        puja_time_obj = booking.puja.time if booking.puja and booking.puja.time else None
-                        
-                        # Format time to 12-hour IST format
-                        if puja_time_obj and puja_time_obj != "N/A":
-                            try:
-                                if isinstance(puja_time_obj, str):
-                                    time_obj = datetime.strptime(puja_time_obj, "%H:%M:%S").time()
-                                else:
-                                    time_obj = puja_time_obj
-                                puja_time = datetime.combine(datetime.today(), time_obj).strftime("%I:%M %p") + " IST"
-                            except:
-                                puja_time = f"{puja_time_obj} IST"
-                        else:
-                            puja_time = "N/A"
-                        
-                        template_sent = sender.send_booking_confirmed(
-                            phone=user_phone,
-                            booking_id=booking.id,
-                            puja_name=booking.puja.name if booking.puja else "N/A",
-                            plan_name=booking.plan.name if booking.plan else "N/A",
-                            location=booking.puja.temple_address if booking.puja else "N/A",
-                            puja_date=str(puja_date),
-                            puja_time=puja_time,
-                            total_amount=str(NotificationService._calculate_booking_total(booking))
-                        )
-                    
-                    if template_sent:
-                        logger.info(f"✅ WhatsApp CONFIRMATION template sent successfully")
-                        whatsapp_sent = True
-                    else:
-                        logger.warning(f"⚠️ Confirmation template not configured or failed, falling back to free-form message")
-                        
-                except Exception as template_err:
-                    logger.warning(f"⚠️ Template sending failed: {template_err}")
-                    logger.info(f"   Falling back to free-form WhatsApp message")
-                
-                # Fallback to free-form message if template failed or not configured
-                if not template_sent:
-                    logger.info(f"📝 Using free-form WhatsApp confirmation message (sandbox/fallback)")
-                    whatsapp_body = f"""✅ *Booking Confirmed!* ✅
-
-{NotificationService.format_booking_details_whatsapp(booking)}
+    @staticmethod
+    def send_booking_notification(notification: BookingNotification, notification_type: str) -> dict:
+        """Send a "pending" or "confirmed" booking notification from a loaded BookingNotification.
+        
+        Only provider I/O happens here; load the notification first
+        (app.notification_context.load_booking_notification) and close the session.
+        """
+        booking_id, user_email, user_phone = notification.booking_id, notification.user_email, notification.user_phone
+        if not settings.SEND_BOOKING_NOTIFICATIONS:
+            log.info("notification.skipped", booking_id=booking_id, kind=notification_type, reason="disabled")
+            return {"email_sent": False, "whatsapp_sent": False}
 
-Your booking is now confirmed! 🎉
+        log.debug("notification.start", booking_id=booking_id, kind=notification_type, email=user_email,
+                  phone=user_phone, whatsapp_enabled=settings.SEND_WHATSAPP_ON_BOOKING,
+                  twilio_configured=bool(settings.TWILIO_ACCOUNT_SID))
 
-Further instructions will be sent to you shortly.
+        # Email notifications are temporarily disabled per request - only WhatsApp will be sent
+        email_sent = False
+        log.debug("email.skipped", booking_id=booking_id, reason="whatsapp_only_mode")
 
-Thank you for choosing 33 Koti Dham! 🙏
-"""
-                    
-                    # Get puja image URL for WhatsApp media attachment
-                    media_url = None
-                    if booking.puja and booking.puja.images:
-                        img_url = booking.puja.images[0].image_url if booking.puja.images else ""
-                        if img_url:
-                            media_url = NotificationService._normalize_image_url(img_url)
-                    
-                    whatsapp_sent = NotificationService.send_whatsapp_notification(user_phone, whatsapp_body, media_url=media_url)
-                    
-                    # If failed and media was included, retry without media
-                    if not whatsapp_sent and media_url:
-                        logger.warning(f"⚠️ WhatsApp with media failed, retrying WITHOUT media...")
-                        whatsapp_sent = NotificationService.send_whatsapp_notification(user_phone, whatsapp_body, media_url=None)
-                        if whatsapp_sent:
-                            logger.info(f"✅ WhatsApp sent successfully WITHOUT media")
-                
-                logger.info(f"💬 WhatsApp confirmation: {'✅ Sent' if whatsapp_sent else '❌ Failed'}")
-                
-        except Exception as e:
-            logger.error(f"❌ WhatsApp confirmation error: {str(e)}", exc_info=True)
+        messages = NotificationService.booking_whatsapp_messages(notification, notification_type)
+        if not messages:
+            log.warning("whatsapp.skipped", booking_id=booking_id, kind=notification_type,
+                        reason="no_phone" if not (user_phone or "").strip() else "not_configured")
             whatsapp_sent = False
+        else:
+            whatsapp_sent = NotificationService.deliver_whatsapp_once(booking_id, notification_type, messages)
 
+        log.info("notification.done", booking_id=booking_id, kind=notification_type, whatsapp_sent=whatsapp_sent,
+                 email_sent=email_sent)
         return {
             "email_sent": email_sent,
             "whatsapp_sent": whatsapp_sent,
-            "booking_id": booking.id
+            "booking_id": booking_id
         }
 
+    @staticmethod
+    def _booking_notification(booking, user_email: str, user_phone: str) -> BookingNotification:
+        notification = BookingNotification.from_booking(booking)
+        notification.user_email, notification.user_phone = user_email, user_phone
+        return notification
+
+    @staticmethod
+    def send_booking_pending_notification(booking, user_email: str, user_phone: str) -> dict:
+        """Send notification when booking is created (PENDING status)."""
+        return NotificationService.send_booking_notification(
+            NotificationService._booking_notification(booking, user_email, user_phone), "pending")
+
+    @staticmethod
+    def send_booking_confirmed_notification(booking, user_email: str, user_phone: str) -> dict:
+        """Send notification when booking is confirmed by admin."""
+        return NotificationService.send_booking_notification(
+            NotificationService._booking_notification(booking, user_email, user_phone), "confirmed")
+
 
 # Global instances
 notification_service = NotificationService()
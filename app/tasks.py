@@ -2,13 +2,39 @@
 Celery Tasks for Booking Notifications
 Independent message queue system - processes one message at a time per user
 """
+import time
+from datetime import datetime
+
+from celery.exceptions import Retry, SoftTimeLimitExceeded
+from celery.signals import task_postrun
 from app.celery_config import celery_app
+from app.config import settings
 from app.database import SessionLocal
-from app import crud
-from app.services import NotificationService
-import logging
+from app.log import get_logger
+from app import crud, db_metrics, models, outbox
+from app.notification_context import load_booking_notification
+from app.rate_limit import RateLimitExceeded
+from app.services import NotificationService, notification_service
+
+log = get_logger(__name__)
+
 
-logger = logging.getLogger(__name__)
+@task_postrun.connect
+def report_pool_metrics(**kwargs):
+    """Report this worker's DB pool metrics (throttled) for /admin/diagnostics/db-pool."""
+    db_metrics.maybe_publish()
+
+
+def _requeue_rate_limited(task, error: RateLimitExceeded) -> Retry:
+    """
+    Publish ``task`` again for when the provider budget has a token, keeping its retry count.
+    
+    Waiting for the budget is not a failure, so unlike ``task.retry()`` this
+    does not use up max_retries (the notification executor's ``_retry`` does
+    the same). Returns the Retry to raise, which marks this run as retried.
+    """
+    task.signature_from_request(countdown=error.retry_after, retries=task.request.retries).apply_async()
+    return Retry(exc=error, when=error.retry_after)
 
 
 @celery_app.task(
@@ -35,59 +61,35 @@ def send_booking_notification(self, booking_id: int, notification_type: str):
         - Max 3 retries with exponential backoff
         - 60 seconds delay between retries
         - Jitter added to prevent thundering herd
+        - A provider rate limit requeues the task for when a token is due
+          without using up a retry
     """
-    db = None
     try:
-        # Create new database session for this task
-        db = SessionLocal()
+        log.debug("notification.task_start", booking_id=booking_id, kind=notification_type)
         
-        logger.info(f"📬 Processing notification for booking {booking_id}, type: {notification_type}")
-        
-        # Fetch booking with user details
-        booking = crud.BookingCRUD.get_booking(db, booking_id)
-        if not booking:
-            logger.error(f"❌ Booking {booking_id} not found")
+        # Load everything the message needs in one query; the session is closed
+        # before any provider call
+        db = SessionLocal()
+        try:
+            notification = load_booking_notification(db, booking_id)
+        finally:
+            db.close()
+        if not notification:
+            log.error("notification.booking_not_found", booking_id=booking_id, kind=notification_type)
             return {"status": "error", "message": "Booking not found"}
         
-        # Get user contact information
-        user = booking.user
-        user_email = user.email or ""
-        user_phone = booking.whatsapp_number or booking.mobile_number or getattr(user, 'mobile', None) or ""
-        
         # Check if we have any contact info
-        if not user_email and not user_phone:
-            logger.warning(f"⚠️ No contact info for booking {booking_id}")
+        if not notification.user_email and not notification.user_phone:
+            log.warning("notification.skipped", booking_id=booking_id, kind=notification_type, reason="no_contact_info")
             return {"status": "skipped", "message": "No contact information available"}
         
-        logger.info(f"📧 Email: {user_email if user_email else 'None'}")
-        logger.info(f"📱 Phone: {user_phone if user_phone else 'None'}")
-        
-        # Send appropriate notification based on type
-        result = None
-        if notification_type == "pending":
-            result = NotificationService.send_booking_pending_notification(
-                booking,
-                user_email=user_email,
-                user_phone=user_phone
-            )
-        elif notification_type == "confirmed":
-            result = NotificationService.send_booking_confirmed_notification(
-                booking,
-                user_email=user_email,
-                user_phone=user_phone
-            )
-        elif notification_type == "completed":
-            result = NotificationService.send_booking_completed_notification(
-                booking,
-                user_email=user_email,
-                user_phone=user_phone
-            )
-        else:
-            logger.error(f"❌ Unknown notification type: {notification_type}")
+        # Only pending and confirmed notifications have messages ("completed" has none yet)
+        if notification_type not in ("pending", "confirmed"):
+            log.error("notification.unknown_type", booking_id=booking_id, kind=notification_type)
             return {"status": "error", "message": f"Unknown notification type: {notification_type}"}
+        result = NotificationService.send_booking_notification(notification, notification_type)
         
-        logger.info(f"✅ Notification sent successfully for booking {booking_id}")
-        logger.info(f"   Result: {result}")
+        log.debug("notification.task_done", booking_id=booking_id, kind=notification_type, result=result)
         
         return {
             "status": "success",
@@ -95,30 +97,228 @@ def send_booking_notification(self, booking_id: int, notification_type: str):
             "notification_type": notification_type,
             "result": result
         }
+    
+    except RateLimitExceeded as e:
+        log.info("notification.rate_limited", booking_id=booking_id, kind=notification_type,
+                 retry_after=round(e.retry_after, 1))
+        raise _requeue_rate_limited(self, e)
         
     except Exception as e:
-        logger.error(f"❌ Error sending notification for booking {booking_id}: {str(e)}", exc_info=True)
+        log.exception("notification.task_failed", booking_id=booking_id, kind=notification_type, error=str(e))
         
         # Retry the task
         try:
             raise self.retry(exc=e)
         except self.MaxRetriesExceededError:
-            logger.error(f"❌ Max retries exceeded for booking {booking_id}")
+            log.error("notification.retries_exhausted", booking_id=booking_id, kind=notification_type)
             return {
                 "status": "failed",
                 "booking_id": booking_id,
                 "error": str(e),
                 "message": "Max retries exceeded"
             }
+
+
+def enqueue_otp(otp_id: int) -> bool:
+    """
+    Queue an OTP SMS on the high-priority ``otp`` queue. Returns False if the broker is unavailable.
+    
+    Publishing does not retry, so the request never waits on a broker that
+    is down; the caller then sends inline instead.
+    """
+    try:
+        send_otp.apply_async(args=[otp_id, time.time()], expires=settings.OTP_TASK_EXPIRES_SECONDS, retry=False)
+        return True
+    except Exception as e:
+        log.error("otp.enqueue_failed", otp_id=otp_id, error=str(e))
+        return False
+
+
+@celery_app.task(name='app.tasks.send_otp', bind=True, ignore_result=True)
+def send_otp(self, otp_id: int, requested_at: float):
+    """
+    Send a login/registration OTP by SMS, off the request path.
     
+    The code is read from the database, so it never travels through the
+    broker. An OTP already used or expired is not sent. The task expires
+    after OTP_TASK_EXPIRES_SECONDS, so a backlog never delivers stale codes.
+    A provider rate limit requeues it for when a token is due (with the same
+    expiry) without using up one of OTP_SEND_MAX_RETRIES.
+    """
+    log.info("otp.dequeued", otp_id=otp_id, retries=self.request.retries,
+             queue_delay_ms=round((time.time() - requested_at) * 1000, 1))
+    db = SessionLocal()
+    try:
+        row = (
+            db.query(models.OTPLogin.otp_code, models.User.mobile)
+            .join(models.User, models.User.id == models.OTPLogin.user_id)
+            .filter(models.OTPLogin.id == otp_id, models.OTPLogin.is_verified == False,
+                    models.OTPLogin.expires_at > datetime.utcnow())
+            .first()
+        )
     finally:
-        # Always close the database session
-        if db:
-            db.close()
+        # Release the connection before the provider call
+        db.close()
+    if not row:
+        log.info("otp.skipped", otp_id=otp_id, reason="used_or_expired")
+        return False
+    
+    otp_code, mobile = row
+    try:
+        if notification_service.send_otp(mobile, otp_code):
+            return True
+    except RateLimitExceeded as e:
+        log.info("otp.rate_limited", otp_id=otp_id, retry_after=round(e.retry_after, 1))
+        raise _requeue_rate_limited(self, e)
+    if self.request.retries < settings.OTP_SEND_MAX_RETRIES:
+        raise self.retry(countdown=settings.OTP_RETRY_DELAY_SECONDS, max_retries=settings.OTP_SEND_MAX_RETRIES)
+    log.error("otp.retries_exhausted", otp_id=otp_id, to=mobile)
+    return False
+
+
+@celery_app.task(name='app.tasks.expire_pujas', ignore_result=True)
+def expire_pujas():
+    """
+    Deactivate pujas whose date+time has passed.
+    
+    Scheduled by Celery beat every PUJA_EXPIRY_SWEEP_SECONDS, so the public
+    puja reads never have to write.
+    """
+    db = SessionLocal()
+    try:
+        expired = crud.PujaCRUD.expire_due_pujas(db)
+        if expired:
+            log.info("pujas.expired", count=expired)
+        return expired
+    finally:
+        db.close()
+
+
+@celery_app.task(name='app.tasks.purge_outbox', ignore_result=True)
+def purge_outbox():
+    """Delete outbox events dispatched more than OUTBOX_RETENTION_HOURS ago (scheduled hourly by Celery beat)."""
+    db = SessionLocal()
+    try:
+        deleted = outbox.purge_dispatched(db)
+        if deleted:
+            log.info("outbox.purged", count=deleted)
+        return deleted
+    finally:
+        db.close()
+
+
+def enqueue_whatsapp_campaign(db, campaign_id: int) -> int:
+    """
+    Fan a campaign's recipients out as independent chunk tasks.
+    
+    Recipients are split into id ranges of BULK_WHATSAPP_CHUNK_SIZE, one
+    task each, so a chunk that fails does not hold up the ones after it.
+    A task only carries its range, ``(campaign_id, after_id, last_id)``, and
+    selects its recipients itself; neither this process nor the broker holds
+    the recipient list. The tasks go to the ``campaigns`` queue, whose
+    worker runs with a fixed concurrency (BULK_WHATSAPP_CONCURRENCY). That
+    bounds how many chunks are sending at once however many campaigns are
+    queued. Returns the number of chunks.
+    """
+    size = max(1, settings.BULK_WHATSAPP_CHUNK_SIZE)
+    chunks = 0
+    for after_id, last_id in crud.WhatsAppCampaignCRUD.iter_chunk_bounds(db, campaign_id, size):
+        send_whatsapp_campaign_chunk.apply_async((campaign_id, after_id, last_id))
+        chunks += 1
+    return chunks
+
+
+def _give_up_chunk(db, campaign_id: int, after_id: int, last_id: int, error: Exception) -> dict:
+    """Retries are used up: mark the chunk's pending recipients errored so the campaign can complete."""
+    db.rollback()
+    failed = crud.WhatsAppCampaignCRUD.fail_pending_recipients(
+        db, campaign_id, after_id, last_id, f"Chunk failed after retries: {error}"[:1000]
+    )
+    crud.WhatsAppCampaignCRUD.complete_if_done(db, campaign_id)
+    log.error("campaign.chunk_failed", campaign_id=campaign_id, recipients=failed, error=str(error))
+    return {"status": "error", "campaign_id": campaign_id, "failed": failed}
+
+
+@celery_app.task(
+    name='app.tasks.send_whatsapp_campaign_chunk',
+    bind=True,
+    max_retries=3,
+    default_retry_delay=30,
+    soft_time_limit=540,
+    time_limit=600,
+)
+def send_whatsapp_campaign_chunk(self, campaign_id: int, after_id: int, last_id: int):
+    """
+    Send a campaign's template to one chunk of recipients (``after_id < id <= last_id``).
+    
+    Each result is committed as soon as it is known, so job progress is live
+    and a redelivered or retried chunk only sends to recipients still pending.
+    A chunk that keeps failing (database errors, time limits) is retried up
+    to max_retries times; after that its pending recipients are marked
+    errored. Whichever chunk finishes last marks the campaign completed.
+    """
+    db = SessionLocal()
+    try:
+        campaign = crud.WhatsAppCampaignCRUD.get_campaign(db, campaign_id)
+        if not campaign:
+            log.error("campaign.not_found", campaign_id=campaign_id)
+            return {"status": "error", "message": "Campaign not found"}
+        if campaign.status == models.CampaignStatus.QUEUED.value:
+            campaign.status = models.CampaignStatus.RUNNING.value
+            db.commit()
+        
+        sent = failed = 0
+        for recipient in crud.WhatsAppCampaignCRUD.get_pending_recipients(db, campaign_id, after_id, last_id):
+            try:
+                ok = NotificationService.send_whatsapp_template(
+                    phone_number=recipient.normalized_phone,
+                    template_name=campaign.template_name,
+                    template_params=recipient.template_params or campaign.template_params or [],
+                    media_url=campaign.media_url
+                )
+                if ok:
+                    recipient.status = models.CampaignRecipientStatus.SUCCESS.value
+                else:
+                    recipient.status = models.CampaignRecipientStatus.FAILED.value
+                    recipient.error = "WhatsApp send failed - check server logs for details"
+            except (SoftTimeLimitExceeded, RateLimitExceeded):
+                raise
+            except Exception as e:
+                ok = False
+                recipient.status = models.CampaignRecipientStatus.ERROR.value
+                recipient.error = str(e)
+            recipient.sent_at = crud.get_ist_now()
+            db.commit()
+            sent, failed = sent + ok, failed + (not ok)
+        
+        crud.WhatsAppCampaignCRUD.complete_if_done(db, campaign_id)
+        log.info("campaign.chunk_done", campaign_id=campaign_id, sent=sent, failed=failed)
+        return {"status": "success", "campaign_id": campaign_id, "sent": sent, "failed": failed}
+    
+    except RateLimitExceeded as e:
+        # Provider budget is used up by other senders: requeue the remainder
+        # for when a token is due instead of failing it
+        db.rollback()
+        log.info("campaign.chunk_rate_limited", campaign_id=campaign_id, retry_after=round(e.retry_after, 1))
+        raise _requeue_rate_limited(self, e)
+    
+    except Exception as e:
+        if self.request.retries >= self.max_retries:
+            return _give_up_chunk(db, campaign_id, after_id, last_id, e)
+        # Retry the rest of the chunk; recipients already sent are no longer pending
+        db.rollback()
+        if isinstance(e, SoftTimeLimitExceeded):
+            log.warning("campaign.chunk_time_limit", campaign_id=campaign_id, action="retrying remainder")
+            raise self.retry(exc=e, countdown=0)
+        log.warning("campaign.chunk_retry", campaign_id=campaign_id, attempt=self.request.retries + 1, error=str(e))
+        raise self.retry(exc=e)
+    
+    finally:
+        db.close()
 
 
 @celery_app.task(name='app.tasks.test_celery')
 def test_celery():
     """Test task to verify Celery is working"""
-    logger.info("✅ Celery is working!")
+    log.info("celery.test_task", status="ok")
     return {"status": "success", "message": "Celery is working!"}
@@ -0,0 +1,112 @@
+"""
+Process-wide Twilio REST client.
+
+twilio.rest.Client builds a new requests session unless it is given an HTTP
+client, so creating one per message costs a TCP connection and a TLS
+handshake per send. Every Twilio code path (OTP SMS, WhatsApp free-form and
+template sends, WhatsAppTemplateSender) uses get_twilio_client() instead.
+That client keeps up to TWILIO_HTTP_POOL_SIZE keep-alive connections to
+api.twilio.com and applies explicit connect/read timeouts.
+
+The client is created lazily and again after a fork, so Celery prefork
+children never share the parent's sockets.
+
+WhatsAppMessage describes one send independently of the transport, so the
+same message can go through this client or app.notification_executor.
+"""
+import json
+import os
+import threading
+from typing import Dict, Optional
+
+from requests.adapters import HTTPAdapter
+from twilio.http.http_client import TwilioHttpClient
+from twilio.rest import Client
+
+from app.config import settings
+
+
+MESSAGES_URL = "https://api.twilio.com/2010-04-01/Accounts/{account_sid}/Messages.json"
+
+
+class WhatsAppMessage:
+    """One WhatsApp send: a free-form ``body`` (optionally with ``media_url``) or an approved template."""
+
+    def __init__(self, to: str, from_: str, body: Optional[str] = None, media_url: Optional[str] = None,
+                 content_sid: Optional[str] = None, content_variables: Optional[Dict[str, str]] = None,
+                 label: str = "free_form", status_callback: Optional[str] = None):
+        self.to = to
+        self.from_ = from_
+        self.body = body
+        self.media_url = media_url
+        self.content_sid = content_sid
+        self.content_variables = content_variables
+        self.label = label  # template name or free-form variant, for logs
+        # Where Twilio posts delivery receipts (app.routers.notification_webhooks)
+        self.status_callback = status_callback or settings.TWILIO_STATUS_CALLBACK_URL or None
+
+    def create_kwargs(self) -> dict:
+        """Keyword arguments for ``client.messages.create``."""
+        kwargs = {"from_": self.from_, "to": self.to}
+        if self.content_sid:
+            kwargs["content_sid"] = self.content_sid
+            if self.content_variables:
+                kwargs["content_variables"] = json.dumps(self.content_variables)
+        else:
+            kwargs["body"] = self.body
+            if self.media_url:
+                kwargs["media_url"] = [self.media_url]
+        if self.status_callback:
+            kwargs["status_callback"] = self.status_callback
+        return kwargs
+
+    def form_data(self) -> Dict[str, str]:
+        """The same message as form fields of the Messages REST resource."""
+        names = {"from_": "From", "to": "To", "body": "Body", "content_sid": "ContentSid",
+                 "content_variables": "ContentVariables", "status_callback": "StatusCallback"}
+        data = {names[key]: value for key, value in self.create_kwargs().items() if key != "media_url"}
+        if self.media_url and not self.content_sid:
+            data["MediaUrl"] = self.media_url
+        return data
+
+
+class PooledTwilioHttpClient(TwilioHttpClient):
+    """TwilioHttpClient with a sized connection pool and separate connect/read timeouts."""
+
+    def __init__(self, pool_size: int, connect_timeout: float, read_timeout: float):
+        super().__init__(pool_connections=True)
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        # TwilioHttpClient only validates a single number; requests also accepts (connect, read)
+        self.timeout = (connect_timeout, read_timeout)
+
+
+_client: Optional[Client] = None
+_client_pid: Optional[int] = None
+_client_lock = threading.Lock()
+
+
+def get_twilio_client() -> Client:
+    """The shared Twilio client of this process (credentials from settings)."""
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _client_lock:
+            if _client is None or _client_pid != pid:
+                http_client = PooledTwilioHttpClient(
+                    pool_size=settings.TWILIO_HTTP_POOL_SIZE,
+                    connect_timeout=settings.TWILIO_CONNECT_TIMEOUT_SECONDS,
+                    read_timeout=settings.TWILIO_READ_TIMEOUT_SECONDS,
+                )
+                _client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN, http_client=http_client)
+                _client_pid = pid
+    return _client
+
+
+def reset_twilio_client() -> None:
+    """Drop the shared client, e.g. after rotating credentials; the next call builds a new one."""
+    global _client, _client_pid
+    with _client_lock:
+        if _client is not None:
+            _client.http_client.session.close()
+        _client = None
+        _client_pid = None
@@ -5,6 +5,9 @@ from fastapi import UploadFile, HTTPException
 from PIL import Image
 import aiofiles
 from app.config import settings
+from app.log import get_logger
+
+log = get_logger(__name__)
 
 
 async def save_upload_file(upload_file: UploadFile, directory: str = "images") -> str:
@@ -60,7 +63,7 @@ def optimize_image(file_path: str, max_width: int = 1200, quality: int = 85):
             img.save(file_path, optimize=True, quality=quality)
     except Exception as e:
         # If optimization fails, keep original file
-        print(f"Image optimization failed: {e}")
+        log.warning("upload.image_optimize_failed", path=file_path, error=str(e))
 
 
 def delete_file(file_path: str) -> bool:
@@ -0,0 +1,134 @@
+"""
+Benchmark per-message SMTP sessions against app.mailer.SMTPPool.
+
+By default both paths send to a local SMTP sink that adds --rtt-ms to every
+server reply, which stands in for the network round trip to a real relay.
+Pass --host/--port (and --username/--password/--tls) to measure against a
+real server instead; use a test inbox, every message is really sent.
+
+Usage:
+    python scripts/benchmark_smtp.py --messages 200 --rtt-ms 20
+"""
+import argparse
+import os
+import smtplib
+import socketserver
+import sys
+import threading
+import time
+from email.message import EmailMessage
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.mailer import SMTPPool  # noqa: E402
+
+
+class SinkHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: replies 250 to everything, swallows DATA."""
+
+    def reply(self, line: str) -> None:
+        time.sleep(self.server.rtt)
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        self.reply("220 sink ESMTP")
+        in_data = False
+        for raw in self.rfile:
+            line = raw.decode(errors="replace").rstrip("\r\n")
+            if in_data:
+                if line == ".":
+                    in_data = False
+                    self.reply("250 queued")
+                continue
+            verb = line.split(" ", 1)[0].upper()
+            if verb == "EHLO":
+                self.reply("250 sink")
+            elif verb == "DATA":
+                in_data = True
+                self.reply("354 go ahead")
+            elif verb == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("250 ok")
+
+
+class Sink(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def make_message(i: int) -> EmailMessage:
+    msg = EmailMessage()
+    msg["From"] = "noreply@33kotidham.com"
+    msg["To"] = f"devotee{i}@example.com"
+    msg["Subject"] = f"Booking #{i} received"
+    msg.set_content("Namaste, your booking has been received.")
+    return msg
+
+
+def per_message(args, count: int) -> None:
+    """The previous path: a new session (connect, STARTTLS, login) for every message."""
+    for i in range(count):
+        with smtplib.SMTP(args.host, args.port, timeout=10) as server:
+            if args.tls:
+                server.starttls()
+            if args.username:
+                server.login(args.username, args.password)
+            server.send_message(make_message(i))
+
+
+def pooled(pool: SMTPPool, count: int) -> None:
+    for i in range(count):
+        pool.send(make_message(i))
+
+
+def batched(pool: SMTPPool, count: int) -> None:
+    pool.send_many([make_message(i) for i in range(count)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=100)
+    parser.add_argument("--rtt-ms", type=float, default=20, help="simulated reply latency of the local sink")
+    parser.add_argument("--host")
+    parser.add_argument("--port", type=int, default=587)
+    parser.add_argument("--username", default="")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--tls", action="store_true")
+    args = parser.parse_args()
+
+    sink = None
+    if not args.host:
+        sink = Sink(("127.0.0.1", 0), SinkHandler)
+        sink.rtt = args.rtt_ms / 1000
+        threading.Thread(target=sink.serve_forever, daemon=True).start()
+        args.host, args.port = sink.server_address
+        print(f"Local SMTP sink on {args.host}:{args.port}, {args.rtt_ms:g} ms per reply")
+
+    def new_pool():
+        return SMTPPool(args.host, args.port, args.username, args.password, use_tls=args.tls,
+                        size=1, max_messages=args.messages + 1)
+
+    runs = [
+        ("per-message session", lambda: per_message(args, args.messages)),
+        ("pooled send()", lambda: pooled(pool, args.messages)),
+        ("send_many() batch", lambda: batched(pool, args.messages)),
+    ]
+    baseline = None
+    for name, run in runs:
+        pool = new_pool()
+        started = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - started
+        pool.close()
+        baseline = baseline or elapsed
+        print(f"{name:22s} {args.messages} msgs  {elapsed:7.2f}s  "
+              f"{elapsed / args.messages * 1000:7.1f} ms/msg  {baseline / elapsed:5.1f}x")
+
+    if sink:
+        sink.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Microbenchmark of notification rendering cost per message.
+
+Times app.notification_templates rendering from a prepared context, and the
+full path including app.notification_context.booking_context() on an in-memory
+booking (no database).
+
+Usage:
+    python scripts/benchmark_templates.py --number 20000
+"""
+import argparse
+import datetime
+import os
+import sys
+import timeit
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import models  # noqa: E402
+from app.notification_templates import render_booking_email, render_booking_whatsapp  # noqa: E402
+from app.services import NotificationService  # noqa: E402
+
+
+def sample_booking(chadawas: int) -> models.Booking:
+    booking = models.Booking(id=1042, status="pending", booking_date=datetime.datetime(2025, 1, 2, 10, 30),
+                             gotra="Kashyap", mobile_number="9400000001", whatsapp_number="9400000001",
+                             puja_id=1, plan_id=1)
+    booking.plan = models.Plan(id=1, name="Gold", actual_price=Decimal("2100.00"), discounted_price=Decimal("1100.00"))
+    booking.puja = models.Puja(name="Rudrabhishek", temple_address="Kashi Vishwanath, Varanasi",
+                               date=datetime.date(2025, 2, 1), time=datetime.time(18, 30),
+                               temple_image_url="/uploads/images/kashi.png")
+    booking.puja.images = [models.PujaImage(image_url=f"/uploads/images/{i}.png") for i in range(6)]
+    booking.booking_chadawas = [
+        models.BookingChadawa(chadawa_id=i, chadawa=models.Chadawa(id=i, name=f"Offering {i}", price=Decimal("51.00")))
+        for i in range(1, chadawas + 1)
+    ]
+    return booking
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=20000, help="renders per measurement")
+    parser.add_argument("--chadawas", type=int, default=5)
+    args = parser.parse_args()
+
+    booking = sample_booking(args.chadawas)
+    context = NotificationService.booking_context(booking)
+    cases = [
+        ("render whatsapp", lambda: render_booking_whatsapp(context)),
+        ("render email", lambda: render_booking_email(context)),
+        ("context build", lambda: NotificationService.booking_context(booking)),
+        ("context + whatsapp", lambda: NotificationService.format_booking_details_whatsapp(booking)),
+        ("context + email", lambda: NotificationService.format_booking_details_email(booking)),
+    ]
+    print(f"{args.chadawas} chadawas, best of 5 x {args.number} renders")
+    for name, fn in cases:
+        best = min(timeit.repeat(fn, number=args.number, repeat=5))
+        print(f"{name:20s} {best / args.number * 1e6:8.2f} µs/message")
+
+
+if __name__ == "__main__":
+    main()
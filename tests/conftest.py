@@ -0,0 +1,65 @@
+import os
+
+# Point the app at a throwaway SQLite database before anything imports app.config
+os.environ.setdefault("DATABASE_URL", "sqlite:///./test_33kotidham.db")
+
+import pytest
+from app.database import Base, SessionLocal, engine
+from app import models  # noqa: F401  (register tables on Base.metadata)
+from app.auth import create_access_token, user_cache
+from app.cache import catalog_cache
+
+
+@pytest.fixture(scope="session", autouse=True)
+def create_tables():
+    """Create the schema once for the whole test session."""
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+    if engine.url.get_backend_name() == "sqlite" and engine.url.database:
+        try:
+            os.remove(engine.url.database)
+        except OSError:
+            pass
+
+
+@pytest.fixture
+def db():
+    """Database session; every table is emptied after the test."""
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        for table in reversed(Base.metadata.sorted_tables):
+            session.execute(table.delete())
+        session.commit()
+        session.close()
+
+
+@pytest.fixture
+def admin_headers(db):
+    """Authorization headers for an active admin user."""
+    admin = models.User(name="Admin", mobile="9000000001", role="admin", is_active=True)
+    db.add(admin)
+    db.commit()
+    token = create_access_token({"sub": admin.mobile})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture(autouse=True)
+def clear_catalog_cache():
+    """Start every test with an empty catalog cache."""
+    catalog_cache.local.clear()
+    catalog_cache.reset_stats()
+    yield
+    catalog_cache.local.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_user_cache():
+    """Tables are emptied between tests, so cached users must go too."""
+    user_cache.clear()
+    yield
+    user_cache.clear()
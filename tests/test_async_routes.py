@@ -0,0 +1,89 @@
+from decimal import Decimal
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import models
+from app.database import async_database_url
+from app.main import app
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def catalog(db):
+    """A puja, temple, blog and product with every relationship their responses serialize."""
+    author = models.User(name="Author", mobile="9300000001", is_active=True)
+    plan = models.Plan(name="Gold", actual_price=Decimal("2100.00"))
+    chadawa = models.Chadawa(name="Flowers", price=Decimal("51.00"))
+    puja = models.Puja(name="Rudrabhishek", sub_heading="Kashi", is_active=True)
+    puja.images.append(models.PujaImage(image_url="uploads/images/rudra.jpg"))
+    puja.benefits.append(models.PujaBenefit(benefit_title="Peace", benefit_description="Inner peace"))
+    puja.plan_ids.append(plan)
+    puja.puja_chadawas.append(models.PujaChadawa(chadawa=chadawa))
+    temple = models.temple(name="Kashi Vishwanath", location="Varanasi")
+    temple.recommended_pujas.append(puja)
+    temple.chadawas.append(chadawa)
+    blog_category = models.Category(name="Festivals")
+    blog = models.Blog(title="Shivratri", content="...", slug="shivratri", author=author)
+    blog.categories.append(blog_category)
+    product_category = models.ProductCategory(name="Rudraksha")
+    product = models.Product(
+        name="Panchmukhi Rudraksha", slug="panchmukhi-rudraksha", category=product_category,
+        mrp=Decimal("999"), selling_price=Decimal("799"),
+    )
+    product.images.append(models.ProductImage(image_url="uploads/images/rudraksha.jpg", is_primary=True))
+    db.add_all([puja, temple, blog, product])
+    db.commit()
+    return {"puja_id": puja.id, "temple_id": temple.id, "blog_id": blog.id, "product_id": product.id}
+
+
+def test_puja_routes_serialize_relationships(catalog):
+    pujas = client.get("/api/v1/pujas/").json()
+    assert pujas[0]["images"][0]["image_url"] == "uploads/images/rudra.jpg"
+    assert pujas[0]["benefits"][0]["benefit_title"] == "Peace"
+
+    puja = client.get(f"/api/v1/pujas/{catalog['puja_id']}").json()
+    assert [c["name"] for c in puja["chadawas"]] == ["Flowers"]
+    assert len(puja["plan_ids"]) == 1
+
+    benefits = client.get(f"/api/v1/pujas/{catalog['puja_id']}/benefits")
+    assert benefits.status_code == 200 and len(benefits.json()) == 1
+    assert client.get("/api/v1/pujas/999999/benefits").status_code == 404
+
+
+def test_temple_routes_serialize_relationships(catalog):
+    temple = client.get(f"/api/v1/temples/{catalog['temple_id']}").json()
+    assert temple["recommended_pujas"][0]["images"][0]["image_url"] == "uploads/images/rudra.jpg"
+    assert [c["name"] for c in temple["chadawas"]] == ["Flowers"]
+    assert client.get("/api/v1/temples/").json()[0]["name"] == "Kashi Vishwanath"
+
+
+def test_blog_routes_serialize_relationships(catalog):
+    blog = client.get("/api/v1/blogs/slug/shivratri").json()
+    assert blog["author"]["name"] == "Author"
+    assert [c["name"] for c in blog["categories"]] == ["Festivals"]
+
+    category_id = blog["categories"][0]["id"]
+    listed = client.get(f"/api/v1/blogs/?category_id={category_id}").json()
+    assert [b["id"] for b in listed] == [catalog["blog_id"]]
+    assert client.get("/api/v1/blogs/search?q=shiv").json()[0]["slug"] == "shivratri"
+
+
+def test_product_routes_serialize_relationships(catalog):
+    product = client.get(f"/api/v1/products/{catalog['product_id']}").json()
+    assert product["category"]["name"] == "Rudraksha"
+    assert product["images"][0]["is_primary"] is True
+
+    products = client.get("/api/v1/products/?search=rudraksha").json()
+    assert products[0]["slug"] == "panchmukhi-rudraksha"
+    assert client.get("/api/v1/products/slug/missing").status_code == 404
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("sqlite:///./33kotidham.db", "sqlite+aiosqlite:///./33kotidham.db"),
+    ("postgresql://u:p@db:5432/app", "postgresql+asyncpg://u:p@db:5432/app"),
+    ("postgresql+psycopg2://u:p@db/app?sslmode=require", "postgresql+asyncpg://u:p@db/app?ssl=require"),
+])
+def test_async_database_url(url, expected):
+    assert async_database_url(url).render_as_string(hide_password=False) == expected
@@ -0,0 +1,106 @@
+import io
+import types
+import zipfile
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import audiences, models
+from app.celery_config import celery_app
+from app.config import settings
+from app.main import app
+from app.services import NotificationService
+
+client = TestClient(app)
+
+
+def upload(headers, content, filename="audience.csv", name="Diwali"):
+    return client.post("/api/v1/bulk-whatsapp/audiences", headers=headers, data={"name": name},
+                       files={"file": (filename, io.BytesIO(content), "text/csv")})
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("+91 97149 20830", "+919714920830"),
+    ("076985 92808", "+917698592808"),
+    ("9714920830.0", "+919714920830"),
+    ("0044 7700 900123", "+447700900123"),
+    ("12345", None),
+    ("5714920830", None),
+    ("", None),
+])
+def test_normalize_phone(raw, expected):
+    assert audiences.normalize_phone(raw) == expected
+
+
+def test_csv_upload_is_normalized_and_deduplicated(db, admin_headers, monkeypatch):
+    monkeypatch.setattr(settings, "AUDIENCE_IMPORT_BATCH_SIZE", 2)
+    content = (
+        "﻿Name,Phone,param1,param2,param3\n"
+        "A,+91 97149 20830,Puja for A,Peace,https://x/1\n"
+        "B,076985 92808,Puja for B,Wealth,https://x/2\n"
+        "C,9714920830,Puja for C,Health,https://x/3\n"
+        "D,12345,Puja for D,Luck,https://x/4\n"
+        "E,9000000011,Puja for E,,https://x/5\n"
+        "\n"
+    ).encode()
+
+    response = upload(admin_headers, content)
+
+    assert response.status_code == 201
+    body = response.json()
+    assert (body["status"], body["param_count"], body["total_rows"]) == ("ready", 3, 5)
+    assert (body["member_count"], body["duplicate_count"], body["invalid_count"]) == (2, 1, 2)
+    members = db.query(models.WhatsAppAudienceMember).order_by(models.WhatsAppAudienceMember.id).all()
+    assert [(m.normalized_phone, m.template_params[0]) for m in members] == [
+        ("+919714920830", "Puja for A"), ("+917698592808", "Puja for B")]
+
+
+def test_send_to_audience_uses_per_recipient_params(db, admin_headers, monkeypatch):
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    sent = []
+
+    def send_whatsapp_template(phone_number, template_name, template_params=None, media_url=None):
+        sent.append((phone_number, template_params))
+        return True
+
+    monkeypatch.setattr(NotificationService, "send_whatsapp_template", staticmethod(send_whatsapp_template))
+    audience = upload(admin_headers, b"phone,param1,param2,param3\n9714920830,m1,b1,u1\n7698592808,m2,b2,u2\n").json()
+
+    response = client.post(f"/api/v1/bulk-whatsapp/audiences/{audience['id']}/send", headers=admin_headers,
+                           json={"template_name": "puja_promp"})
+
+    assert response.status_code == 202
+    assert response.json()["total_numbers"] == 2
+    assert sorted(sent) == [("+917698592808", ["m2", "b2", "u2"]), ("+919714920830", ["m1", "b1", "u1"])]
+
+    # Without per-row parameters, puja_promp still needs template_params
+    plain = upload(admin_headers, b"9714920830\n").json()
+    response = client.post(f"/api/v1/bulk-whatsapp/audiences/{plain['id']}/send", headers=admin_headers,
+                           json={"template_name": "puja_promp"})
+    assert response.status_code == 400
+
+
+def test_unsupported_uploads_are_rejected(db, admin_headers, monkeypatch):
+    assert upload(admin_headers, b"phone\n", filename="audience.pdf").status_code == 400
+
+    monkeypatch.setattr(audiences, "openpyxl", None)
+    assert upload(admin_headers, b"PK", filename="audience.xlsx").status_code == 400
+
+    monkeypatch.setattr(settings, "AUDIENCE_MAX_ROWS", 1)
+    response = upload(admin_headers, b"phone\n9714920830\n7698592808\n")
+    assert response.status_code == 400
+    assert db.query(models.WhatsAppAudience).one().status == "failed"
+    assert db.query(models.WhatsAppAudienceMember).count() == 0
+
+
+def test_corrupt_xlsx_upload_is_rejected(db, admin_headers, monkeypatch):
+    def load_workbook(file, **kwargs):
+        raise zipfile.BadZipFile("File is not a zip file")
+
+    monkeypatch.setattr(audiences, "openpyxl", types.SimpleNamespace(load_workbook=load_workbook))
+
+    response = upload(admin_headers, b"phone\n9714920830\n", filename="audience.xlsx")
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "The file is not a valid .xlsx workbook"
+    assert db.query(models.WhatsAppAudience).count() == 0
@@ -0,0 +1,158 @@
+from contextlib import contextmanager
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app import auth, crud, models, schemas
+from app.auth import UserCache, create_access_token
+from app.config import settings
+from app.database import SessionLocal, engine
+from app.main import app
+
+client = TestClient(app)
+
+
+@contextmanager
+def user_selects():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "FROM users" in statement:
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+class SharedRedis:
+    """The few Redis commands UserCache uses, on a dict shared by every cache given it."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def incr(self, key):
+        self.data[key] = int(self.data.get(key, 0)) + 1
+
+    def expire(self, key, seconds):
+        pass
+
+    def execute(self):
+        pass
+
+
+@pytest.fixture
+def shared_redis(monkeypatch):
+    """Point the app's user cache at an in-memory Redis (no Redis server runs in tests)."""
+    redis = SharedRedis()
+    monkeypatch.setattr(auth.user_cache, "_redis", redis)
+    monkeypatch.setattr(auth.user_cache, "_redis_retry_at", 0.0)
+    return redis
+
+
+@pytest.fixture
+def user_headers(db):
+    user = models.User(name="Devotee", mobile="9400000001", is_active=True)
+    db.add(user)
+    db.commit()
+    return {"Authorization": f"Bearer {create_access_token({'sub': user.mobile})}"}
+
+
+def test_repeated_requests_skip_the_user_lookup(shared_redis, user_headers):
+    assert client.get("/api/v1/auth/me", headers=user_headers).status_code == 200
+
+    with user_selects() as statements:
+        response = client.get("/api/v1/auth/me", headers=user_headers)
+
+    assert response.status_code == 200
+    assert response.json()["name"] == "Devotee"
+    assert statements == []
+
+
+def test_cached_user_can_update_itself(shared_redis, user_headers):
+    client.get("/api/v1/auth/me", headers=user_headers)
+
+    response = client.put("/api/v1/auth/me", json={"name": "Renamed"}, headers=user_headers)
+
+    assert response.status_code == 200
+    assert client.get("/api/v1/auth/me", headers=user_headers).json()["name"] == "Renamed"
+
+
+def test_deactivation_takes_effect_immediately(db, shared_redis, user_headers, admin_headers):
+    me = client.get("/api/v1/auth/me", headers=user_headers).json()
+
+    response = client.put(f"/api/v1/users/{me['id']}/deactivate", headers=admin_headers)
+    assert response.status_code == 200
+
+    response = client.get("/api/v1/auth/me", headers=user_headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Inactive user"
+
+
+def test_deleted_user_is_rejected(db, shared_redis, user_headers):
+    me = client.get("/api/v1/auth/me", headers=user_headers).json()
+    assert crud.UserCRUD.delete_user(db, me["id"]) is True
+
+    assert client.get("/api/v1/auth/me", headers=user_headers).status_code == 401
+
+
+def test_updates_in_another_process_invalidate_this_one(db, shared_redis, user_headers):
+    """Another worker's cache (same Redis, own memory) sees an update made here at once."""
+    other = UserCache(redis_url=settings.REDIS_URL, ttl=60, max_entries=10)
+    other._redis = shared_redis
+    me = client.get("/api/v1/auth/me", headers=user_headers).json()
+
+    def load_in_other_worker():
+        session = SessionLocal()
+        try:
+            original, auth.user_cache = auth.user_cache, other
+            try:
+                return auth._load_user(session, me["mobile"])
+            finally:
+                auth.user_cache = original
+        finally:
+            session.close()
+
+    assert load_in_other_worker().name == "Devotee"
+    with user_selects() as statements:
+        assert load_in_other_worker().is_active is True
+    assert statements == []
+
+    crud.UserCRUD.update_user(db, me["id"], schemas.UserUpdate(is_active=False, name="Renamed"))
+
+    user = load_in_other_worker()
+    assert (user.is_active, user.name) == (False, "Renamed")
+
+
+def test_cache_is_bypassed_without_redis(db, user_headers, monkeypatch):
+    """Without Redis a cached entry cannot be checked, so every request reads the database."""
+    monkeypatch.setattr(auth.user_cache, "generation", lambda mobile: None)
+    client.get("/api/v1/auth/me", headers=user_headers)
+
+    with user_selects() as statements:
+        assert client.get("/api/v1/auth/me", headers=user_headers).status_code == 200
+
+    assert len(statements) == 1
+
+
+def test_cached_user_is_not_put_in_the_session(db, shared_redis, user_headers):
+    """A cache hit must not shadow the database row in the request's identity map."""
+    client.get("/api/v1/auth/me", headers=user_headers)
+    session = SessionLocal()
+    try:
+        user = auth._load_user(session, "9400000001")
+        session.query(models.User).filter_by(id=user.id).update({"name": "Changed"})
+
+        assert user not in session
+        assert session.get(models.User, user.id).name == "Changed"
+    finally:
+        session.close()
@@ -0,0 +1,116 @@
+from decimal import Decimal
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app import models, schemas
+from app.database import engine
+from app.main import app
+from app.pricing import BookingValidationError, booking_price, resolve_booking_items
+from app.services import NotificationService
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def catalog(db):
+    plan = models.Plan(name="Gold", actual_price=Decimal("2100.00"), discounted_price=Decimal("1100.00"))
+    puja = models.Puja(name="Rudrabhishek", sub_heading="Kashi", is_active=True)
+    temple = models.temple(name="Kashi Vishwanath")
+    chadawas = [models.Chadawa(name=f"Offering {i}", price=Decimal("51.00")) for i in range(10)]
+    noted = models.Chadawa(name="Sankalp", price=Decimal("101.00"), requires_note=True)
+    db.add_all([plan, puja, temple, noted, *chadawas])
+    db.commit()
+    return {"plan": plan.id, "puja": puja.id, "temple": temple.id,
+            "chadawas": [c.id for c in chadawas], "noted": noted.id}
+
+
+def test_resolver_batches_lookups_and_totals_in_decimal(db, catalog):
+    booking = schemas.BookingCreate(puja_id=catalog["puja"], plan_id=catalog["plan"], chadawa_ids=catalog["chadawas"])
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        resolved = resolve_booking_items(db, booking)
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    assert len(statements) == 2  # plan by primary key + one chadawa IN query
+    assert resolved.total == Decimal("1100.00") + 10 * Decimal("51.00")
+
+
+def test_temple_bookings_are_not_charged_for_the_plan(db, catalog):
+    booking = schemas.BookingCreate(temple_id=catalog["temple"], plan_id=catalog["plan"],
+                                    chadawa_ids=catalog["chadawas"][:2])
+    assert resolve_booking_items(db, booking).total == Decimal("102.00")
+
+
+def test_validation_errors(db, catalog):
+    with pytest.raises(BookingValidationError) as missing:
+        resolve_booking_items(db, schemas.BookingCreate(chadawa_ids=[catalog["chadawas"][0], 999999]))
+    assert (missing.value.status_code, missing.value.detail) == (404, "Chadawa with ID 999999 not found")
+
+    without_note = schemas.BookingCreate(chadawas=[{"chadawa_id": catalog["noted"]}])
+    with pytest.raises(BookingValidationError) as note:
+        resolve_booking_items(db, without_note)
+    assert (note.value.status_code, note.value.detail) == (400, "Note is required for chadawa: Sankalp")
+
+
+def test_create_booking_reports_validation_errors(admin_headers, catalog):
+    response = client.post("/api/v1/bookings/", headers=admin_headers,
+                           json={"puja_id": catalog["puja"], "plan_id": 999999})
+    assert response.status_code == 404  # detail is rewritten by the app-wide 404 handler
+
+    response = client.post("/api/v1/bookings/", headers=admin_headers, json={
+        "puja_id": catalog["puja"], "plan_id": catalog["plan"],
+        "chadawas": [{"chadawa_id": catalog["noted"], "note": "For family"}],
+    })
+    assert response.status_code == 200
+    assert response.json()["booking_chadawas"][0]["note"] == "For family"
+
+
+def test_persisted_booking_total_skips_deleted_chadawas(db, catalog, admin_headers):
+    booking = models.Booking(user_id=db.query(models.User).first().id, puja_id=catalog["puja"],
+                             plan_id=catalog["plan"])
+    booking.booking_chadawas.append(models.BookingChadawa(chadawa_id=catalog["chadawas"][0]))
+    booking.booking_chadawas.append(models.BookingChadawa(chadawa_id=None))
+    db.add(booking)
+    db.commit()
+
+    assert resolve_booking_items(db, booking, strict=False).total == Decimal("1151.00")
+
+
+def test_booking_stores_a_price_snapshot(db, catalog, admin_headers):
+    response = client.post("/api/v1/bookings/", headers=admin_headers, json={
+        "puja_id": catalog["puja"], "plan_id": catalog["plan"], "chadawa_ids": catalog["chadawas"][:2],
+    })
+    assert response.status_code == 200
+    body = response.json()
+    assert Decimal(body["amount"]) == Decimal("1202.00")
+    assert [(item["type"], item["price"]) for item in body["line_items"]] == [
+        ("plan", "1100.00"), ("chadawa", "51.00"), ("chadawa", "51.00"),
+    ]
+
+    # Later catalog price changes don't alter what the booking costs
+    db.get(models.Chadawa, catalog["chadawas"][0]).price = Decimal("501.00")
+    db.commit()
+    booking = db.get(models.Booking, body["id"])
+    assert booking_price(booking).amount == Decimal("1202.00")
+    assert "*Total:* ₹1202.00" in NotificationService.format_booking_details_whatsapp(booking)
+
+
+def test_bookings_without_snapshot_are_priced_from_their_items(db, catalog, admin_headers):
+    booking = models.Booking(user_id=db.query(models.User).first().id, temple_id=catalog["temple"],
+                             plan_id=catalog["plan"])
+    booking.booking_chadawas.append(models.BookingChadawa(chadawa_id=catalog["chadawas"][0]))
+    db.add(booking)
+    db.commit()
+
+    price = booking_price(booking)
+    assert price.amount == Decimal("51.00")  # temple bookings exclude the plan
+    assert price.plan_price == Decimal("0")
+    assert [item["name"] for item in price.chadawa_items] == ["Offering 0"]
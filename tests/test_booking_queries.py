@@ -0,0 +1,100 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app import models
+from app.database import async_engine, engine
+from app.main import app
+
+client = TestClient(app)
+
+# Statements allowed for one page of bookings regardless of its size: the
+# auth lookup, the page itself and one SELECT ... IN per eager relationship.
+MAX_QUERIES_PER_PAGE = 20
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    # Listing routes run on the async engine; auth still uses the sync one
+    engines = [engine, async_engine.sync_engine]
+    for target in engines:
+        event.listen(target, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        for target in engines:
+            event.remove(target, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture
+def seeded_bookings(db):
+    """100 puja bookings and 100 temple chadawa bookings, each with distinct related rows."""
+    now = datetime.utcnow()
+    chadawa = models.Chadawa(name="Flowers", price=Decimal("51.00"))
+    db.add(chadawa)
+    for i in range(100):
+        user = models.User(name=f"User {i}", mobile=f"91000{i:05d}", is_active=True)
+        plan = models.Plan(name=f"Plan {i}", actual_price=Decimal("1100.00"))
+        puja = models.Puja(name=f"Puja {i}", sub_heading="Sub heading", is_active=True)
+        puja.images.append(models.PujaImage(image_url=f"uploads/images/puja-{i}.jpg"))
+        puja.benefits.append(models.PujaBenefit(benefit_title="Peace", benefit_description="Inner peace"))
+        puja.plan_ids.append(plan)
+        temple = models.temple(name=f"Temple {i}", location="Varanasi")
+        temple.recommended_pujas.append(puja)
+        temple.chadawas.append(chadawa)
+        db.add_all([user, plan, puja, temple])
+        db.flush()
+
+        puja_booking = models.Booking(
+            user_id=user.id, puja_id=puja.id, plan_id=plan.id,
+            booking_date=now - timedelta(minutes=i), status="pending",
+        )
+        temple_booking = models.Booking(
+            user_id=user.id, temple_id=temple.id,
+            booking_date=now - timedelta(minutes=i), status="pending",
+        )
+        for booking in (puja_booking, temple_booking):
+            booking.booking_chadawas.append(models.BookingChadawa(chadawa_id=chadawa.id, note="For family"))
+        db.add_all([puja_booking, temple_booking])
+    db.commit()
+
+
+@pytest.mark.parametrize("url", [
+    "/api/v1/bookings/puja?limit=100",
+    "/api/v1/bookings/temple-chadawa?limit=100",
+    "/api/v1/bookings/?limit=100",
+    "/api/v1/admin/bookings/pending?limit=100",
+    "/api/v1/admin/bookings/recent?limit=50",
+])
+def test_booking_listing_query_count_is_bounded(url, admin_headers, seeded_bookings):
+    """Booking listings issue a fixed number of queries, not one per row."""
+    with count_queries() as statements:
+        response = client.get(url, headers=admin_headers)
+
+    assert response.status_code == 200
+    bookings = response.json()
+    assert len(bookings) >= 50
+    assert all(b["booking_chadawas"][0]["chadawa"]["name"] == "Flowers" for b in bookings)
+    assert len(statements) <= MAX_QUERIES_PER_PAGE, "\n".join(statements)
+
+
+def test_puja_bookings_serialize_nested_relationships(admin_headers, seeded_bookings):
+    """Eagerly loaded puja bookings still carry the full nested payload."""
+    response = client.get("/api/v1/bookings/puja?limit=1", headers=admin_headers)
+
+    assert response.status_code == 200
+    booking = response.json()[0]
+    assert booking["user"]["name"] == "User 0"
+    assert booking["plan"]["name"] == "Plan 0"
+    assert booking["puja"]["images"][0]["image_url"] == "uploads/images/puja-0.jpg"
+    assert booking["puja"]["benefits"][0]["benefit_title"] == "Peace"
+    assert booking["puja"]["plan_ids"] == [booking["plan_id"]]
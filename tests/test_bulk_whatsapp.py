@@ -0,0 +1,131 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app import models
+from app.celery_config import celery_app
+from app.config import settings
+from app.main import app
+from app.services import NotificationService
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def eager_celery(monkeypatch):
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    monkeypatch.setattr(settings, "BULK_WHATSAPP_CHUNK_SIZE", 2)
+    monkeypatch.setattr(settings, "BULK_WHATSAPP_CONCURRENCY", 2)
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    """Numbers passed to send_whatsapp_template; numbers ending in 9 fail."""
+    numbers = []
+
+    def send_whatsapp_template(phone_number, template_name, template_params=None, media_url=None):
+        numbers.append(phone_number)
+        return not phone_number.endswith("9")
+
+    monkeypatch.setattr(NotificationService, "send_whatsapp_template", staticmethod(send_whatsapp_template))
+    return numbers
+
+
+def test_campaign_runs_in_background_and_reports_progress(db, admin_headers, eager_celery, sent):
+    phones = ["+91 97149 20830", "076985 92808", "9000000011", "9000000019", "9000000021"]
+
+    response = client.post("/api/v1/bulk-whatsapp/send", headers=admin_headers,
+                           json={"phone_numbers": phones, "template_name": "33koti_promo"})
+
+    assert response.status_code == 202
+    job = response.json()
+    assert job["total_numbers"] == 5
+
+    assert sorted(sent) == sorted(["+919714920830", "+917698592808", "+919000000011",
+                                   "+919000000019", "+919000000021"])
+    status = client.get(f"/api/v1/bulk-whatsapp/jobs/{job['job_id']}", headers=admin_headers).json()
+    assert (status["status"], status["successful"], status["failed"], status["pending"]) == ("completed", 4, 1, 0)
+    assert status["progress"] == 100.0
+
+    failed = db.query(models.WhatsAppCampaignRecipient).filter_by(status="failed").one()
+    assert failed.phone == "9000000019" and failed.error
+
+
+def test_chunks_are_published_as_id_ranges(db, monkeypatch, eager_celery):
+    from app import crud, tasks
+
+    published = []
+    monkeypatch.setattr(tasks.send_whatsapp_campaign_chunk, "apply_async", lambda args: published.append(args))
+    campaign = crud.WhatsAppCampaignCRUD.create_campaign(
+        db, "33koti_promo", None, None, [(str(n), f"+91{n}") for n in range(9000000011, 9000000100, 10)])
+    first = db.query(models.WhatsAppCampaignRecipient.id).filter_by(campaign_id=campaign.id).order_by("id").first()[0]
+
+    assert tasks.enqueue_whatsapp_campaign(db, campaign.id) == 5
+    # Each task carries (campaign_id, after_id, last_id), never the recipient ids
+    ends = [first + 1, first + 3, first + 5, first + 7, first + 8]
+    assert published == [(campaign.id, after, last) for after, last in zip([0] + ends[:-1], ends)]
+
+
+def test_failing_chunk_does_not_stop_the_others(db, admin_headers, eager_celery, sent, monkeypatch):
+    from sqlalchemy.exc import OperationalError
+
+    from app import crud
+
+    get_pending_recipients = crud.WhatsAppCampaignCRUD.get_pending_recipients
+    attempts = []
+
+    def flaky(db, campaign_id, after_id, last_id):
+        # The second chunk hits a database error on every attempt
+        if after_id == middle[0] - 1:
+            attempts.append(after_id)
+            raise OperationalError("SELECT", {}, Exception("server closed the connection"))
+        return get_pending_recipients(db, campaign_id, after_id, last_id)
+
+    monkeypatch.setattr(crud.WhatsAppCampaignCRUD, "get_pending_recipients", staticmethod(flaky))
+    campaign = crud.WhatsAppCampaignCRUD.create_campaign(
+        db, "33koti_promo", None, None, [(str(n), f"+91{n}") for n in range(9000000011, 9000000071, 10)])
+    ids = [r.id for r in db.query(models.WhatsAppCampaignRecipient.id).order_by("id")]
+    middle = ids[2:4]
+
+    from app.tasks import enqueue_whatsapp_campaign
+    assert enqueue_whatsapp_campaign(db, campaign.id) == 3
+
+    assert len(attempts) == 4  # first run and max_retries retries
+    assert sent == ["+919000000011", "+919000000021", "+919000000051", "+919000000061"]
+    status = client.get(f"/api/v1/bulk-whatsapp/jobs/{campaign.id}", headers=admin_headers).json()
+    assert (status["status"], status["successful"], status["failed"], status["pending"]) == ("completed", 4, 2, 0)
+    errored = db.query(models.WhatsAppCampaignRecipient).filter_by(status="error").all()
+    assert [r.id for r in errored] == middle and "after retries" in errored[0].error
+
+
+def test_retried_chunk_skips_sent_recipients(db, admin_headers, eager_celery, sent):
+    from app import crud
+    from app.tasks import send_whatsapp_campaign_chunk
+
+    campaign = crud.WhatsAppCampaignCRUD.create_campaign(
+        db, "33koti_promo", None, None, [("9000000011", "+919000000011"), ("9000000021", "+919000000021")])
+    (after_id, last_id), = crud.WhatsAppCampaignCRUD.iter_chunk_bounds(db, campaign.id, 10)
+    send_whatsapp_campaign_chunk(campaign.id, after_id, last_id)
+    send_whatsapp_campaign_chunk(campaign.id, after_id, last_id)
+
+    assert sent == ["+919000000011", "+919000000021"]
+
+
+def test_unknown_job_is_404(admin_headers):
+    assert client.get("/api/v1/bulk-whatsapp/jobs/999999", headers=admin_headers).status_code == 404
+
+
+
+def test_campaign_is_removed_when_it_cannot_be_queued(db, admin_headers, monkeypatch):
+    from app import tasks
+
+    def broker_down(*args, **kwargs):
+        raise ConnectionError("redis unavailable")
+
+    monkeypatch.setattr(tasks.send_whatsapp_campaign_chunk, "apply_async", broker_down)
+
+    response = client.post("/api/v1/bulk-whatsapp/send", headers=admin_headers,
+                           json={"phone_numbers": ["9000000011", "9000000021"], "template_name": "33koti_promo"})
+
+    assert response.status_code == 503
+    assert db.query(models.WhatsAppCampaign).count() == 0
+    assert db.query(models.WhatsAppCampaignRecipient).count() == 0
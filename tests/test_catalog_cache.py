@@ -0,0 +1,51 @@
+from decimal import Decimal
+
+from fastapi.testclient import TestClient
+
+from app import crud, schemas
+from app.cache import LocalTTLCache, catalog_cache
+from app.main import app
+
+client = TestClient(app)
+
+
+def test_local_cache_evicts_least_recently_used():
+    """The in-process tier keeps at most max_entries, dropping the oldest."""
+    cache = LocalTTLCache(max_entries=2, ttl=60)
+    cache.set(("plans", "a"), 1)
+    cache.set(("plans", "b"), 2)
+    cache.get(("plans", "a"))
+    cache.set(("plans", "c"), 3)
+
+    assert cache.get(("plans", "a")) == 1
+    assert cache.get(("plans", "c")) == 3
+    assert len(cache) == 2
+
+
+def test_plans_are_served_from_cache_until_a_write(db):
+    """Repeated reads hit the cache; a CRUD write invalidates it."""
+    crud.PlanCRUD.create_plan(db, schemas.PlanCreate(name="Basic", actual_price=Decimal("501.00")))
+
+    first = client.get("/api/v1/plans/")
+    second = client.get("/api/v1/plans/")
+    assert first.json() == second.json()
+    assert [p["name"] for p in second.json()] == ["Basic"]
+    stats = catalog_cache.stats()
+    assert stats["misses"] == 1
+    assert stats["local_hits"] == 1
+
+    crud.PlanCRUD.create_plan(db, schemas.PlanCreate(name="Premium", actual_price=Decimal("1101.00")))
+
+    third = client.get("/api/v1/plans/")
+    assert [p["name"] for p in third.json()] == ["Basic", "Premium"]
+    assert catalog_cache.stats()["misses"] == 2
+
+
+def test_chadawa_write_invalidates_dependent_namespaces():
+    """Chadawa changes also drop cached pujas and temples, which embed chadawas."""
+    for namespace in ("chadawas", "pujas", "temples", "plans"):
+        catalog_cache.local.set((namespace, "list:0:100"), [])
+
+    catalog_cache.invalidate("chadawas")
+
+    assert len(catalog_cache.local) == 1
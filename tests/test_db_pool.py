@@ -0,0 +1,49 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, exc
+
+from app import db_metrics
+from app.database import engine
+from app.db_metrics import InstrumentedQueuePool
+from app.main import app
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def tiny_pool_engine(tmp_path):
+    small = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.05,
+    )
+    yield small
+    small.dispose()
+
+
+def test_pool_stats_track_checked_out_connections():
+    with engine.connect():
+        stats = db_metrics.pool_stats(engine.pool)
+        assert stats["pool_class"] == "InstrumentedQueuePool"
+        assert stats["checked_out"] >= 1
+    assert db_metrics.pool_stats(engine.pool)["checkout"]["checkouts"] >= 1
+
+
+def test_checkout_timeouts_are_counted(tiny_pool_engine):
+    with tiny_pool_engine.connect():
+        with pytest.raises(exc.TimeoutError):
+            tiny_pool_engine.connect()
+
+    stats = db_metrics.pool_stats(tiny_pool_engine.pool)
+    assert stats["checkout"]["timeouts"] == 1
+    assert stats["checkout"]["checkouts"] == 1
+    assert stats["overflow"] == 0
+
+
+def test_db_pool_diagnostics_endpoint(admin_headers):
+    response = client.get("/api/v1/admin/diagnostics/db-pool", headers=admin_headers)
+
+    assert response.status_code == 200
+    current = response.json()["current"]
+    assert current["process_type"] == "api"
+    assert current["engines"]["sync"]["size"] == 5
+    assert "p95_ms" in current["engines"]["sync"]["checkout"]
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from twilio.request_validator import RequestValidator
+
+from app import delivery_receipts, models
+from app.config import settings
+from app.main import app
+
+client = TestClient(app)
+
+TWILIO_URL = "http://testserver/api/v1/notifications/webhooks/twilio/status"
+
+
+@pytest.fixture(autouse=True)
+def webhooks(monkeypatch):
+    monkeypatch.setattr(settings, "TWILIO_AUTH_TOKEN", "token")
+    monkeypatch.setattr(settings, "TWILIO_STATUS_CALLBACK_URL", TWILIO_URL)
+    monkeypatch.setattr(settings, "MSG91_WEBHOOK_TOKEN", "secret")
+    monkeypatch.setattr(settings, "DELIVERY_RECEIPT_FLUSH_SECONDS", 0)
+
+
+def twilio_callback(sid, message_status, **extra):
+    params = {"MessageSid": sid, "MessageStatus": message_status, "To": "whatsapp:+919400000001", **extra}
+    signature = RequestValidator("token").compute_signature(TWILIO_URL, params)
+    return client.post(TWILIO_URL, data=params, headers={"X-Twilio-Signature": signature})
+
+
+def test_twilio_callbacks_keep_the_furthest_status(db):
+    assert twilio_callback("SM1", "delivered").status_code == 204
+    assert twilio_callback("SM1", "sent").status_code == 204  # arrives late
+    assert twilio_callback("SM2", "undelivered", ErrorCode="63016").status_code == 204
+
+    rows = {row.provider_message_id: row for row in db.query(models.NotificationDelivery).all()}
+    assert rows["SM1"].status == "delivered" and rows["SM1"].channel == "whatsapp"
+    assert rows["SM2"].status == "undelivered" and rows["SM2"].error_code == "63016"
+
+
+def test_unsigned_callbacks_are_rejected(db):
+    response = client.post(TWILIO_URL, data={"MessageSid": "SM1", "MessageStatus": "failed"},
+                           headers={"X-Twilio-Signature": "forged"})
+    bad_token = client.post("/api/v1/notifications/webhooks/msg91/status?token=wrong", json=[])
+
+    assert response.status_code == 403 and bad_token.status_code == 403
+    assert db.query(models.NotificationDelivery).count() == 0
+
+
+def test_receipts_are_not_acknowledged_until_stored(db, monkeypatch):
+    def database_down(db, rows):
+        raise ConnectionError("database unavailable")
+
+    monkeypatch.setattr(delivery_receipts, "write_receipts", database_down)
+
+    assert twilio_callback("SM1", "delivered").status_code == 503
+
+
+def test_failure_rates_from_twilio_and_msg91_receipts(db, admin_headers):
+    twilio_callback("SM1", "delivered")
+    twilio_callback("SM2", "failed", ErrorCode="63016")
+    report = [{"requestId": "R1", "report": [{"number": "919400000001", "status": "1", "desc": "DELIVERED"}]},
+              {"requestId": "R2", "report": [{"number": "919400000002", "status": "16", "desc": "Rejected"}]}]
+    response = client.post("/api/v1/notifications/webhooks/msg91/status?token=secret", json=report)
+    assert response.json()["receipts"] == 2
+
+    response = client.get("/api/v1/admin/notifications/failure-rates", headers=admin_headers)
+
+    assert response.status_code == 200
+    rates = {(p["provider"], p["channel"]): p for p in response.json()["providers"]}
+    assert rates[("twilio", "whatsapp")]["failure_rate"] == 0.5
+    assert rates[("twilio", "whatsapp")]["top_errors"] == [{"error_code": "63016", "count": 1}]
+    assert rates[("msg91", "sms")]["failed"] == 1 and rates[("msg91", "sms")]["total"] == 2
+
+
+def test_concurrent_callbacks_share_one_upsert(db, monkeypatch):
+    batches = []
+    write_receipts = delivery_receipts.write_receipts
+
+    def recording_write(db, rows):
+        batches.append(rows)
+        return write_receipts(db, rows)
+
+    monkeypatch.setattr(delivery_receipts, "write_receipts", recording_write)
+    monkeypatch.setattr(settings, "DELIVERY_RECEIPT_FLUSH_SECONDS", 0.01)
+    writer = delivery_receipts.ReceiptWriter()
+    rows = [delivery_receipts.receipt("twilio", f"SM{i}", "delivered", "whatsapp") for i in range(3)]
+
+    async def callbacks():
+        await asyncio.gather(*(writer.write([row]) for row in rows))
+
+    asyncio.run(callbacks())
+
+    assert len(batches) == 1 and len(batches[0]) == 3
+    assert db.query(models.NotificationDelivery).count() == 3
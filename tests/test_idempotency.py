@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app import idempotency, models
+from app.config import settings
+from app.rate_limit import rate_limiter
+from app.services import NotificationService
+
+
+@pytest.fixture
+def booking(db):
+    user = models.User(name="Devotee", mobile="9400000001")
+    db.add(user)
+    db.commit()
+    booking = models.Booking(user_id=user.id, status="confirmed")
+    db.add(booking)
+    db.commit()
+    return booking
+
+
+def test_a_key_is_sent_once(booking):
+    key = (booking.id, "confirmed", idempotency.WHATSAPP)
+
+    assert idempotency.claim(*key) == idempotency.CLAIMED
+    assert idempotency.claim(*key) == idempotency.IN_PROGRESS
+
+    idempotency.finish(*key, sent=True)
+
+    assert idempotency.claim(*key) == idempotency.ALREADY_SENT
+    assert idempotency.claim(booking.id, "pending", idempotency.WHATSAPP) == idempotency.CLAIMED
+
+
+def test_failed_and_abandoned_claims_can_be_retaken(db, booking):
+    key = (booking.id, "confirmed", idempotency.WHATSAPP)
+    idempotency.claim(*key)
+    idempotency.finish(*key, sent=False)
+
+    assert idempotency.claim(*key) == idempotency.CLAIMED
+
+    record = db.query(models.NotificationIdempotencyKey).one()
+    record.claimed_at = datetime.now(timezone.utc) - timedelta(seconds=settings.NOTIFICATION_CLAIM_TTL_SECONDS + 1)
+    db.commit()
+
+    assert idempotency.claim(*key) == idempotency.CLAIMED
+
+
+def test_redelivered_notification_is_not_sent_again(booking, monkeypatch):
+    monkeypatch.setattr(rate_limiter, "enabled", False)
+    monkeypatch.setattr(settings, "SEND_BOOKING_NOTIFICATIONS", True)
+    monkeypatch.setattr(settings, "TWILIO_ACCOUNT_SID", "AC123")
+    monkeypatch.setattr(settings, "TWILIO_AUTH_TOKEN", "token")
+    monkeypatch.setattr(settings, "SEND_WHATSAPP_ON_BOOKING", True)
+    sent = []
+    monkeypatch.setattr(NotificationService, "send_whatsapp_message", staticmethod(lambda m: sent.append(m) or True))
+
+    for _ in range(2):
+        result = NotificationService.send_booking_confirmed_notification(booking, None, "9400000001")
+        assert result["whatsapp_sent"] is True
+
+    assert len(sent) == 1
@@ -0,0 +1,66 @@
+import json
+import logging
+
+import pytest
+
+from app import log as app_log
+from app.log import StructuredFormatter, get_logger
+
+
+class Expensive:
+    """Counts how often a field value is turned into text."""
+    renders = 0
+
+    def __str__(self):
+        Expensive.renders += 1
+        return "expensive"
+
+
+@pytest.fixture
+def records():
+    captured = []
+    handler = logging.Handler()
+    handler.emit = captured.append
+    logger = logging.getLogger("app.test_log")
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    yield captured
+    logger.removeHandler(handler)
+
+
+def test_disabled_levels_never_format_fields(records):
+    Expensive.renders = 0
+    log = get_logger("app.test_log")
+
+    log.debug("whatsapp.request", params=Expensive())
+    assert records == [] and Expensive.renders == 0
+
+    log.info("whatsapp.sent", to="+919400000001", sid="SM1")
+    [record] = records
+    assert record.event == "whatsapp.sent" and record.fields == {"to": "+919400000001", "sid": "SM1"}
+    assert record.funcName == "test_disabled_levels_never_format_fields"
+
+
+def test_sampled_events_keep_warnings(records, monkeypatch):
+    monkeypatch.setattr(app_log, "_sample_rates", app_log._parse_sample_rates("campaign.chunk_done=0, bad, x=y"))
+    log = get_logger("app.test_log")
+
+    log.info("campaign.chunk_done", sent=1)
+    log.warning("campaign.chunk_done", sent=1)
+    log.info("campaign.queued")
+
+    assert [(r.levelname, r.event) for r in records] == [("WARNING", "campaign.chunk_done"), ("INFO", "campaign.queued")]
+
+
+def test_text_and_json_formats(records):
+    get_logger("app.test_log").info("otp.failed", to="9400000001", response='{"type": "error"}', status=401)
+    record = records[0]
+
+    text = StructuredFormatter("text").format(record)
+    assert text.endswith('INFO app.test_log otp.failed to=9400000001 response="{\\"type\\": \\"error\\"}" status=401')
+
+    data = json.loads(StructuredFormatter("json").format(record))
+    assert data["event"] == "otp.failed" and data["status"] == 401 and data["logger"] == "app.test_log"
+
+    plain = logging.LogRecord("app.x", logging.INFO, __file__, 1, "plain %s", ("message",), None)
+    assert StructuredFormatter().format(plain).endswith("INFO app.x plain message")
@@ -0,0 +1,95 @@
+import smtplib
+from email.message import EmailMessage
+
+import pytest
+
+from app import mailer
+from app.mailer import SMTPPool
+
+
+class FakeSMTP:
+    """Records the session lifecycle; ``drop_next``/``refuse`` inject server behaviour."""
+    instances = []
+    drop_next = False
+    refuse = ()
+
+    def __init__(self, host, port, timeout=None):
+        self.logins = 0
+        self.sent = []
+        self.closed = False
+        FakeSMTP.instances.append(self)
+
+    def starttls(self):
+        pass
+
+    def login(self, username, password):
+        self.logins += 1
+
+    def send_message(self, msg, from_addr=None):
+        if FakeSMTP.drop_next:
+            FakeSMTP.drop_next = False
+            raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+        if msg["To"] in FakeSMTP.refuse:
+            raise smtplib.SMTPRecipientsRefused({msg["To"]: (550, b"No such user")})
+        self.sent.append(msg["To"])
+
+    def rset(self):
+        pass
+
+    def quit(self):
+        self.closed = True
+
+    close = quit
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    FakeSMTP.instances, FakeSMTP.drop_next, FakeSMTP.refuse = [], False, ()
+    monkeypatch.setattr(mailer.smtplib, "SMTP", FakeSMTP)
+    return SMTPPool("smtp.example.com", 587, "user", "secret", size=2)
+
+
+def message(to):
+    msg = EmailMessage()
+    msg["From"], msg["To"], msg["Subject"] = "noreply@33kotidham.com", to, "Booking"
+    msg.set_content("Namaste")
+    return msg
+
+
+def test_messages_reuse_one_authenticated_session(pool):
+    for i in range(3):
+        pool.send(message(f"devotee{i}@example.com"))
+
+    assert len(FakeSMTP.instances) == 1
+    assert FakeSMTP.instances[0].logins == 1
+    assert pool.stats()["messages"] == 3
+
+
+def test_dropped_session_reconnects_and_retries(pool):
+    pool.send(message("a@example.com"))
+    FakeSMTP.drop_next = True
+
+    pool.send(message("b@example.com"))
+
+    assert [s.sent for s in FakeSMTP.instances] == [["a@example.com"], ["b@example.com"]]
+    assert pool.stats()["reconnects"] == 1
+
+
+def test_batch_continues_past_refused_recipients(pool):
+    FakeSMTP.refuse = ("bad@example.com",)
+
+    results = pool.send_many([message("a@example.com"), message("bad@example.com"), message("c@example.com")])
+
+    assert results == [True, False, True]
+    assert len(FakeSMTP.instances) == 1
+
+
+def test_idle_and_exhausted_sessions_are_replaced(pool):
+    pool.max_messages = 2
+    pool.send_many([message("a@example.com"), message("b@example.com"), message("c@example.com")])
+    assert [s.sent for s in FakeSMTP.instances] == [["a@example.com", "b@example.com"], ["c@example.com"]]
+
+    pool.max_idle_seconds = 0
+    pool.send(message("d@example.com"))
+    assert len(FakeSMTP.instances) == 3
+    assert FakeSMTP.instances[1].closed
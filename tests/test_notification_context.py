@@ -0,0 +1,63 @@
+import asyncio
+from decimal import Decimal
+
+from sqlalchemy import event
+
+from app import models
+from app.database import AsyncSessionLocal, SessionLocal, engine
+from app.notification_context import load_booking_notification, load_booking_notification_async
+
+
+def seed_booking(db, temple_only=False):
+    user = models.User(name="Devotee", mobile="9400000001", email="devotee@example.com")
+    plan = models.Plan(name="Gold", actual_price=Decimal("1100.00"))
+    puja = models.Puja(name="Rudrabhishek", sub_heading="Kashi", temple_address="Varanasi")
+    puja.images.extend(models.PujaImage(image_url=f"/uploads/images/{i}.png") for i in range(3))
+    chadawa = models.Chadawa(name="Diya", price=Decimal("51.00"))
+    temple = models.temple(name="Kashi Vishwanath", location="Varanasi")
+    temple.recommended_pujas.append(puja)
+    temple.chadawas.append(chadawa)
+    db.add_all([user, plan, puja, chadawa, temple])
+    db.flush()
+    booking = models.Booking(user_id=user.id, plan_id=plan.id, status="pending", whatsapp_number="9400000002",
+                             puja_id=None if temple_only else puja.id, temple_id=temple.id if temple_only else None)
+    booking.booking_chadawas.append(models.BookingChadawa(chadawa_id=chadawa.id))
+    db.add(booking)
+    db.commit()
+    return booking.id
+
+
+def test_notification_is_loaded_in_one_query(db):
+    booking_id = seed_booking(db)
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+
+    session = SessionLocal()
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        notification = load_booking_notification(session, booking_id)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+        session.close()
+
+    assert len(statements) == 1
+    assert notification.user_email == "devotee@example.com" and notification.user_phone == "9400000002"
+    context = notification.context
+    assert context["booking_kind"] == "puja" and context["puja_name"] == "Rudrabhishek"
+    assert len(context["gallery_images"]) == 3 and context["total"] == Decimal("1151.00")
+    assert context["chadawas"] == [{"name": "Diya", "price": "51.00"}]
+
+
+def test_async_loader_matches_the_sync_one(db):
+    booking_id = seed_booking(db, temple_only=True)
+
+    async def load(booking_id):
+        async with AsyncSessionLocal() as session:
+            return await load_booking_notification_async(session, booking_id)
+
+    notification = asyncio.run(load(booking_id))
+
+    assert notification.context == load_booking_notification(db, booking_id).context
+    assert notification.context["booking_kind"] == "temple"
+    assert notification.context["temple_name"] == "Kashi Vishwanath"
+    assert asyncio.run(load(10 ** 6)) is None
@@ -0,0 +1,184 @@
+import asyncio
+import threading
+import time
+from urllib.parse import parse_qs
+
+import httpx
+import pytest
+
+from app import models
+from app.celery_config import celery_app
+from app.config import settings
+from app.notification_executor import AsyncNotificationExecutor, NotificationConsumer
+from app.rate_limit import rate_limiter
+from app.twilio_client import WhatsAppMessage
+
+
+@pytest.fixture(autouse=True)
+def twilio(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "enabled", False)
+    monkeypatch.setattr(settings, "TWILIO_ACCOUNT_SID", "AC123")
+    monkeypatch.setattr(settings, "TWILIO_AUTH_TOKEN", "token")
+    monkeypatch.setattr(settings, "SEND_BOOKING_NOTIFICATIONS", True)
+    monkeypatch.setattr(settings, "SEND_WHATSAPP_ON_BOOKING", True)
+    monkeypatch.setattr(settings, "WHATSAPP_TEMPLATE_BOOKING_CONFIRMED", "")
+
+
+def executor_with(handler, **caps):
+    return AsyncNotificationExecutor(client=httpx.AsyncClient(transport=httpx.MockTransport(handler)), **caps)
+
+
+def test_booking_notification_falls_back_to_a_message_without_media(db):
+    user = models.User(name="Devotee", mobile="9400000001")
+    puja = models.Puja(name="Rudrabhishek", sub_heading="Kashi")
+    puja.images.append(models.PujaImage(image_url="https://cdn.example/rudra.png"))
+    db.add_all([user, puja])
+    db.commit()
+    booking = models.Booking(user_id=user.id, puja_id=puja.id, status="confirmed")
+    db.add(booking)
+    db.commit()
+    requests = []
+
+    async def handler(request):
+        form = parse_qs(request.content.decode())
+        requests.append(form)
+        if "MediaUrl" in form:
+            return httpx.Response(400, json={"code": 63019, "message": "Media failed to download"})
+        return httpx.Response(201, json={"sid": "SM1", "status": "queued"})
+
+    async def deliver():
+        executor = executor_with(handler)
+        try:
+            return await executor.deliver_booking_notification(booking.id, "confirmed")
+        finally:
+            await executor.close()
+
+    result = asyncio.run(deliver())
+
+    assert result["result"]["whatsapp_sent"] is True
+    assert [form.get("MediaUrl") for form in requests] == [["https://cdn.example/rudra.png"], None]
+    assert requests[1]["To"] == ["whatsapp:+919400000001"]
+    assert "Rudrabhishek" in requests[1]["Body"][0]
+
+
+def test_twilio_requests_are_capped_per_provider():
+    active = peak = 0
+
+    async def handler(request):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return httpx.Response(201, json={"sid": "SM1", "status": "queued"})
+
+    async def send_many():
+        executor = executor_with(handler, twilio_concurrency=3)
+        message = WhatsAppMessage(to="whatsapp:+919400000001", from_=settings.TWILIO_WHATSAPP_NUMBER, body="hi")
+        try:
+            return await asyncio.gather(*(executor.send_whatsapp(message) for _ in range(12)))
+        finally:
+            await executor.close()
+
+    assert all(asyncio.run(send_many()))
+    assert peak == 3
+
+
+def test_failed_message_is_republished_until_retries_run_out(monkeypatch):
+    published = []
+    monkeypatch.setattr(celery_app, "send_task", lambda name, **options: published.append((name, options)))
+
+    class FailingExecutor:
+        async def deliver_booking_notification(self, booking_id, notification_type):
+            raise RuntimeError("database unavailable")
+
+    consumer = NotificationConsumer(FailingExecutor(), broker_url="memory://")
+    task = "app.tasks.send_booking_notification"
+
+    assert asyncio.run(consumer.handle(task, [7, "confirmed"], {}, {"retries": 0})) == "ack"
+    assert published[0][0] == task
+    assert published[0][1]["args"] == [7, "confirmed"] and published[0][1]["retries"] == 1
+
+    assert asyncio.run(consumer.handle(task, [7, "confirmed"], {}, {"retries": 3})) == "ack"
+    assert len(published) == 1
+
+
+class _Message:
+    def __init__(self, connection_lost=False):
+        self.headers = {"task": "app.tasks.send_booking_notification", "retries": 0}
+        self.connection_lost = connection_lost
+        self.acked = False
+
+    def ack(self):
+        if self.connection_lost:
+            raise ConnectionError("connection closed")
+        self.acked = True
+
+
+def test_messages_from_a_lost_connection_still_settle(monkeypatch):
+    """Coroutines outliving their connection are counted down once, so shutdown's drain ends."""
+    release = None
+
+    class SlowExecutor:
+        async def deliver_booking_notification(self, booking_id, notification_type):
+            await release.wait()
+
+    consumer = NotificationConsumer(SlowExecutor(), broker_url="memory://")
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        release = asyncio.run_coroutine_threadsafe(_make_event(), loop).result()
+        consumer._loop = loop
+        lost, current = _Message(connection_lost=True), _Message()
+        consumer._on_message([[1, "confirmed"], {}, {}], lost)
+        consumer._on_message([[2, "confirmed"], {}, {}], current)
+        assert len(consumer._in_flight) == 2
+
+        loop.call_soon_threadsafe(release.set)
+        deadline = time.monotonic() + 5
+        while consumer._in_flight and time.monotonic() < deadline:
+            consumer._settle(timeout=0.05)
+
+        assert not consumer._in_flight
+        assert current.acked and not lost.acked  # the broker redelivers the lost one
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+async def _make_event():
+    return asyncio.Event()
+
+
+def test_waiting_eta_message_does_not_take_a_prefetch_slot():
+    from datetime import datetime, timedelta, timezone
+
+    from kombu.common import QoS
+
+    class Executor:
+        async def deliver_booking_notification(self, booking_id, notification_type):
+            pass
+
+    consumer = NotificationConsumer(Executor(), broker_url="memory://", max_in_flight=2)
+    consumer._qos = QoS(lambda prefetch_count: None, 2)
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        consumer._loop = loop
+        message = _Message()
+        message.headers["eta"] = (datetime.now(timezone.utc) + timedelta(seconds=0.2)).isoformat()
+        consumer._on_message([[1, "confirmed"], {}, {}], message)
+        assert consumer._qos.value == 3  # the waiting message holds an extra slot, not one of the two
+
+        deadline = time.monotonic() + 5
+        while consumer._in_flight and time.monotonic() < deadline:
+            consumer._settle(timeout=0.05)
+
+        assert message.acked and consumer._qos.value == 2
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
@@ -0,0 +1,62 @@
+from decimal import Decimal
+
+import pytest
+
+from app.notification_templates import (
+    CompiledTemplate, SafeHTML, render_booking_email, render_booking_whatsapp, templates,
+)
+
+
+def context(**overrides):
+    values = {
+        "booking_id": 7, "status": "PENDING", "booking_created": "02-01-2025 10:30", "booking_kind": "puja",
+        "puja_name": "Rudrabhishek", "plan_name": "Gold", "temple_name": "N/A", "temple_location": "N/A",
+        "temple_address": "Kashi", "puja_date": "2025-02-01", "puja_time": "06:30 PM IST",
+        "puja_image": "", "gallery_images": [], "plan_price": Decimal("1100.00"), "total": Decimal("1151.00"),
+        "chadawas": [{"name": "Diya", "price": "51.00"}],
+        "gotra": "Kashyap", "mobile": "9400000001", "whatsapp": "N/A",
+    }
+    values.update(overrides)
+    return values
+
+
+def test_templates_are_compiled_once_with_plain_fields():
+    template = templates.get("booking.whatsapp.chadawa_row")
+    assert template.fields == {"name", "price"}
+
+    with pytest.raises(ValueError):
+        CompiledTemplate("bad", "{booking.puja.name}")
+
+
+def test_whatsapp_puja_booking():
+    text = render_booking_whatsapp(context())
+
+    assert "*Name:* Rudrabhishek" in text
+    assert "*Plan Price:* ₹1100.00\n🎁 *Selected Offerings(chadawas):*\n   • Diya: ₹51.00\n   *Total:* ₹1151.00" in text
+
+
+def test_whatsapp_temple_booking_has_no_plan_price():
+    text = render_booking_whatsapp(context(booking_kind="temple", temple_name="Kashi Vishwanath",
+                                           temple_location="Varanasi", total=Decimal("51.00")))
+
+    assert "🛕 *Temple Details:*\n   *Temple:* Kashi Vishwanath" in text
+    assert "Plan Price" not in text and "*Total:* ₹51.00" in text
+
+
+def test_email_escapes_values_but_not_rendered_fragments():
+    html = render_booking_email(context(puja_name="Puja <b>&</b>", gallery_images=["https://x/a.png"]))
+
+    assert "Puja &lt;b&gt;&amp;&lt;/b&gt;" in html
+    assert "<img src='https://x/a.png'" in html
+    assert "<span style='padding-left: 15px;'>• Diya</span>" in html
+    assert isinstance(html, SafeHTML)
+
+
+def test_rendering_does_not_mutate_the_context():
+    values = context()
+    snapshot = dict(values)
+
+    render_booking_whatsapp(values)
+    render_booking_email(values)
+
+    assert values == snapshot
@@ -0,0 +1,78 @@
+from decimal import Decimal
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app import models
+from app.database import engine
+from app.main import app
+
+client = TestClient(app)
+
+SHIPPING = {"shipping_name": "Devotee", "shipping_mobile": "9400000001", "shipping_address": "1 Ghat Road",
+            "shipping_city": "Varanasi", "shipping_state": "UP", "shipping_pincode": "221001"}
+
+
+def seed_products(db, count=10, stock=5):
+    products = [models.Product(name=f"Mala {i}", slug=f"mala-{i}", mrp=Decimal("120.00"),
+                               selling_price=Decimal("100.00"), stock_quantity=stock,
+                               shipping_charge=Decimal("10.00"))
+                for i in range(count)]
+    db.add_all(products)
+    db.commit()
+    return [product.id for product in products]
+
+
+def test_order_loads_all_products_in_one_query(db, admin_headers):
+    product_ids = seed_products(db)
+    selects = []
+    listener = lambda conn, cursor, statement, *args: selects.append(statement) if "FROM products" in statement else None
+
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        response = client.post("/api/v1/orders", headers=admin_headers,
+                               json={**SHIPPING, "items": [{"product_id": i, "quantity": 2} for i in product_ids]})
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert Decimal(body["subtotal"]) == Decimal("2000.00") and Decimal(body["shipping_charges"]) == Decimal("200.00")
+    assert len(selects) == 1
+    db.expire_all()
+    assert {(p.stock_quantity, p.total_sales) for p in db.query(models.Product)} == {(3, 2)}
+
+
+def test_repeated_product_lines_share_its_stock(db, admin_headers):
+    product_id, = seed_products(db, count=1, stock=3)
+
+    response = client.post("/api/v1/orders", headers=admin_headers,
+                           json={**SHIPPING, "items": [{"product_id": product_id, "quantity": 2}] * 2})
+
+    assert response.status_code == 400
+    assert "Insufficient stock" in response.json()["detail"]
+    assert db.query(models.Order).count() == 0
+
+
+def test_promo_code_usage_is_incremented_in_sql(db, admin_headers):
+    product_id, = seed_products(db, count=1)
+    db.add(models.PromoCode(code="DIWALI", discount_type="fixed", discount_value=Decimal("50.00"), current_uses=4))
+    db.commit()
+    updates = []
+    listener = lambda conn, cursor, statement, *args: (
+        updates.append(statement) if "UPDATE promo_codes" in statement else None)
+
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        response = client.post("/api/v1/orders", headers=admin_headers, json={
+            **SHIPPING, "promo_code": "diwali", "items": [{"product_id": product_id, "quantity": 1}],
+        })
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert response.status_code == 200, response.text
+    assert Decimal(response.json()["discount_amount"]) == Decimal("50.00")
+    # Added to the stored count, not written back from the value this request read
+    assert len(updates) == 1 and "current_uses=(promo_codes.current_uses +" in updates[0]
+    db.expire_all()
+    assert db.query(models.PromoCode).one().current_uses == 5
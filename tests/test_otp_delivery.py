@@ -0,0 +1,122 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import crud, models, services, tasks
+from app.config import settings
+from app.main import app
+from app.rate_limit import rate_limiter
+from app.services import notification_service
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def user(db):
+    user = models.User(name="Devotee", mobile="9400000001")
+    db.add(user)
+    db.commit()
+    return user
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    """A configured SMS provider that records the OTPs it is asked to send."""
+    sent = []
+    monkeypatch.setattr(notification_service.sms_service, "sms_provider", "msg91")
+    monkeypatch.setattr(notification_service, "send_otp", lambda mobile, otp: sent.append((mobile, otp)) or True)
+    return sent
+
+
+def test_request_otp_is_queued_without_calling_the_provider(user, provider, monkeypatch):
+    queued = []
+    monkeypatch.setattr(tasks.send_otp, "apply_async", lambda args, **options: queued.append((args, options)))
+
+    response = client.post("/api/v1/auth/request-otp", json={"mobile": "9400000001"})
+
+    assert response.status_code == 200
+    assert response.json()["message"] == "OTP sent successfully to your mobile number"
+    assert provider == []
+    (otp_id, _requested_at), options = queued[0]
+    assert options["retry"] is False and options["expires"] == settings.OTP_TASK_EXPIRES_SECONDS
+
+
+def test_otp_is_sent_inline_when_the_broker_is_down(user, provider, monkeypatch):
+    def broker_down(*args, **kwargs):
+        raise ConnectionError("redis unavailable")
+
+    monkeypatch.setattr(tasks.send_otp, "apply_async", broker_down)
+
+    response = client.post("/api/v1/auth/request-otp", json={"mobile": "9400000001"})
+
+    assert response.status_code == 200
+    assert len(provider) == 1 and provider[0][0] == "9400000001"
+
+
+def test_task_sends_the_code_once_and_skips_used_otps(db, user, provider):
+    otp = crud.OTPCRUD.create_otp(db, user.id)
+
+    assert tasks.send_otp(otp.id, time.time()) is True
+    assert provider == [("9400000001", otp.otp_code)]
+
+    crud.OTPCRUD.verify_otp(db, "9400000001", otp.otp_code)
+
+    assert tasks.send_otp(otp.id, time.time()) is False
+    assert len(provider) == 1
+
+
+def test_msg91_call_has_connect_and_read_timeouts(monkeypatch):
+    calls = []
+
+    class Response:
+        status_code = 200
+
+        def json(self):
+            return {"request_id": "R1"}
+
+    monkeypatch.setattr(rate_limiter, "enabled", False)
+    monkeypatch.setattr(services.requests, "post", lambda url, **kwargs: calls.append(kwargs) or Response())
+
+    assert services.SMSService()._send_msg91_otp("9400000001", "123456") is True
+    assert calls[0]["timeout"] == (settings.MSG91_CONNECT_TIMEOUT_SECONDS, settings.MSG91_READ_TIMEOUT_SECONDS)
+
+
+def test_rate_limited_otp_is_requeued_without_using_a_retry(db, user, monkeypatch):
+    from app.celery_config import celery_app
+    from app.rate_limit import RateLimitExceeded
+
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    monkeypatch.setattr(notification_service.sms_service, "sms_provider", "msg91")
+    retries = []
+
+    def send_otp(mobile, otp):
+        retries.append(tasks.send_otp.request.retries)
+        if len(retries) <= settings.OTP_SEND_MAX_RETRIES:
+            raise RateLimitExceeded("ratelimit:msg91_sms:test", 0.01)
+        return True
+
+    monkeypatch.setattr(notification_service, "send_otp", send_otp)
+    otp = crud.OTPCRUD.create_otp(db, user.id)
+
+    tasks.send_otp.apply(args=(otp.id, time.time()))
+
+    assert retries == [0] * (settings.OTP_SEND_MAX_RETRIES + 1)
+
+
+def test_inline_otp_is_not_sent_when_rate_limited(user, monkeypatch):
+    from app.rate_limit import RateLimitExceeded
+
+    def broker_down(*args, **kwargs):
+        raise ConnectionError("redis unavailable")
+
+    def rate_limited(mobile, otp):
+        raise RateLimitExceeded("ratelimit:msg91_sms:test", 5)
+
+    monkeypatch.setattr(tasks.send_otp, "apply_async", broker_down)
+    monkeypatch.setattr(notification_service.sms_service, "sms_provider", "msg91")
+    monkeypatch.setattr(notification_service, "send_otp", rate_limited)
+
+    response = client.post("/api/v1/auth/request-otp", json={"mobile": "9400000001"})
+
+    assert response.status_code == 200
@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import models, outbox
+from app.celery_config import celery_app
+from app.main import app
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def published(monkeypatch):
+    """Record what the dispatcher publishes instead of talking to the broker."""
+    sent = []
+
+    def send_task(name, kwargs=None, **options):
+        sent.append((name, kwargs))
+
+    monkeypatch.setattr(celery_app, "send_task", send_task)
+    return sent
+
+
+def pending_events(db):
+    return db.query(models.OutboxEvent).filter(models.OutboxEvent.dispatched_at.is_(None)).all()
+
+
+def test_confirm_commits_the_event_with_the_status_change(db, admin_headers, published):
+    user = models.User(name="Devotee", mobile="9400000001")
+    db.add(user)
+    db.commit()
+    booking = models.Booking(user_id=user.id, status="pending")
+    db.add(booking)
+    db.commit()
+
+    response = client.put(f"/api/v1/bookings/{booking.id}/confirm", headers=admin_headers)
+
+    assert response.status_code == 200
+    assert published == []  # nothing reaches the broker from the request
+    [event] = pending_events(db)
+    assert event.payload == {"booking_id": booking.id, "notification_type": "confirmed"}
+
+
+def test_dispatch_publishes_due_events_in_order(db, published):
+    for booking_id in (1, 2, 3):
+        outbox.add_booking_notification(db, booking_id, "pending")
+    db.commit()
+
+    assert outbox.dispatch_batch(db, batch_size=2) == 2
+    assert outbox.dispatch_batch(db, batch_size=2) == 1
+    assert outbox.dispatch_batch(db, batch_size=2) == 0
+
+    assert [kwargs["booking_id"] for _, kwargs in published] == [1, 2, 3]
+    assert {name for name, _ in published} == {"app.tasks.send_booking_notification"}
+    assert pending_events(db) == []
+
+
+def test_publish_failure_backs_off_and_leaves_the_rest_pending(db, monkeypatch):
+    def send_task(name, kwargs=None, **options):
+        raise ConnectionError("broker unavailable")
+
+    monkeypatch.setattr(celery_app, "send_task", send_task)
+    first = outbox.add_booking_notification(db, 1, "pending")
+    outbox.add_booking_notification(db, 2, "pending")
+    db.commit()
+
+    assert outbox.dispatch_batch(db) == 0
+
+    db.refresh(first)
+    assert first.attempts == 1 and "broker unavailable" in first.last_error
+    assert len(pending_events(db)) == 2
+    assert [e.payload["booking_id"] for e in pending_events(db) if e.attempts == 0] == [2]
+
+
+def test_unknown_event_types_are_rejected(db):
+    with pytest.raises(ValueError):
+        outbox.add_event(db, "booking.unknown", {})
+
+
+def test_purge_keeps_pending_and_recent_events(db):
+    old = models.OutboxEvent(event_type=outbox.BOOKING_NOTIFICATION, payload={}, attempts=0,
+                             dispatched_at=datetime.now(timezone.utc) - timedelta(days=10))
+    recent = models.OutboxEvent(event_type=outbox.BOOKING_NOTIFICATION, payload={}, attempts=0,
+                                dispatched_at=datetime.now(timezone.utc))
+    pending = models.OutboxEvent(event_type=outbox.BOOKING_NOTIFICATION, payload={}, attempts=0)
+    db.add_all([old, recent, pending])
+    db.commit()
+
+    assert outbox.purge_dispatched(db, older_than_hours=24) == 1
+    assert db.query(models.OutboxEvent).count() == 2
@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from app import models
+from app.config import settings
+from app.main import app
+from app.pagination import NEXT_CURSOR_HEADER
+
+client = TestClient(app)
+
+
+def seed_puja_bookings(db, count):
+    user = models.User(name="Devotee", mobile="9100000000", is_active=True)
+    puja = models.Puja(name="Rudrabhishek", sub_heading="Sub heading", is_active=True)
+    db.add_all([user, puja])
+    db.flush()
+    # Pairs of bookings share a booking_date so the id tie-breaker matters
+    now = datetime.utcnow()
+    db.add_all([
+        models.Booking(user_id=user.id, puja_id=puja.id, booking_date=now - timedelta(minutes=i // 2))
+        for i in range(count)
+    ])
+    db.commit()
+
+
+def test_cursor_walks_every_booking_exactly_once(db, admin_headers):
+    """Following X-Next-Cursor returns every row once, newest first."""
+    seed_puja_bookings(db, 25)
+
+    seen = []
+    url = "/api/v1/bookings/puja?limit=10"
+    response = client.get(url, headers=admin_headers)
+    while True:
+        assert response.status_code == 200
+        seen.extend(b["id"] for b in response.json())
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            break
+        response = client.get(f"{url}&cursor={cursor}", headers=admin_headers)
+
+    assert len(seen) == 25
+    assert len(set(seen)) == 25
+    offset_ids = [b["id"] for b in client.get("/api/v1/bookings/puja?limit=100", headers=admin_headers).json()]
+    assert seen == offset_ids
+
+
+def test_invalid_cursor_is_rejected(db, admin_headers):
+    """A malformed cursor is a client error, not a 500."""
+    response = client.get("/api/v1/users/?cursor=not-a-cursor", headers=admin_headers)
+    assert response.status_code == 400
+
+
+def test_next_cursor_is_readable_cross_origin(db, admin_headers):
+    """Browsers on CORS_ORIGINS may only read X-Next-Cursor if it is exposed."""
+    seed_puja_bookings(db, 3)
+
+    response = client.get("/api/v1/bookings/puja?limit=2",
+                          headers={**admin_headers, "Origin": settings.CORS_ORIGINS[0]})
+
+    assert response.headers.get(NEXT_CURSOR_HEADER)
+    exposed = [h.strip().lower() for h in response.headers["Access-Control-Expose-Headers"].split(",")]
+    assert NEXT_CURSOR_HEADER.lower() in exposed
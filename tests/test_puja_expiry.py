@@ -0,0 +1,49 @@
+from datetime import datetime, time, timedelta
+
+from app import crud, models, schemas
+
+
+def make_puja(db, name, when):
+    puja = models.Puja(
+        name=name,
+        sub_heading="Sub heading",
+        date=when.date(),
+        time=when.time(),
+        expires_at=when,
+        is_active=True,
+    )
+    db.add(puja)
+    db.commit()
+    return puja
+
+
+def test_update_puja_sets_expires_at(db):
+    """expires_at follows the puja's date and time."""
+    puja = make_puja(db, "Future puja", datetime(2030, 1, 1, 6, 30))
+    updated = crud.PujaCRUD.update_puja(db, puja.id, schemas.PujaUpdate(time=time(18, 0)))
+    assert updated.expires_at == datetime(2030, 1, 1, 18, 0)
+
+
+def test_sweeper_deactivates_only_past_pujas(db):
+    """The sweeper disables past pujas, including legacy rows without expires_at."""
+    now = datetime.utcnow()
+    past = make_puja(db, "Past puja", now - timedelta(hours=1))
+    future = make_puja(db, "Future puja", now + timedelta(days=1))
+    legacy = make_puja(db, "Legacy puja", now - timedelta(days=2))
+    legacy.expires_at = None
+    db.commit()
+
+    assert crud.PujaCRUD.expire_due_pujas(db, now=now) == 2
+
+    db.expire_all()
+    assert db.get(models.Puja, past.id).is_active is False
+    assert db.get(models.Puja, legacy.id).is_active is False
+    assert db.get(models.Puja, future.id).is_active is True
+
+
+def test_reads_do_not_deactivate(db):
+    """get_puja/get_pujas are plain reads; expiry is left to the sweeper."""
+    past = make_puja(db, "Past puja", datetime.utcnow() - timedelta(hours=1))
+
+    assert crud.PujaCRUD.get_puja(db, past.id).is_active is True
+    assert [p.id for p in crud.PujaCRUD.get_pujas(db, is_active=True)] == [past.id]
@@ -0,0 +1,151 @@
+import re
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import and_, event, text
+
+from app import crud, models
+from app.database import engine
+from app.pagination import apply_keyset
+
+# SQLite reports a full table scan as "SCAN <table>" (no "USING ... INDEX")
+SQLITE_SEQ_SCAN = re.compile(r"^SCAN (TABLE )?\w+( AS \w+)?$")
+
+
+def explain(db, query):
+    """Run ``query`` once, then EXPLAIN the exact statement and parameters it sent."""
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        query.all()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    statement, parameters = captured[0]
+    connection = db.connection()
+    if engine.dialect.name == "postgresql":
+        # Seeded tables are tiny; make the planner prove an index can serve the query
+        connection.execute(text("SET LOCAL enable_seqscan = off"))
+        rows = connection.exec_driver_sql(f"EXPLAIN {statement}", parameters).fetchall()
+        return [row[0] for row in rows]
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    return [row[-1] for row in rows]
+
+
+def sequential_scans(plan):
+    if engine.dialect.name == "postgresql":
+        return [line for line in plan if "Seq Scan" in line]
+    return [line for line in plan if SQLITE_SEQ_SCAN.match(line)]
+
+
+@pytest.fixture
+def seeded(db):
+    now = datetime.utcnow()
+    users = [models.User(name=f"User {i}", mobile=f"92000{i:05d}", is_active=True) for i in range(50)]
+    pujas = [models.Puja(name=f"Puja {i}", sub_heading="Sub heading") for i in range(20)]
+    temples = [models.temple(name=f"Temple {i}") for i in range(20)]
+    categories = [models.ProductCategory(name=f"Category {i}") for i in range(10)]
+    db.add_all(users + pujas + temples + categories)
+    db.flush()
+
+    statuses = ["pending", "confirmed", "completed", "cancelled"]
+    for i in range(400):
+        booking = models.Booking(
+            user_id=users[i % 50].id,
+            puja_id=pujas[i % 20].id if i % 2 else None,
+            temple_id=None if i % 2 else temples[i % 20].id,
+            booking_date=now - timedelta(hours=i),
+            status=statuses[i % 4],
+        )
+        booking.booking_chadawas.append(models.BookingChadawa(note="note"))
+        db.add(booking)
+        db.flush()
+        db.add(models.Payment(booking_id=booking.id, razorpay_order_id=f"order_b{i}", amount=Decimal("501")))
+        db.add(models.OTPLogin(user_id=users[i % 50].id, otp_code=f"{i:06d}", expires_at=now + timedelta(minutes=i)))
+
+    for i in range(200):
+        db.add(models.Product(
+            category_id=categories[i % 10].id, name=f"Product {i}", slug=f"product-{i}",
+            mrp=Decimal("100"), selling_price=Decimal("90"), is_active=bool(i % 2),
+        ))
+        order = models.Order(
+            user_id=users[i % 50].id, order_number=f"ORD{i:05d}", subtotal=Decimal("90"),
+            total_amount=Decimal("90"), shipping_name="Name", shipping_mobile="9000000000",
+            shipping_address="Address", shipping_city="City", shipping_state="State",
+            shipping_pincode="110001", payment_method="online",
+        )
+        db.add(order)
+        db.flush()
+        db.add(models.OrderPayment(order_id=order.id, razorpay_order_id=f"order_o{i}", amount=Decimal("90")))
+    db.commit()
+
+    # Give the planner real statistics, as production would have
+    db.execute(text("ANALYZE"))
+    db.commit()
+    return {"user_id": users[7].id, "puja_id": pujas[3].id, "category_id": categories[2].id, "now": now}
+
+
+HOT_QUERIES = {
+    # routers/bookings.py
+    "bookings.puja": lambda db, s: apply_keyset(
+        crud.BookingCRUD.query(db, profile=None).filter(models.Booking.puja_id != None),
+        models.Booking.booking_date, models.Booking.id, 0, 100),
+    "bookings.puja_by_id": lambda db, s: apply_keyset(
+        crud.BookingCRUD.query(db, profile=None).filter(models.Booking.puja_id == s["puja_id"]),
+        models.Booking.booking_date, models.Booking.id, 0, 100),
+    "bookings.temple_chadawa": lambda db, s: apply_keyset(
+        crud.BookingCRUD.query(db, profile=None).filter(models.Booking.temple_id != None),
+        models.Booking.booking_date, models.Booking.id, 0, 100),
+    "bookings.by_status": lambda db, s: crud.BookingCRUD.query(db, profile=None).filter(
+        models.Booking.puja_id != None, models.Booking.status == "pending",
+    ).order_by(models.Booking.booking_date.desc()).limit(100),
+    "bookings.my": lambda db, s: crud.BookingCRUD.query(db, profile=None).filter(
+        models.Booking.user_id == s["user_id"]).limit(100),
+    "booking_chadawas.selectin": lambda db, s: db.query(models.BookingChadawa).filter(
+        models.BookingChadawa.booking_id.in_([1, 2, 3])),
+    # routers/admin.py
+    "admin.pending": lambda db, s: crud.BookingCRUD.query(db, profile=None).filter(
+        models.Booking.status == "pending").limit(100),
+    "admin.recent": lambda db, s: crud.BookingCRUD.query(db, profile=None).order_by(
+        models.Booking.created_at.desc()).limit(10),
+    # routers/bookings.py verify-payment and routers/payments.py
+    "payments.by_booking": lambda db, s: db.query(models.Payment).filter(models.Payment.booking_id == 5),
+    "payments.by_razorpay_order": lambda db, s: db.query(models.Payment).filter(
+        models.Payment.razorpay_order_id == "order_b5"),
+    # routers/order_payments.py
+    "order_payments.by_razorpay_order": lambda db, s: db.query(models.OrderPayment).filter(
+        models.OrderPayment.razorpay_order_id == "order_o5"),
+    "order_payments.by_order": lambda db, s: db.query(models.OrderPayment).filter(
+        models.OrderPayment.order_id == 5),
+    # routers/promo_orders.py
+    "orders.mine": lambda db, s: db.query(models.Order).filter(
+        models.Order.user_id == s["user_id"]).order_by(models.Order.created_at.desc()).limit(100),
+    "orders.all": lambda db, s: apply_keyset(
+        db.query(models.Order), models.Order.created_at, models.Order.id, 0, 100),
+    "promo_codes.list": lambda db, s: apply_keyset(
+        db.query(models.PromoCode), models.PromoCode.created_at, models.PromoCode.id, 0, 100),
+    # crud.OTPCRUD.verify_otp
+    "otp.verify": lambda db, s: db.query(models.OTPLogin).filter(and_(
+        models.OTPLogin.user_id == s["user_id"],
+        models.OTPLogin.otp_code == "000007",
+        models.OTPLogin.is_verified == False,
+        models.OTPLogin.expires_at > s["now"],
+    )),
+    # routers/products.py
+    "products.by_category": lambda db, s: db.query(models.Product).filter(
+        models.Product.category_id == s["category_id"], models.Product.is_active == True).limit(100),
+    # routers/users.py
+    "users.list": lambda db, s: apply_keyset(db.query(models.User), models.User.created_at, models.User.id, 0, 100),
+}
+
+
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_hot_query_uses_an_index(name, db, seeded):
+    """Every hot query is served by an index, never a full table scan."""
+    plan = explain(db, HOT_QUERIES[name](db, seeded))
+    assert not sequential_scans(plan), f"{name} falls back to a sequential scan:\n" + "\n".join(plan)
@@ -0,0 +1,97 @@
+import pytest
+
+from app import crud, rate_limit
+from app.config import settings
+from app.rate_limit import RateLimiter, RateLimitExceeded
+from app.services import NotificationService
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    """Limiter on its in-process buckets (no Redis here), recording sleeps instead of sleeping."""
+    limiter = RateLimiter(redis_url=settings.REDIS_URL)
+    monkeypatch.setattr(limiter, "_get_script", lambda: None)
+    monkeypatch.setattr(settings, "TWILIO_WHATSAPP_RATE_PER_SECOND", 2)
+    monkeypatch.setattr(settings, "TWILIO_WHATSAPP_BURST", 2)
+    sleeps = []
+    monkeypatch.setattr(rate_limit.time, "sleep", sleeps.append)
+    limiter.sleeps = sleeps
+    return limiter
+
+
+def test_burst_is_free_then_callers_wait_their_turn(limiter):
+    assert limiter.acquire("twilio_whatsapp", "+1555") == 0
+    assert limiter.acquire("twilio_whatsapp", "+1555") == 0
+
+    # Tokens are reserved, so back-to-back callers queue behind each other
+    assert limiter.acquire("twilio_whatsapp", "+1555") == pytest.approx(0.5, abs=0.05)
+    assert limiter.acquire("twilio_whatsapp", "+1555") == pytest.approx(1.0, abs=0.05)
+    assert len(limiter.sleeps) == 2
+
+
+def test_senders_have_separate_buckets(limiter):
+    limiter.acquire("twilio_whatsapp", "+1555")
+    limiter.acquire("twilio_whatsapp", "+1555")
+
+    assert limiter.acquire("twilio_whatsapp", "+1666") == 0
+
+
+def test_wait_beyond_max_raises_without_spending_a_token(limiter):
+    limiter.acquire("twilio_whatsapp", "+1555")
+    limiter.acquire("twilio_whatsapp", "+1555")
+
+    with pytest.raises(RateLimitExceeded) as exceeded:
+        limiter.acquire("twilio_whatsapp", "+1555", max_wait=0.1)
+    assert exceeded.value.retry_after == pytest.approx(0.5, abs=0.05)
+
+    assert limiter.acquire("twilio_whatsapp", "+1555", max_wait=1) == pytest.approx(0.5, abs=0.05)
+
+
+def test_rate_limited_campaign_chunk_is_requeued(db, monkeypatch):
+    from app.celery_config import celery_app
+    from app.tasks import send_whatsapp_campaign_chunk
+
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    sent = []
+
+    def send_whatsapp_template(phone_number, template_name, template_params=None, media_url=None):
+        if len(sent) == 1 and not getattr(send_whatsapp_template, "limited", False):
+            send_whatsapp_template.limited = True
+            raise RateLimitExceeded("ratelimit:twilio_whatsapp:test", 0.01)
+        sent.append(phone_number)
+        return True
+
+    monkeypatch.setattr(NotificationService, "send_whatsapp_template", staticmethod(send_whatsapp_template))
+    campaign = crud.WhatsAppCampaignCRUD.create_campaign(
+        db, "33koti_promo", None, None, [("9000000011", "+919000000011"), ("9000000021", "+919000000021")])
+
+    (after_id, last_id), = crud.WhatsAppCampaignCRUD.iter_chunk_bounds(db, campaign.id, 10)
+    send_whatsapp_campaign_chunk.apply(args=(campaign.id, after_id, last_id))
+
+    assert sent == ["+919000000011", "+919000000021"]
+    assert crud.WhatsAppCampaignCRUD.get_status_counts(db, campaign.id) == {"success": 2}
+
+
+def test_rate_limit_requeues_do_not_use_up_chunk_retries(db, monkeypatch):
+    from app.celery_config import celery_app
+    from app.tasks import send_whatsapp_campaign_chunk
+
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    limited, retries = [], []
+
+    def send_whatsapp_template(phone_number, template_name, template_params=None, media_url=None):
+        retries.append(send_whatsapp_campaign_chunk.request.retries)
+        if len(limited) <= send_whatsapp_campaign_chunk.max_retries:
+            limited.append(phone_number)
+            raise RateLimitExceeded("ratelimit:twilio_whatsapp:test", 0.01)
+        return True
+
+    monkeypatch.setattr(NotificationService, "send_whatsapp_template", staticmethod(send_whatsapp_template))
+    campaign = crud.WhatsAppCampaignCRUD.create_campaign(db, "33koti_promo", None, None, [("9000000011", "+919000000011")])
+
+    (after_id, last_id), = crud.WhatsAppCampaignCRUD.iter_chunk_bounds(db, campaign.id, 10)
+    send_whatsapp_campaign_chunk.apply(args=(campaign.id, after_id, last_id))
+
+    assert len(limited) == send_whatsapp_campaign_chunk.max_retries + 1
+    assert set(retries) == {0}
+    assert crud.WhatsAppCampaignCRUD.get_status_counts(db, campaign.id) == {"success": 1}
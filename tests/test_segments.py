@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import models, segments
+from app.celery_config import celery_app
+from app.config import settings
+from app.main import app
+from app.services import NotificationService
+
+client = TestClient(app)
+
+
+def seed(db):
+    """Two users; bookings for a puja and a temple (with and without chadawa), and store orders."""
+    a = models.User(name="A", mobile="9400000001")
+    b = models.User(name="B", mobile="9400000002")
+    puja = models.Puja(name="Rudrabhishek", sub_heading="Kashi")
+    temple = models.temple(name="Kashi Vishwanath")
+    chadawa = models.Chadawa(name="Diya", price=Decimal("51.00"))
+    db.add_all([a, b, puja, temple, chadawa])
+    db.flush()
+    old = datetime.now(timezone.utc) - timedelta(days=120)
+
+    def booking(user, status="confirmed", with_chadawa=False, booked=None, **fields):
+        if booked:
+            fields["booking_date"] = booked
+        row = models.Booking(user_id=user.id, status=status, **fields)
+        if with_chadawa:
+            row.booking_chadawas.append(models.BookingChadawa(chadawa_id=chadawa.id))
+        db.add(row)
+
+    # Same person twice: WhatsApp number written differently
+    booking(a, puja_id=puja.id, whatsapp_number="+91 94000 00011")
+    booking(a, puja_id=puja.id, whatsapp_number="094000 00011")
+    booking(b, puja_id=puja.id, mobile_number="12345")  # invalid
+    booking(b, puja_id=puja.id, status="cancelled", whatsapp_number="9400000099")
+    booking(a, temple_id=temple.id, with_chadawa=True)  # falls back to the account mobile
+    booking(b, temple_id=temple.id, with_chadawa=True, booked=old, whatsapp_number="9400000022")
+    booking(b, temple_id=temple.id, whatsapp_number="9400000033")  # no chadawa
+    for number, status, mobile in [("O-1", "delivered", "9400000044"), ("O-2", "shipped", "9400000055")]:
+        db.add(models.Order(user_id=b.id, order_number=number, subtotal=1, total_amount=1, shipping_name="B",
+                            shipping_mobile=mobile, shipping_address="x", shipping_city="x", shipping_state="x",
+                            shipping_pincode="1", status=status, payment_method="cod"))
+    db.commit()
+    return puja.id, temple.id
+
+
+def members(db, audience):
+    return sorted(m.normalized_phone for m in
+                  db.query(models.WhatsAppAudienceMember).filter_by(audience_id=audience.id))
+
+
+def test_segments_resolve_deduplicated_in_the_database(db, monkeypatch):
+    monkeypatch.setattr(settings, "AUDIENCE_IMPORT_BATCH_SIZE", 1)
+    puja_id, temple_id = seed(db)
+
+    audience = segments.resolve_segment(db, segments.SEGMENTS["puja_bookers"], {"puja_id": puja_id})
+    assert members(db, audience) == ["+919400000011"]
+    assert (audience.status, audience.total_rows, audience.member_count) == ("ready", 3, 1)
+    assert (audience.invalid_count, audience.duplicate_count) == (1, 1)
+
+    audience = segments.resolve_segment(db, segments.SEGMENTS["temple_chadawa_bookers"], {"temple_id": temple_id})
+    assert members(db, audience) == ["+919400000001"]
+
+    audience = segments.resolve_segment(db, segments.SEGMENTS["delivered_order_customers"], {})
+    assert members(db, audience) == ["+919400000044"]
+
+    with pytest.raises(segments.SegmentError):
+        segments.resolve_segment(db, segments.SEGMENTS["puja_bookers"], {})
+
+
+def test_send_to_segment_queues_a_campaign(db, admin_headers, monkeypatch):
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    sent = []
+    monkeypatch.setattr(NotificationService, "send_whatsapp_template",
+                        staticmethod(lambda phone_number, *args, **kwargs: sent.append(phone_number) or True))
+    _, temple_id = seed(db)
+
+    response = client.post("/api/v1/bulk-whatsapp/segments/temple_chadawa_bookers/send", headers=admin_headers,
+                           json={"template_name": "33koti_promo", "temple_id": temple_id, "days": 365})
+
+    assert response.status_code == 202
+    assert response.json()["total_numbers"] == 2
+    assert sorted(sent) == ["+919400000001", "+919400000022"]
+
+    response = client.post("/api/v1/bulk-whatsapp/segments/temple_chadawa_bookers/send", headers=admin_headers,
+                           json={"template_name": "33koti_promo"})
+    assert response.status_code == 400
+    assert client.post("/api/v1/bulk-whatsapp/segments/nobody/send", headers=admin_headers,
+                       json={"template_name": "33koti_promo"}).status_code == 404
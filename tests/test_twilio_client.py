@@ -0,0 +1,65 @@
+import pytest
+from requests import Response
+from requests.adapters import HTTPAdapter
+
+from app import twilio_client
+from app.config import settings
+from app.services import NotificationService
+from app.twilio_client import get_twilio_client, reset_twilio_client
+
+
+@pytest.fixture
+def twilio_settings(monkeypatch):
+    monkeypatch.setattr(settings, "TWILIO_ACCOUNT_SID", "AC" + "0" * 32)
+    monkeypatch.setattr(settings, "TWILIO_AUTH_TOKEN", "token")
+    monkeypatch.setattr(settings, "SEND_WHATSAPP_ON_BOOKING", True)
+    reset_twilio_client()
+    yield
+    reset_twilio_client()
+
+
+@pytest.fixture
+def sent_requests(twilio_settings, monkeypatch):
+    """Requests that reached the shared client's HTTPS adapter, answered with a queued message."""
+    sent = []
+
+    def send(adapter, request, **kwargs):
+        sent.append((adapter, kwargs["timeout"]))
+        response = Response()
+        response.status_code = 201
+        response._content = b'{"sid": "SM123", "status": "queued"}'
+        return response
+
+    monkeypatch.setattr(HTTPAdapter, "send", send)
+    return sent
+
+
+def test_client_is_shared_and_pooled(twilio_settings):
+    client = get_twilio_client()
+
+    assert get_twilio_client() is client
+    assert client.http_client.timeout == (settings.TWILIO_CONNECT_TIMEOUT_SECONDS, settings.TWILIO_READ_TIMEOUT_SECONDS)
+    adapter = client.http_client.session.get_adapter("https://api.twilio.com")
+    assert adapter._pool_maxsize == settings.TWILIO_HTTP_POOL_SIZE
+
+
+def test_client_is_rebuilt_after_fork(twilio_settings, monkeypatch):
+    client = get_twilio_client()
+    monkeypatch.setattr(twilio_client, "_client_pid", -1)
+
+    assert get_twilio_client() is not client
+
+
+def test_whatsapp_sends_reuse_one_session(sent_requests):
+    assert NotificationService.send_whatsapp_notification("9400000001", "First")
+    assert NotificationService.send_whatsapp_notification("9400000002", "Second")
+
+    adapters = {id(adapter) for adapter, _ in sent_requests}
+    assert len(sent_requests) == 2 and len(adapters) == 1
+    assert sent_requests[0][1] == (settings.TWILIO_CONNECT_TIMEOUT_SECONDS, settings.TWILIO_READ_TIMEOUT_SECONDS)
+
+
+def test_template_sender_uses_the_shared_client(twilio_settings):
+    from whatsapp_template_sender import WhatsAppTemplateSender
+
+    assert WhatsAppTemplateSender().client is get_twilio_client()
@@ -5,22 +5,32 @@ This module handles sending WhatsApp messages using approved Content Templates.
 For production WhatsApp, you MUST use pre-approved templates.
 """
 
-from twilio.rest import Client
 from app.config import settings
+from app.log import get_logger
+from app.rate_limit import rate_limiter
+from app.twilio_client import WhatsAppMessage, get_twilio_client
 from typing import Dict, List, Optional
 import json
 
+log = get_logger(__name__)
+
 
 class WhatsAppTemplateSender:
-    """Send WhatsApp messages using Twilio Content Templates."""
+    """Send WhatsApp messages using Twilio Content Templates.
+    
+    The ``*_message`` builders return the template message without sending it
+    (None if its Content SID is not configured), for callers that deliver
+    messages themselves, e.g. app.notification_executor.
+    """
     
     def __init__(self):
         if not settings.TWILIO_ACCOUNT_SID or not settings.TWILIO_AUTH_TOKEN:
             raise Exception("Twilio credentials not configured")
         
-        self.client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
+        self.client = get_twilio_client()
     
-    def _normalize_phone(self, phone: str) -> str:
+    @staticmethod
+    def _normalize_phone(phone: str) -> str:
         """Normalize phone number to WhatsApp format."""
         # Remove all non-numeric characters
         phone = ''.join(filter(str.isdigit, phone))
@@ -31,8 +41,44 @@ class WhatsAppTemplateSender:
         
         return f"whatsapp:+{phone}"
     
-    def send_booking_pending(
-        self,
+    @staticmethod
+    def _template_message(template: str, setting: str, phone: str,
+                          content_variables: Dict[str, str]) -> Optional[WhatsAppMessage]:
+        content_sid = getattr(settings, setting)
+        if not content_sid:
+            log.warning("whatsapp.template_not_configured", template=template, setting=setting)
+            return None
+        return WhatsAppMessage(
+            to=WhatsAppTemplateSender._normalize_phone(phone),
+            from_=settings.TWILIO_WHATSAPP_NUMBER,
+            content_sid=content_sid,
+            content_variables=content_variables,
+            label=template,
+        )
+    
+    def _send(self, message: Optional[WhatsAppMessage]) -> Optional[str]:
+        """Send a built template message. Returns the message SID, or None."""
+        if message is None:
+            return None
+        
+        # Waits for a send token; raises RateLimitExceeded past the allowed wait
+        rate_limiter.acquire("twilio_whatsapp", settings.TWILIO_WHATSAPP_NUMBER)
+        
+        try:
+            log.debug("whatsapp.template_request", template=message.label, to=message.to,
+                      variables=message.content_variables)
+            
+            sent = self.client.messages.create(**message.create_kwargs())
+            
+            log.info("whatsapp.template_sent", template=message.label, to=message.to, sid=sent.sid)
+            return sent.sid
+            
+        except Exception as e:
+            log.error("whatsapp.template_failed", template=message.label, to=message.to, error=str(e))
+            return None
+    
+    @staticmethod
+    def booking_pending_message(
         phone: str,
         booking_id: int,
         booking_date: str,
@@ -45,22 +91,16 @@ class WhatsAppTemplateSender:
         total_amount: str,
         gotra: str,
         mobile: str
-    ) -> Optional[str]:
+    ) -> Optional[WhatsAppMessage]:
         """
-        Send booking pending notification using template.
+        Booking pending notification.
         
         Template: booking_pending_notification
         Variables: {{1}} to {{11}}
         """
-        if not settings.WHATSAPP_TEMPLATE_BOOKING_PENDING:
-            print("⚠️ WHATSAPP_TEMPLATE_BOOKING_PENDING not configured")
-            return None
-        
-        try:
-            to_number = self._normalize_phone(phone)
-            
-            # Build template variables
-            content_variables = {
+        return WhatsAppTemplateSender._template_message(
+            "booking_pending_notification", "WHATSAPP_TEMPLATE_BOOKING_PENDING", phone,
+            {
                 "1": str(booking_id),
                 "2": booking_date,
                 "3": puja_name,
@@ -73,27 +113,10 @@ class WhatsAppTemplateSender:
                 "10": gotra,
                 "11": mobile
             }
-            
-            print(f"📤 Sending WhatsApp Template: booking_pending_notification")
-            print(f"   To: {to_number}")
-            print(f"   Variables: {content_variables}")
-            
-            message = self.client.messages.create(
-                from_=settings.TWILIO_WHATSAPP_NUMBER,
-                to=to_number,
-                content_sid=settings.WHATSAPP_TEMPLATE_BOOKING_PENDING,
-                content_variables=json.dumps(content_variables)
-            )
-            
-            print(f"✅ WhatsApp sent! SID: {message.sid}")
-            return message.sid
-            
-        except Exception as e:
-            print(f"❌ WhatsApp template send failed: {e}")
-            return None
+        )
     
-    def send_booking_confirmed(
-        self,
+    @staticmethod
+    def booking_confirmed_message(
         phone: str,
         booking_id: int,
         puja_name: str,
@@ -102,21 +125,16 @@ class WhatsAppTemplateSender:
         puja_date: str,
         puja_time: str,
         total_amount: str
-    ) -> Optional[str]:
+    ) -> Optional[WhatsAppMessage]:
         """
-        Send booking confirmed notification using template.
+        Booking confirmed notification.
         
         Template: booking_confirmed_notification
         Variables: {{1}} to {{7}}
         """
-        if not settings.WHATSAPP_TEMPLATE_BOOKING_CONFIRMED:
-            print("⚠️ WHATSAPP_TEMPLATE_BOOKING_CONFIRMED not configured")
-            return None
-        
-        try:
-            to_number = self._normalize_phone(phone)
-            
-            content_variables = {
+        return WhatsAppTemplateSender._template_message(
+            "booking_confirmed_notification", "WHATSAPP_TEMPLATE_BOOKING_CONFIRMED", phone,
+            {
                 "1": str(booking_id),
                 "2": puja_name,
                 "3": plan_name,
@@ -125,26 +143,10 @@ class WhatsAppTemplateSender:
                 "6": puja_time,
                 "7": total_amount
             }
-            
-            print(f"📤 Sending WhatsApp Template: booking_confirmed_notification")
-            print(f"   To: {to_number}")
-            
-            message = self.client.messages.create(
-                from_=settings.TWILIO_WHATSAPP_NUMBER,
-                to=to_number,
-                content_sid=settings.WHATSAPP_TEMPLATE_BOOKING_CONFIRMED,
-                content_variables=json.dumps(content_variables)
-            )
-            
-            print(f"✅ WhatsApp sent! SID: {message.sid}")
-            return message.sid
-            
-        except Exception as e:
-            print(f"❌ WhatsApp template send failed: {e}")
-            return None
+        )
     
-    def send_temple_booking(
-        self,
+    @staticmethod
+    def temple_booking_message(
         phone: str,
         booking_id: int,
         status: str,
@@ -154,21 +156,16 @@ class WhatsAppTemplateSender:
         total_amount: str,
         gotra: str,
         mobile: str
-    ) -> Optional[str]:
+    ) -> Optional[WhatsAppMessage]:
         """
-        Send temple booking notification using template.
+        Temple booking notification.
         
         Template: temple_booking_notification
         Variables: {{1}} to {{8}}
         """
-        if not settings.WHATSAPP_TEMPLATE_TEMPLE_BOOKING:
-            print("⚠️ WHATSAPP_TEMPLATE_TEMPLE_BOOKING not configured")
-            return None
-        
-        try:
-            to_number = self._normalize_phone(phone)
-            
-            content_variables = {
+        return WhatsAppTemplateSender._template_message(
+            "temple_booking_notification", "WHATSAPP_TEMPLATE_TEMPLE_BOOKING", phone,
+            {
                 "1": str(booking_id),
                 "2": status,
                 "3": booking_date,
@@ -178,23 +175,19 @@ class WhatsAppTemplateSender:
                 "7": gotra,
                 "8": mobile
             }
-            
-            print(f"📤 Sending WhatsApp Template: temple_booking_notification")
-            print(f"   To: {to_number}")
-            
-            message = self.client.messages.create(
-                from_=settings.TWILIO_WHATSAPP_NUMBER,
-                to=to_number,
-                content_sid=settings.WHATSAPP_TEMPLATE_TEMPLE_BOOKING,
-                content_variables=json.dumps(content_variables)
-            )
-            
-            print(f"✅ WhatsApp sent! SID: {message.sid}")
-            return message.sid
-            
-        except Exception as e:
-            print(f"❌ WhatsApp template send failed: {e}")
-            return None
+        )
+    
+    def send_booking_pending(self, **kwargs) -> Optional[str]:
+        """Send the booking pending template; see booking_pending_message for the arguments."""
+        return self._send(self.booking_pending_message(**kwargs))
+    
+    def send_booking_confirmed(self, **kwargs) -> Optional[str]:
+        """Send the booking confirmed template; see booking_confirmed_message for the arguments."""
+        return self._send(self.booking_confirmed_message(**kwargs))
+    
+    def send_temple_booking(self, **kwargs) -> Optional[str]:
+        """Send the temple booking template; see temple_booking_message for the arguments."""
+        return self._send(self.temple_booking_message(**kwargs))
 
 
 # Test function